@@ -0,0 +1,370 @@
+"""BM25インデックスのベンチマーク.
+
+合成した日本語コーパスに対して以下を計測する。
+
+- ingest: 取り込み直後の最初の検索にかかる時間を、旧実装（rank_bm25でコーパス全体を
+  再構築）と現行実装（差分更新）で比較する
+- query: 構築済みインデックスでの検索レイテンシ（p50/p95）をスコアリング方式ごとに比較する
+- tokenize: 一括構築時のトークン化時間を、逐次処理・プロセスプール・トークンキャッシュ
+  （内容が変わっていない再構築）で比較する
+- memory: インデックスが保持するメモリ量（1チャンクあたり）と、ソースURL指定の削除時間を
+  本文を保持する場合と保持しない場合（text_loader 指定）で比較する
+- segments: メモリ上のインデックスとセグメント型（segment_dir 指定）で、コーパスの大きさ
+  ごとの常駐メモリ量（Pythonヒープ、メモリマップしたページは含まない）と検索レイテンシを比較する
+
+使い方:
+    python scripts/bench_bm25.py ingest [--docs 5000] [--batch 20] [--rounds 5]
+    python scripts/bench_bm25.py query [--docs 100000] [--queries 200] [--n-results 60]
+    python scripts/bench_bm25.py tokenize [--docs 20000] [--workers 1 2 4]
+    python scripts/bench_bm25.py memory [--docs 20000] [--scoring sparse postings]
+    python scripts/bench_bm25.py segments [--docs 5000 20000] [--queries 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, ".")
+
+from src.rag.bm25_index import BM25Index, BM25ScoringMode, tokenize_japanese
+from src.rag.tokenizer_pool import TokenCache, TokenizerPool
+
+_NOUNS = [
+    "勇者", "魔王", "ドラゴン", "スライム", "城", "王様", "呪文", "剣", "盾", "宝箱",
+    "洞窟", "村", "町", "船", "鍵", "地図", "薬草", "経験値", "ゴールド", "レベル",
+    "パーティ", "仲間", "武器", "防具", "装備", "魔法", "回復", "攻撃", "守備", "素早さ",
+    "ボス", "モンスター", "ダンジョン", "塔", "神殿", "砂漠", "森", "山", "海", "空",
+]
+_VERBS = ["倒す", "探す", "集める", "覚える", "使う", "守る", "進む", "戦う", "調べる", "買う"]
+_ADJECTIVES = ["強い", "弱い", "大きい", "古い", "新しい", "暗い", "高い", "速い"]
+
+
+def make_japanese_corpus(n_docs: int, seed: int = 42) -> list[tuple[str, str, str]]:
+    """合成した日本語ドキュメントを (id, text, source_url) のリストで返す."""
+    rng = random.Random(seed)
+    docs: list[tuple[str, str, str]] = []
+    for i in range(n_docs):
+        sentences = []
+        for _ in range(rng.randint(3, 8)):
+            # 型番のような数字はZipf分布にして、頻出語と希少語が混在する語彙にする
+            sentences.append(
+                f"{rng.choice(_ADJECTIVES)}{rng.choice(_NOUNS)}は"
+                f"{rng.choice(_NOUNS)}{_zipf_id(rng)}で{rng.choice(_NOUNS)}を{rng.choice(_VERBS)}。"
+            )
+        docs.append((f"doc{i}", "".join(sentences), f"https://example.com/page{i // 20}"))
+    return docs
+
+
+def _zipf_id(rng: random.Random, vocab_size: int = 50000) -> int:
+    """1〜vocab_size のZipf分布（指数1）に従う整数を返す."""
+    return min(int(vocab_size ** rng.random()), vocab_size)
+
+
+def make_queries(n_queries: int, seed: int = 7) -> list[str]:
+    """合成クエリを返す."""
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(_NOUNS)}{_zipf_id(rng)}の{rng.choice(_NOUNS)}を{rng.choice(_VERBS)}"
+        for _ in range(n_queries)
+    ]
+
+
+def bench_rank_bm25(
+    base: list[tuple[str, str, str]],
+    batches: list[list[tuple[str, str, str]]],
+    query: str,
+) -> list[float]:
+    """旧実装: 取り込みのたびに全体を再トークン化してBM25Okapiを再構築する."""
+    from rank_bm25 import BM25Okapi
+
+    documents = {doc_id: text for doc_id, text, _ in base}
+    timings: list[float] = []
+    for batch in batches:
+        documents.update({doc_id: text for doc_id, text, _ in batch})
+        started = time.perf_counter()
+        doc_ids = list(documents.keys())
+        corpus = [tokenize_japanese(documents[doc_id]) for doc_id in doc_ids]
+        bm25 = BM25Okapi(corpus)
+        scores = bm25.get_scores(tokenize_japanese(query))
+        scored = [(doc_ids[i], s) for i, s in enumerate(scores) if s > 0]
+        scored.sort(key=lambda x: x[1], reverse=True)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def bench_native(
+    base: list[tuple[str, str, str]],
+    batches: list[list[tuple[str, str, str]]],
+    query: str,
+) -> list[float]:
+    """現行実装: 差分追加後にそのまま検索する."""
+    index = BM25Index()
+    index.add_documents(base)
+    index.search(query)
+    timings: list[float] = []
+    for batch in batches:
+        started = time.perf_counter()
+        index.add_documents(batch)
+        index.search(query)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def bench_query_latency(
+    docs: list[tuple[str, str, str]],
+    queries: list[str],
+    n_results: int,
+    scoring: BM25ScoringMode,
+) -> list[float]:
+    """構築済みインデックスでの検索レイテンシを計測する."""
+    tokenized = [tokenize_japanese(text) for _, text, _ in docs]
+    index = BM25Index(scoring=scoring)
+    index.add_documents(docs, tokenized=tokenized)
+    # 初回のIDF・文書長正規化項の計算を計測対象から除外する
+    index.search(queries[0], n_results=n_results)
+
+    timings: list[float] = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query, n_results=n_results)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def run_ingest(args: argparse.Namespace) -> None:
+    """取り込み直後の検索時間を比較する."""
+    corpus = make_japanese_corpus(args.docs + args.batch * args.rounds)
+    base = corpus[: args.docs]
+    rest = corpus[args.docs:]
+    batches = [rest[i : i + args.batch] for i in range(0, len(rest), args.batch)]
+    query = make_queries(1)[0]
+
+    # トークナイザの初期化コストを計測対象から除外する
+    tokenize_japanese(query)
+
+    print(f"=== BM25 取り込み直後の検索 (docs={args.docs}, batch={args.batch}) ===")
+    benches = (
+        ("rank_bm25 (full rebuild)", bench_rank_bm25),
+        ("native (incremental)", bench_native),
+    )
+    for name, bench in benches:
+        tokenize_japanese.cache_clear()
+        timings = bench(base, batches, query)
+        print(
+            f"{name:<26} median={statistics.median(timings) * 1000:9.2f} ms  "
+            f"max={max(timings) * 1000:9.2f} ms"
+        )
+
+
+def run_query(args: argparse.Namespace) -> None:
+    """スコアリング方式ごとの検索レイテンシを比較する."""
+    docs = make_japanese_corpus(args.docs)
+    queries = make_queries(args.queries)
+
+    print(
+        f"=== BM25 検索レイテンシ (docs={args.docs}, queries={args.queries}, "
+        f"n_results={args.n_results}) ==="
+    )
+    for scoring in args.scoring:
+        timings = sorted(bench_query_latency(docs, queries, args.n_results, scoring))
+        p50 = timings[len(timings) // 2]
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(f"{scoring:<10} p50={p50 * 1000:8.3f} ms  p95={p95 * 1000:8.3f} ms")
+
+
+async def _bench_tokenizer_pool(texts: list[str], workers: int, chunk_size: int) -> None:
+    """プロセスプールでのコールド構築とキャッシュ済み再構築の時間を計測する."""
+    pool = TokenizerPool(max_workers=workers, chunk_size=chunk_size, cache=TokenCache())
+    try:
+        # ワーカープロセスの起動コストを計測対象から除外する
+        await pool.tokenize(make_queries(chunk_size * workers + 1, seed=99))
+
+        started = time.perf_counter()
+        await pool.tokenize(texts)
+        cold = time.perf_counter() - started
+
+        started = time.perf_counter()
+        await pool.tokenize(texts)
+        cached = time.perf_counter() - started
+    finally:
+        pool.shutdown()
+
+    print(f"pool (workers={workers:<2})        cold={cold:8.2f} s  cached={cached:8.3f} s")
+
+
+def run_tokenize(args: argparse.Namespace) -> None:
+    """一括構築時のトークン化時間を比較する."""
+    texts = [text for _, text, _ in make_japanese_corpus(args.docs)]
+    tokenize_japanese("ウォームアップ")
+
+    print(
+        f"=== BM25 一括構築のトークン化 (docs={args.docs}, cpu_count={os.cpu_count()}) ==="
+    )
+    tokenize_japanese.cache_clear()
+    started = time.perf_counter()
+    for text in texts:
+        tokenize_japanese(text)
+    print(f"serial                   cold={time.perf_counter() - started:8.2f} s")
+
+    for workers in args.workers:
+        asyncio.run(_bench_tokenizer_pool(texts, workers, args.chunk_size))
+
+
+def bench_memory(n_docs: int, scoring: BM25ScoringMode, keep_text: bool) -> None:
+    """インデックスの保持メモリ量と削除時間を計測する."""
+    gc.collect()
+    tracemalloc.start()
+    index = BM25Index(scoring=scoring, text_loader=None if keep_text else (lambda ids: {}))
+    # 本文・トークン列はバッチごとに生成して捨て、インデックスが保持する分だけを計測する
+    for start in range(0, n_docs, 500):
+        batch = [
+            (f"doc{i}", text, f"https://example.com/page{i // 20}")
+            for i, (_, text, _) in enumerate(
+                make_japanese_corpus(min(500, n_docs - start), seed=start), start=start
+            )
+        ]
+        index.add_documents(batch, tokenized=[tokenize_japanese(text) for _, text, _ in batch])
+        tokenize_japanese.cache_clear()
+        del batch
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    sources = [f"https://example.com/page{i}" for i in range(0, n_docs // 20, 50)]
+    started = time.perf_counter()
+    for source_url in sources:
+        index.delete_by_source(source_url)
+    delete_ms = (time.perf_counter() - started) * 1000 / max(1, len(sources))
+
+    label = f"{scoring} ({'with text' if keep_text else 'text_loader'})"
+    print(f"{label:<26} {current / n_docs:8.0f} B/chunk  delete_by_source={delete_ms:7.2f} ms")
+
+
+def run_memory(args: argparse.Namespace) -> None:
+    """インデックスの保持メモリ量と削除時間を比較する."""
+    print(f"=== BM25 インデックスのメモリ量 (docs={args.docs}) ===")
+    for scoring in args.scoring:
+        for keep_text in (True, False):
+            bench_memory(args.docs, scoring, keep_text)
+
+
+def _build_measured(
+    n_docs: int, segment_dir: str | None
+) -> tuple[BM25Index, int]:
+    """バッチごとに追加してインデックスを構築し、保持しているPythonヒープ量を返す."""
+    gc.collect()
+    tracemalloc.start()
+    index = BM25Index(
+        text_loader=lambda ids: {}, segment_dir=segment_dir, segment_buffer_size=2000
+    )
+    for start in range(0, n_docs, 500):
+        batch = [
+            (f"doc{i}", text, f"https://example.com/page{i // 20}")
+            for i, (_, text, _) in enumerate(
+                make_japanese_corpus(min(500, n_docs - start), seed=start), start=start
+            )
+        ]
+        index.add_documents(batch, tokenized=[tokenize_japanese(text) for _, text, _ in batch])
+        tokenize_japanese.cache_clear()
+        del batch
+    index.close()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return index, current
+
+
+def run_segments(args: argparse.Namespace) -> None:
+    """メモリ上のインデックスとセグメント型の常駐メモリ量・検索レイテンシを比較する."""
+    queries = make_queries(args.queries)
+    print("=== BM25 セグメント型ストレージ (text_loader 指定、本文は保持しない) ===")
+    for n_docs in args.docs:
+        with tempfile.TemporaryDirectory() as segment_dir:
+            for label, directory in (("memory", None), ("segmented", segment_dir)):
+                index, resident = _build_measured(n_docs, directory)
+                index.search(queries[0], n_results=args.n_results)
+                timings = []
+                for query in queries:
+                    started = time.perf_counter()
+                    index.search(query, n_results=args.n_results)
+                    timings.append(time.perf_counter() - started)
+                timings.sort()
+                print(
+                    f"docs={n_docs:<7} {label:<10} resident={resident / 1024 / 1024:8.2f} MiB  "
+                    f"p50={timings[len(timings) // 2] * 1000:7.2f} ms"
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="BM25インデックスのベンチマーク")
+    subparsers = parser.add_subparsers(dest="scenario", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="取り込み直後の検索時間を比較")
+    ingest_parser.add_argument(
+        "--docs", type=int, default=5000, help="初期コーパスのドキュメント数"
+    )
+    ingest_parser.add_argument("--batch", type=int, default=20, help="1回の取り込みドキュメント数")
+    ingest_parser.add_argument("--rounds", type=int, default=5, help="取り込み→検索の繰り返し回数")
+
+    query_parser = subparsers.add_parser("query", help="検索レイテンシを比較")
+    query_parser.add_argument("--docs", type=int, default=100000, help="コーパスのドキュメント数")
+    query_parser.add_argument("--queries", type=int, default=200, help="計測するクエリ数")
+    query_parser.add_argument("--n-results", type=int, default=60, help="取得件数")
+    query_parser.add_argument(
+        "--scoring",
+        nargs="+",
+        default=["postings", "sparse", "maxscore"],
+        choices=["postings", "sparse", "maxscore"],
+        help="比較するスコアリング方式",
+    )
+
+    tokenize_parser = subparsers.add_parser("tokenize", help="一括構築のトークン化時間を比較")
+    tokenize_parser.add_argument("--docs", type=int, default=20000, help="コーパスのドキュメント数")
+    tokenize_parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4], help="比較するワーカー数"
+    )
+    tokenize_parser.add_argument("--chunk-size", type=int, default=200, help="チャンクサイズ")
+
+    memory_parser = subparsers.add_parser("memory", help="インデックスのメモリ量を比較")
+    memory_parser.add_argument("--docs", type=int, default=20000, help="コーパスのドキュメント数")
+    memory_parser.add_argument(
+        "--scoring",
+        nargs="+",
+        default=["sparse", "postings"],
+        choices=["postings", "sparse", "maxscore"],
+        help="比較するスコアリング方式",
+    )
+
+    segments_parser = subparsers.add_parser(
+        "segments", help="メモリ上とセグメント型の常駐メモリ量を比較"
+    )
+    segments_parser.add_argument(
+        "--docs", type=int, nargs="+", default=[5000, 20000], help="コーパスのドキュメント数"
+    )
+    segments_parser.add_argument("--queries", type=int, default=200, help="計測するクエリ数")
+    segments_parser.add_argument("--n-results", type=int, default=60, help="取得件数")
+
+    args = parser.parse_args()
+    if args.scenario == "ingest":
+        run_ingest(args)
+    elif args.scenario == "query":
+        run_query(args)
+    elif args.scenario == "tokenize":
+        run_tokenize(args)
+    elif args.scenario == "segments":
+        run_segments(args)
+    else:
+        run_memory(args)
+
+
+if __name__ == "__main__":
+    main()
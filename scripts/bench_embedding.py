@@ -0,0 +1,123 @@
+"""Embeddingのベンチマーク.
+
+LM Studioのように1リクエストずつ処理し、リクエストごとの固定コストが大きいバックエンドを
+模したプロバイダーに対して以下を計測する。
+
+- microbatch: 並行するチャットのクエリEmbedding（1件ずつの embed() 呼び出し）を、
+  そのまま送る場合とマイクロバッチ（MicroBatchingEmbedding）でまとめる場合とで、
+  スループット・レイテンシ（p50/p95）・バックエンドへのリクエスト数を比較する
+
+使い方:
+    python scripts/bench_embedding.py microbatch [--clients 1 8 32] [--queries 20]
+        [--request-ms 20] [--item-ms 0.5] [--wait-ms 2 5] [--batch-size 32]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from src.embedding.base import EmbeddingProvider
+from src.embedding.micro_batching import MicroBatchingEmbedding
+
+
+class SimulatedBackend(EmbeddingProvider):
+    """リクエストを1件ずつ処理する（固定コスト + テキスト数に比例するコスト）バックエンド."""
+
+    def __init__(self, request_sec: float, item_sec: float) -> None:
+        self._request_sec = request_sec
+        self._item_sec = item_sec
+        self._lock = asyncio.Lock()
+        self.requests = 0
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        async with self._lock:
+            self.requests += 1
+            await asyncio.sleep(self._request_sec + self._item_sec * len(texts))
+        return [[float(len(text)), 0.0, 1.0] for text in texts]
+
+    async def is_available(self) -> bool:
+        return True
+
+
+async def _run_clients(
+    provider: EmbeddingProvider, n_clients: int, n_queries: int
+) -> tuple[float, list[float]]:
+    """n_clients 件の呼び出し元がそれぞれ n_queries 件のクエリを順に埋め込む."""
+    latencies: list[float] = []
+
+    async def client(client_id: int) -> None:
+        for i in range(n_queries):
+            started = time.perf_counter()
+            await provider.embed([f"client{client_id} の質問 {i}"])
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(c) for c in range(n_clients)))
+    return time.perf_counter() - started, latencies
+
+
+def _report(label: str, elapsed: float, latencies: list[float], requests: int) -> None:
+    quantiles = statistics.quantiles(latencies, n=20) if len(latencies) > 1 else latencies * 19
+    print(
+        f"{label:<28} {len(latencies) / elapsed:8.1f} q/s  "
+        f"p50={statistics.median(latencies) * 1000:7.1f} ms  "
+        f"p95={quantiles[18] * 1000:7.1f} ms  requests={requests}"
+    )
+
+
+async def run_microbatch(args: argparse.Namespace) -> None:
+    print(
+        f"=== クエリEmbeddingのマイクロバッチ (request={args.request_ms} ms, "
+        f"item={args.item_ms} ms, queries/client={args.queries}) ==="
+    )
+    for n_clients in args.clients:
+        print(f"--- clients={n_clients}")
+        backend = SimulatedBackend(args.request_ms / 1000, args.item_ms / 1000)
+        elapsed, latencies = await _run_clients(backend, n_clients, args.queries)
+        _report("direct", elapsed, latencies, backend.requests)
+
+        for wait_ms in args.wait_ms:
+            backend = SimulatedBackend(args.request_ms / 1000, args.item_ms / 1000)
+            provider = MicroBatchingEmbedding(
+                backend, max_wait_sec=wait_ms / 1000, max_batch_size=args.batch_size
+            )
+            elapsed, latencies = await _run_clients(provider, n_clients, args.queries)
+            _report(f"micro-batch (wait={wait_ms} ms)", elapsed, latencies, backend.requests)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Embeddingのベンチマーク")
+    subparsers = parser.add_subparsers(dest="scenario", required=True)
+
+    microbatch_parser = subparsers.add_parser(
+        "microbatch", help="クエリEmbeddingのマイクロバッチの効果を比較"
+    )
+    microbatch_parser.add_argument(
+        "--clients", type=int, nargs="+", default=[1, 8, 32], help="並行する呼び出し元の数"
+    )
+    microbatch_parser.add_argument(
+        "--queries", type=int, default=20, help="呼び出し元ごとのクエリ数"
+    )
+    microbatch_parser.add_argument(
+        "--request-ms", type=float, default=20.0, help="バックエンドの1リクエストの固定コスト"
+    )
+    microbatch_parser.add_argument(
+        "--item-ms", type=float, default=0.5, help="バックエンドのテキスト1件あたりのコスト"
+    )
+    microbatch_parser.add_argument(
+        "--wait-ms", type=float, nargs="+", default=[2.0, 5.0], help="比較する待ち時間"
+    )
+    microbatch_parser.add_argument("--batch-size", type=int, default=32, help="最大バッチサイズ")
+
+    args = parser.parse_args()
+    asyncio.run(run_microbatch(args))
+
+
+if __name__ == "__main__":
+    main()
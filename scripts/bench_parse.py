@@ -0,0 +1,150 @@
+"""HTML解析・チャンク分割のベンチマーク.
+
+合成したHTMLページを本文抽出 → スマートチャンキングしながら、イベントループの遅延
+（一定間隔で起床するタスクの予定時刻からの遅れ）を計測する。
+
+- lag: イベントループ上で直接処理する旧実装と、ParsePool（スレッド / プロセスプール）で
+  処理する現行実装とで、全ページの処理時間とイベントループの遅延（p50/p99/最大）を比較する。
+  lxml がインストールされている場合は html.parser と lxml の両方で計測する
+
+使い方:
+    python scripts/bench_parse.py lag [--pages 200] [--sections 200] [--workers 1 4]
+        [--concurrency 8]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.util
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+
+sys.path.insert(0, ".")
+
+from src.rag.chunker import smart_chunk
+from src.rag.parse_pool import ParsePool
+from src.services.web_crawler import extract_text
+
+_TICK_SEC = 0.005
+
+
+def build_page(index: int, sections: int) -> str:
+    """見出し・段落・表を含む合成HTMLページを作成する."""
+    body = []
+    for i in range(sections):
+        body.append(f"<h2>セクション {index}-{i}</h2>")
+        body.append(
+            f"<p>これはページ{index}のセクション{i}の本文です。"
+            "RAGはベクトル検索とBM25でナレッジを検索します。" * 3 + "</p>"
+        )
+        if i % 10 == 0:
+            rows = "".join(f"<tr><td>項目{j}</td><td>{j * i}</td></tr>" for j in range(5))
+            body.append(f"<table>{rows}</table>")
+    return (
+        f"<html><head><title>ページ{index}</title><script>var x = {index};</script></head>"
+        f"<body><nav>メニュー</nav><article>{''.join(body)}</article></body></html>"
+    )
+
+
+async def _measure_lag(stop: asyncio.Event, lags: list[float]) -> None:
+    """_TICK_SEC ごとに起床し、予定時刻からの遅れを記録する."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + _TICK_SEC
+        await asyncio.sleep(_TICK_SEC)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def _run(
+    pages: list[str], concurrency: int, parse: Callable[[str], Awaitable[list[str]]]
+) -> tuple[float, list[float]]:
+    """全ページを concurrency 件ずつ並行して処理し、処理時間と遅延を返す."""
+    lags: list[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_measure_lag(stop, lags))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def process(html: str) -> None:
+        async with semaphore:
+            await parse(html)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(process(html) for html in pages))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    return elapsed, lags
+
+
+def _report(label: str, elapsed: float, lags: list[float]) -> None:
+    p99 = statistics.quantiles(lags, n=100)[98] if len(lags) >= 2 else max(lags)
+    print(
+        f"{label:<28} total={elapsed:7.2f} s  "
+        f"lag p50={statistics.median(lags) * 1000:7.1f} ms  "
+        f"p99={p99 * 1000:7.1f} ms  max={max(lags) * 1000:7.1f} ms"
+    )
+
+
+async def run_lag(args: argparse.Namespace) -> None:
+    pages = [build_page(i, args.sections) for i in range(args.pages)]
+    size_kb = sum(len(html.encode()) for html in pages) / len(pages) / 1024
+    print(
+        f"=== イベントループ遅延 (pages={args.pages}, 平均 {size_kb:.0f} KB/page, "
+        f"concurrency={args.concurrency}, tick={_TICK_SEC * 1000:.0f} ms) ==="
+    )
+    parsers = ["html.parser"]
+    if importlib.util.find_spec("lxml") is not None:
+        parsers.append("lxml")
+    else:
+        print("（lxml が未インストールのため html.parser のみ計測）")
+
+    for parser in parsers:
+        print(f"--- parser={parser}")
+
+        async def inline(html: str, parser: str = parser) -> list[str]:
+            # 旧実装: イベントループ上で直接処理する
+            _, text = extract_text(html, parser)
+            return smart_chunk(text, 500, 50)
+
+        elapsed, lags = await _run(pages, args.concurrency, inline)
+        _report("event loop (旧実装)", elapsed, lags)
+
+        for workers in args.workers:
+            pool = ParsePool(max_workers=workers, html_parser=parser)  # type: ignore[arg-type]
+
+            async def pooled(html: str, pool: ParsePool = pool) -> list[str]:
+                _, text = await pool.extract_text(html)
+                return await pool.smart_chunk(text, 500, 50)
+
+            try:
+                # プロセスの起動を計測から除く
+                await pooled(pages[0])
+                elapsed, lags = await _run(pages, args.concurrency, pooled)
+            finally:
+                pool.shutdown()
+            label = "ParsePool thread" if workers == 1 else f"ParsePool workers={workers}"
+            _report(label, elapsed, lags)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HTML解析・チャンク分割のベンチマーク")
+    subparsers = parser.add_subparsers(dest="scenario", required=True)
+
+    lag_parser = subparsers.add_parser("lag", help="処理中のイベントループの遅延を比較")
+    lag_parser.add_argument("--pages", type=int, default=200, help="処理するページ数")
+    lag_parser.add_argument("--sections", type=int, default=200, help="1ページのセクション数")
+    lag_parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 4], help="ParsePoolのワーカー数（1=スレッド）"
+    )
+    lag_parser.add_argument("--concurrency", type=int, default=8, help="同時に処理するページ数")
+
+    args = parser.parse_args()
+    if args.scenario == "lag":
+        asyncio.run(run_lag(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""ベクトルストアのベンチマーク.
+
+合成ベクトルを保存した永続化ベクトルストアに対して以下を計測する。
+
+- search: 検索1回あたりのレイテンシ（p50/p95）を、検索ごとに別スレッドで count() を
+  呼んでから検索する旧実装と、書き込み時に差分更新したチャンク数を使う現行実装とで比較する
+- backends: ChromaDB（HNSW）とフラットベクトル（総当たり）の各バックエンドについて、
+  保存時間・検索レイテンシ（p50/p95）・ディスク使用量と、総当たりの結果に対する
+  ChromaDBの再現率（recall@k）を比較する
+
+使い方:
+    python scripts/bench_vector_store.py search [--docs 1000 20000] [--queries 200] [--dim 384]
+    python scripts/bench_vector_store.py backends [--docs 10000 50000] [--queries 200]
+        [--dim 384] [--k 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, ".")
+
+from chromadb.api.types import IncludeEnum
+
+from src.embedding.base import EmbeddingProvider
+from src.rag.vector_store import DocumentChunk, VectorStore
+
+
+class HashEmbedding(EmbeddingProvider):
+    """テキストのハッシュから決定的な乱数ベクトルを作るプロバイダー（通信しない）."""
+
+    def __init__(self, dim: int) -> None:
+        self._dim = dim
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        vectors = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "big")
+            rng = random.Random(seed)
+            vectors.append([rng.gauss(0.0, 1.0) for _ in range(self._dim)])
+        return vectors
+
+    async def is_available(self) -> bool:
+        return True
+
+
+async def build_store(
+    path: str, n_docs: int, dim: int, flat: bool = False
+) -> VectorStore:
+    """n_docs 件の合成チャンクを保存したベクトルストアを作成する."""
+    store = VectorStore(
+        HashEmbedding(dim),
+        persist_directory=path,
+        embed_batch_size=500,
+        flat_dir=path if flat else None,
+    )
+    chunks = [
+        DocumentChunk(
+            id=f"doc{i}",
+            text=f"合成ドキュメント {i}",
+            metadata={"source_url": f"https://example.com/page{i // 20}", "chunk_index": i % 20},
+        )
+        for i in range(n_docs)
+    ]
+    for start in range(0, n_docs, 5000):
+        await store.add_documents(chunks[start:start + 5000])
+    return store
+
+
+async def _legacy_search(store: VectorStore, query: str, n_results: int) -> None:
+    """旧実装: 検索ごとに count() を別スレッドで呼んでから検索する."""
+    query_embeddings = await store._embedding.embed([query])
+    collection_count = await asyncio.to_thread(store._collection.count)
+    await asyncio.to_thread(
+        store._collection.query,
+        query_embeddings=query_embeddings,  # type: ignore[arg-type]
+        n_results=min(n_results, collection_count),
+        include=[IncludeEnum.documents, IncludeEnum.metadatas, IncludeEnum.distances],
+    )
+
+
+async def _measure(search: object, queries: list[str]) -> list[float]:
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        await search(query)  # type: ignore[operator]
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def _report(label: str, latencies: list[float]) -> None:
+    p95 = statistics.quantiles(latencies, n=20)[18]
+    print(
+        f"{label:<22} p50={statistics.median(latencies) * 1000:8.3f} ms  "
+        f"p95={p95 * 1000:8.3f} ms"
+    )
+
+
+async def run_search(args: argparse.Namespace) -> None:
+    print(f"=== 検索レイテンシ (queries={args.queries}, dim={args.dim}, n_results=5) ===")
+    queries = [f"質問 {i}" for i in range(args.queries)]
+    for n_docs in args.docs:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = await build_store(tmp, n_docs, args.dim)
+            # 初回の件数取得・HNSWインデックスの読み込みを計測から除く
+            await store.search("warm up")
+
+            legacy = await _measure(lambda q, store=store: _legacy_search(store, q, 5), queries)
+            cached = await _measure(lambda q, store=store: store.search(q, n_results=5), queries)
+            print(f"--- docs={n_docs}")
+            _report("count() per query", legacy)
+            _report("cached count", cached)
+            saved = statistics.median(legacy) - statistics.median(cached)
+            print(f"{'saved per retrieval':<22} p50={saved * 1000:8.3f} ms")
+
+
+def _disk_usage(path: str) -> float:
+    """ディレクトリ配下のファイルサイズの合計（MB）."""
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file()) / 1e6
+
+
+async def run_backends(args: argparse.Namespace) -> None:
+    print(f"=== バックエンド比較 (queries={args.queries}, dim={args.dim}, k={args.k}) ===")
+    queries = [f"質問 {i}" for i in range(args.queries)]
+    for n_docs in args.docs:
+        print(f"--- docs={n_docs}")
+        top_ids: dict[str, list[list[str]]] = {}
+        for backend in ("chroma", "flat"):
+            with tempfile.TemporaryDirectory() as tmp:
+                started = time.perf_counter()
+                store = await build_store(tmp, n_docs, args.dim, flat=backend == "flat")
+                build_sec = time.perf_counter() - started
+                await store.search("warm up")
+
+                latencies = await _measure(
+                    lambda q, store=store: store.search(q, n_results=args.k), queries
+                )
+                # 合成チャンクの本文は一意なので、本文で検索結果を突き合わせる
+                top_ids[backend] = [
+                    [r.text for r in await store.search(q, n_results=args.k)] for q in queries
+                ]
+                print(f"{backend:<8} build={build_sec:7.2f} s  disk={_disk_usage(tmp):8.1f} MB")
+                _report(f"{backend} search", latencies)
+
+        hits = sum(
+            len(set(chroma) & set(flat))
+            for chroma, flat in zip(top_ids["chroma"], top_ids["flat"])
+        )
+        print(f"{'chroma recall@k':<22} {hits / (len(queries) * args.k):.3f} (flat = exact)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ベクトルストアのベンチマーク")
+    subparsers = parser.add_subparsers(dest="scenario", required=True)
+
+    search_parser = subparsers.add_parser("search", help="検索ごとの件数取得の有無を比較")
+    search_parser.add_argument(
+        "--docs", type=int, nargs="+", default=[1000, 20000], help="保存するチャンク数"
+    )
+    search_parser.add_argument("--queries", type=int, default=200, help="計測するクエリ数")
+    search_parser.add_argument("--dim", type=int, default=384, help="ベクトルの次元数")
+
+    backends_parser = subparsers.add_parser(
+        "backends", help="ChromaDBとフラットベクトルのバックエンドを比較"
+    )
+    backends_parser.add_argument(
+        "--docs", type=int, nargs="+", default=[10000, 50000], help="保存するチャンク数"
+    )
+    backends_parser.add_argument("--queries", type=int, default=200, help="計測するクエリ数")
+    backends_parser.add_argument("--dim", type=int, default=384, help="ベクトルの次元数")
+    backends_parser.add_argument("--k", type=int, default=5, help="検索結果の件数")
+
+    args = parser.parse_args()
+    if args.scenario == "search":
+        asyncio.run(run_search(args))
+    else:
+        asyncio.run(run_backends(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -80,6 +80,12 @@ class Settings(BaseSettings):
     # Thread History
     thread_history_limit: int = Field(default=20, ge=1, le=100)
 
+    # 外部HTTP接続（クローラー・OGP画像取得・Safe Browsing APIで共有するコネクションプール）
+    http_connection_limit: int = Field(default=100, ge=1)  # 全体の同時接続数
+    http_connection_limit_per_host: int = Field(default=8, ge=1)  # ホストごとの同時接続数
+    http_keepalive_timeout_sec: float = Field(default=30.0, gt=0.0)  # 接続を保持する秒数
+    http_dns_cache_ttl_sec: int = Field(default=300, ge=0)  # DNS解決結果のキャッシュ秒数
+
     # RAG / Embedding
     rag_enabled: bool = False
     embedding_provider: Literal["local", "online"] = "local"
@@ -89,9 +95,40 @@ class Settings(BaseSettings):
     rag_chunk_size: int = Field(default=500, ge=1)
     rag_chunk_overlap: int = Field(default=50, ge=0)
     rag_retrieval_count: int = Field(default=5, ge=1)
+    rag_retrieval_cache_size: int = Field(default=256, ge=0)  # 検索結果キャッシュ件数（0=無効）
+    rag_retrieval_cache_ttl_sec: float = Field(default=300.0, gt=0.0)  # 検索キャッシュ有効期間秒
+    rag_embedding_cache_path: str = "./embedding_cache.db"  # Embeddingキャッシュ（空で無効）
+    rag_embedding_cache_max_entries: int = Field(default=200000, ge=1)  # 保存する最大ベクトル数
+    rag_embedding_batch_size: int = Field(default=64, ge=1)  # 1リクエストの最大チャンク数
+    rag_embedding_batch_tokens: int = Field(default=8000, ge=1)  # 1リクエストの概算トークン上限
+    rag_embedding_concurrency: int = Field(default=2, ge=1)  # 同時Embeddingリクエスト数
+    rag_embedding_micro_batch_wait_ms: float = Field(default=5.0, ge=0.0)  # 待ち時間（0=無効）
+    rag_embedding_micro_batch_size: int = Field(default=32, ge=1)  # まとめる最大テキスト数
+    rag_source_registry_path: str = "./rag_sources.db"  # ソースURL台帳（空で無効）
+    rag_vector_count_refresh_sec: float = Field(default=300.0, ge=0.0)  # チャンク数の照合間隔秒
+    rag_vector_backend: Literal["chroma", "flat"] = "chroma"  # ベクトルの保持先
+    rag_flat_vector_dir: str = "./flat_vectors"  # flat時のベクトル・メタデータ保存先
+    rag_flat_vector_quantization: Literal["none", "int8", "binary"] = "none"  # 候補選択の量子化
+    rag_flat_vector_rerank_factor: int = Field(default=8, ge=1)  # 再スコアリングする候補の倍率
+    rag_hnsw_m: int = Field(default=16, ge=2)  # HNSWの各ノードのリンク数
+    rag_hnsw_construction_ef: int = Field(default=100, ge=1)  # HNSW構築時の探索幅
+    rag_hnsw_search_ef: int = Field(default=100, ge=1)  # HNSW検索時の探索幅
+    rag_hnsw_batch_size: int = Field(default=100, ge=3)  # HNSWへ反映するまでに溜める件数
+    rag_hnsw_sync_threshold: int = Field(default=1000, ge=3)  # HNSWをディスクへ書き出す件数
     rag_max_crawl_pages: int = Field(default=50, ge=1)
     rag_crawl_delay_sec: float = Field(default=1.0, ge=0)
+    rag_crawl_max_concurrent: int = Field(default=5, ge=1)  # 全ホスト合計の同時接続数
+    rag_crawl_respect_robots: bool = True  # robots.txt の Crawl-delay に従う
+    rag_crawl_max_delay_sec: float = Field(default=30.0, ge=0)  # Crawl-delay の上限秒数
     rag_crawl_progress_interval: int = Field(default=5, ge=1)  # 進捗報告間隔（ページ数）
+    rag_ingest_crawl_concurrency: int = Field(default=5, ge=1)  # 一括取り込みの同時クロール数
+    rag_ingest_chunk_concurrency: int = Field(default=2, ge=1)  # 同時にチャンク分割するページ数
+    rag_ingest_embed_concurrency: int = Field(default=2, ge=1)  # 同時にEmbeddingするページ数
+    rag_ingest_store_concurrency: int = Field(default=1, ge=1)  # 同時に保存するページ数
+    rag_ingest_queue_size: int = Field(default=8, ge=1)  # ステージ間で待機できるページ数
+    rag_parse_workers: int = Field(default=0, ge=0)  # 本文抽出・チャンク分割のプロセス数（0=CPU数）
+    rag_parse_queue_size: int = Field(default=0, ge=0)  # プロセスへの同時依頼数（0=プロセス数×2）
+    rag_html_parser: Literal["auto", "html.parser", "lxml"] = "auto"  # 本文抽出のパーサー
     rag_similarity_threshold: float | None = Field(default=None, ge=0.0, le=2.0)  # cosine距離閾値
 
     # RAG評価・デバッグ (Phase 1)
@@ -104,6 +141,17 @@ class Settings(BaseSettings):
     rag_bm25_k1: float = Field(default=1.5, gt=0.0)  # BM25の用語頻度パラメータ
     rag_bm25_b: float = Field(default=0.75, ge=0.0, le=1.0)  # BM25の文書長正規化パラメータ
     rag_rrf_k: int = Field(default=60, ge=1)  # RRFの定数
+    rag_hybrid_leg_timeout_sec: float = Field(default=0.0, ge=0.0)  # 各検索の締め切り（0=無制限）
+    rag_bm25_scoring: Literal["postings", "sparse", "maxscore"] = "sparse"  # BM25のスコアリング方式
+    rag_bm25_snapshot_path: str = "./bm25_snapshot.json"  # BM25スナップショット（空で永続化無効）
+    rag_bm25_snapshot_interval_sec: float = Field(default=30.0, ge=0.0)  # 保存間隔の最大秒数
+    rag_bm25_snapshot_max_pending: int = Field(default=50, ge=1)  # この変更数ですぐに保存
+    rag_bm25_tokenizer_workers: int = Field(default=0, ge=0)  # トークン化プロセス数（0=CPUコア数）
+    rag_bm25_token_cache_path: str = "./bm25_token_cache.db"  # トークンキャッシュ（空で無効）
+    rag_bm25_token_cache_size: int = Field(default=100000, ge=0)  # トークンキャッシュ件数（0=無効）
+    rag_bm25_backend: Literal["memory", "segmented"] = "memory"  # BM25コーパスの保持先
+    rag_bm25_segment_dir: str = "./bm25_segments"  # segmented時のセグメント保存先
+    rag_bm25_segment_buffer_size: int = Field(default=5000, ge=1)  # セグメント書き出し件数
 
     # Safe Browsing (URL安全性チェック)
     rag_url_safety_check: bool = False
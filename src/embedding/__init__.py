@@ -1,7 +1,11 @@
 from src.embedding.base import EmbeddingProvider
+from src.embedding.cached_embedding import CachedEmbedding
 from src.embedding.factory import get_embedding_provider
+from src.embedding.micro_batching import MicroBatchingEmbedding
 
 __all__ = [
+    "CachedEmbedding",
     "EmbeddingProvider",
+    "MicroBatchingEmbedding",
     "get_embedding_provider",
 ]
@@ -17,6 +17,14 @@ class EmbeddingProvider(abc.ABC):
     async def embed(self, texts: list[str]) -> list[list[float]]:
         """テキストリストをベクトルリストに変換する."""
 
+    async def embed_query(self, text: str) -> list[float]:
+        """検索クエリを1件ベクトルに変換する.
+
+        キャッシュを持つプロバイダーはクエリのベクトルを保存しない
+        （質問は繰り返されにくく、保存すると際限なく増えるため）。
+        """
+        return (await self.embed([text]))[0]
+
     @abc.abstractmethod
     async def is_available(self) -> bool:
         """プロバイダーが利用可能かチェックする."""
@@ -0,0 +1,200 @@
+"""永続Embeddingキャッシュ付きプロバイダー
+仕様: docs/specs/f9-rag.md
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.embedding.base import EmbeddingProvider
+
+logger = logging.getLogger(__name__)
+
+# SQLiteのプレースホルダ数の上限（古いバージョンの既定値999）を超えないように分割する
+_LOOKUP_BATCH_SIZE = 500
+
+
+class CachedEmbedding(EmbeddingProvider):
+    """モデル名 + sha256(テキスト) をキーにベクトルをSQLiteへ永続化するプロバイダー.
+
+    キャッシュに無いテキストのみを内側のプロバイダーに送り、結果を保存する。
+    ベクトルはfloat32で保存し、ヒット・ミスにかかわらずfloat32に丸めた値を返す
+    （キャッシュの有無で同じテキストのベクトルが変わらないようにするため）。
+    保存件数が max_entries を超えた場合は最後に使われた日時が古いものから削除する（LRU）。
+    検索クエリ（embed_query）は保存しない。
+
+    仕様: docs/specs/f9-rag.md
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        model: str,
+        path: str | Path,
+        max_entries: int = 200000,
+    ) -> None:
+        """CachedEmbeddingを初期化する.
+
+        Args:
+            provider: キャッシュミス時に使用するEmbeddingプロバイダー
+            model: キャッシュキーに含めるモデル識別子（モデルが変われば別のキーになる）
+            path: SQLiteデータベースファイルのパス
+            max_entries: 保存する最大ベクトル数（全モデルの合計）
+        """
+        self._provider = provider
+        self._model = model
+        self._max_entries = max(1, max_entries)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # 読み書きはスレッドで行うため、接続はロックで保護して共有する
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL,"
+                " text_hash BLOB NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " last_used REAL NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (model, text_hash)"
+                ") WITHOUT ROWID"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")}
+            if "last_used" not in columns:
+                # 最終利用日時の無い旧形式のキャッシュは、既存の行を最も古いものとして扱う
+                self._conn.execute(
+                    "ALTER TABLE embeddings ADD COLUMN last_used REAL NOT NULL DEFAULT 0"
+                )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+            )
+            self._conn.commit()
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        self._entries = int(entries)
+        self._prune()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        """テキストからキャッシュキーを計算する."""
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        """テキストリストをベクトルリストに変換する（キャッシュミスのみ生成する）."""
+        if not texts:
+            return []
+
+        keys = [self.key(text) for text in texts]
+        cached = await asyncio.to_thread(self._lookup, keys)
+
+        # 同じバッチ内の重複テキストは1回だけ生成する
+        missing: dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = await self._provider.embed(list(missing.values()))
+            if len(vectors) != len(missing):
+                raise ValueError(
+                    f"Embedding provider returned {len(vectors)} vectors "
+                    f"for {len(missing)} texts"
+                )
+            blobs = {
+                key: np.asarray(vector, dtype=np.float32).tobytes()
+                for key, vector in zip(missing, vectors)
+            }
+            await asyncio.to_thread(self._store, blobs)
+            cached.update(blobs)
+
+        hits = len(texts) - len(missing)
+        self.hits += hits
+        self.misses += len(missing)
+        logger.debug(
+            "Embedding cache: %d/%d hits (model=%s)", hits, len(texts), self._model
+        )
+        return [np.frombuffer(cached[key], dtype=np.float32).tolist() for key in keys]
+
+    async def embed_query(self, text: str) -> list[float]:
+        """検索クエリをベクトルに変換する（キャッシュを参照・保存しない）."""
+        vector = await self._provider.embed_query(text)
+        rounded: list[float] = np.asarray(vector, dtype=np.float32).tolist()
+        return rounded
+
+    async def is_available(self) -> bool:
+        """内側のプロバイダーが利用可能かチェックする."""
+        return await self._provider.is_available()
+
+    def _lookup(self, keys: list[bytes]) -> dict[bytes, bytes]:
+        """キャッシュ済みのベクトル（float32のバイト列）を取得する."""
+        unique = list(dict.fromkeys(keys))
+        found: dict[bytes, bytes] = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(unique), _LOOKUP_BATCH_SIZE):
+                batch = unique[start:start + _LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    "SELECT text_hash, vector FROM embeddings"
+                    f" WHERE model = ? AND text_hash IN ({placeholders})",
+                    [self._model, *batch],
+                ).fetchall()
+                found.update((bytes(key), bytes(vector)) for key, vector in rows)
+                if rows:
+                    self._conn.execute(
+                        "UPDATE embeddings SET last_used = ?"
+                        f" WHERE model = ? AND text_hash IN ({placeholders})",
+                        [now, self._model, *batch],
+                    )
+            self._conn.commit()
+        return found
+
+    def _store(self, blobs: dict[bytes, bytes]) -> None:
+        """生成したベクトルを保存する（上限を超えた分は最後に使われた日時が古いものから削除）."""
+        now = time.time()
+        with self._lock:
+            inserted = self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, text_hash, vector, last_used)"
+                " VALUES (?, ?, ?, ?)",
+                [(self._model, key, blob, now) for key, blob in blobs.items()],
+            ).rowcount
+            self._entries += max(inserted, 0)
+            self._conn.commit()
+        self._prune()
+
+    def _prune(self) -> None:
+        """保存件数が上限を超えている場合、最後に使われた日時が古いものから削除する."""
+        with self._lock:
+            excess = self._entries - self._max_entries
+            if excess <= 0:
+                return
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE (model, text_hash) IN ("
+                " SELECT model, text_hash FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+            self._conn.commit()
+            self._entries = self._max_entries
+        logger.debug("Embedding cache: pruned %d least recently used vectors", excess)
+
+    def get_stats(self) -> dict[str, int]:
+        """ヒット数・ミス数・保存済みベクトル数（このモデルのもの）を返す."""
+        with self._lock:
+            (entries,) = self._conn.execute(
+                "SELECT COUNT(*) FROM embeddings WHERE model = ?", (self._model,)
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": int(entries)}
+
+    def close(self) -> None:
+        """データベース接続を閉じる."""
+        with self._lock:
+            self._conn.close()
@@ -34,3 +34,42 @@ def get_embedding_provider(
         base_url=settings.lmstudio_base_url,
         model=settings.embedding_model_local,
     )
+
+
+def embedding_model_id(
+    settings: Settings,
+    provider_setting: Literal["local", "online"],
+) -> str:
+    """Embeddingモデルの識別子（"<プロバイダー設定>:<モデル名>"）を返す.
+
+    ベクトルストアに記録し、モデルが変わったかどうかの判定に使う。
+    """
+    model = (
+        settings.embedding_model_online
+        if provider_setting == "online"
+        else settings.embedding_model_local
+    )
+    return f"{provider_setting}:{model}"
+
+
+def get_embedding_provider_by_id(settings: Settings, model_id: str) -> EmbeddingProvider:
+    """Embeddingモデルの識別子に対応するプロバイダーを返す.
+
+    モデル変更後の再Embedding中に、元のコレクションを検索するためのクエリEmbeddingに使う。
+
+    Args:
+        settings: アプリケーション設定（接続先・APIキーを使用する）
+        model_id: embedding_model_id() の形式の識別子
+
+    Returns:
+        対応するEmbeddingプロバイダー
+
+    Raises:
+        ValueError: 識別子の形式が不正な場合
+    """
+    provider_setting, sep, model = model_id.partition(":")
+    if not sep or not model or provider_setting not in ("local", "online"):
+        raise ValueError(f"Invalid embedding model id: {model_id}")
+    if provider_setting == "online":
+        return OpenAIEmbedding(api_key=settings.openai_api_key, model=model)
+    return LMStudioEmbedding(base_url=settings.lmstudio_base_url, model=model)
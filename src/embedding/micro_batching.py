@@ -0,0 +1,123 @@
+"""リクエスト横断のEmbeddingマイクロバッチ処理
+仕様: docs/specs/f9-rag.md
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from src.embedding.base import EmbeddingProvider
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatchingEmbedding(EmbeddingProvider):
+    """並行する embed() 呼び出しをまとめて1回のリクエストで生成するプロバイダー.
+
+    呼び出しを最大 max_wait_sec の間、または合計 max_batch_size 件になるまで溜め、
+    内側のプロバイダーに1回だけリクエストして結果を各呼び出し元に振り分ける。
+    1回で max_batch_size 件以上のテキストを渡す呼び出し（取り込み時のバッチ等）は
+    待たずにそのまま送る。
+
+    仕様: docs/specs/f9-rag.md
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        max_wait_sec: float = 0.005,
+        max_batch_size: int = 32,
+    ) -> None:
+        """MicroBatchingEmbeddingを初期化する.
+
+        Args:
+            provider: 実際にEmbeddingを生成するプロバイダー
+            max_wait_sec: 最初の呼び出しから送信までの最大待ち時間（秒）
+            max_batch_size: 1回のリクエストにまとめる最大テキスト数
+        """
+        self._provider = provider
+        self._max_wait_sec = max_wait_sec
+        self._max_batch_size = max_batch_size
+        self._pending: list[tuple[list[str], asyncio.Future[list[list[float]]]]] = []
+        self._pending_texts = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self._inflight: set[asyncio.Task[None]] = set()
+        self.calls = 0
+        self.requests = 0
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        """テキストリストをベクトルリストに変換する（並行する呼び出しとまとめて送る）."""
+        if not texts:
+            return []
+        self.calls += 1
+        if len(texts) >= self._max_batch_size:
+            self.requests += 1
+            return await self._provider.embed(texts)
+
+        if self._pending_texts + len(texts) > self._max_batch_size:
+            self._flush()
+        future: asyncio.Future[list[list[float]]] = asyncio.get_running_loop().create_future()
+        self._pending.append((texts, future))
+        self._pending_texts += len(texts)
+        if self._pending_texts >= self._max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self._max_wait_sec, self._flush
+            )
+        return await future
+
+    async def is_available(self) -> bool:
+        """内側のプロバイダーが利用可能かチェックする."""
+        return await self._provider.is_available()
+
+    def _flush(self) -> None:
+        """溜まっている呼び出しを1回のリクエストとして送信する."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        self._pending_texts = 0
+        self.requests += 1
+        task = asyncio.create_task(self._run(batch))
+        # 送信中のタスクが破棄されないよう参照を保持する
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _run(
+        self,
+        batch: list[tuple[list[str], asyncio.Future[list[list[float]]]]],
+    ) -> None:
+        """まとめたテキストのEmbeddingを生成し、呼び出し元ごとに結果を返す."""
+        texts = [text for call_texts, _ in batch for text in call_texts]
+        try:
+            vectors = await self._provider.embed(texts)
+            if len(vectors) != len(texts):
+                raise ValueError(
+                    f"Embedding provider returned {len(vectors)} vectors "
+                    f"for {len(texts)} texts"
+                )
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            logger.debug(
+                "Embedding micro-batch of %d calls failed", len(batch), exc_info=True
+            )
+            # まとめた呼び出しはすべて同じエラーで失敗させる
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        logger.debug("Embedding micro-batch: %d calls, %d texts", len(batch), len(texts))
+        offset = 0
+        for call_texts, future in batch:
+            # 待機中にキャンセルされた呼び出しには結果を返さない
+            if not future.done():
+                future.set_result(vectors[offset:offset + len(call_texts)])
+            offset += len(call_texts)
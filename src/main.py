@@ -8,6 +8,7 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import time
 from datetime import datetime
 from pathlib import Path
 from zoneinfo import ZoneInfo
@@ -24,15 +25,27 @@ from src.process_guard import (
     write_pid_file,
 )
 from src.db.session import init_db, get_session_factory
-from src.embedding.factory import get_embedding_provider
+from src.embedding.cached_embedding import CachedEmbedding
+from src.embedding.factory import (
+    embedding_model_id,
+    get_embedding_provider,
+    get_embedding_provider_by_id,
+)
+from src.embedding.micro_batching import MicroBatchingEmbedding
 from src.llm.factory import get_provider_for_service
 from src.mcp_bridge.client_manager import MCPClientManager, MCPServerConfig
 from src.rag.bm25_index import BM25Index
-from src.rag.vector_store import VectorStore
+from src.rag.parse_pool import ParsePool
+from src.rag.retrieval_cache import RetrievalCache
+from src.rag.source_registry import SourceRegistry
+from src.rag.tokenizer_pool import TokenCache, TokenizerPool
+from src.rag.vector_store import HnswParams, VectorStore
 from src.services.chat import ChatService
+from src.services.dns_resolver import SafeResolver
 from src.services.feed_collector import FeedCollector
+from src.services.http_client import HttpClient
 from src.services.ogp_extractor import OgpExtractor
-from src.services.rag_knowledge import RAGKnowledgeService
+from src.services.rag_knowledge import IngestPipelineConfig, RAGKnowledgeService
 from src.services.summarizer import Summarizer
 from src.services.thread_history import ThreadHistoryService
 from src.services.topic_recommender import TopicRecommender
@@ -72,7 +85,50 @@ def _load_mcp_server_configs(config_path: str) -> list[MCPServerConfig]:
     return configs
 
 
+async def _warm_start_bm25(rag_service: RAGKnowledgeService, boot_started: float) -> None:
+    """BM25インデックスをバックグラウンドで復元し、ハイブリッド検索の準備完了を記録する."""
+    try:
+        count = await rag_service.warm_start_bm25_index()
+    except Exception:
+        logger.warning(
+            "BM25インデックスの復元に失敗しました（ベクトル検索のみで動作）", exc_info=True
+        )
+        return
+    logger.info(
+        "ハイブリッド検索準備完了: %d件 (起動から%.2f秒)",
+        count,
+        time.monotonic() - boot_started,
+    )
+
+
+async def _sync_source_registry(rag_service: RAGKnowledgeService) -> None:
+    """ソースURL台帳をバックグラウンドでベクトルストアと同期する."""
+    try:
+        count = await rag_service.sync_source_registry()
+    except Exception:
+        logger.warning(
+            "ソースURL台帳の同期に失敗しました（統計は全チャンクの走査で算出）", exc_info=True
+        )
+        return
+    logger.info("ソースURL台帳準備完了: %d件", count)
+
+
+async def _reembed_vector_store(vector_store: VectorStore) -> None:
+    """Embeddingモデル変更後の再Embeddingをバックグラウンドで実行する."""
+    try:
+        count = await vector_store.reembed()
+    except Exception:
+        logger.warning(
+            "再Embeddingに失敗しました（元のモデルで検索を継続、次回起動時に再開）",
+            exc_info=True,
+        )
+        return
+    logger.info("再Embedding完了: %d件（新しいモデルの検索に切り替えました）", count)
+
+
 async def main() -> None:
+    boot_started = time.monotonic()
+
     # ログ設定（プロセスガードのログ出力に必要なため最初に実行）
     settings = get_settings()
     logging.basicConfig(level=settings.log_level)
@@ -82,6 +138,18 @@ async def main() -> None:
     write_pid_file()
 
     mcp_manager: MCPClientManager | None = None
+    http_client: HttpClient | None = None
+    safe_resolver: SafeResolver | None = None
+    bm25_warm_start_task: asyncio.Task[None] | None = None
+    tokenizer_pool: TokenizerPool | None = None
+    token_cache: TokenCache | None = None
+    parse_pool: ParsePool | None = None
+    bm25_index: BM25Index | None = None
+    rag_service: RAGKnowledgeService | None = None
+    embedding_cache: CachedEmbedding | None = None
+    source_registry: SourceRegistry | None = None
+    source_registry_task: asyncio.Task[None] | None = None
+    reembed_task: asyncio.Task[None] | None = None
     try:
         # 起動時刻を記録 (F7)
         handlers_module.BOT_START_TIME = datetime.now(tz=ZoneInfo(settings.timezone))
@@ -99,6 +167,18 @@ async def main() -> None:
         topic_llm = get_provider_for_service(settings, settings.topic_llm_provider)
         summarizer_llm = get_provider_for_service(settings, settings.summarizer_llm_provider)
 
+        # SSRF対策のDNS解決（検証済みアドレスをキャッシュし、接続先もそのアドレスに限定する）
+        safe_resolver = SafeResolver(ttl=settings.http_dns_cache_ttl_sec)
+
+        # 外部HTTPアクセスで共有するコネクションプール（セッションは最初のリクエストで作成）
+        http_client = HttpClient(
+            limit=settings.http_connection_limit,
+            limit_per_host=settings.http_connection_limit_per_host,
+            keepalive_timeout=settings.http_keepalive_timeout_sec,
+            dns_cache_ttl=settings.http_dns_cache_ttl_sec,
+            resolver=safe_resolver,
+        )
+
         # MCP初期化（有効時のみ）
         if settings.mcp_enabled:
             mcp_manager = MCPClientManager()
@@ -110,28 +190,113 @@ async def main() -> None:
             logger.info("MCP無効: ツール呼び出し機能はオフです")
 
         # RAG初期化（有効時のみ）
-        rag_service: RAGKnowledgeService | None = None
         if settings.rag_enabled:
             embedding = get_embedding_provider(settings, settings.embedding_provider)
-            vector_store = VectorStore(embedding, settings.chromadb_persist_dir)
+            embedding_model = embedding_model_id(settings, settings.embedding_provider)
+            if settings.rag_embedding_micro_batch_wait_ms > 0:
+                # 並行するチャットのクエリEmbeddingを1回のリクエストにまとめる
+                embedding = MicroBatchingEmbedding(
+                    embedding,
+                    max_wait_sec=settings.rag_embedding_micro_batch_wait_ms / 1000,
+                    max_batch_size=settings.rag_embedding_micro_batch_size,
+                )
+            if settings.rag_embedding_cache_path:
+                # 内容が変わっていないチャンクは再取り込み時にEmbeddingを再生成しない
+                embedding_cache = CachedEmbedding(
+                    embedding,
+                    model=embedding_model,
+                    path=settings.rag_embedding_cache_path,
+                    max_entries=settings.rag_embedding_cache_max_entries,
+                )
+                embedding = embedding_cache
+                logger.info("Embeddingキャッシュ有効: %s", settings.rag_embedding_cache_path)
+            vector_store = VectorStore(
+                embedding,
+                settings.chromadb_persist_dir,
+                embed_batch_size=settings.rag_embedding_batch_size,
+                embed_batch_tokens=settings.rag_embedding_batch_tokens,
+                embed_concurrency=settings.rag_embedding_concurrency,
+                count_refresh_sec=settings.rag_vector_count_refresh_sec,
+                # flat: ChromaDBの代わりにメモリマップしたベクトル行列を総当たりで検索する
+                flat_dir=(
+                    settings.rag_flat_vector_dir
+                    if settings.rag_vector_backend == "flat"
+                    else None
+                ),
+                flat_quantization=settings.rag_flat_vector_quantization,
+                flat_rerank_factor=settings.rag_flat_vector_rerank_factor,
+                hnsw=HnswParams(
+                    m=settings.rag_hnsw_m,
+                    construction_ef=settings.rag_hnsw_construction_ef,
+                    search_ef=settings.rag_hnsw_search_ef,
+                    batch_size=settings.rag_hnsw_batch_size,
+                    sync_threshold=settings.rag_hnsw_sync_threshold,
+                ),
+                embedding_model=embedding_model,
+            )
+            if vector_store.embedding_outdated:
+                # モデル変更後は、再Embeddingが完了するまで元のモデルで元のコレクションを検索する
+                vector_store.begin_reembedding(
+                    get_embedding_provider_by_id(settings, vector_store.stored_embedding_model)
+                )
+                reembed_task = asyncio.create_task(_reembed_vector_store(vector_store))
+                logger.info(
+                    "Embeddingモデルの変更を検知: %s -> %s（バックグラウンドで再Embeddingします）",
+                    vector_store.stored_embedding_model,
+                    embedding_model,
+                )
+            # クロールしたページの本文抽出・チャンク分割をプロセスプールで行う
+            # （プロセスは最初のクロールで起動）
+            parse_pool = ParsePool(
+                max_workers=settings.rag_parse_workers,
+                max_pending=settings.rag_parse_queue_size,
+                html_parser=settings.rag_html_parser,
+            )
+            logger.info("HTML解析パーサー: %s", parse_pool.html_parser)
             web_crawler = WebCrawler(
                 max_pages=settings.rag_max_crawl_pages,
                 crawl_delay=settings.rag_crawl_delay_sec,
+                max_concurrent=settings.rag_crawl_max_concurrent,
+                parse_pool=parse_pool,
+                http_client=http_client,
+                resolver=safe_resolver,
+                respect_robots_txt=settings.rag_crawl_respect_robots,
+                max_crawl_delay=settings.rag_crawl_max_delay_sec,
             )
             # Safe Browsing クライアント（URL安全性チェック）
-            safe_browsing_client = create_safe_browsing_client(settings)
+            safe_browsing_client = create_safe_browsing_client(settings, http_client)
             if safe_browsing_client:
                 logger.info("URL安全性チェック有効: Google Safe Browsing API")
 
             # BM25インデックス（ハイブリッド検索用）
-            bm25_index: BM25Index | None = None
             if settings.rag_hybrid_search_enabled:
+                segmented = settings.rag_bm25_backend == "segmented"
                 bm25_index = BM25Index(
                     k1=settings.rag_bm25_k1,
                     b=settings.rag_bm25_b,
+                    scoring=settings.rag_bm25_scoring,
+                    # 本文はChromaDBが保持しているため、検索結果の上位k件のみ取得する
+                    text_loader=vector_store.get_texts,
+                    # segmented: コーパスをディスク上のセグメントに保持する（メモリマップ）
+                    segment_dir=settings.rag_bm25_segment_dir if segmented else None,
+                    segment_buffer_size=settings.rag_bm25_segment_buffer_size,
+                )
+                # 一括再構築時のトークン化を並列化する（プロセスは初回の再構築時に起動）
+                if settings.rag_bm25_token_cache_path and settings.rag_bm25_token_cache_size:
+                    # 再起動後の再構築でも、内容が変わっていないチャンクは形態素解析を行わない
+                    token_cache = TokenCache(
+                        path=settings.rag_bm25_token_cache_path,
+                        max_entries=settings.rag_bm25_token_cache_size,
+                    )
+                tokenizer_pool = TokenizerPool(
+                    max_workers=settings.rag_bm25_tokenizer_workers,
+                    cache=token_cache,
                 )
                 logger.info("BM25インデックス初期化完了")
 
+            if settings.rag_source_registry_path:
+                source_registry = SourceRegistry(settings.rag_source_registry_path)
+
             rag_service = RAGKnowledgeService(
                 vector_store,
                 web_crawler,
@@ -140,8 +305,32 @@ async def main() -> None:
                 safe_browsing_client=safe_browsing_client,
                 bm25_index=bm25_index,
                 hybrid_search_enabled=settings.rag_hybrid_search_enabled,
+                bm25_snapshot_path=settings.rag_bm25_snapshot_path or None,
+                bm25_snapshot_interval=settings.rag_bm25_snapshot_interval_sec,
+                bm25_snapshot_max_pending=settings.rag_bm25_snapshot_max_pending,
+                tokenizer_pool=tokenizer_pool,
+                retrieval_cache=RetrievalCache(
+                    max_entries=settings.rag_retrieval_cache_size,
+                    ttl_sec=settings.rag_retrieval_cache_ttl_sec,
+                ),
+                source_registry=source_registry,
+                ingest_pipeline=IngestPipelineConfig(
+                    crawl_concurrency=settings.rag_ingest_crawl_concurrency,
+                    chunk_concurrency=settings.rag_ingest_chunk_concurrency,
+                    embed_concurrency=settings.rag_ingest_embed_concurrency,
+                    store_concurrency=settings.rag_ingest_store_concurrency,
+                    queue_size=settings.rag_ingest_queue_size,
+                ),
+                parse_pool=parse_pool,
             )
+            if source_registry is not None:
+                # 台帳導入前のデータがある場合は全チャンクを1回走査して台帳を作る
+                source_registry_task = asyncio.create_task(_sync_source_registry(rag_service))
             if settings.rag_hybrid_search_enabled:
+                # 復元完了まではBM25が空のためベクトル検索のみで応答する
+                bm25_warm_start_task = asyncio.create_task(
+                    _warm_start_bm25(rag_service, boot_started)
+                )
                 logger.info("RAG有効: ハイブリッド検索（ベクトル＋BM25）が利用可能")
             else:
                 logger.info("RAG有効: ナレッジベース機能が利用可能")
@@ -194,7 +383,7 @@ async def main() -> None:
 
         # 要約・収集サービス
         summarizer = Summarizer(llm=summarizer_llm)
-        ogp_extractor = OgpExtractor()
+        ogp_extractor = OgpExtractor(http_client=http_client)
         feed_collector = FeedCollector(
             session_factory=session_factory,
             summarizer=summarizer,
@@ -220,6 +409,8 @@ async def main() -> None:
             rag_crawl_progress_interval=settings.rag_crawl_progress_interval,
         )
 
+        logger.info("起動処理完了 (%.2f秒)", time.monotonic() - boot_started)
+
         # Socket Mode で起動（グレースフルシャットダウン対応）
         async with socket_mode_handler(app, settings) as handler:
             try:
@@ -227,6 +418,52 @@ async def main() -> None:
             except asyncio.CancelledError:
                 logger.info("シャットダウンシグナルを受信しました")
     finally:
+        if bm25_warm_start_task is not None and not bm25_warm_start_task.done():
+            bm25_warm_start_task.cancel()
+        if source_registry_task is not None and not source_registry_task.done():
+            source_registry_task.cancel()
+        if reembed_task is not None and not reembed_task.done():
+            reembed_task.cancel()
+        if rag_service is not None:
+            try:
+                # 未保存のBM25スナップショットを保存する（インデックスを閉じる前に行う）
+                await rag_service.close()
+            except Exception:
+                logger.warning("BM25スナップショットの保存失敗", exc_info=True)
+        if tokenizer_pool is not None:
+            tokenizer_pool.shutdown()
+        if parse_pool is not None:
+            parse_pool.shutdown()
+        if bm25_index is not None:
+            try:
+                bm25_index.close()
+            except Exception:
+                logger.warning("BM25インデックスのクローズ失敗", exc_info=True)
+        if token_cache is not None:
+            try:
+                token_cache.close()
+            except Exception:
+                logger.warning("トークンキャッシュのクローズ失敗", exc_info=True)
+        if embedding_cache is not None:
+            try:
+                embedding_cache.close()
+            except Exception:
+                logger.warning("Embeddingキャッシュのクローズ失敗", exc_info=True)
+        if source_registry is not None:
+            try:
+                source_registry.close()
+            except Exception:
+                logger.warning("ソースURL台帳のクローズ失敗", exc_info=True)
+        if http_client is not None:
+            try:
+                await http_client.close()
+            except Exception:
+                logger.warning("HTTPセッションのクローズ失敗", exc_info=True)
+        if safe_resolver is not None:
+            try:
+                await safe_resolver.close()
+            except Exception:
+                logger.warning("DNSリゾルバーのクローズ失敗", exc_info=True)
         if mcp_manager:
             try:
                 await mcp_manager.cleanup()
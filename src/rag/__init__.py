@@ -19,6 +19,7 @@ from src.rag.content_detector import (
 from src.rag.heading_chunker import HeadingChunk, chunk_by_headings
 from src.rag.hybrid_search import (
     HybridSearchEngine,
+    HybridSearchResponse,
     HybridSearchResult,
     reciprocal_rank_fusion,
 )
@@ -68,6 +69,7 @@ __all__ = [
     "tokenize_japanese",
     # Hybrid search
     "HybridSearchEngine",
+    "HybridSearchResponse",
     "HybridSearchResult",
     "reciprocal_rank_fusion",
     # Evaluation
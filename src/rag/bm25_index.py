@@ -5,21 +5,41 @@
 
 from __future__ import annotations
 
+import heapq
+import importlib.util
+import json
 import logging
+import math
+import os
 import re
-from dataclasses import dataclass
+import sys
+import tempfile
+import threading
+from array import array
+from collections import Counter
+from collections.abc import Callable, Iterator, MutableMapping
+from dataclasses import dataclass, field
 from functools import lru_cache
-from typing import TYPE_CHECKING
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal, TypeVar
 
 if TYPE_CHECKING:
     import fugashi
-    import rank_bm25
+    import numpy as np
+    import numpy.typing as npt
+
+    from src.rag.bm25_segments import BM25SegmentStore
 
 logger = logging.getLogger(__name__)
 
+# スナップショットのフォーマットバージョン（互換性のない変更時にインクリメント）
+SNAPSHOT_VERSION = 2
+
 # fugashiのインポートを遅延させる（オプショナル依存）
 _fugashi_available: bool | None = None
 _tagger: "fugashi.Tagger | None" = None
+# MeCabのTaggerはスレッドセーフではないため、スレッドから呼ぶ場合に備えて排他する
+_tagger_lock = threading.Lock()
 
 
 def _get_fugashi_tagger() -> "fugashi.Tagger | None":
@@ -45,6 +65,22 @@ def _get_fugashi_tagger() -> "fugashi.Tagger | None":
         return None
 
 
+BM25ScoringMode = Literal["postings", "sparse", "maxscore"]
+
+# MaxScoreの上限スコアに掛ける余裕（浮動小数点の丸め誤差で枝刈りしすぎないため）
+_MAXSCORE_BOUND_SLACK = 1.0 + 1e-9
+
+
+def _numpy_available() -> bool:
+    """numpyが利用可能かを返す（オプショナル依存）."""
+    return importlib.util.find_spec("numpy") is not None
+
+
+def get_tokenizer_name() -> str:
+    """現在有効なトークナイザ名を返す（スナップショットの互換性判定用）."""
+    return "fugashi" if _get_fugashi_tagger() is not None else "simple"
+
+
 @dataclass
 class BM25Result:
     """BM25検索結果."""
@@ -54,71 +90,305 @@ class BM25Result:
     text: str
 
 
+@dataclass(frozen=True, slots=True)
+class _Document:
+    """インデックス内のドキュメント.
+
+    トークン列は語彙の用語IDの配列で保持する。本文はテキストローダーが
+    設定されている場合は保持しない（検索結果の上位k件のみ遅延取得する）。
+    """
+
+    slot: int
+    source_url: str
+    term_ids: array[int]
+    text: str | None
+
+
+_K = TypeVar("_K")
+_V = TypeVar("_V")
+
+# _CowDict の1シャードあたりの目安の件数（この2倍を超えるとシャード数を倍にする）
+_COW_SHARD_SIZE = 16
+
+
+class _CowDict(MutableMapping[_K, _V]):
+    """書き込み時に変更したシャードだけを複製する辞書（構造共有）.
+
+    キーのハッシュ値で小さな辞書（シャード）に分けて保持する。draft() はシャードの
+    一覧だけを複製して公開済みの辞書とシャードを共有し、書き込みでは変更するシャードを
+    初回だけ複製する。そのため書き込みのコストは全体の件数ではなく変更した件数に比例する
+    （シャードの一覧の複製はポインタのコピーのみ）。公開済みの辞書は変更しない。
+    """
+
+    __slots__ = ("_mask", "_owned", "_shards", "_size")
+
+    def __init__(self, shards: list[dict[_K, _V]] | None = None, size: int = 0) -> None:
+        self._shards: list[dict[_K, _V]] = shards if shards is not None else [{}]
+        self._mask = len(self._shards) - 1
+        self._size = size
+        # この辞書が複製済み（変更してよい）のシャード番号
+        self._owned: set[int] = set() if shards is not None else {0}
+
+    def draft(self) -> _CowDict[_K, _V]:
+        """シャードを共有する書き込み用の複製を返す."""
+        return _CowDict(list(self._shards), self._size)
+
+    @property
+    def shards(self) -> list[dict[_K, _V]]:
+        """シャードの一覧（キー k は shards[hash(k) & mask] にある。読み取り専用）."""
+        return self._shards
+
+    @property
+    def mask(self) -> int:
+        """シャード番号を求めるマスク."""
+        return self._mask
+
+    def __getitem__(self, key: _K) -> _V:
+        return self._shards[hash(key) & self._mask][key]
+
+    def get(self, key: _K, default: Any = None) -> Any:
+        return self._shards[hash(key) & self._mask].get(key, default)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._shards[hash(key) & self._mask]
+
+    def __setitem__(self, key: _K, value: _V) -> None:
+        shard = self._writable(hash(key) & self._mask)
+        if key not in shard:
+            self._size += 1
+        shard[key] = value
+        if self._size > 2 * _COW_SHARD_SIZE * len(self._shards):
+            self._grow()
+
+    def __delitem__(self, key: _K) -> None:
+        index = hash(key) & self._mask
+        if key not in self._shards[index]:
+            raise KeyError(key)
+        del self._writable(index)[key]
+        self._size -= 1
+
+    def __iter__(self) -> Iterator[_K]:
+        for shard in self._shards:
+            yield from shard
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _writable(self, index: int) -> dict[_K, _V]:
+        """変更するシャードを返す（公開済みの辞書と共有している場合は複製する）."""
+        if index not in self._owned:
+            self._shards[index] = dict(self._shards[index])
+            self._owned.add(index)
+        return self._shards[index]
+
+    def _grow(self) -> None:
+        """シャード数を倍にして振り分け直す."""
+        shards: list[dict[_K, _V]] = [{} for _ in range(2 * len(self._shards))]
+        mask = len(shards) - 1
+        for shard in self._shards:
+            for key, value in shard.items():
+                shards[hash(key) & mask][key] = value
+        self._shards = shards
+        self._mask = mask
+        self._owned = set(range(len(shards)))
+
+
+@dataclass
+class _TermDelta:
+    """1回の書き込みでの用語ごとのポスティングの変更."""
+
+    added: dict[int, int] = field(default_factory=dict)  # slot -> 出現回数
+    # 公開済みの状態から取り除くスロット -> 取り除いた時点の文書長
+    removed: dict[int, int] = field(default_factory=dict)
+
+
+@dataclass
+class _IndexState:
+    """検索が参照するインデックスの状態.
+
+    公開（BM25Index._state への代入）後は変更しない。書き込みは現在の状態とシャードを
+    共有する下書き（_CowDict）に用語ごとの変更（_TermDelta）をまとめてマージし、
+    スコアリング用の配列まで作り終えてから参照を差し替える。検索は開始時点の状態への
+    参照を保持するため、書き込み中でもロックなしで構築途中ではない一貫した状態を参照できる。
+    """
+
+    # ドキュメントは内部スロット番号で参照する
+    # スロットは追加順に採番し、同点スコアの並び順（追加順）の決定にも使う
+    documents: _CowDict[str, _Document] = field(default_factory=_CowDict)  # id -> ドキュメント
+    slot_doc_ids: _CowDict[int, str] = field(default_factory=_CowDict)  # slot -> id
+    doc_lengths: _CowDict[int, int] = field(default_factory=_CowDict)  # slot -> トークン数
+    total_length: int = 0
+    next_slot: int = 0
+    # 用語ごとのポスティング（スコアリング方式に応じていずれか一方のみを保持する）
+    # postings/maxscore: term -> {slot: 出現回数}
+    postings: _CowDict[str, dict[int, int]] = field(default_factory=_CowDict)
+    # sparse: term -> (列=スロット配列, 値=出現回数配列, 各列の文書長)（疎行列の行）
+    matrix_rows: _CowDict[
+        str,
+        tuple[npt.NDArray[np.int64], npt.NDArray[np.float64], npt.NDArray[np.float64]],
+    ] = field(default_factory=_CowDict)
+    # 文書頻度 -> その文書頻度の用語数（IDF補正値の計算用）
+    df_counts: dict[int, int] = field(default_factory=dict)
+    # 負のIDFの補正値（epsilon × 全用語の平均IDF）
+    idf_floor: float = 0.0
+    # maxscore: 用語 -> {出現回数: その出現回数での最小文書長}
+    term_bounds: _CowDict[str, dict[int, int]] = field(default_factory=_CowDict)
+
+    # ソースURL -> ドキュメントIDの集合（逆引き）
+    source_docs: _CowDict[str, set[str]] = field(default_factory=_CowDict)
+    # 語彙（用語 -> 用語ID と 用語IDの逆引き）
+    # 追記のみのため下書きとも共有する（書き込みロック下でのみ追記する）
+    vocabulary: dict[str, int] = field(default_factory=dict)
+    terms: list[str] = field(default_factory=list)
+
+    def draft(self) -> _IndexState:
+        """書き込み用の下書きを作成する（変更されるまで公開済みの状態とシャードを共有する）."""
+        return _IndexState(
+            documents=self.documents.draft(),
+            slot_doc_ids=self.slot_doc_ids.draft(),
+            doc_lengths=self.doc_lengths.draft(),
+            total_length=self.total_length,
+            next_slot=self.next_slot,
+            postings=self.postings.draft(),
+            matrix_rows=self.matrix_rows.draft(),
+            df_counts=self.df_counts,
+            idf_floor=self.idf_floor,
+            term_bounds=self.term_bounds.draft(),
+            source_docs=self.source_docs.draft(),
+            vocabulary=self.vocabulary,
+            terms=self.terms,
+        )
+
+
+@dataclass
+class _Transaction:
+    """1回の書き込みでの変更."""
+
+    deltas: dict[str, _TermDelta] = field(default_factory=dict)
+    # 下書き用に複製済みのソースURL（公開済みの集合は変更しない）
+    copied_sources: set[str] = field(default_factory=set)
+
+
 class BM25Index:
     """BM25ベースのキーワード検索インデックス.
 
     仕様: docs/specs/f9-rag.md
+
+    用語ごとのポスティングリスト（転置インデックス）を持ち、文書頻度・平均文書長を
+    追加・削除のたびに差分更新する。変更コストは変更したドキュメント数に比例し、
+    検索前のコーパス全体の再トークン化・再構築は発生しない。
+    スコアは rank_bm25.BM25Okapi と同じ式で計算する（負のIDFは epsilon × 平均IDF に補正）。
+
+    検索は公開済みの不変な状態（_IndexState）に対してロックなしで行い、書き込みは
+    新しい状態を作ってからアトミックに差し替える。そのため search() と書き込み系の
+    メソッドは別々のスレッドから同時に呼び出してよい（書き込み同士は直列化される）。
+
+    スコアリング方式:
+    - sparse: 用語×文書の疎行列（用語ごとのCSR行）とクエリ用語の積を numpy で
+      一括計算し、argpartition で上位k件のみを選択する（numpyが必要）
+    - postings: ポスティングリストを Python で走査して加算する
+    - maxscore: 用語ごとのスコア上限を使ったMaxScore（動的枝刈り）で、上位k件に
+      入り得ないドキュメントのスコア計算を飛ばす（numpy不要、結果はpostingsと一致）
+
+    ドキュメントは用語IDの配列で保持し、用語の文字列は語彙（追記のみ）で1つだけ持つ。
+    text_loader を指定した場合は本文を保持せず、検索結果の上位k件の本文のみを
+    text_loader で取得する。
+
+    segment_dir を指定した場合はコーパスをメモリ上に持たず、ディスク上のセグメント
+    （BM25SegmentStore、メモリマップ）に保持する。スコアは sparse 方式と同じ式で計算し、
+    スナップショットは使わない（セグメント自体が永続化される）。
     """
 
     def __init__(
         self,
         k1: float = 1.5,
         b: float = 0.75,
+        epsilon: float = 0.25,
+        scoring: BM25ScoringMode = "sparse",
+        text_loader: Callable[[list[str]], dict[str, str]] | None = None,
+        segment_dir: str | Path | None = None,
+        segment_buffer_size: int = 5000,
     ) -> None:
         """BM25Indexを初期化する.
 
         Args:
             k1: 用語頻度の飽和パラメータ（デフォルト: 1.5）
             b: 文書長の正規化パラメータ（デフォルト: 0.75）
+            epsilon: 負のIDFを補正する係数（デフォルト: 0.25、rank_bm25と同じ）
+            scoring: スコアリング方式（"sparse"、"postings" または "maxscore"）
+            text_loader: ドキュメントIDのリストから {id: 本文} を返す関数。
+                指定した場合は本文をインデックス内に保持しない
+            segment_dir: セグメントの保存先（指定した場合はディスク上のセグメントに保持する）
+            segment_buffer_size: セグメントとして書き出すまでメモリに保持するドキュメント数
         """
         self._k1 = k1
         self._b = b
+        self._epsilon = epsilon
+
+        if scoring == "sparse" and not _numpy_available():
+            logger.warning("numpy not available, falling back to postings scoring")
+            scoring = "postings"
+        self._scoring: BM25ScoringMode = scoring
+        self._text_loader = text_loader
+
+        self._segments: BM25SegmentStore | None = None
+        if segment_dir is not None:
+            from src.rag.bm25_segments import BM25SegmentStore
+
+            self._segments = BM25SegmentStore(
+                segment_dir,
+                k1=k1,
+                b=b,
+                epsilon=epsilon,
+                tokenizer=get_tokenizer_name(),
+                buffer_size=segment_buffer_size,
+                store_text=text_loader is None,
+            )
 
-        # ドキュメントストレージ
-        self._documents: dict[str, str] = {}  # id -> text
-        self._doc_source_map: dict[str, str] = {}  # id -> source_url
-
-        # BM25インデックス（遅延初期化）
-        self._bm25: "rank_bm25.BM25Okapi | None" = None
-        self._doc_ids: list[str] = []  # インデックス順序を保持
-        self._tokenized_corpus: list[list[str]] = []
-
-        # 再構築フラグ
-        self._needs_rebuild = True
+        # 公開済みの状態（検索はこの参照を1回だけ読む）
+        self._state = _IndexState()
+        # 書き込み（下書きの作成から公開まで）を直列化する
+        self._write_lock = threading.Lock()
 
     def add_documents(
         self,
         documents: list[tuple[str, str, str]],
+        tokenized: list[list[str]] | None = None,
     ) -> int:
         """ドキュメントをインデックスに追加する.
 
+        同じIDのドキュメントが既に存在する場合は置き換える。
+
         Args:
             documents: (id, text, source_url) のリスト
+            tokenized: documents と同順のトークン列（事前にトークン化済みの場合）。
+                Noneの場合は tokenize_japanese() でトークン化する
 
         Returns:
             追加されたドキュメント数
         """
+        if tokenized is not None and len(tokenized) != len(documents):
+            raise ValueError("tokenized must have the same length as documents")
+        if not documents:
+            return 0
+        if tokenized is None:
+            tokenized = [tokenize_japanese(text) for _, text, _ in documents]
+        if self._segments is not None:
+            return self._segments.add_documents(documents, tokenized)
+
         added = 0
         updated = 0
-        for doc_id, text, source_url in documents:
-            if doc_id in self._documents:
-                # 既存のドキュメントを更新
-                self._documents[doc_id] = text
-                self._doc_source_map[doc_id] = source_url
-                updated += 1
-            else:
-                # 新規ドキュメントを追加
-                self._documents[doc_id] = text
-                self._doc_source_map[doc_id] = source_url
-                added += 1
-
-        # 新規追加または更新があった場合はインデックス再構築が必要
-        if added > 0 or updated > 0:
-            self._needs_rebuild = True
-            logger.debug(
-                "BM25 index: added %d, updated %d documents", added, updated
-            )
-
+        with self._write_lock:
+            draft = self._state.draft()
+            txn = _Transaction()
+            for (doc_id, text, source_url), tokens in zip(documents, tokenized, strict=True):
+                if self._insert(draft, txn, doc_id, text, source_url, tokens):
+                    added += 1
+                else:
+                    updated += 1
+            self._publish(draft, txn)
+
+        logger.debug("BM25 index: added %d, updated %d documents", added, updated)
         return added
 
     def search(
@@ -135,14 +405,11 @@ class BM25Index:
         Returns:
             BM25Resultのリスト（スコア降順）
         """
-        if not self._documents:
-            return []
-
-        # 必要に応じてインデックスを再構築
-        if self._needs_rebuild:
-            self._rebuild_index()
+        if self._segments is not None:
+            return self._search_segments(self._segments, query, n_results)
 
-        if self._bm25 is None:
+        state = self._state
+        if not state.documents or n_results <= 0:
             return []
 
         # クエリをトークナイズ
@@ -150,26 +417,19 @@ class BM25Index:
         if not query_tokens:
             return []
 
-        # BM25検索
-        scores = self._bm25.get_scores(query_tokens)
+        if self._scoring == "sparse":
+            top = self._top_k_sparse(state, query_tokens, n_results)
+        elif self._scoring == "maxscore":
+            top = self._top_k_maxscore(state, query_tokens, n_results)
+        else:
+            top = self._top_k_postings(state, query_tokens, n_results)
 
-        # スコアでソートして上位n_results件を取得
-        scored_docs = [
-            (self._doc_ids[i], score) for i, score in enumerate(scores) if score > 0
+        doc_ids = [state.slot_doc_ids[slot] for slot, _ in top]
+        texts = self._load_texts(state, doc_ids)
+        return [
+            BM25Result(doc_id=doc_id, score=float(score), text=texts.get(doc_id, ""))
+            for doc_id, (_, score) in zip(doc_ids, top, strict=True)
         ]
-        scored_docs.sort(key=lambda x: x[1], reverse=True)
-
-        results: list[BM25Result] = []
-        for doc_id, score in scored_docs[:n_results]:
-            results.append(
-                BM25Result(
-                    doc_id=doc_id,
-                    score=float(score),
-                    text=self._documents[doc_id],
-                )
-            )
-
-        return results
 
     def delete_by_source(self, source_url: str) -> int:
         """ソースURL指定でドキュメントを削除する.
@@ -180,29 +440,80 @@ class BM25Index:
         Returns:
             削除されたドキュメント数
         """
-        to_delete = [
-            doc_id
-            for doc_id, url in self._doc_source_map.items()
-            if url == source_url
-        ]
+        if self._segments is not None:
+            return self._segments.delete_by_source(source_url)
+
+        with self._write_lock:
+            to_delete = list(self._state.source_docs.get(source_url, ()))
+            if not to_delete:
+                return 0
+
+            draft = self._state.draft()
+            txn = _Transaction()
+            for doc_id in to_delete:
+                self._remove(draft, txn, doc_id)
+            self._publish(draft, txn)
+
+        logger.debug(
+            "Deleted %d documents from BM25 index (source: %s)",
+            len(to_delete),
+            source_url,
+        )
+        return len(to_delete)
 
-        for doc_id in to_delete:
-            del self._documents[doc_id]
-            del self._doc_source_map[doc_id]
+    def delete_documents(self, doc_ids: list[str]) -> int:
+        """ID指定でドキュメントを削除する（存在しないIDは無視する）.
 
-        if to_delete:
-            self._needs_rebuild = True
-            logger.debug(
-                "Deleted %d documents from BM25 index (source: %s)",
-                len(to_delete),
-                source_url,
-            )
+        Args:
+            doc_ids: 削除するドキュメントIDのリスト
 
+        Returns:
+            削除されたドキュメント数
+        """
+        if self._segments is not None:
+            return self._segments.delete_documents(doc_ids)
+
+        with self._write_lock:
+            to_delete = [
+                doc_id for doc_id in dict.fromkeys(doc_ids)
+                if doc_id in self._state.documents
+            ]
+            if not to_delete:
+                return 0
+
+            draft = self._state.draft()
+            txn = _Transaction()
+            for doc_id in to_delete:
+                self._remove(draft, txn, doc_id)
+            self._publish(draft, txn)
+
+        logger.debug("Deleted %d documents from BM25 index", len(to_delete))
         return len(to_delete)
 
     def get_document_count(self) -> int:
         """インデックス内のドキュメント数を返す."""
-        return len(self._documents)
+        if self._segments is not None:
+            return self._segments.get_document_count()
+        return len(self._state.documents)
+
+    def get_document_ids(self) -> set[str]:
+        """メモリ上のインデックスに含まれるドキュメントIDの集合を返す.
+
+        セグメント型のインデックスでは使用できない（スナップショットの照合用）。
+        """
+        if self._segments is not None:
+            raise NotImplementedError("get_document_ids is not supported for segment storage")
+        return set(self._state.documents)
+
+    @property
+    def is_persistent(self) -> bool:
+        """コーパスがディスク上のセグメントに永続化されているか."""
+        return self._segments is not None
+
+    def close(self) -> None:
+        """セグメントのマージ完了を待ち、書き込みバッファを書き出す."""
+        if self._segments is not None:
+            self._segments.close()
 
     def get_source_url(self, doc_id: str) -> str | None:
         """ドキュメントIDからソースURLを取得する.
@@ -213,30 +524,583 @@ class BM25Index:
         Returns:
             ソースURL、見つからない場合はNone
         """
-        return self._doc_source_map.get(doc_id)
+        if self._segments is not None:
+            return self._segments.get_source_url(doc_id)
+        document = self._state.documents.get(doc_id)
+        return document.source_url if document is not None else None
+
+    def to_snapshot(self) -> dict[str, Any]:
+        """インデックスの永続化用スナップショットを作成する.
+
+        語彙・用語ID列で表したコーパス・doc→source対応・統計情報を含む。
+        本文を保持していない場合（text_loader 指定時）の本文は null になる。
+        公開済みの不変な状態から作成するため、別スレッドで実行してよい。
+
+        Returns:
+            JSONシリアライズ可能なスナップショット辞書
+        """
+        state = self._state
+        # 語彙は追記のみのため、状態を読んだ後に複製すれば状態内の用語IDをすべて含む
+        vocabulary = list(state.terms)
+        documents = [
+            [doc_id, document.source_url, document.text, document.term_ids.tolist()]
+            for doc_id, document in state.documents.items()
+        ]
+        return {
+            "version": SNAPSHOT_VERSION,
+            "tokenizer": get_tokenizer_name(),
+            "k1": self._k1,
+            "b": self._b,
+            "stats": {
+                "document_count": len(documents),
+                "total_length": state.total_length,
+            },
+            "vocabulary": vocabulary,
+            "documents": documents,
+        }
+
+    def load_snapshot(self, path: str | Path) -> bool:
+        """スナップショットファイルからインデックスを復元する.
+
+        read_snapshot() と adopt() を続けて実行する。
+
+        Args:
+            path: スナップショットファイルのパス
 
-    def _rebuild_index(self) -> None:
-        """BM25インデックスを再構築する."""
+        Returns:
+            復元に成功した場合True
+        """
+        restored = self.read_snapshot(path)
+        if restored is None:
+            return False
+        self.adopt(restored)
+        return True
+
+    def read_snapshot(self, path: str | Path) -> BM25Index | None:
+        """スナップショットファイルを読み込み、同じパラメータの新しいインデックスを返す.
+
+        自身の状態は変更しないため、別スレッドで実行してから adopt() で反映できる。
+        バージョンやトークナイザが現在の環境と一致しない場合は読み込まない
+        （トークン列の互換性が保証できないため、呼び出し側で再構築すること）。
+
+        Args:
+            path: スナップショットファイルのパス
+
+        Returns:
+            復元したインデックス。読み込めない場合はNone
+        """
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError):
+            logger.warning("Failed to read BM25 snapshot: %s", path, exc_info=True)
+            return None
+
+        if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+            logger.info("BM25 snapshot version mismatch, ignoring: %s", path)
+            return None
+        if data.get("tokenizer") != get_tokenizer_name():
+            logger.info(
+                "BM25 snapshot tokenizer mismatch (%s != %s), ignoring: %s",
+                data.get("tokenizer"),
+                get_tokenizer_name(),
+                path,
+            )
+            return None
+
+        restored = BM25Index(
+            k1=self._k1,
+            b=self._b,
+            epsilon=self._epsilon,
+            scoring=self._scoring,
+            text_loader=self._text_loader,
+        )
         try:
-            from rank_bm25 import BM25Okapi
-        except ImportError:
-            logger.warning("rank-bm25 not installed, BM25 search disabled")
-            self._bm25 = None
-            self._needs_rebuild = False
-            return
-
-        self._doc_ids = list(self._documents.keys())
-        self._tokenized_corpus = [
-            tokenize_japanese(self._documents[doc_id]) for doc_id in self._doc_ids
+            vocabulary = [str(term) for term in data["vocabulary"]]
+            documents = [
+                (str(doc_id), str(text or ""), str(source_url))
+                for doc_id, source_url, text, _ in data["documents"]
+            ]
+            tokenized = [[vocabulary[i] for i in entry[3]] for entry in data["documents"]]
+            restored.add_documents(documents, tokenized=tokenized)
+        except (KeyError, IndexError, TypeError, ValueError):
+            logger.warning("Malformed BM25 snapshot, ignoring: %s", path, exc_info=True)
+            return None
+
+        logger.info(
+            "Loaded BM25 snapshot with %d documents: %s", restored.get_document_count(), path
+        )
+        return restored
+
+    def adopt(self, other: BM25Index) -> None:
+        """別のインデックスの内容で自身の内容をアトミックに置き換える.
+
+        Args:
+            other: 内容の提供元（同じパラメータ・スコアリング方式で作成したもの）
+        """
+        with self._write_lock:
+            self._state = other._state
+
+    def _search_segments(
+        self, segments: BM25SegmentStore, query: str, n_results: int
+    ) -> list[BM25Result]:
+        """ディスク上のセグメントに対して検索する."""
+        if n_results <= 0 or not segments.get_document_count():
+            return []
+        query_tokens = tokenize_japanese(query)
+        if not query_tokens:
+            return []
+
+        top = segments.top_k(query_tokens, n_results)
+        doc_ids = [doc_id for doc_id, _ in top]
+        if self._text_loader is None:
+            texts = segments.get_texts(doc_ids)
+        else:
+            texts = self._load_texts(self._state, doc_ids)
+        return [
+            BM25Result(doc_id=doc_id, score=score, text=texts.get(doc_id, ""))
+            for doc_id, score in top
         ]
 
-        if self._tokenized_corpus:
-            self._bm25 = BM25Okapi(self._tokenized_corpus, k1=self._k1, b=self._b)
+    def _load_texts(self, state: _IndexState, doc_ids: list[str]) -> dict[str, str]:
+        """検索結果のドキュメントIDの本文を返す.
+
+        text_loader が設定されている場合は返却するドキュメントの分だけ取得する。
+        取得に失敗した場合は空文字列の本文として扱う（スコアと順位はそのまま返す）。
+        """
+        if self._text_loader is None:
+            return {doc_id: state.documents[doc_id].text or "" for doc_id in doc_ids}
+        if not doc_ids:
+            return {}
+        try:
+            return self._text_loader(doc_ids)
+        except Exception:
+            logger.warning("Failed to load texts for BM25 results", exc_info=True)
+            return {}
+
+    @staticmethod
+    def _term_id(draft: _IndexState, term: str) -> int:
+        """用語の用語IDを返す（未登録の用語は語彙に追加する）."""
+        term_id = draft.vocabulary.get(term)
+        if term_id is None:
+            term_id = len(draft.terms)
+            draft.terms.append(term)
+            draft.vocabulary[term] = term_id
+        return term_id
+
+    def _document_tokens(self, doc_id: str) -> list[str]:
+        """ドキュメントのトークン列を用語IDから復元する."""
+        state = self._state
+        return [state.terms[term_id] for term_id in state.documents[doc_id].term_ids]
+
+    def _insert(
+        self,
+        draft: _IndexState,
+        txn: _Transaction,
+        doc_id: str,
+        text: str,
+        source_url: str,
+        tokens: list[str],
+    ) -> bool:
+        """下書きにドキュメントを1件登録し、ポスティングの変更と統計を記録する.
+
+        Returns:
+            新規追加の場合True、既存ドキュメントの置き換えの場合False
+        """
+        existing = draft.documents.get(doc_id)
+        if existing is None:
+            slot = draft.next_slot
+            draft.next_slot += 1
+            draft.slot_doc_ids[slot] = doc_id
+        else:
+            # 置き換え時は旧内容のポスティングを取り除く（スロットは維持して順序を保つ）
+            slot = existing.slot
+            self._remove_postings(draft, txn, slot, existing.term_ids)
+            self._source_doc_ids(draft, txn, existing.source_url).discard(doc_id)
+
+        # 同じソースURLの文字列はドキュメント間で共有する
+        source_url = sys.intern(source_url)
+        self._source_doc_ids(draft, txn, source_url).add(doc_id)
+        term_ids = array("I", [self._term_id(draft, term) for term in tokens])
+        stored_text = text if self._text_loader is None else None
+        draft.documents[doc_id] = _Document(slot, source_url, term_ids, stored_text)
+        for term, tf in Counter(tokens).items():
+            txn.deltas.setdefault(term, _TermDelta()).added[slot] = tf
+        draft.doc_lengths[slot] = len(tokens)
+        draft.total_length += len(tokens)
+        return existing is None
+
+    def _remove(self, draft: _IndexState, txn: _Transaction, doc_id: str) -> None:
+        """下書きからドキュメントを1件削除し、ポスティングの変更と統計を記録する."""
+        document = draft.documents.pop(doc_id)
+        self._remove_postings(draft, txn, document.slot, document.term_ids)
+        self._source_doc_ids(draft, txn, document.source_url).discard(doc_id)
+        del draft.slot_doc_ids[document.slot]
+        del draft.doc_lengths[document.slot]
+
+    @staticmethod
+    def _source_doc_ids(draft: _IndexState, txn: _Transaction, source_url: str) -> set[str]:
+        """下書きのソースURLのドキュメントID集合を返す（公開済みの集合は初回に複製する）."""
+        if source_url not in txn.copied_sources:
+            txn.copied_sources.add(source_url)
+            draft.source_docs[source_url] = set(draft.source_docs.get(source_url, ()))
+        return draft.source_docs[source_url]
+
+    @staticmethod
+    def _remove_postings(
+        draft: _IndexState, txn: _Transaction, slot: int, term_ids: array[int]
+    ) -> None:
+        """スロットのポスティングを取り除く変更を記録する."""
+        deltas = txn.deltas
+        terms = draft.terms
+        for term_id in set(term_ids):
+            delta = deltas.setdefault(terms[term_id], _TermDelta())
+            # 同じ書き込み内で追加したものは取り消すだけでよい
+            if delta.added.pop(slot, None) is None:
+                delta.removed[slot] = draft.doc_lengths[slot]
+        draft.total_length -= draft.doc_lengths[slot]
+
+    def _publish(self, draft: _IndexState, txn: _Transaction) -> None:
+        """変更を下書きにマージし、スコアリング用の配列を作ってから公開する.
+
+        変更された用語のポスティングだけを作り直す（公開済みのものは変更しない）。
+        書き込みロックを保持した状態で呼び出すこと。
+        """
+        deltas = txn.deltas
+        for source_url in txn.copied_sources:
+            if not draft.source_docs[source_url]:
+                del draft.source_docs[source_url]
+
+        published_dfs = {term: self._doc_freq(draft, term) for term in deltas}
+        if self._scoring == "sparse":
+            self._merge_matrix_rows(draft, deltas)
+        else:
+            self._merge_postings(draft, deltas)
+
+        # 文書頻度の分布を変更された用語の分だけ更新する
+        df_counts = dict(draft.df_counts)
+        for term, published_df in published_dfs.items():
+            df = self._doc_freq(draft, term)
+            if df == published_df:
+                continue
+            if published_df:
+                df_counts[published_df] -= 1
+                if not df_counts[published_df]:
+                    del df_counts[published_df]
+            if df:
+                df_counts[df] = df_counts.get(df, 0) + 1
+        draft.df_counts = df_counts
+        draft.idf_floor = self._compute_idf_floor(draft)
+
+        self._state = draft
+
+    def _merge_postings(self, draft: _IndexState, deltas: dict[str, _TermDelta]) -> None:
+        """変更された用語のポスティング辞書を複製してマージする."""
+        for term, delta in deltas.items():
+            published = draft.postings.get(term, {})
+            postings = dict(published)
+            for slot in delta.removed:
+                del postings[slot]
+            postings.update(delta.added)
+
+            if not postings:
+                draft.postings.pop(term, None)
+                draft.term_bounds.pop(term, None)
+                continue
+            draft.postings[term] = postings
+            if self._scoring == "maxscore":
+                draft.term_bounds[term] = self._merge_term_bound_frontier(
+                    draft, term, delta, published
+                )
+
+    @staticmethod
+    def _merge_matrix_rows(draft: _IndexState, deltas: dict[str, _TermDelta]) -> None:
+        """変更された用語の疎行列行を、削除分の除外と追加分の連結で作り直す.
+
+        各列の文書長も行に持たせる（置き換えたドキュメントの列は取り除いてから
+        追加し直すため、行ごとに公開時点の文書長と一致する）。
+        """
+        import numpy as np
+
+        doc_lengths = draft.doc_lengths
+        for term, delta in deltas.items():
+            row = draft.matrix_rows.get(term)
+            if row is None:
+                cols: npt.NDArray[np.int64] = np.empty(0, dtype=np.int64)
+                tfs: npt.NDArray[np.float64] = np.empty(0, dtype=np.float64)
+                lengths: npt.NDArray[np.float64] = np.empty(0, dtype=np.float64)
+            else:
+                cols, tfs, lengths = row
+            if delta.removed and cols.size:
+                removed = np.fromiter(delta.removed, dtype=np.int64, count=len(delta.removed))
+                keep = ~np.isin(cols, removed)
+                cols, tfs, lengths = cols[keep], tfs[keep], lengths[keep]
+            if delta.added:
+                count = len(delta.added)
+                cols = np.concatenate(
+                    (cols, np.fromiter(delta.added.keys(), dtype=np.int64, count=count))
+                )
+                tfs = np.concatenate(
+                    (tfs, np.fromiter(delta.added.values(), dtype=np.float64, count=count))
+                )
+                added_lengths = (doc_lengths[slot] for slot in delta.added)
+                lengths = np.concatenate(
+                    (lengths, np.fromiter(added_lengths, dtype=np.float64, count=count))
+                )
+
+            if cols.size:
+                draft.matrix_rows[term] = (cols, tfs, lengths)
+            else:
+                draft.matrix_rows.pop(term, None)
+
+    def _doc_freq(self, state: _IndexState, term: str) -> int:
+        """用語の文書頻度を返す."""
+        if self._scoring == "sparse":
+            row = state.matrix_rows.get(term)
+            return row[0].size if row is not None else 0
+        postings = state.postings.get(term)
+        return len(postings) if postings is not None else 0
+
+    def _compute_idf_floor(self, state: _IndexState) -> float:
+        """負のIDFの補正値（epsilon × 全用語の平均IDF）を計算する.
+
+        IDFは文書頻度だけで決まるため、文書頻度の分布（df_counts）から
+        異なる文書頻度の数に比例するコストで計算する。
+        """
+        n = len(state.documents)
+        term_count = sum(state.df_counts.values())
+        if not n or not term_count:
+            return 0.0
+        idf_sum = sum(
+            count * (math.log(n - df + 0.5) - math.log(df + 0.5))
+            for df, count in state.df_counts.items()
+        )
+        return self._epsilon * idf_sum / term_count
+
+    @staticmethod
+    def _idf(state: _IndexState, df: int) -> float:
+        """文書頻度からIDFを計算する（半数以上の文書に出現する用語の負のIDFは補正する）."""
+        n = len(state.documents)
+        value = math.log(n - df + 0.5) - math.log(df + 0.5)
+        return state.idf_floor if value < 0 else value
+
+    def _score(self, state: _IndexState, query_tokens: list[str]) -> dict[int, float]:
+        """クエリ用語を含むドキュメントのみを対象にBM25スコアを計算する.
+
+        Returns:
+            スロット -> スコア（クエリ用語を1つも含まないドキュメントは含まない）
+        """
+        avgdl = state.total_length / len(state.documents)
+        k1 = self._k1
+        b = self._b
+        # 内側のループではシャードを直接引く（スロット番号は自身がハッシュ値）
+        length_shards = state.doc_lengths.shards
+        mask = state.doc_lengths.mask
+
+        scores: dict[int, float] = {}
+        # クエリ内の重複用語はその回数だけ加算する（rank_bm25と同じ扱い）
+        for term in query_tokens:
+            postings = state.postings.get(term)
+            if not postings:
+                continue
+            term_idf = self._idf(state, len(postings))
+            for slot, tf in postings.items():
+                norm = k1 * (1 - b + b * length_shards[slot & mask][slot] / avgdl)
+                scores[slot] = scores.get(slot, 0.0) + term_idf * (tf * (k1 + 1) / (tf + norm))
+
+        return scores
+
+    def _top_k_sparse(
+        self, state: _IndexState, query_tokens: list[str], n_results: int
+    ) -> list[tuple[int, float]]:
+        """疎行列とクエリベクトルの積でスコアを計算し、上位k件を返す.
+
+        スコアはクエリ用語の行だけを連結して np.bincount で一括加算する。
+        上位k件は np.argpartition でk番目のスコアを求めて候補を絞り、
+        候補内のみを（スコア降順・追加順で）ソートする。
+
+        Returns:
+            (スロット, スコア) のリスト（スコア降順）
+        """
+        import numpy as np
+
+        avgdl = state.total_length / len(state.documents)
+        k1 = self._k1
+        # 文書長正規化項 k1 * (1 - b + b * dl / avgdl) = base + slope * dl
+        base = k1 * (1 - self._b)
+        slope = k1 * self._b / avgdl
+
+        columns: list[npt.NDArray[np.int64]] = []
+        weights: list[npt.NDArray[np.float64]] = []
+        for term, count in Counter(query_tokens).items():
+            row = state.matrix_rows.get(term)
+            if row is None:
+                continue
+            cols, tf, lengths = row
+            query_weight = self._idf(state, cols.size) * count
+            if query_weight == 0.0:
+                continue
+            denominator = lengths * slope
+            denominator += base
+            denominator += tf
+            columns.append(cols)
+            weights.append(tf * (query_weight * (k1 + 1)) / denominator)
+
+        if not columns:
+            return []
+
+        scores = np.bincount(
+            np.concatenate(columns),
+            weights=np.concatenate(weights),
+            minlength=state.next_slot,
+        )
+        candidates = np.flatnonzero(scores > 0)
+        if candidates.size > n_results:
+            # k番目に大きいスコア以上のものだけを残す（同点は後段で追加順に並べる）
+            candidate_scores = scores[candidates]
+            kth_position = candidates.size - n_results
+            kth = candidate_scores[np.argpartition(candidate_scores, kth_position)[kth_position]]
+            candidates = candidates[candidate_scores >= kth]
+
+        order = np.lexsort((candidates, -scores[candidates]))[:n_results]
+        return [(int(slot), float(scores[slot])) for slot in candidates[order]]
+
+    @staticmethod
+    def _merge_term_bound_frontier(
+        draft: _IndexState, term: str, delta: _TermDelta, published: dict[int, int]
+    ) -> dict[int, int]:
+        """用語の {出現回数: その出現回数での最小文書長} を変更分だけ更新する.
+
+        BM25の各項は出現回数に対して単調増加・文書長に対して単調減少のため、
+        出現回数ごとの最小文書長だけを見れば、平均文書長がいくつでも最大値を求められる。
+        取り除いたドキュメントが最小文書長だった場合のみ、用語全体から作り直す。
+        """
+        frontier = draft.term_bounds.get(term, {})
+        if any(frontier.get(published[slot]) == length for slot, length in delta.removed.items()):
+            frontier, added = {}, draft.postings[term]
         else:
-            self._bm25 = None
+            frontier, added = dict(frontier), delta.added
+
+        doc_lengths = draft.doc_lengths
+        for slot, tf in added.items():
+            length = doc_lengths[slot]
+            if length < frontier.get(tf, length + 1):
+                frontier[tf] = length
+        return frontier
+
+    def _top_k_postings(
+        self, state: _IndexState, query_tokens: list[str], n_results: int
+    ) -> list[tuple[int, float]]:
+        """全件スコアリングの結果から上位k件を返す（同点は追加順）."""
+        scores = self._score(state, query_tokens)
+        return heapq.nlargest(
+            n_results,
+            ((slot, score) for slot, score in scores.items() if score > 0),
+            key=lambda item: (item[1], -item[0]),
+        )
+
+    def _top_k_maxscore(
+        self, state: _IndexState, query_tokens: list[str], n_results: int
+    ) -> list[tuple[int, float]]:
+        """MaxScoreによる動的枝刈りで上位k件を返す.
+
+        クエリ用語を上限スコアの大きい順（おおむね希少な順）に処理し、その用語を含む
+        未評価のドキュメントだけを評価する。残りの用語の上限スコアの合計が現在のk番目の
+        スコア（閾値）を下回った時点で、以降のドキュメントは上位k件に入り得ないため
+        打ち切る。評価はポスティングの辞書引きで postings 方式と同じ順序で加算するため、
+        結果（スコア・同点の順序）は全件スコアリングと一致する。
 
-        self._needs_rebuild = False
-        logger.debug("Rebuilt BM25 index with %d documents", len(self._doc_ids))
+        Returns:
+            (スロット, スコア) のリスト（スコア降順）
+        """
+        avgdl = state.total_length / len(state.documents)
+        k1 = self._k1
+        b = self._b
+        doc_lengths = state.doc_lengths
+
+        query_postings = {
+            term: state.postings[term] for term in query_tokens if term in state.postings
+        }
+        if not query_postings:
+            return []
+        idf = {term: self._idf(state, len(postings)) for term, postings in query_postings.items()}
+        # 非正のIDFがあると上限スコアによる枝刈りが成り立たないため全件評価する
+        if any(idf[term] <= 0 for term in query_postings):
+            return self._top_k_postings(state, query_tokens, n_results)
+
+        query_counts = Counter(query_tokens)
+        uppers: dict[str, float] = {}
+        for term in query_postings:
+            best = max(
+                tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avgdl))
+                for tf, length in state.term_bounds[term].items()
+            )
+            uppers[term] = query_counts[term] * idf[term] * best * _MAXSCORE_BOUND_SLACK
+        terms = sorted(query_postings, key=lambda term: uppers[term], reverse=True)
+        # remaining[i]: i番目以降の用語だけを含むドキュメントが取り得る最大スコア
+        remaining = [sum(uppers[term] for term in terms[i:]) for i in range(len(terms))]
+
+        # (スコア, -スロット) の最小ヒープ。先頭がk番目（同点なら追加順が最も後）の結果
+        heap: list[tuple[float, int]] = []
+        evaluated: set[int] = set()
+        for i, term in enumerate(terms):
+            if len(heap) >= n_results and remaining[i] < heap[0][0]:
+                break
+            for slot in query_postings[term]:
+                if slot in evaluated:
+                    continue
+                evaluated.add(slot)
+
+                norm = k1 * (1 - b + b * doc_lengths[slot] / avgdl)
+                score = 0.0
+                for query_term in query_tokens:
+                    postings = query_postings.get(query_term)
+                    tf = postings.get(slot) if postings is not None else None
+                    if tf is not None:
+                        score = score + idf[query_term] * (tf * (k1 + 1) / (tf + norm))
+
+                entry = (score, -slot)
+                if len(heap) < n_results:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+                    if remaining[i] < heap[0][0]:
+                        break
+
+        return sorted(
+            ((-neg_slot, score) for score, neg_slot in heap),
+            key=lambda item: (-item[1], item[0]),
+        )
+
+
+def write_snapshot_file(path: str | Path, snapshot: dict[str, Any]) -> None:
+    """スナップショットをファイルへアトミックに書き込む.
+
+    一時ファイルに書き出してから置き換えるため、書き込み途中で
+    プロセスが停止しても既存のスナップショットは壊れない。
+
+    Args:
+        path: 書き込み先のパス
+        snapshot: BM25Index.to_snapshot() の戻り値
+    """
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{target.name}.", suffix=".tmp", dir=target.parent
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, target)
+    except BaseException:
+        # 失敗時は一時ファイルを残さない
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
 
 
 # ストップワード（日本語の一般的な助詞・助動詞など）
@@ -368,27 +1232,29 @@ def _tokenize_with_fugashi(
     """fugashiを使って形態素解析でトークン化する."""
     tokens: list[str] = []
 
-    for word in tagger(text):
-        # 品詞情報を取得
-        if not word.feature.pos1:
-            continue
+    # ノードの参照中もTaggerの内部状態を使うため、走査全体を排他する
+    with _tagger_lock:
+        for word in tagger(text):
+            # 品詞情報を取得
+            if not word.feature.pos1:
+                continue
 
-        pos = word.feature.pos1
-        surface = word.surface
+            pos = word.feature.pos1
+            surface = word.surface
 
-        # 名詞・動詞・形容詞のみ抽出
-        if pos not in INCLUDE_POS:
-            continue
+            # 名詞・動詞・形容詞のみ抽出
+            if pos not in INCLUDE_POS:
+                continue
 
-        # ストップワード除去
-        if surface in JAPANESE_STOPWORDS:
-            continue
+            # ストップワード除去
+            if surface in JAPANESE_STOPWORDS:
+                continue
 
-        # 1文字の助詞・記号をスキップ
-        if len(surface) == 1 and not surface.isalnum():
-            continue
+            # 1文字の助詞・記号をスキップ
+            if len(surface) == 1 and not surface.isalnum():
+                continue
 
-        tokens.append(surface)
+            tokens.append(surface)
 
     return tokens
 
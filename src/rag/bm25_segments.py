@@ -0,0 +1,1272 @@
+"""BM25インデックスのセグメント型ストレージ（LSM方式）
+
+仕様: docs/specs/f9-rag.md
+
+不変なセグメント（用語辞書・ポスティング・文書長などのnumpy配列をメモリマップで
+参照するファイル群）と、メモリ上の小さな書き込みバッファで構成する。
+
+- 追加: 書き込みバッファに入れ、一定件数に達したらセグメントとして書き出す
+- 削除: セグメント内のドキュメントに墓標（削除マーク）を付ける
+- マージ: セグメント数が上限を超えたら、小さいセグメントをバックグラウンドで
+  1つにまとめ、墓標の付いたドキュメントを物理的に取り除く
+- 永続化: セグメント一覧と墓標はマニフェストに、バッファ内の変更は書き込みログ
+  （WAL）に記録し、再起動時はマニフェストを開いてWALを再適用する
+
+常駐メモリは書き込みバッファ・墓標・語彙ごとの文書頻度に限られ、
+ドキュメント数が増えてもほぼ一定に保たれる。
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+logger = logging.getLogger(__name__)
+
+# セグメント・マニフェストのフォーマットバージョン（互換性のない変更時にインクリメント）
+SEGMENT_FORMAT_VERSION = 1
+
+_MANIFEST_NAME = "manifest.json"
+_WAL_NAME = "wal.jsonl"
+_SEGMENT_PREFIX = "seg-"
+
+
+@dataclass(frozen=True, slots=True)
+class _BufferedDoc:
+    """書き込みバッファ内のドキュメント."""
+
+    seq: int  # 追加順（同点スコアの並び順の決定に使う。置き換え時も維持する）
+    source_url: str
+    text: str | None
+    counts: dict[str, int]  # 用語 -> 出現回数
+    length: int
+
+
+def _bytes_array(values: list[bytes]) -> npt.NDArray[np.bytes_]:
+    """バイト列のリストを固定長バイト列のnumpy配列に変換する."""
+    width = max((len(value) for value in values), default=1)
+    return np.array(values, dtype=f"S{max(1, width)}")
+
+
+class _Segment:
+    """ディスク上の不変なセグメント.
+
+    配列はすべて np.load(mmap_mode="r") で開き、必要な範囲だけがページインされる。
+
+    - terms: 用語（UTF-8、昇順）、term_offsets: 用語ごとのポスティングの範囲
+    - post_docs / post_tfs: ポスティング（セグメント内の文書番号・出現回数）
+    - doc_lengths / doc_seqs / doc_ids: 文書番号ごとの文書長・追加順・ID
+    - sorted_doc_ids / sorted_doc_locals: IDの昇順とその文書番号（ID検索用）
+    - sources / source_starts: ソースURL（昇順）と文書番号の範囲（文書はソース順に並ぶ）
+    - doc_term_offsets / doc_term_ids / doc_term_tfs: 文書ごとの用語
+      （墓標を付けたときの文書頻度の補正とマージに使う）
+    - texts / text_offsets: 本文（UTF-8、本文を保持する場合のみ）
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.name = path.name
+
+        def load(name: str) -> Any:
+            return np.load(path / f"{name}.npy", mmap_mode="r")
+
+        self.terms: npt.NDArray[np.bytes_] = load("terms")
+        self.term_offsets: npt.NDArray[np.int64] = load("term_offsets")
+        self.post_docs: npt.NDArray[np.int32] = load("post_docs")
+        self.post_tfs: npt.NDArray[np.int32] = load("post_tfs")
+        self.doc_lengths: npt.NDArray[np.int32] = load("doc_lengths")
+        self.doc_seqs: npt.NDArray[np.int64] = load("doc_seqs")
+        self.doc_ids: npt.NDArray[np.bytes_] = load("doc_ids")
+        self.sorted_doc_ids: npt.NDArray[np.bytes_] = load("sorted_doc_ids")
+        self.sorted_doc_locals: npt.NDArray[np.int32] = load("sorted_doc_locals")
+        self.sources: npt.NDArray[np.bytes_] = load("sources")
+        self.source_starts: npt.NDArray[np.int64] = load("source_starts")
+        self.doc_term_offsets: npt.NDArray[np.int64] = load("doc_term_offsets")
+        self.doc_term_ids: npt.NDArray[np.int32] = load("doc_term_ids")
+        self.doc_term_tfs: npt.NDArray[np.int32] = load("doc_term_tfs")
+        self.has_text = (path / "texts.npy").exists()
+        if self.has_text:
+            self.texts: npt.NDArray[np.uint8] = load("texts")
+            self.text_offsets: npt.NDArray[np.int64] = load("text_offsets")
+
+        self.doc_count = int(self.doc_lengths.shape[0])
+        self.total_length = int(self.doc_lengths.sum(dtype=np.int64))
+
+    @property
+    def doc_freqs(self) -> npt.NDArray[np.int64]:
+        """用語ごとの文書頻度（墓標は考慮しない）."""
+        return np.diff(self.term_offsets)
+
+    def term_ordinal(self, term: bytes) -> int:
+        """用語のセグメント内の番号を返す（存在しない場合は-1）."""
+        terms = self.terms
+        if not terms.shape[0] or len(term) > terms.dtype.itemsize:
+            return -1
+        position = int(np.searchsorted(terms, term))
+        if position < terms.shape[0] and terms[position] == term:
+            return position
+        return -1
+
+    def postings(self, ordinal: int) -> tuple[npt.NDArray[np.int32], npt.NDArray[np.int32]]:
+        """用語のポスティング（文書番号, 出現回数）を返す."""
+        start, end = int(self.term_offsets[ordinal]), int(self.term_offsets[ordinal + 1])
+        return self.post_docs[start:end], self.post_tfs[start:end]
+
+    def find_docs(self, doc_ids: list[str]) -> dict[str, int]:
+        """IDに対応する文書番号を返す（墓標は考慮しない、存在しないIDは含まない）."""
+        sorted_ids = self.sorted_doc_ids
+        width = sorted_ids.dtype.itemsize
+        keys = [(doc_id, doc_id.encode("utf-8")) for doc_id in doc_ids]
+        keys = [(doc_id, key) for doc_id, key in keys if len(key) <= width]
+        if not keys or not sorted_ids.shape[0]:
+            return {}
+        needles = np.array([key for _, key in keys], dtype=sorted_ids.dtype)
+        positions = np.minimum(np.searchsorted(sorted_ids, needles), sorted_ids.shape[0] - 1)
+        matched = sorted_ids[positions] == needles
+        return {
+            doc_id: int(self.sorted_doc_locals[position])
+            for (doc_id, _), position, hit in zip(keys, positions, matched, strict=True)
+            if hit
+        }
+
+    def source_range(self, source_url: str) -> range:
+        """ソースURLのドキュメントの文書番号の範囲を返す."""
+        ordinal = _sorted_lookup(self.sources, source_url.encode("utf-8"))
+        if ordinal < 0:
+            return range(0)
+        return range(int(self.source_starts[ordinal]), int(self.source_starts[ordinal + 1]))
+
+    def doc_id(self, local: int) -> str:
+        """文書番号のIDを返す."""
+        return bytes(self.doc_ids[local]).decode("utf-8")
+
+    def source_url(self, local: int) -> str:
+        """文書番号のソースURLを返す."""
+        ordinal = int(np.searchsorted(self.source_starts, local, side="right")) - 1
+        return bytes(self.sources[ordinal]).decode("utf-8")
+
+    def doc_source_ordinals(self) -> npt.NDArray[np.int64]:
+        """文書番号ごとのソースURLの番号を返す."""
+        return np.repeat(
+            np.arange(self.sources.shape[0], dtype=np.int64), np.diff(self.source_starts)
+        )
+
+    def doc_terms(self, locals_: npt.NDArray[np.int64]) -> npt.NDArray[np.int32]:
+        """文書番号の集合に含まれる用語番号を（重複ありで）返す."""
+        if not locals_.size:
+            return np.empty(0, dtype=np.int32)
+        starts = self.doc_term_offsets[locals_]
+        ends = self.doc_term_offsets[locals_ + 1]
+        return np.concatenate(
+            [self.doc_term_ids[int(s):int(e)] for s, e in zip(starts, ends, strict=True)]
+        )
+
+    def text(self, local: int) -> str:
+        """文書番号の本文を返す（本文を保持しない場合は空文字列）."""
+        if not self.has_text:
+            return ""
+        start, end = int(self.text_offsets[local]), int(self.text_offsets[local + 1])
+        return self.texts[start:end].tobytes().decode("utf-8")
+
+
+def _sorted_lookup(values: npt.NDArray[np.bytes_], key: bytes) -> int:
+    """昇順の固定長バイト列配列から key の位置を返す（存在しない場合は-1）."""
+    if not values.shape[0] or len(key) > values.dtype.itemsize:
+        return -1
+    position = int(np.searchsorted(values, key))
+    if position < values.shape[0] and values[position] == key:
+        return position
+    return -1
+
+
+def _write_segment(
+    path: Path,
+    *,
+    doc_ids: npt.NDArray[np.bytes_],
+    sources: npt.NDArray[np.bytes_],
+    seqs: npt.NDArray[np.int64],
+    lengths: npt.NDArray[np.int32],
+    texts: list[bytes] | None,
+    terms: npt.NDArray[np.bytes_],
+    triple_terms: npt.NDArray[np.int64],
+    triple_docs: npt.NDArray[np.int64],
+    triple_tfs: npt.NDArray[np.int32],
+) -> None:
+    """セグメントのファイル群を書き出す.
+
+    ドキュメントは (ソースURL, 追加順) で並べ替えて文書番号を振り直す。
+    一時ディレクトリに書き出してから名前を変更するため、途中で停止しても
+    不完全なセグメントは残らない。
+
+    Args:
+        path: セグメントのディレクトリ
+        doc_ids / sources / seqs / lengths: ドキュメントごとの属性（入力順）
+        texts: ドキュメントごとの本文（UTF-8、本文を保持しない場合はNone）
+        terms: 用語（UTF-8、昇順・重複なし）
+        triple_terms / triple_docs / triple_tfs: (用語番号, 入力順の文書番号, 出現回数)
+    """
+    order = np.lexsort((seqs, sources))
+    new_local = np.empty(order.size, dtype=np.int64)
+    new_local[order] = np.arange(order.size, dtype=np.int64)
+    sorted_sources = sources[order]
+
+    docs = new_local[triple_docs]
+    by_term = np.lexsort((docs, triple_terms))
+    by_doc = np.lexsort((triple_terms, docs))
+    term_offsets = np.zeros(terms.shape[0] + 1, dtype=np.int64)
+    np.cumsum(np.bincount(triple_terms, minlength=terms.shape[0]), out=term_offsets[1:])
+    doc_term_offsets = np.zeros(order.size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(docs, minlength=order.size), out=doc_term_offsets[1:])
+
+    unique_sources, source_first = np.unique(sorted_sources, return_index=True)
+    source_starts = np.append(source_first.astype(np.int64), order.size)
+    ordered_ids = doc_ids[order]
+    id_order = np.argsort(ordered_ids, kind="stable")
+
+    arrays: dict[str, npt.NDArray[Any]] = {
+        "terms": terms,
+        "term_offsets": term_offsets,
+        "post_docs": docs[by_term].astype(np.int32),
+        "post_tfs": triple_tfs[by_term].astype(np.int32),
+        "doc_lengths": lengths[order].astype(np.int32),
+        "doc_seqs": seqs[order].astype(np.int64),
+        "doc_ids": ordered_ids,
+        "sorted_doc_ids": ordered_ids[id_order],
+        "sorted_doc_locals": id_order.astype(np.int32),
+        "sources": unique_sources,
+        "source_starts": source_starts,
+        "doc_term_offsets": doc_term_offsets,
+        "doc_term_ids": triple_terms[by_doc].astype(np.int32),
+        "doc_term_tfs": triple_tfs[by_doc].astype(np.int32),
+    }
+    if texts is not None:
+        ordered_texts = [texts[i] for i in order]
+        text_offsets = np.zeros(order.size + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in ordered_texts], out=text_offsets[1:])
+        arrays["texts"] = np.frombuffer(b"".join(ordered_texts), dtype=np.uint8)
+        arrays["text_offsets"] = text_offsets
+
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+    for name, array in arrays.items():
+        np.save(tmp_path / f"{name}.npy", array)
+    os.replace(tmp_path, path)
+
+
+@dataclass
+class _Vocabulary:
+    """セグメント全体の用語ごとの文書頻度（墓標・書き込みバッファは含まない）.
+
+    IDF補正値（epsilon × 全用語の平均IDF）の計算に使う。セグメントの構成が
+    変わったときだけ作り直す。
+    """
+
+    terms: npt.NDArray[np.bytes_]  # 全セグメントの用語（昇順・重複なし）
+    doc_freqs: npt.NDArray[np.float64]
+    # セグメントごとの「セグメント内の用語番号 -> terms の位置」
+    positions: list[npt.NDArray[np.int64]]
+
+    @classmethod
+    def build(cls, segments: list[_Segment]) -> _Vocabulary:
+        """セグメントの用語辞書をまとめる."""
+        if not segments:
+            return cls(terms=_bytes_array([]), doc_freqs=np.empty(0), positions=[])
+        terms, inverse = np.unique(
+            np.concatenate([np.asarray(segment.terms) for segment in segments]),
+            return_inverse=True,
+        )
+        doc_freqs = np.bincount(
+            inverse,
+            weights=np.concatenate([segment.doc_freqs for segment in segments]),
+            minlength=terms.shape[0],
+        ).astype(np.float64)
+        positions: list[npt.NDArray[np.int64]] = []
+        offset = 0
+        for segment in segments:
+            size = segment.terms.shape[0]
+            positions.append(inverse[offset:offset + size].astype(np.int64))
+            offset += size
+        return cls(terms=terms, doc_freqs=doc_freqs, positions=positions)
+
+
+@dataclass
+class _StoreState:
+    """検索が参照するストアの状態.
+
+    公開（BM25SegmentStore._state への代入）後は変更しない。書き込みは draft() で
+    複製した下書きを変更してから参照を差し替える（BM25Index の _IndexState と同じ方式）。
+    """
+
+    segments: list[_Segment] = field(default_factory=list)
+    # セグメントごとの墓標（削除済みの文書番号のマスク、墓標が無ければNone）
+    deleted: list[npt.NDArray[np.bool_] | None] = field(default_factory=list)
+    # セグメントごとの「用語番号 -> 墓標の付いたドキュメントのうちその用語を含む数」
+    removed_df: list[dict[int, int]] = field(default_factory=list)
+    vocabulary: _Vocabulary | None = None
+    buffer: dict[str, _BufferedDoc] = field(default_factory=dict)
+    doc_count: int = 0
+    total_length: int = 0
+    next_seq: int = 0
+    idf_floor: float = 0.0
+
+    def draft(self) -> _StoreState:
+        """書き込み用の下書きを作成する（墓標のマスク・辞書自体は変更時に複製する）."""
+        return _StoreState(
+            segments=list(self.segments),
+            deleted=list(self.deleted),
+            removed_df=list(self.removed_df),
+            vocabulary=self.vocabulary,
+            buffer=dict(self.buffer),
+            doc_count=self.doc_count,
+            total_length=self.total_length,
+            next_seq=self.next_seq,
+        )
+
+
+@dataclass
+class _Transaction:
+    """1回の書き込みでの変更."""
+
+    # 下書き用に墓標を複製済みのセグメント（公開済みのマスク・辞書は変更しない）
+    copied: set[str] = field(default_factory=set)
+    segments_changed: bool = False
+    wal: list[dict[str, Any]] = field(default_factory=list)
+
+
+class BM25SegmentStore:
+    """メモリマップしたセグメントに保持するBM25のコーパス.
+
+    仕様: docs/specs/f9-rag.md
+
+    BM25Index のバックエンドとして使用する（BM25Index(segment_dir=...)）。
+    スコアは BM25Index の sparse 方式と同じ式・同じ加算順で計算する。
+    検索は公開済みの状態に対してロックなしで行い、書き込み同士は直列化する。
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        *,
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+        tokenizer: str = "",
+        buffer_size: int = 5000,
+        max_segments: int = 8,
+        merge_factor: int = 4,
+        store_text: bool = True,
+        background_merge: bool = True,
+    ) -> None:
+        """セグメントのディレクトリを開く（無ければ作成する）.
+
+        Args:
+            directory: セグメント・マニフェスト・WALを置くディレクトリ
+            k1 / b / epsilon: BM25パラメータ
+            tokenizer: トークナイザ名（一致しない既存のセグメントは破棄する）
+            buffer_size: 書き込みバッファをセグメントとして書き出すドキュメント数
+            max_segments: マージを開始するセグメント数
+            merge_factor: 1回のマージでまとめるセグメント数
+            store_text: 本文をセグメントに保持するか
+            background_merge: マージを別スレッドで行うか（Falseの場合は書き込み時に行う）
+        """
+        self._directory = Path(directory)
+        self._k1 = k1
+        self._b = b
+        self._epsilon = epsilon
+        self._tokenizer = tokenizer
+        self._buffer_size = max(1, buffer_size)
+        self._max_segments = max(2, max_segments)
+        self._merge_factor = max(2, merge_factor)
+        self._store_text = store_text
+        self._background_merge = background_merge
+
+        self._state = _StoreState()
+        self._write_lock = threading.Lock()
+        self._next_segment = 0
+        self._merge_thread: threading.Thread | None = None
+        # 追記先のWAL（close() 後はNoneにして追記しない）
+        self._wal_path: Path | None = None
+
+        self._open()
+
+    # ------------------------------------------------------------------
+    # 公開API（BM25Index から呼ばれる）
+    # ------------------------------------------------------------------
+
+    def add_documents(
+        self, documents: list[tuple[str, str, str]], tokenized: list[list[str]]
+    ) -> int:
+        """ドキュメントを追加する（同じIDのドキュメントは置き換える）.
+
+        Returns:
+            新規に追加されたドキュメント数
+        """
+        with self._write_lock:
+            draft = self._state.draft()
+            txn = _Transaction()
+            # 既存のドキュメントの位置はまとめて引いておく
+            located = self._locate(draft, [doc_id for doc_id, _, _ in documents])
+            first_new = len(draft.segments)
+            added = 0
+            for (doc_id, text, source_url), tokens in zip(documents, tokenized, strict=True):
+                counts = dict(Counter(tokens))
+                location = self._find(draft, doc_id, located, first_new)
+                if self._insert(
+                    draft, txn, doc_id, text, source_url, counts, len(tokens), location
+                ):
+                    added += 1
+                txn.wal.append({
+                    "op": "add",
+                    "id": doc_id,
+                    "source": source_url,
+                    "text": text if self._store_text else None,
+                    "counts": counts,
+                })
+                if len(draft.buffer) >= self._buffer_size:
+                    self._flush(draft, txn)
+            self._commit(draft, txn)
+        return added
+
+    def delete_by_source(self, source_url: str) -> int:
+        """ソースURL指定でドキュメントを削除する.
+
+        Returns:
+            削除されたドキュメント数
+        """
+        with self._write_lock:
+            draft = self._state.draft()
+            txn = _Transaction()
+            deleted = self._delete_source(draft, txn, source_url)
+            if not deleted:
+                return 0
+            txn.wal.append({"op": "delete", "source": source_url})
+            self._commit(draft, txn)
+        return deleted
+
+    def delete_documents(self, doc_ids: list[str]) -> int:
+        """ID指定でドキュメントを削除する（存在しないIDは無視する）.
+
+        Returns:
+            削除されたドキュメント数
+        """
+        with self._write_lock:
+            draft = self._state.draft()
+            txn = _Transaction()
+            deleted = self._delete_ids(draft, txn, doc_ids)
+            if not deleted:
+                return 0
+            txn.wal.append({"op": "delete_ids", "ids": list(doc_ids)})
+            self._commit(draft, txn)
+        return deleted
+
+    def top_k(self, query_tokens: list[str], n_results: int) -> list[tuple[str, float]]:
+        """クエリ用語でスコアを計算し、上位k件の (ID, スコア) をスコア降順で返す."""
+        state = self._state
+        if not state.doc_count or n_results <= 0:
+            return []
+        avgdl = state.total_length / state.doc_count
+        k1, b = self._k1, self._b
+
+        query_counts = Counter(query_tokens)
+        keys = {term: term.encode("utf-8") for term in query_counts}
+        ordinals = [
+            {term: segment.term_ordinal(key) for term, key in keys.items()}
+            for segment in state.segments
+        ]
+
+        # クエリ用語ごとの重み（IDF × クエリ内の出現回数）。sparse方式と同じく
+        # Counter の順に処理し、非正の重みの用語は加算しない
+        weights: dict[str, float] = {}
+        for term, count in query_counts.items():
+            df = self._live_doc_freq(state, ordinals, term)
+            if df == 0:
+                continue
+            value = math.log(state.doc_count - df + 0.5) - math.log(df + 0.5)
+            weight = (state.idf_floor if value < 0 else value) * count
+            if weight != 0.0:
+                weights[term] = weight
+        if not weights:
+            return []
+
+        # (スコア, -追加順, ID取得用の位置) の候補を集め、最後にまとめて上位k件を選ぶ
+        candidates: list[tuple[float, int, int, int]] = []
+        for index, segment in enumerate(state.segments):
+            candidates.extend(
+                self._top_k_segment(
+                    state, index, segment, ordinals[index], weights, avgdl, n_results
+                )
+            )
+        buffer_ids = list(state.buffer)
+        for position, doc_id in enumerate(buffer_ids):
+            document = state.buffer[doc_id]
+            norm = k1 * (1 - b + b * document.length / avgdl)
+            score = 0.0
+            matched = False
+            for term, weight in weights.items():
+                tf = document.counts.get(term)
+                if tf is not None:
+                    matched = True
+                    score = score + weight * (tf * (k1 + 1) / (tf + norm))
+            if matched and score > 0:
+                candidates.append((score, -document.seq, -1, position))
+
+        top = heapq.nlargest(n_results, candidates, key=lambda item: (item[0], item[1]))
+        return [
+            (
+                buffer_ids[local] if index < 0 else state.segments[index].doc_id(local),
+                score,
+            )
+            for score, _, index, local in top
+        ]
+
+    def get_texts(self, doc_ids: list[str]) -> dict[str, str]:
+        """ID指定で本文を返す（本文を保持しない場合は空の辞書）."""
+        if not self._store_text:
+            return {}
+        state = self._state
+        texts: dict[str, str] = {}
+        for doc_id, (index, local) in self._locate(state, doc_ids).items():
+            if index < 0:
+                texts[doc_id] = state.buffer[doc_id].text or ""
+            else:
+                texts[doc_id] = state.segments[index].text(local)
+        return texts
+
+    def get_document_count(self) -> int:
+        """ドキュメント数（墓標の付いたものを除く）を返す."""
+        return self._state.doc_count
+
+    def get_segment_count(self) -> int:
+        """セグメント数を返す."""
+        return len(self._state.segments)
+
+    def get_source_url(self, doc_id: str) -> str | None:
+        """ドキュメントIDからソースURLを取得する."""
+        state = self._state
+        location = self._locate(state, [doc_id]).get(doc_id)
+        if location is None:
+            return None
+        index, local = location
+        if index < 0:
+            return state.buffer[doc_id].source_url
+        return state.segments[index].source_url(local)
+
+    def flush(self) -> None:
+        """書き込みバッファをセグメントとして書き出す."""
+        with self._write_lock:
+            if not self._state.buffer:
+                return
+            draft = self._state.draft()
+            txn = _Transaction()
+            self._flush(draft, txn)
+            self._commit(draft, txn)
+
+    def wait_for_merges(self) -> None:
+        """実行中のバックグラウンドマージの完了を待つ."""
+        while True:
+            # マージスレッドは書き込みロックを保持したまま参照を外してから結果を公開するため、
+            # 参照はロック下で読む（公開前に待ち終えないようにする）
+            with self._write_lock:
+                thread = self._merge_thread
+            if thread is None:
+                return
+            thread.join()
+            with self._write_lock:
+                if self._merge_thread is thread:
+                    return
+
+    def close(self) -> None:
+        """書き込みバッファを書き出し、マージの完了を待ってからWALを閉じる."""
+        self.flush()
+        self.wait_for_merges()
+        with self._write_lock:
+            self._wal_path = None
+
+    # ------------------------------------------------------------------
+    # 検索
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _live_doc_freq(
+        state: _StoreState, ordinals: list[dict[str, int]], term: str
+    ) -> int:
+        """墓標を除いた用語の文書頻度を返す."""
+        df = 0
+        for index, segment in enumerate(state.segments):
+            ordinal = ordinals[index][term]
+            if ordinal < 0:
+                continue
+            df += int(segment.term_offsets[ordinal + 1] - segment.term_offsets[ordinal])
+            df -= state.removed_df[index].get(ordinal, 0)
+        df += sum(1 for document in state.buffer.values() if term in document.counts)
+        return df
+
+    def _top_k_segment(
+        self,
+        state: _StoreState,
+        index: int,
+        segment: _Segment,
+        ordinals: dict[str, int],
+        weights: dict[str, float],
+        avgdl: float,
+        n_results: int,
+    ) -> list[tuple[float, int, int, int]]:
+        """セグメント内の上位k件の候補を返す."""
+        k1, b = self._k1, self._b
+        deleted = state.deleted[index]
+        columns: list[npt.NDArray[np.int64]] = []
+        contributions: list[npt.NDArray[np.float64]] = []
+        for term, weight in weights.items():
+            ordinal = ordinals[term]
+            if ordinal < 0:
+                continue
+            docs, tfs = segment.postings(ordinal)
+            docs64 = docs.astype(np.int64)
+            tf = tfs.astype(np.float64)
+            if deleted is not None:
+                keep = ~deleted[docs64]
+                docs64, tf = docs64[keep], tf[keep]
+            norms = k1 * (1 - b + b * segment.doc_lengths[docs64].astype(np.float64) / avgdl)
+            columns.append(docs64)
+            contributions.append(weight * (tf * (k1 + 1) / (tf + norms)))
+        if not columns:
+            return []
+
+        # 対象ドキュメントだけに詰めて加算する（加算順は用語の順でsparse方式と同じ）
+        unique_docs, inverse = np.unique(np.concatenate(columns), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(contributions))
+        positive = np.flatnonzero(scores > 0)
+        if positive.size > n_results:
+            candidate_scores = scores[positive]
+            kth_position = positive.size - n_results
+            kth = candidate_scores[np.argpartition(candidate_scores, kth_position)[kth_position]]
+            positive = positive[candidate_scores >= kth]
+        seqs = segment.doc_seqs[unique_docs[positive]]
+        return [
+            (float(scores[position]), -int(seq), index, int(unique_docs[position]))
+            for position, seq in zip(positive, seqs, strict=True)
+        ]
+
+    # ------------------------------------------------------------------
+    # 書き込み（書き込みロックを保持した状態で呼び出す）
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _locate(state: _StoreState, doc_ids: list[str]) -> dict[str, tuple[int, int]]:
+        """IDごとの位置 (セグメント番号, 文書番号) を返す（バッファ内は (-1, -1)）."""
+        locations: dict[str, tuple[int, int]] = {}
+        remaining: list[str] = []
+        for doc_id in doc_ids:
+            if doc_id in state.buffer:
+                locations[doc_id] = (-1, -1)
+            else:
+                remaining.append(doc_id)
+        for index, segment in enumerate(state.segments):
+            if not remaining:
+                break
+            deleted = state.deleted[index]
+            for doc_id, local in segment.find_docs(remaining).items():
+                if deleted is None or not deleted[local]:
+                    locations[doc_id] = (index, local)
+            remaining = [doc_id for doc_id in remaining if doc_id not in locations]
+        return locations
+
+    @staticmethod
+    def _find(
+        draft: _StoreState,
+        doc_id: str,
+        located: dict[str, tuple[int, int]],
+        first_new: int,
+    ) -> tuple[int, int] | None:
+        """書き込み中のドキュメントの現在の位置を返す.
+
+        located は書き込み開始時点の _locate() の結果。その後に墓標が付いたものは除き、
+        書き込み中に書き出したセグメント（first_new 以降）は個別に探す。
+        """
+        if doc_id in draft.buffer:
+            return (-1, -1)
+        location = located.get(doc_id)
+        if location is not None and location[0] >= 0:
+            mask = draft.deleted[location[0]]
+            if mask is None or not mask[location[1]]:
+                return location
+        for index in range(first_new, len(draft.segments)):
+            local = draft.segments[index].find_docs([doc_id]).get(doc_id)
+            mask = draft.deleted[index]
+            if local is not None and (mask is None or not mask[local]):
+                return (index, local)
+        return None
+
+    def _insert(
+        self,
+        draft: _StoreState,
+        txn: _Transaction,
+        doc_id: str,
+        text: str,
+        source_url: str,
+        counts: dict[str, int],
+        length: int,
+        location: tuple[int, int] | None,
+    ) -> bool:
+        """下書きのバッファにドキュメントを登録する（既存のものは墓標を付けて置き換える）.
+
+        Args:
+            location: 既存のドキュメントの位置（_find() の結果）
+
+        Returns:
+            新規追加の場合True
+        """
+        if location is None:
+            seq = draft.next_seq
+            draft.next_seq += 1
+        elif location[0] < 0:
+            previous = draft.buffer.pop(doc_id)
+            seq = previous.seq
+            draft.doc_count -= 1
+            draft.total_length -= previous.length
+        else:
+            index, local = location
+            seq = int(draft.segments[index].doc_seqs[local])
+            self._tombstone(draft, txn, index, np.array([local], dtype=np.int64))
+
+        draft.buffer[doc_id] = _BufferedDoc(
+            seq=seq,
+            source_url=source_url,
+            text=text if self._store_text else None,
+            counts=counts,
+            length=length,
+        )
+        draft.doc_count += 1
+        draft.total_length += length
+        return location is None
+
+    def _delete_source(self, draft: _StoreState, txn: _Transaction, source_url: str) -> int:
+        """下書きからソースURLのドキュメントを削除し、削除数を返す."""
+        deleted = 0
+        for doc_id in [
+            doc_id for doc_id, document in draft.buffer.items()
+            if document.source_url == source_url
+        ]:
+            document = draft.buffer.pop(doc_id)
+            draft.doc_count -= 1
+            draft.total_length -= document.length
+            deleted += 1
+        for index, segment in enumerate(draft.segments):
+            span = segment.source_range(source_url)
+            if span:
+                deleted += self._tombstone(
+                    draft, txn, index, np.arange(span.start, span.stop, dtype=np.int64)
+                )
+        return deleted
+
+    def _delete_ids(self, draft: _StoreState, txn: _Transaction, doc_ids: list[str]) -> int:
+        """下書きからID指定でドキュメントを削除し、削除数を返す."""
+        deleted = 0
+        by_segment: dict[int, list[int]] = {}
+        for doc_id, (index, local) in self._locate(draft, doc_ids).items():
+            if index < 0:
+                document = draft.buffer.pop(doc_id)
+                draft.doc_count -= 1
+                draft.total_length -= document.length
+                deleted += 1
+            else:
+                by_segment.setdefault(index, []).append(local)
+        for index, locals_ in by_segment.items():
+            deleted += self._tombstone(draft, txn, index, np.array(locals_, dtype=np.int64))
+        return deleted
+
+    @staticmethod
+    def _tombstone(
+        draft: _StoreState, txn: _Transaction, index: int, locals_: npt.NDArray[np.int64]
+    ) -> int:
+        """セグメント内のドキュメントに墓標を付け、統計を更新する.
+
+        Returns:
+            新たに墓標を付けたドキュメント数
+        """
+        segment = draft.segments[index]
+        if segment.name not in txn.copied:
+            txn.copied.add(segment.name)
+            published = draft.deleted[index]
+            draft.deleted[index] = (
+                np.zeros(segment.doc_count, dtype=bool) if published is None
+                else published.copy()
+            )
+            draft.removed_df[index] = dict(draft.removed_df[index])
+        mask = draft.deleted[index]
+        assert mask is not None
+        locals_ = locals_[~mask[locals_]]
+        if not locals_.size:
+            return 0
+        mask[locals_] = True
+
+        removed_df = draft.removed_df[index]
+        for ordinal, count in Counter(segment.doc_terms(locals_).tolist()).items():
+            removed_df[ordinal] = removed_df.get(ordinal, 0) + count
+        draft.doc_count -= int(locals_.size)
+        draft.total_length -= int(segment.doc_lengths[locals_].sum(dtype=np.int64))
+        return int(locals_.size)
+
+    def _flush(self, draft: _StoreState, txn: _Transaction) -> None:
+        """下書きのバッファをセグメントとして書き出し、下書きに加える."""
+        if not draft.buffer:
+            return
+        items = list(draft.buffer.items())
+        terms = sorted({term.encode("utf-8") for _, document in items for term in document.counts})
+        ordinal = {term: i for i, term in enumerate(terms)}
+        triple_terms: list[int] = []
+        triple_docs: list[int] = []
+        triple_tfs: list[int] = []
+        for local, (_, document) in enumerate(items):
+            for term, tf in document.counts.items():
+                triple_terms.append(ordinal[term.encode("utf-8")])
+                triple_docs.append(local)
+                triple_tfs.append(tf)
+
+        path = self._new_segment_path()
+        _write_segment(
+            path,
+            doc_ids=_bytes_array([doc_id.encode("utf-8") for doc_id, _ in items]),
+            sources=_bytes_array([document.source_url.encode("utf-8") for _, document in items]),
+            seqs=np.array([document.seq for _, document in items], dtype=np.int64),
+            lengths=np.array([document.length for _, document in items], dtype=np.int32),
+            texts=(
+                [(document.text or "").encode("utf-8") for _, document in items]
+                if self._store_text else None
+            ),
+            terms=_bytes_array(terms),
+            triple_terms=np.array(triple_terms, dtype=np.int64),
+            triple_docs=np.array(triple_docs, dtype=np.int64),
+            triple_tfs=np.array(triple_tfs, dtype=np.int32),
+        )
+        draft.segments.append(_Segment(path))
+        draft.deleted.append(None)
+        draft.removed_df.append({})
+        draft.buffer = {}
+        txn.segments_changed = True
+        logger.debug("Flushed BM25 write buffer to segment %s (%d docs)", path.name, len(items))
+
+    def _commit(self, draft: _StoreState, txn: _Transaction) -> None:
+        """変更を永続化してから下書きを公開する."""
+        # 全ドキュメントに墓標が付いたセグメントは取り除く
+        dropped: list[_Segment] = []
+        for index in reversed(range(len(draft.segments))):
+            mask = draft.deleted[index]
+            if mask is not None and bool(mask.all()):
+                dropped.append(draft.segments.pop(index))
+                del draft.deleted[index]
+                del draft.removed_df[index]
+                txn.segments_changed = True
+
+        if txn.segments_changed:
+            draft.vocabulary = _Vocabulary.build(draft.segments)
+            # セグメントの構成とそれまでの墓標をマニフェストに記録し、WALを空にする
+            self._write_manifest(draft)
+            self._reset_wal(list(draft.buffer.items()))
+        else:
+            self._append_wal(txn.wal)
+
+        draft.idf_floor = self._compute_idf_floor(draft)
+        self._state = draft
+        for segment in dropped:
+            shutil.rmtree(segment.path, ignore_errors=True)
+        self._maybe_merge()
+
+    def _compute_idf_floor(self, state: _StoreState) -> float:
+        """負のIDFの補正値（epsilon × 全用語の平均IDF）を計算する."""
+        vocabulary = state.vocabulary
+        doc_freqs = (
+            vocabulary.doc_freqs.copy() if vocabulary is not None else np.empty(0)
+        )
+        if vocabulary is not None:
+            for index, removed in enumerate(state.removed_df):
+                if removed:
+                    positions = vocabulary.positions[index][
+                        np.fromiter(removed.keys(), dtype=np.int64, count=len(removed))
+                    ]
+                    np.subtract.at(
+                        doc_freqs,
+                        positions,
+                        np.fromiter(removed.values(), dtype=np.float64, count=len(removed)),
+                    )
+
+        extra: list[float] = []
+        buffer_freqs = Counter(
+            term for document in state.buffer.values() for term in document.counts
+        )
+        for term, count in buffer_freqs.items():
+            position = (
+                _sorted_lookup(vocabulary.terms, term.encode("utf-8"))
+                if vocabulary is not None else -1
+            )
+            if position < 0:
+                extra.append(float(count))
+            else:
+                doc_freqs[position] += count
+
+        all_freqs = np.concatenate((doc_freqs[doc_freqs > 0], np.asarray(extra, dtype=np.float64)))
+        if not all_freqs.size or not state.doc_count:
+            return 0.0
+        n = state.doc_count
+        idf_sum = float(np.sum(np.log(n - all_freqs + 0.5) - np.log(all_freqs + 0.5)))
+        return self._epsilon * idf_sum / all_freqs.size
+
+    # ------------------------------------------------------------------
+    # マージ
+    # ------------------------------------------------------------------
+
+    def _maybe_merge(self) -> None:
+        """セグメント数が上限を超えていれば、小さいセグメントのマージを開始する."""
+        state = self._state
+        if len(state.segments) < self._max_segments:
+            return
+        if self._merge_thread is not None and self._merge_thread.is_alive():
+            return
+
+        live = [
+            segment.doc_count - (int(mask.sum()) if mask is not None else 0)
+            for segment, mask in zip(state.segments, state.deleted, strict=True)
+        ]
+        chosen = sorted(range(len(state.segments)), key=lambda i: live[i])[: self._merge_factor]
+        segments = [state.segments[i] for i in chosen]
+        masks = [state.deleted[i] for i in chosen]
+        path = self._new_segment_path()
+        if not self._background_merge:
+            self._merge(segments, masks, path)
+            return
+        thread = threading.Thread(
+            target=self._merge, args=(segments, masks, path), name="bm25-merge", daemon=True
+        )
+        self._merge_thread = thread
+        thread.start()
+
+    def _merge(
+        self,
+        segments: list[_Segment],
+        masks: list[npt.NDArray[np.bool_] | None],
+        path: Path,
+    ) -> None:
+        """セグメントを1つにまとめ、完成したら差し替える.
+
+        書き出しは書き込みロックの外で行い、その間に付いた墓標は差し替え時に
+        新しいセグメントへ付け直す。
+        """
+        try:
+            self._write_merged_segment(segments, masks, path)
+            merged = _Segment(path)
+        except Exception:
+            logger.warning("BM25 segment merge failed", exc_info=True)
+            shutil.rmtree(path, ignore_errors=True)
+            return
+
+        lock_held = not self._background_merge
+        if not lock_held:
+            self._write_lock.acquire()
+        try:
+            draft = self._state.draft()
+            txn = _Transaction(segments_changed=True)
+            late_deleted: list[str] = []
+            for segment, mask in zip(segments, masks, strict=True):
+                index = next(
+                    (i for i, s in enumerate(draft.segments) if s is segment), None
+                )
+                if index is None:
+                    # マージ中に全ドキュメントが削除されて取り除かれた
+                    live = np.arange(segment.doc_count) if mask is None else np.flatnonzero(~mask)
+                    late_deleted.extend(segment.doc_id(int(i)) for i in live)
+                    continue
+                current = draft.deleted[index]
+                if current is not None:
+                    # マージ開始後に付いた墓標
+                    late = current if mask is None else current & ~mask
+                    late_deleted.extend(segment.doc_id(int(i)) for i in np.flatnonzero(late))
+                    draft.doc_count += int(current.sum())
+                    draft.total_length += int(
+                        segment.doc_lengths[np.flatnonzero(current)].sum(dtype=np.int64)
+                    )
+                draft.doc_count -= segment.doc_count
+                draft.total_length -= segment.total_length
+                del draft.segments[index]
+                del draft.deleted[index]
+                del draft.removed_df[index]
+
+            draft.segments.append(merged)
+            draft.deleted.append(None)
+            draft.removed_df.append({})
+            draft.doc_count += merged.doc_count
+            draft.total_length += merged.total_length
+            found = merged.find_docs(late_deleted)
+            if found:
+                self._tombstone(
+                    draft,
+                    txn,
+                    len(draft.segments) - 1,
+                    np.fromiter(found.values(), dtype=np.int64, count=len(found)),
+                )
+            logger.info(
+                "Merged %d BM25 segments into %s (%d docs)",
+                len(segments),
+                merged.name,
+                merged.doc_count,
+            )
+            if not lock_held:
+                self._merge_thread = None
+            self._commit(draft, txn)
+        finally:
+            if not lock_held:
+                self._write_lock.release()
+        for segment in segments:
+            shutil.rmtree(segment.path, ignore_errors=True)
+
+    def _write_merged_segment(
+        self,
+        segments: list[_Segment],
+        masks: list[npt.NDArray[np.bool_] | None],
+        path: Path,
+    ) -> None:
+        """墓標の付いていないドキュメントだけで新しいセグメントを書き出す."""
+        terms, inverse = np.unique(
+            np.concatenate([np.asarray(segment.terms) for segment in segments]),
+            return_inverse=True,
+        )
+        doc_ids: list[npt.NDArray[np.bytes_]] = []
+        sources: list[npt.NDArray[np.bytes_]] = []
+        seqs: list[npt.NDArray[np.int64]] = []
+        lengths: list[npt.NDArray[np.int32]] = []
+        texts: list[bytes] | None = [] if self._store_text else None
+        triple_terms: list[npt.NDArray[np.int64]] = []
+        triple_docs: list[npt.NDArray[np.int64]] = []
+        triple_tfs: list[npt.NDArray[np.int32]] = []
+
+        term_offset = 0
+        doc_offset = 0
+        for segment, mask in zip(segments, masks, strict=True):
+            live = np.arange(segment.doc_count) if mask is None else np.flatnonzero(~mask)
+            # セグメント内の文書番号 -> 新しい入力順の文書番号（削除済みは-1）
+            remap = np.full(segment.doc_count, -1, dtype=np.int64)
+            remap[live] = np.arange(live.size) + doc_offset
+            term_remap = inverse[term_offset:term_offset + segment.terms.shape[0]]
+            term_offset += segment.terms.shape[0]
+
+            doc_ids.append(np.asarray(segment.doc_ids)[live])
+            sources.append(np.asarray(segment.sources)[segment.doc_source_ordinals()[live]])
+            seqs.append(np.asarray(segment.doc_seqs)[live])
+            lengths.append(np.asarray(segment.doc_lengths)[live])
+            if texts is not None:
+                texts.extend(segment.text(int(local)).encode("utf-8") for local in live)
+
+            doc_of_entry = remap[
+                np.repeat(
+                    np.arange(segment.doc_count, dtype=np.int64),
+                    np.diff(segment.doc_term_offsets),
+                )
+            ]
+            keep = doc_of_entry >= 0
+            triple_docs.append(doc_of_entry[keep])
+            triple_terms.append(
+                term_remap[np.asarray(segment.doc_term_ids, dtype=np.int64)][keep]
+            )
+            triple_tfs.append(np.asarray(segment.doc_term_tfs)[keep])
+            doc_offset += live.size
+
+        all_terms = np.concatenate(triple_terms)
+        # 削除済みのドキュメントにしか出現しない用語は用語辞書から取り除く
+        used, compact = np.unique(all_terms, return_inverse=True)
+        _write_segment(
+            path,
+            doc_ids=np.concatenate(doc_ids),
+            sources=np.concatenate(sources),
+            seqs=np.concatenate(seqs),
+            lengths=np.concatenate(lengths),
+            texts=texts,
+            terms=terms[used] if used.size else _bytes_array([]),
+            triple_terms=compact.astype(np.int64),
+            triple_docs=np.concatenate(triple_docs),
+            triple_tfs=np.concatenate(triple_tfs),
+        )
+
+    # ------------------------------------------------------------------
+    # 永続化
+    # ------------------------------------------------------------------
+
+    def _new_segment_path(self) -> Path:
+        """新しいセグメントのパスを払い出す."""
+        self._next_segment += 1
+        return self._directory / f"{_SEGMENT_PREFIX}{self._next_segment:08d}"
+
+    def _open(self) -> None:
+        """マニフェストのセグメントを開き、WALを再適用する."""
+        self._directory.mkdir(parents=True, exist_ok=True)
+        manifest_path = self._directory / _MANIFEST_NAME
+        manifest: dict[str, Any] | None = None
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError):
+            logger.warning("Failed to read BM25 segment manifest: %s", manifest_path, exc_info=True)
+
+        if manifest is not None and (
+            manifest.get("version") != SEGMENT_FORMAT_VERSION
+            or manifest.get("tokenizer") != self._tokenizer
+            or manifest.get("store_text") != self._store_text
+        ):
+            logger.info("BM25 segments are incompatible, discarding: %s", self._directory)
+            manifest = None
+            (self._directory / _WAL_NAME).unlink(missing_ok=True)
+
+        state = _StoreState()
+        listed: set[str] = set()
+        if manifest is not None:
+            try:
+                state.next_seq = int(manifest["next_seq"])
+                self._next_segment = int(manifest["next_segment"])
+                for entry in manifest["segments"]:
+                    segment = _Segment(self._directory / str(entry["name"]))
+                    tombstones = np.asarray(entry["tombstones"], dtype=np.int64)
+                    state.segments.append(segment)
+                    state.deleted.append(None)
+                    state.removed_df.append({})
+                    state.doc_count += segment.doc_count
+                    state.total_length += segment.total_length
+                    listed.add(segment.name)
+                    if tombstones.size:
+                        self._tombstone(
+                            state, _Transaction(), len(state.segments) - 1, tombstones
+                        )
+            except (KeyError, TypeError, ValueError, OSError):
+                logger.warning(
+                    "Malformed BM25 segment manifest, discarding: %s", manifest_path,
+                    exc_info=True,
+                )
+                state = _StoreState()
+                listed = set()
+                (self._directory / _WAL_NAME).unlink(missing_ok=True)
+
+        # マニフェストに無いセグメント（書き出し途中・マージ後の削除漏れ）を片付ける
+        for child in self._directory.iterdir():
+            if child.is_dir() and child.name not in listed:
+                shutil.rmtree(child, ignore_errors=True)
+
+        state.vocabulary = _Vocabulary.build(state.segments)
+        replayed = self._replay_wal(state)
+        state.idf_floor = self._compute_idf_floor(state)
+        self._state = state
+        self._wal_path = self._directory / _WAL_NAME
+        if manifest is None:
+            self._write_manifest(state)
+        logger.info(
+            "Opened BM25 segments: %d segments, %d documents (%d replayed from WAL)",
+            len(state.segments),
+            state.doc_count,
+            replayed,
+        )
+
+    def _replay_wal(self, state: _StoreState) -> int:
+        """WALの変更を状態に再適用し、適用した操作数を返す."""
+        wal_path = self._directory / _WAL_NAME
+        try:
+            with open(wal_path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return 0
+
+        entries: list[dict[str, Any]] = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # 書き込み途中で停止した最後の行などは読み飛ばす
+                logger.warning("Skipping malformed BM25 WAL entry: %r", line[:200])
+
+        txn = _Transaction()
+        located = self._locate(
+            state, [str(entry.get("id")) for entry in entries if entry.get("op") == "add"]
+        )
+        replayed = 0
+        for entry in entries:
+            try:
+                if entry["op"] == "add":
+                    doc_id = str(entry["id"])
+                    counts = {str(term): int(tf) for term, tf in entry["counts"].items()}
+                    self._insert(
+                        state,
+                        txn,
+                        doc_id,
+                        str(entry["text"] or ""),
+                        str(entry["source"]),
+                        counts,
+                        sum(counts.values()),
+                        self._find(state, doc_id, located, len(state.segments)),
+                    )
+                elif entry["op"] == "delete":
+                    self._delete_source(state, txn, str(entry["source"]))
+                elif entry["op"] == "delete_ids":
+                    self._delete_ids(state, txn, [str(doc_id) for doc_id in entry["ids"]])
+            except (KeyError, TypeError, ValueError, AttributeError):
+                logger.warning("Skipping malformed BM25 WAL entry: %r", entry)
+                continue
+            replayed += 1
+        return replayed
+
+    def _write_manifest(self, state: _StoreState) -> None:
+        """セグメント一覧と墓標をマニフェストにアトミックに書き込む."""
+        manifest = {
+            "version": SEGMENT_FORMAT_VERSION,
+            "tokenizer": self._tokenizer,
+            "store_text": self._store_text,
+            "next_seq": state.next_seq,
+            "next_segment": self._next_segment,
+            "segments": [
+                {
+                    "name": segment.name,
+                    "tombstones": (
+                        np.flatnonzero(mask).tolist() if mask is not None else []
+                    ),
+                }
+                for segment, mask in zip(state.segments, state.deleted, strict=True)
+            ],
+        }
+        path = self._directory / _MANIFEST_NAME
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    def _append_wal(self, entries: list[dict[str, Any]]) -> None:
+        """WALに変更を追記する."""
+        if self._wal_path is None or not entries:
+            return
+        with open(self._wal_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries))
+
+    def _reset_wal(self, buffered: list[tuple[str, _BufferedDoc]]) -> None:
+        """WALをバッファ内のドキュメントだけの内容に書き直す."""
+        path = self._directory / _WAL_NAME
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(
+                json.dumps({
+                    "op": "add",
+                    "id": doc_id,
+                    "source": document.source_url,
+                    "text": document.text,
+                    "counts": document.counts,
+                }, ensure_ascii=False) + "\n"
+                for doc_id, document in buffered
+            )
+        os.replace(tmp_path, path)
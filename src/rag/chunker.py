@@ -5,8 +5,60 @@
 
 from __future__ import annotations
 
+import logging
 import re
 
+from src.rag.content_detector import ContentType, detect_content_type
+from src.rag.heading_chunker import chunk_by_headings
+from src.rag.table_chunker import chunk_table_data
+
+logger = logging.getLogger(__name__)
+
+
+def smart_chunk(text: str, chunk_size: int = 500, chunk_overlap: int = 50) -> list[str]:
+    """コンテンツタイプに応じた適切なチャンキング手法を選択する.
+
+    仕様: docs/specs/f9-rag.md
+
+    - TABLE: テーブルデータとして行単位でチャンキング
+    - HEADING/MIXED: 見出し単位でチャンキング
+    - PROSE: 従来の段落ベースチャンキング
+
+    プロセスプールのワーカーからも呼ばれるため、モジュールレベルの関数とする。
+
+    Args:
+        text: チャンキング対象のテキスト
+        chunk_size: チャンクの最大文字数
+        chunk_overlap: チャンク間のオーバーラップ文字数
+
+    Returns:
+        チャンクのリスト
+    """
+    if not text or not text.strip():
+        return []
+
+    content_type = detect_content_type(text)
+    logger.debug("Detected content type: %s", content_type.value)
+
+    if content_type == ContentType.TABLE:
+        # テーブルデータ: 行単位でチャンキング
+        table_chunks = chunk_table_data(text)
+        if table_chunks:
+            return [chunk.formatted_text for chunk in table_chunks]
+        # テーブルチャンキングに失敗した場合はフォールバック
+        logger.debug("Table chunking returned no results, falling back to prose")
+
+    if content_type in (ContentType.HEADING, ContentType.MIXED):
+        # 見出しあり: 見出し単位でチャンキング
+        heading_chunks = chunk_by_headings(text, max_chunk_size=chunk_size)
+        if heading_chunks:
+            return [chunk.formatted_text for chunk in heading_chunks]
+        # 見出しチャンキングに失敗した場合はフォールバック
+        logger.debug("Heading chunking returned no results, falling back to prose")
+
+    # 通常テキスト: 従来のチャンキング
+    return chunk_text(text, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
 
 def chunk_text(
     text: str,
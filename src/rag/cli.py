@@ -8,19 +8,31 @@ from __future__ import annotations
 import argparse
 import asyncio
 import hashlib
+import itertools
 import json
 import logging
+import statistics
 import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, replace
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import TYPE_CHECKING, TypedDict
 
+from src.embedding.base import EmbeddingProvider
 from src.rag.evaluation import (
     EvaluationReport,
+    QuantizationFidelityResult,
+    evaluate_quantization_fidelity,
     evaluate_retrieval,
+    load_evaluation_dataset,
 )
 
 if TYPE_CHECKING:
+    from src.config.settings import Settings
+    from src.rag.flat_vector_store import Quantization
+    from src.rag.vector_store import HnswParams, RetrievalResult, VectorStore
     from src.services.rag_knowledge import RAGKnowledgeService
 
 
@@ -32,6 +44,20 @@ class RegressionInfo(TypedDict):
     current_f1: float
     delta: float
 
+
+@dataclass
+class HnswSweepResult:
+    """HNSWパラメータ1組分のスイープ結果."""
+
+    m: int
+    construction_ef: int
+    search_ef: int
+    build_sec: float  # 全チャンクのコピー（インデックス構築）にかかった秒数
+    p50_ms: float
+    p95_ms: float
+    recall_at_k: float  # 総当たり（正確な検索）の上位k件のうち取得できた割合
+
+
 logger = logging.getLogger(__name__)
 
 
@@ -88,6 +114,96 @@ def main() -> None:
         help="現在の結果をベースラインとして保存",
     )
 
+    # quantization-report サブコマンド
+    quant_parser = subparsers.add_parser(
+        "quantization-report",
+        help="フラットベクトルバックエンドの量子化方式ごとの検索精度を比較",
+    )
+    quant_parser.add_argument(
+        "--dataset",
+        default="tests/fixtures/rag_evaluation_dataset.json",
+        help="評価データセットのパス",
+    )
+    quant_parser.add_argument(
+        "--output-dir",
+        default="reports/rag-quantization",
+        help="レポート出力ディレクトリ",
+    )
+    quant_parser.add_argument(
+        "--n-results",
+        type=int,
+        default=5,
+        help="各クエリで取得する結果数",
+    )
+    quant_parser.add_argument(
+        "--persist-dir",
+        help="フラットベクトルの保存ディレクトリ（省略時は設定 rag_flat_vector_dir）",
+    )
+    quant_parser.add_argument(
+        "--quantizations",
+        nargs="+",
+        choices=["int8", "binary"],
+        default=["int8", "binary"],
+        help="量子化なしと比較する量子化方式",
+    )
+    quant_parser.add_argument(
+        "--fail-on-recall-loss",
+        action="store_true",
+        help="いずれかの方式で平均Recallが量子化なしより低下した場合に exit code 1 で終了",
+    )
+
+    # rebuild-index サブコマンド
+    rebuild_parser = subparsers.add_parser(
+        "rebuild-index",
+        help="設定のHNSWパラメータでChromaDBのコレクションを再構築（Botを停止して実行）",
+    )
+    rebuild_parser.add_argument(
+        "--persist-dir",
+        help="ChromaDB永続化ディレクトリ（省略時は設定 chromadb_persist_dir）",
+    )
+    rebuild_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="1回にコピーする件数",
+    )
+    rebuild_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="パラメータが設定と同じ場合も再構築する",
+    )
+
+    # hnsw-sweep サブコマンド
+    sweep_parser = subparsers.add_parser(
+        "hnsw-sweep",
+        help="HNSWパラメータごとの検索レイテンシとrecall@kを計測",
+    )
+    sweep_parser.add_argument(
+        "--dataset",
+        default="tests/fixtures/rag_evaluation_dataset.json",
+        help="評価データセットのパス（クエリのみ使用）",
+    )
+    sweep_parser.add_argument(
+        "--output-dir",
+        default="reports/rag-hnsw-sweep",
+        help="レポート出力ディレクトリ",
+    )
+    sweep_parser.add_argument(
+        "--persist-dir",
+        help="ChromaDB永続化ディレクトリ（省略時は設定 chromadb_persist_dir）",
+    )
+    sweep_parser.add_argument("--m", type=int, nargs="+", default=[16], help="Mの候補")
+    sweep_parser.add_argument(
+        "--construction-ef", type=int, nargs="+", default=[100], help="construction_efの候補"
+    )
+    sweep_parser.add_argument(
+        "--search-ef", type=int, nargs="+", default=[10, 50, 100, 200], help="search_efの候補"
+    )
+    sweep_parser.add_argument("--k", type=int, default=5, help="recall@kのk（取得件数）")
+    sweep_parser.add_argument(
+        "--repeat", type=int, default=5, help="レイテンシ計測で各クエリを検索する回数"
+    )
+
     # init-test-db サブコマンド
     init_parser = subparsers.add_parser("init-test-db", help="テスト用ChromaDB初期化")
     init_parser.add_argument(
@@ -100,24 +216,52 @@ def main() -> None:
         default="tests/fixtures/rag_test_documents.json",
         help="テストドキュメントフィクスチャ",
     )
+    init_parser.add_argument(
+        "--backend",
+        choices=["chroma", "flat"],
+        default="chroma",
+        help="ベクトルの保持先（flat: --persist-dir にフラットベクトルとして保存）",
+    )
 
     args = parser.parse_args()
 
     if args.command == "evaluate":
         asyncio.run(run_evaluation(args))
+    elif args.command == "quantization-report":
+        asyncio.run(run_quantization_report(args))
+    elif args.command == "rebuild-index":
+        asyncio.run(run_rebuild_index(args))
+    elif args.command == "hnsw-sweep":
+        asyncio.run(run_hnsw_sweep(args))
     elif args.command == "init-test-db":
         asyncio.run(init_test_db(args))
 
 
+def hnsw_params_from_settings(settings: Settings) -> HnswParams:
+    """設定からHNSWパラメータを作成する."""
+    from src.rag.vector_store import HnswParams
+
+    return HnswParams(
+        m=settings.rag_hnsw_m,
+        construction_ef=settings.rag_hnsw_construction_ef,
+        search_ef=settings.rag_hnsw_search_ef,
+        batch_size=settings.rag_hnsw_batch_size,
+        sync_threshold=settings.rag_hnsw_sync_threshold,
+    )
+
+
 async def create_rag_service(
     threshold: float | None = None,
     persist_dir: str | None = None,
+    quantization: Quantization | None = None,
 ) -> "RAGKnowledgeService":
     """RAGKnowledgeServiceを生成する.
 
     Args:
         threshold: 類似度閾値（指定時は環境変数を一時上書き）
-        persist_dir: ChromaDB永続化ディレクトリ（指定時は設定 chromadb_persist_dir を上書き）
+        persist_dir: ChromaDB永続化ディレクトリ（指定時は設定 chromadb_persist_dir を上書き）。
+            フラットベクトルバックエンドの場合は設定 rag_flat_vector_dir を上書きする
+        quantization: 指定時はフラットベクトルバックエンドをこの量子化方式で使う
 
     Returns:
         RAGKnowledgeServiceインスタンス
@@ -143,9 +287,19 @@ async def create_rag_service(
 
         # persist_dirが指定されている場合はそれを使用
         chroma_persist_dir = persist_dir or settings.chromadb_persist_dir
+        flat_dir = None
+        if quantization is not None or settings.rag_vector_backend == "flat":
+            flat_dir = persist_dir or settings.rag_flat_vector_dir
         vector_store = VectorStore(
             embedding_provider=embedding_provider,
             persist_directory=chroma_persist_dir,
+            embed_batch_size=settings.rag_embedding_batch_size,
+            embed_batch_tokens=settings.rag_embedding_batch_tokens,
+            embed_concurrency=settings.rag_embedding_concurrency,
+            flat_dir=flat_dir,
+            flat_quantization=quantization or settings.rag_flat_vector_quantization,
+            flat_rerank_factor=settings.rag_flat_vector_rerank_factor,
+            hnsw=hnsw_params_from_settings(settings),
         )
 
         # WebCrawlerはダミー（評価時は使用しない）
@@ -246,6 +400,349 @@ async def run_evaluation(args: argparse.Namespace) -> None:
         sys.exit(1)
 
 
+async def run_quantization_report(args: argparse.Namespace) -> None:
+    """量子化方式ごとの検索精度を評価し、量子化なしとの比較レポートを出力する."""
+    from src.config.settings import get_settings
+    from src.rag.flat_vector_store import FlatVectorCollection
+
+    logger.info("Starting quantization fidelity evaluation...")
+    dataset_path = Path(args.dataset)
+    if not dataset_path.exists():
+        logger.error("Dataset file not found: %s", args.dataset)
+        sys.exit(1)
+
+    flat_dir = Path(args.persist_dir or get_settings().rag_flat_vector_dir) / "knowledge"
+    collection = FlatVectorCollection(flat_dir)
+    dimension = collection.dimension
+    collection.close()
+    if dimension is None:
+        logger.error("No flat vectors found in: %s", flat_dir)
+        sys.exit(1)
+
+    quantizations: list[Quantization] = ["none", *args.quantizations]
+    rag_services = {
+        quantization: await create_rag_service(
+            persist_dir=args.persist_dir, quantization=quantization
+        )
+        for quantization in quantizations
+    }
+    results = await evaluate_quantization_fidelity(
+        rag_services=rag_services,
+        dataset_path=args.dataset,
+        dimension=dimension,
+        n_results=args.n_results,
+    )
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    write_quantization_json_report(results, output_dir / "report.json", args.dataset)
+    write_quantization_markdown_report(results, output_dir / "report.md", args.dataset)
+    logger.info("Reports written to: %s", output_dir)
+
+    if args.fail_on_recall_loss and any(result.recall_delta < 0 for result in results):
+        logger.error("Exiting with code 1 due to recall loss")
+        sys.exit(1)
+
+
+def write_quantization_json_report(
+    results: list[QuantizationFidelityResult],
+    output_path: Path,
+    dataset_path: str,
+) -> None:
+    """量子化方式ごとの比較結果をJSONレポートとして出力する.
+
+    Args:
+        results: 量子化方式ごとの比較結果
+        output_path: 出力パス
+        dataset_path: 評価データセットのパス
+    """
+    data = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "dataset": dataset_path,
+        "results": [
+            {
+                "quantization": result.quantization,
+                "bytes_per_vector": result.bytes_per_vector,
+                "memory_ratio": result.memory_ratio,
+                "average_precision": result.report.average_precision,
+                "average_recall": result.report.average_recall,
+                "average_f1": result.report.average_f1,
+                "recall_delta": result.recall_delta,
+                "source_agreement": result.source_agreement,
+            }
+            for result in results
+        ],
+    }
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def write_quantization_markdown_report(
+    results: list[QuantizationFidelityResult],
+    output_path: Path,
+    dataset_path: str,
+) -> None:
+    """量子化方式ごとの比較結果をMarkdownレポートとして出力する.
+
+    Args:
+        results: 量子化方式ごとの比較結果
+        output_path: 出力パス
+        dataset_path: 評価データセットのパス
+    """
+    lines = [
+        "# ベクトル量子化の精度レポート",
+        "",
+        f"**実行日時**: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')} UTC",
+        f"**データセット**: {dataset_path}",
+        "",
+        "| 量子化 | バイト/ベクトル | 削減倍率 | 平均Precision | 平均Recall | Recall差 "
+        "| 量子化なしとの一致率 |",
+        "|--------|----------------|----------|---------------|------------|----------"
+        "|----------------------|",
+    ]
+    for result in results:
+        lines.append(
+            f"| {result.quantization} | {result.bytes_per_vector} "
+            f"| {result.memory_ratio:.1f}x | {result.report.average_precision:.3f} "
+            f"| {result.report.average_recall:.3f} | {result.recall_delta:+.3f} "
+            f"| {result.source_agreement:.3f} |"
+        )
+    lines.append("")
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+
+async def run_rebuild_index(args: argparse.Namespace) -> None:
+    """設定のHNSWパラメータでChromaDBのコレクションを再構築する."""
+    from src.config.settings import get_settings
+    from src.embedding.factory import get_embedding_provider
+    from src.rag.vector_store import VectorStore
+
+    settings = get_settings()
+    vector_store = VectorStore(
+        embedding_provider=get_embedding_provider(settings, settings.embedding_provider),
+        persist_directory=args.persist_dir or settings.chromadb_persist_dir,
+        hnsw=hnsw_params_from_settings(settings),
+    )
+    if not vector_store.hnsw_outdated and not args.force:
+        logger.info("HNSW parameters are up to date; nothing to rebuild")
+        return
+
+    count = await vector_store.rebuild_index(batch_size=args.batch_size)
+    logger.info("Rebuilt collection with %d documents", count)
+
+
+class _PrecomputedEmbedding(EmbeddingProvider):
+    """事前に生成したクエリのEmbeddingを返すプロバイダー（計測からEmbedding生成を除く）."""
+
+    def __init__(self, vectors: dict[str, list[float]]) -> None:
+        self._vectors = vectors
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        return [self._vectors[text] for text in texts]
+
+    async def is_available(self) -> bool:
+        return True
+
+
+def _result_keys(results: list[RetrievalResult]) -> set[tuple[str, str]]:
+    """検索結果をチャンク単位で突き合わせるためのキー（ソースURL, 本文）に変換する."""
+    return {(str(r.metadata.get("source_url", "")), r.text) for r in results}
+
+
+async def sweep_hnsw_params(
+    source: VectorStore,
+    query_embeddings: dict[str, list[float]],
+    grid: list[HnswParams],
+    work_dir: Path,
+    k: int = 5,
+    repeat: int = 5,
+) -> list[HnswSweepResult]:
+    """HNSWパラメータの組ごとにインデックスを構築し、検索レイテンシとrecall@kを計測する.
+
+    source の全チャンクをベクトルごと work_dir 配下のコレクションにコピーするため、
+    Embeddingの再計算は行わない。正解は同じチャンクをフラットベクトルバックエンドに
+    コピーした総当たり検索の上位k件とする。
+
+    Args:
+        source: 計測対象のチャンクを保存しているVectorStore
+        query_embeddings: クエリ -> Embedding
+        grid: 計測するHNSWパラメータのリスト
+        work_dir: 計測用のコレクションを作成するディレクトリ
+        k: 取得件数
+        repeat: レイテンシ計測で各クエリを検索する回数
+
+    Returns:
+        パラメータの組ごとの計測結果（grid の順）
+    """
+    from src.rag.vector_store import VectorStore
+
+    provider = _PrecomputedEmbedding(query_embeddings)
+    queries = list(query_embeddings)
+    exact = VectorStore(provider, flat_dir=work_dir / "exact")
+    await source.copy_to(exact)
+    expected = {query: _result_keys(await exact.search(query, n_results=k)) for query in queries}
+    total_expected = sum(len(keys) for keys in expected.values())
+
+    results: list[HnswSweepResult] = []
+    for i, params in enumerate(grid):
+        started = time.perf_counter()
+        store = VectorStore(provider, persist_directory=str(work_dir / f"hnsw{i}"), hnsw=params)
+        await source.copy_to(store)
+        build_sec = time.perf_counter() - started
+        # 初回のインデックス読み込みを計測から除く
+        await store.search(queries[0], n_results=k)
+
+        latencies: list[float] = []
+        hits = 0
+        for _ in range(repeat):
+            for query in queries:
+                started = time.perf_counter()
+                found = await store.search(query, n_results=k)
+                latencies.append(time.perf_counter() - started)
+        for query in queries:
+            found = await store.search(query, n_results=k)
+            hits += len(_result_keys(found) & expected[query])
+
+        p95 = statistics.quantiles(latencies, n=20)[18] if len(latencies) > 1 else latencies[0]
+        results.append(
+            HnswSweepResult(
+                m=params.m,
+                construction_ef=params.construction_ef,
+                search_ef=params.search_ef,
+                build_sec=build_sec,
+                p50_ms=statistics.median(latencies) * 1000,
+                p95_ms=p95 * 1000,
+                recall_at_k=hits / total_expected if total_expected else 1.0,
+            )
+        )
+        logger.info(
+            "HNSW M=%d construction_ef=%d search_ef=%d: p50=%.3f ms, p95=%.3f ms, "
+            "recall@%d=%.3f",
+            params.m,
+            params.construction_ef,
+            params.search_ef,
+            results[-1].p50_ms,
+            results[-1].p95_ms,
+            k,
+            results[-1].recall_at_k,
+        )
+    return results
+
+
+async def run_hnsw_sweep(args: argparse.Namespace) -> None:
+    """HNSWパラメータのスイープを実行しレポートを出力する."""
+    from src.config.settings import get_settings
+    from src.embedding.factory import get_embedding_provider
+    from src.rag.vector_store import VectorStore
+
+    dataset_path = Path(args.dataset)
+    if not dataset_path.exists():
+        logger.error("Dataset file not found: %s", args.dataset)
+        sys.exit(1)
+    queries = list(dict.fromkeys(q.query for q in load_evaluation_dataset(args.dataset)))
+    if not queries:
+        logger.error("No queries found in dataset: %s", args.dataset)
+        sys.exit(1)
+
+    settings = get_settings()
+    embedding_provider = get_embedding_provider(settings, settings.embedding_provider)
+    source = VectorStore(
+        embedding_provider=embedding_provider,
+        persist_directory=args.persist_dir or settings.chromadb_persist_dir,
+        flat_dir=(
+            settings.rag_flat_vector_dir if settings.rag_vector_backend == "flat" else None
+        ),
+        hnsw=hnsw_params_from_settings(settings),
+    )
+    if source.get_stats(count_sources=False)["total_chunks"] == 0:
+        logger.error("No documents found in vector store")
+        sys.exit(1)
+
+    query_embeddings = dict(zip(queries, await embedding_provider.embed(queries)))
+    base = hnsw_params_from_settings(settings)
+    grid = [
+        replace(base, m=m, construction_ef=construction_ef, search_ef=search_ef)
+        for m, construction_ef, search_ef in itertools.product(
+            args.m, args.construction_ef, args.search_ef
+        )
+    ]
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = await sweep_hnsw_params(
+            source, query_embeddings, grid, Path(work_dir), k=args.k, repeat=args.repeat
+        )
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    await asyncio.to_thread(
+        write_hnsw_sweep_json_report, results, output_dir / "report.json", args.dataset, args.k
+    )
+    await asyncio.to_thread(
+        write_hnsw_sweep_markdown_report, results, output_dir / "report.md", args.dataset, args.k
+    )
+    logger.info("Reports written to: %s", output_dir)
+
+
+def write_hnsw_sweep_json_report(
+    results: list[HnswSweepResult],
+    output_path: Path,
+    dataset_path: str,
+    k: int,
+) -> None:
+    """HNSWパラメータのスイープ結果をJSONとして出力する.
+
+    Args:
+        results: パラメータの組ごとの計測結果
+        output_path: 出力パス
+        dataset_path: 評価データセットのパス
+        k: 取得件数
+    """
+    data = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "dataset": dataset_path,
+        "k": k,
+        "results": [asdict(result) for result in results],
+    }
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def write_hnsw_sweep_markdown_report(
+    results: list[HnswSweepResult],
+    output_path: Path,
+    dataset_path: str,
+    k: int,
+) -> None:
+    """HNSWパラメータのスイープ結果をMarkdownレポートとして出力する.
+
+    Args:
+        results: パラメータの組ごとの計測結果
+        output_path: 出力パス
+        dataset_path: 評価データセットのパス
+        k: 取得件数
+    """
+    lines = [
+        "# HNSWパラメータのスイープ結果",
+        "",
+        f"**実行日時**: {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')} UTC",
+        f"**データセット**: {dataset_path}",
+        "",
+        f"| M | construction_ef | search_ef | 構築秒数 | p50 (ms) | p95 (ms) | recall@{k} |",
+        "|---|-----------------|-----------|----------|----------|----------|----------|",
+    ]
+    for result in results:
+        lines.append(
+            f"| {result.m} | {result.construction_ef} | {result.search_ef} "
+            f"| {result.build_sec:.2f} | {result.p50_ms:.3f} | {result.p95_ms:.3f} "
+            f"| {result.recall_at_k:.3f} |"
+        )
+    lines.append("")
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+
 def load_baseline(baseline_path: str) -> dict[str, object]:
     """ベースラインJSONを読み込む.
 
@@ -441,6 +938,11 @@ async def init_test_db(args: argparse.Namespace) -> None:
     vector_store = VectorStore(
         embedding_provider=embedding_provider,
         persist_directory=args.persist_dir,
+        embed_batch_size=settings.rag_embedding_batch_size,
+        embed_batch_tokens=settings.rag_embedding_batch_tokens,
+        embed_concurrency=settings.rag_embedding_concurrency,
+        flat_dir=args.persist_dir if args.backend == "flat" else None,
+        hnsw=hnsw_params_from_settings(settings),
     )
 
     # ドキュメントをチャンクに変換して追加
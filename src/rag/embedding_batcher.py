@@ -0,0 +1,187 @@
+"""Embeddingのバッチ分割・パイプライン実行モジュール
+
+仕様: docs/specs/f9-rag.md
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import deque
+from collections.abc import AsyncGenerator
+
+from src.embedding.base import EmbeddingProvider
+
+logger = logging.getLogger(__name__)
+
+# 入力上限超過を示すエラーメッセージの断片（小文字で比較）
+_LIMIT_ERROR_MARKERS = (
+    "too large",
+    "too long",
+    "too many tokens",
+    "maximum context length",
+    "max_tokens_per_request",
+    "context length",
+    "input length",
+)
+
+# 上限を縮めた後、この回数続けて成功したら上限を倍に戻す（設定値まで）
+_GROW_AFTER_SUCCESSES = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """テキストのおおよそのトークン数を見積もる.
+
+    UTF-8のバイト数 / 3 で見積もる（日本語は1文字≒1トークン、英語は3文字≒1トークン）。
+    実際のトークナイザより多めに見積もるため、上限を超えにくい。
+    """
+    return max(1, -(-len(text.encode("utf-8")) // 3))
+
+
+def is_input_limit_error(exc: BaseException) -> bool:
+    """プロバイダーの入力上限超過（413・トークン数超過）によるエラーかを判定する."""
+    status_code = getattr(exc, "status_code", None)
+    if status_code == 413:
+        return True
+    if status_code not in (None, 400):
+        return False
+    message = str(exc).lower()
+    return any(marker in message for marker in _LIMIT_ERROR_MARKERS)
+
+
+class EmbeddingBatcher:
+    """件数とおおよそのトークン数でテキストを分割してEmbeddingを生成する.
+
+    入力上限超過のエラーを受けたバッチは半分に分割して再試行し、
+    以降のバッチの上限も縮める。縮めた上限は成功が続くと設定値まで倍々に戻す
+    （一時的な超過で以降のリクエストが小さいままにならないようにするため）。
+    最大 concurrency 件のリクエストを先行して実行し、
+    呼び出し側が前のバッチを保存している間も次のバッチのEmbeddingを進める。
+
+    仕様: docs/specs/f9-rag.md
+    """
+
+    def __init__(
+        self,
+        provider: EmbeddingProvider,
+        max_items: int = 64,
+        max_tokens: int = 8000,
+        concurrency: int = 2,
+    ) -> None:
+        """EmbeddingBatcherを初期化する.
+
+        Args:
+            provider: Embedding生成プロバイダー
+            max_items: 1リクエストあたりの最大テキスト数
+            max_tokens: 1リクエストあたりのおおよその最大トークン数
+            concurrency: 同時に実行するリクエスト数の上限
+        """
+        self._provider = provider
+        self._configured_items = max_items
+        self._configured_tokens = max_tokens
+        self.max_items = max_items
+        self.max_tokens = max_tokens
+        self._concurrency = max(1, concurrency)
+        self._successes = 0
+
+    def for_provider(self, provider: EmbeddingProvider) -> EmbeddingBatcher:
+        """同じ上限（設定値）で別のプロバイダーを使うEmbeddingBatcherを返す."""
+        return EmbeddingBatcher(
+            provider, self._configured_items, self._configured_tokens, self._concurrency
+        )
+
+    def _next_batch(self, texts: list[str], start: int) -> int:
+        """start から始まるバッチの終了位置を現在の上限に従って決める."""
+        end = start
+        tokens = 0
+        while end < len(texts) and end - start < self.max_items:
+            size = estimate_tokens(texts[end])
+            # 1件で上限を超えるテキストは単独のバッチにする
+            if end > start and tokens + size > self.max_tokens:
+                break
+            tokens += size
+            end += 1
+        return end
+
+    async def iter_embeddings(
+        self,
+        texts: list[str],
+    ) -> AsyncGenerator[tuple[int, list[list[float]]], None]:
+        """バッチごとに (開始位置, ベクトルのリスト) を入力順に返す.
+
+        次のバッチのEmbeddingはバックグラウンドで実行されるため、
+        呼び出し側は受け取ったバッチの保存と並行して次のバッチを生成できる。
+        途中で中断された場合、実行中のリクエストはキャンセルする。
+        """
+        pending: deque[tuple[int, asyncio.Task[list[list[float]]]]] = deque()
+        position = 0
+
+        def schedule() -> None:
+            nonlocal position
+            while position < len(texts) and len(pending) < self._concurrency:
+                end = self._next_batch(texts, position)
+                task = asyncio.create_task(self._embed_adaptive(texts[position:end]))
+                pending.append((position, task))
+                position = end
+
+        try:
+            schedule()
+            while pending:
+                start, task = pending.popleft()
+                vectors = await task
+                schedule()
+                yield start, vectors
+        finally:
+            for _, task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+
+    async def _embed_adaptive(self, texts: list[str]) -> list[list[float]]:
+        """Embeddingを生成する（入力上限超過時はバッチを半分にして再試行）."""
+        try:
+            vectors = await self._provider.embed(texts)
+        except Exception as e:
+            if len(texts) <= 1 or not is_input_limit_error(e):
+                raise
+            half = len(texts) // 2
+            # 以降のバッチも縮めた上限で分割する
+            self.max_items = min(self.max_items, half)
+            self.max_tokens = min(
+                self.max_tokens, max(1, sum(estimate_tokens(t) for t in texts) // 2)
+            )
+            self._successes = 0
+            logger.warning(
+                "Embedding batch of %d texts exceeded provider limit, splitting: %s",
+                len(texts),
+                e,
+            )
+            return [
+                *await self._embed_adaptive(texts[:half]),
+                *await self._embed_adaptive(texts[half:]),
+            ]
+        if len(vectors) != len(texts):
+            raise ValueError(
+                f"Embedding provider returned {len(vectors)} vectors for {len(texts)} texts"
+            )
+        self._grow_limits()
+        return vectors
+
+    def _grow_limits(self) -> None:
+        """成功が続いた場合、縮めた上限を倍に戻す（設定値を超えない）."""
+        if (
+            self.max_items >= self._configured_items
+            and self.max_tokens >= self._configured_tokens
+        ):
+            return
+        self._successes += 1
+        if self._successes < _GROW_AFTER_SUCCESSES:
+            return
+        self._successes = 0
+        self.max_items = min(self._configured_items, self.max_items * 2)
+        self.max_tokens = min(self._configured_tokens, self.max_tokens * 2)
+        logger.debug(
+            "Embedding batch limits raised to %d texts / %d tokens",
+            self.max_items,
+            self.max_tokens,
+        )
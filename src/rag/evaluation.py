@@ -11,6 +11,7 @@ from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from src.rag.flat_vector_store import Quantization
     from src.services.rag_knowledge import RAGKnowledgeService
 
 logger = logging.getLogger(__name__)
@@ -290,3 +291,82 @@ async def evaluate_retrieval(
         negative_source_violations=negative_violations,
         query_results=query_results,
     )
+
+
+@dataclass
+class QuantizationFidelityResult:
+    """量子化方式ごとの検索精度（量子化なしとの比較）."""
+
+    quantization: str
+    bytes_per_vector: int  # 候補選択で走査するベクトル1件あたりのバイト数
+    memory_ratio: float  # 量子化なし（float32）に対する走査データ量の削減倍率
+    report: EvaluationReport
+    recall_delta: float  # 平均Recall - 量子化なしの平均Recall
+    source_agreement: float  # 量子化なしで取得したソースを同じく取得できた割合（クエリ平均）
+
+
+async def evaluate_quantization_fidelity(
+    rag_services: dict[Quantization, RAGKnowledgeService],
+    dataset_path: str,
+    dimension: int,
+    n_results: int = 5,
+    baseline: Quantization = "none",
+) -> list[QuantizationFidelityResult]:
+    """量子化方式ごとにRAG検索の精度を評価し、量子化なしの結果と比較する.
+
+    各方式で evaluate_retrieval() を実行し、平均Recallの差と、量子化なしで取得した
+    ソースに対するRecall（取得結果の一致率）を求める。
+
+    Args:
+        rag_services: 量子化方式 -> その方式で検索するRAGKnowledgeService
+        dataset_path: 評価データセットファイルのパス
+        dimension: ベクトルの次元数（走査データ量の計算に使用）
+        n_results: 各クエリで取得する結果数
+        baseline: 比較の基準とする方式（rag_services に含めること）
+
+    Returns:
+        方式ごとの比較結果（rag_services の順）
+    """
+    from src.rag.flat_vector_store import bytes_per_vector
+
+    if baseline not in rag_services:
+        raise ValueError(f"Baseline quantization not evaluated: {baseline}")
+
+    reports = {
+        quantization: await evaluate_retrieval(service, dataset_path, n_results=n_results)
+        for quantization, service in rag_services.items()
+    }
+    baseline_report = reports[baseline]
+    baseline_bytes = bytes_per_vector(dimension, "none")
+
+    results: list[QuantizationFidelityResult] = []
+    for quantization, report in reports.items():
+        agreements = [
+            calculate_precision_recall(
+                retrieved_sources=query_result.retrieved_sources,
+                expected_sources=baseline_result.retrieved_sources,
+            ).recall
+            for query_result, baseline_result in zip(
+                report.query_results, baseline_report.query_results
+            )
+        ]
+        size = bytes_per_vector(dimension, quantization)
+        results.append(
+            QuantizationFidelityResult(
+                quantization=quantization,
+                bytes_per_vector=size,
+                memory_ratio=baseline_bytes / size,
+                report=report,
+                recall_delta=report.average_recall - baseline_report.average_recall,
+                source_agreement=sum(agreements) / len(agreements) if agreements else 1.0,
+            )
+        )
+        logger.info(
+            "Quantization %s: avg_recall=%.3f (%+.3f), source_agreement=%.3f, %.1fx smaller",
+            quantization,
+            report.average_recall,
+            results[-1].recall_delta,
+            results[-1].source_agreement,
+            results[-1].memory_ratio,
+        )
+    return results
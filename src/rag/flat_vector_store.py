@@ -0,0 +1,601 @@
+"""NumPyフラットベクトルストアモジュール
+
+正規化したEmbeddingをメモリマップした .npy ファイルに、本文・メタデータを
+サイドカーのSQLiteに保存し、全件の内積（総当たり）で検索する。
+
+仕様: docs/specs/f9-rag.md
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Literal, cast
+
+import numpy as np
+from chromadb.api.types import Embeddings, GetResult, IncludeEnum, QueryResult, Where
+
+logger = logging.getLogger(__name__)
+
+# SQLiteの1クエリあたりのプレースホルダ数の上限に収まるよう分割する件数
+_SQL_BATCH = 500
+
+_DEFAULT_INCLUDE = [IncludeEnum.metadatas, IncludeEnum.documents]
+
+# 量子化コードから近似スコアを計算する際に、一度に float32 へ戻す行数
+_SCORE_BLOCK = 65536
+
+Quantization = Literal["none", "int8", "binary"]
+
+
+def bytes_per_vector(dim: int, quantization: Quantization) -> int:
+    """検索時の総当たりで走査する、ベクトル1件あたりのバイト数を返す."""
+    if quantization == "int8":
+        return dim + 4  # 要素ごとのint8 + 行ごとのスケール（float32）
+    if quantization == "binary":
+        return (dim + 7) // 8  # 要素ごとの符号ビット
+    return dim * 4
+
+
+class FlatVectorCollection:
+    """メモリマップした行列による総当たり検索のベクトルコレクション.
+
+    VectorStore が使用する ChromaDB の Collection のメソッド（get / upsert / delete /
+    query / count）と同じ呼び出し方・戻り値の形式を持ち、VectorStore のバックエンドとして
+    差し替えて使う。距離は ChromaDB の cosine 空間と同じく 1 - cosine類似度。
+
+    - ベクトルは正規化した float32 の行列（vectors-<世代>.npy）に追記する。
+      同じIDのupsertも新しい行に追記し、古い行は削除済み（トゥームストーン）にする
+    - ID → 行番号・本文・メタデータはSQLite（meta.db）に保存する。
+      ベクトルの書き込み後にSQLiteをコミットするため、途中で停止しても
+      SQLiteから参照されない行が残るだけで、既存のデータは壊れない
+    - 削除済みの行が一定割合を超えると、有効な行だけの新しいファイルに詰め直す（compaction）
+    - 検索は全クエリを1回の行列積で計算し、argpartition で上位k件を選ぶ
+    - quantization を指定した場合は、メモリ上に保持した量子化コード（int8: 約1/4、
+      binary: 1/32）の総当たりで上位 k × rerank_factor 件の候補を選び、候補だけを
+      float32 のベクトル（メモリマップ）で正確に再スコアリングする
+    - バックグラウンドスレッドは持たず、すべての操作をロックで直列化する
+
+    仕様: docs/specs/f9-rag.md
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        compact_ratio: float = 0.3,
+        compact_min_rows: int = 1024,
+        initial_capacity: int = 1024,
+        quantization: Quantization = "none",
+        rerank_factor: int = 8,
+        metadata: dict[str, Any] | None = None,
+    ) -> None:
+        """FlatVectorCollectionを初期化する.
+
+        Args:
+            directory: ベクトルファイル・SQLiteの保存ディレクトリ
+            compact_ratio: 削除済みの行がこの割合を超えたら詰め直す
+            compact_min_rows: 削除済みの行がこの件数未満の間は詰め直さない
+            initial_capacity: 最初に確保する行数（不足したら倍に拡張する）
+            quantization: 候補選択に使う量子化方式（none: 量子化せず全件を正確に計算）
+            rerank_factor: 量子化時に正確に再スコアリングする候補数の倍率（k × rerank_factor）
+            metadata: コレクションのメタデータ（新規作成時のみ保存する）
+        """
+        if quantization not in ("none", "int8", "binary"):
+            raise ValueError(f"Unsupported quantization: {quantization}")
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._compact_ratio = compact_ratio
+        self._compact_min_rows = compact_min_rows
+        self._initial_capacity = initial_capacity
+        self._quantization: Quantization = quantization
+        self._rerank_factor = rerank_factor
+        # 書き込み・検索はスレッドで行うため、接続はロックで保護して共有する
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self._dir / "meta.db"), check_same_thread=False)
+        self._metadata: dict[str, Any] | None = None
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS docs ("
+                " id TEXT PRIMARY KEY,"
+                " row INTEGER NOT NULL,"
+                " source_url TEXT NOT NULL,"
+                " document TEXT NOT NULL,"
+                " metadata TEXT NOT NULL"
+                ")"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS docs_row ON docs (row)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS docs_source ON docs (source_url)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS info (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+            self._conn.commit()
+            self._load()
+            if self._metadata is None:
+                self._metadata = dict(metadata or {})
+                self._set_info(metadata=json.dumps(self._metadata, ensure_ascii=False))
+                self._conn.commit()
+
+    def _load(self) -> None:
+        """保存済みのベクトルファイルとID → 行番号の対応を読み込む."""
+        info = dict(self._conn.execute("SELECT key, value FROM info").fetchall())
+        self._file_name: str | None = info.get("vectors_file")
+        self._generation = int(info.get("generation", "0"))
+        self._metadata = json.loads(info["metadata"]) if "metadata" in info else None
+        self._vectors: np.memmap[Any, np.dtype[np.float32]] | None = None
+        self._rows: dict[str, int] = dict(
+            self._conn.execute("SELECT id, row FROM docs").fetchall()
+        )
+        self._used = int(info.get("used_rows", "0"))
+        if self._file_name is not None:
+            self._vectors = cast(
+                "np.memmap[Any, np.dtype[np.float32]]",
+                np.load(self._dir / self._file_name, mmap_mode="r+"),
+            )
+        self._alive = np.zeros(self._capacity(), dtype=bool)
+        self._alive[list(self._rows.values())] = True
+        self._row_ids: list[str | None] = [None] * self._used
+        for id_, row in self._rows.items():
+            self._row_ids[row] = id_
+        # 量子化コードは保存せず、起動時にベクトルファイルから作り直す
+        self._codes: np.ndarray[Any, Any] | None = None
+        self._scales: np.ndarray[Any, np.dtype[np.float32]] | None = None
+        if self._vectors is not None:
+            self._resize_codes(self._capacity(), self._vectors.shape[1])
+            for start in range(0, self._used, _SCORE_BLOCK):
+                end = min(start + _SCORE_BLOCK, self._used)
+                self._set_codes(start, self._vectors[start:end])
+        # コミット前に停止した書き込み・詰め直しの残骸を削除する
+        for path in self._dir.glob("vectors-*.npy"):
+            if path.name != self._file_name:
+                path.unlink()
+
+    def _capacity(self) -> int:
+        return 0 if self._vectors is None else int(self._vectors.shape[0])
+
+    @property
+    def dimension(self) -> int | None:
+        """ベクトルの次元数（未保存の場合はNone）."""
+        return None if self._vectors is None else int(self._vectors.shape[1])
+
+    @property
+    def quantization(self) -> Quantization:
+        """候補選択に使う量子化方式."""
+        return self._quantization
+
+    @property
+    def metadata(self) -> dict[str, Any]:
+        """コレクションのメタデータ."""
+        with self._lock:
+            return dict(self._metadata or {})
+
+    def modify(self, metadata: dict[str, Any]) -> None:
+        """コレクションのメタデータを置き換える."""
+        with self._lock:
+            self._metadata = dict(metadata)
+            self._set_info(metadata=json.dumps(self._metadata, ensure_ascii=False))
+            self._conn.commit()
+
+    @property
+    def dead_rows(self) -> int:
+        """削除済み（詰め直し待ち）の行数."""
+        return self._used - len(self._rows)
+
+    def count(self) -> int:
+        """保存されているチャンク数を返す."""
+        with self._lock:
+            return len(self._rows)
+
+    def upsert(
+        self,
+        ids: list[str],
+        embeddings: Embeddings,
+        documents: list[str],
+        metadatas: Sequence[dict[str, Any]],
+    ) -> None:
+        """チャンクを追加・上書きする（上書き時は古い行を削除済みにする）."""
+        if not ids:
+            return
+        # 同じIDが複数ある場合は後のものを採用する
+        latest = {id_: i for i, id_ in enumerate(ids)}
+        order = list(latest.values())
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32)[order])
+        with self._lock:
+            self._reserve(len(order), vectors.shape[1])
+            assert self._vectors is not None
+            start = self._used
+            self._vectors[start:start + len(order)] = vectors
+            self._vectors.flush()
+            self._set_codes(start, vectors)
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO docs (id, row, source_url, document, metadata)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        ids[i],
+                        start + offset,
+                        str(metadatas[i].get("source_url", "")),
+                        documents[i],
+                        json.dumps(dict(metadatas[i]), ensure_ascii=False),
+                    )
+                    for offset, i in enumerate(order)
+                ],
+            )
+            self._set_info(used_rows=str(start + len(order)))
+            self._conn.commit()
+
+            self._used = start + len(order)
+            self._row_ids.extend(ids[i] for i in order)
+            for offset, i in enumerate(order):
+                old_row = self._rows.get(ids[i])
+                if old_row is not None:
+                    self._tombstone(old_row)
+                self._rows[ids[i]] = start + offset
+                self._alive[start + offset] = True
+            self._maybe_compact()
+
+    def update(self, ids: list[str], metadatas: Sequence[dict[str, Any]]) -> None:
+        """ベクトル・本文を変えずにメタデータのみ更新する（存在しないIDは無視する）."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE docs SET source_url = ?, metadata = ? WHERE id = ?",
+                [
+                    (
+                        str(metadata.get("source_url", "")),
+                        json.dumps(dict(metadata), ensure_ascii=False),
+                        id_,
+                    )
+                    for id_, metadata in zip(ids, metadatas, strict=True)
+                    if id_ in self._rows
+                ],
+            )
+            self._conn.commit()
+
+    def delete(self, ids: list[str]) -> None:
+        """ID指定でチャンクを削除する（存在しないIDは無視する）."""
+        with self._lock:
+            rows = [(id_, self._rows[id_]) for id_ in dict.fromkeys(ids) if id_ in self._rows]
+            if not rows:
+                return
+            for start in range(0, len(rows), _SQL_BATCH):
+                batch = rows[start:start + _SQL_BATCH]
+                self._conn.execute(
+                    f"DELETE FROM docs WHERE id IN ({_placeholders(len(batch))})",
+                    [id_ for id_, _ in batch],
+                )
+            self._conn.commit()
+            for id_, row in rows:
+                del self._rows[id_]
+                self._tombstone(row)
+            self._maybe_compact()
+
+    def get(
+        self,
+        ids: list[str] | None = None,
+        where: Where | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        include: list[IncludeEnum] = _DEFAULT_INCLUDE,
+    ) -> GetResult:
+        """ID・ソースURLを指定してチャンクを取得する（行番号順）.
+
+        where は ChromaDB と同じ形式のうち {"source_url": URL} のみに対応する。
+        """
+        conditions: list[str] = []
+        params: list[Any] = []
+        if where is not None:
+            if set(where) != {"source_url"}:
+                raise ValueError(f"Unsupported where filter: {where}")
+            conditions.append("source_url = ?")
+            params.append(where["source_url"])
+        with self._lock:
+            if ids is None:
+                rows = self._select(conditions, params, limit, offset)
+            else:
+                rows = []
+                for start in range(0, len(ids), _SQL_BATCH):
+                    batch = ids[start:start + _SQL_BATCH]
+                    rows.extend(
+                        self._select(
+                            [*conditions, f"id IN ({_placeholders(len(batch))})"],
+                            [*params, *batch],
+                        )
+                    )
+                rows.sort(key=lambda row: row[1])
+                rows = rows[offset or 0:][:limit]
+            return self._result(rows, include)
+
+    def query(
+        self,
+        query_embeddings: Embeddings,
+        n_results: int = 10,
+        include: list[IncludeEnum] = _DEFAULT_INCLUDE,
+    ) -> QueryResult:
+        """全チャンクとのcosine距離を計算し、クエリごとに近い順に n_results 件を返す."""
+        queries = _normalize(np.asarray(query_embeddings, dtype=np.float32))
+        per_query: list[GetResult] = []
+        per_query_distances: list[list[float]] = []
+        with self._lock:
+            k = min(n_results, len(self._rows))
+            for top, top_scores in self._search_rows(queries, k):
+                rows = self._rows_by_index([int(row) for row in top])
+                per_query.append(self._result(rows, include))
+                per_query_distances.append([float(1.0 - score) for score in top_scores])
+
+        return cast(
+            QueryResult,
+            {
+                "ids": [result["ids"] for result in per_query],
+                "embeddings": _nested(per_query, "embeddings", include),
+                "documents": _nested(per_query, "documents", include),
+                "uris": None,
+                "data": None,
+                "metadatas": _nested(per_query, "metadatas", include),
+                "distances": (
+                    per_query_distances if IncludeEnum.distances in include else None
+                ),
+                "included": include,
+            },
+        )
+
+    def _search_rows(
+        self, queries: np.ndarray[Any, np.dtype[np.float32]], k: int
+    ) -> list[tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]]:
+        """クエリごとに類似度の高い順の行番号と cosine類似度を返す（ロック保持中に呼ぶ）."""
+        if k <= 0 or self._vectors is None:
+            empty = np.empty(0, dtype=np.int64)
+            return [(empty, empty.astype(np.float32)) for _ in queries]
+
+        alive = self._alive[:self._used]
+        if self._codes is None:
+            # (クエリ数, 行数) の類似度を1回の行列積で計算し、削除済みの行を除外する
+            scores = queries @ self._vectors[:self._used].T
+            scores[:, ~alive] = -np.inf
+            results = []
+            for query_scores in scores:
+                top = np.argpartition(-query_scores, k - 1)[:k]
+                top = top[np.argsort(-query_scores[top], kind="stable")]
+                results.append((top, query_scores[top]))
+            return results
+
+        # 量子化コードの近似スコアで候補を絞り、候補のみ float32 で正確に計算する
+        approx = np.concatenate(
+            [
+                queries @ self._dequantize(start, min(start + _SCORE_BLOCK, self._used)).T
+                for start in range(0, self._used, _SCORE_BLOCK)
+            ],
+            axis=1,
+        )
+        approx[:, ~alive] = -np.inf
+        shortlist = min(k * self._rerank_factor, len(self._rows))
+        results = []
+        for query, query_scores in zip(queries, approx):
+            candidates = np.sort(np.argpartition(-query_scores, shortlist - 1)[:shortlist])
+            exact = self._vectors[candidates] @ query
+            order = np.argsort(-exact, kind="stable")[:k]
+            results.append((candidates[order], exact[order]))
+        return results
+
+    def compact(self) -> None:
+        """削除済みの行を除いた新しいベクトルファイルに詰め直す."""
+        with self._lock:
+            if self.dead_rows == 0 or self._vectors is None:
+                return
+            live = sorted(self._rows.items(), key=lambda item: item[1])
+            old_rows = np.array([row for _, row in live], dtype=np.int64)
+            capacity = max(self._initial_capacity, len(live) * 2)
+            self._swap_file(capacity, self._vectors[old_rows], len(live))
+            self._conn.executemany(
+                "UPDATE docs SET row = ? WHERE id = ?",
+                [(new_row, id_) for new_row, (id_, _) in enumerate(live)],
+            )
+            self._commit_swap(len(live))
+            removed = self.dead_rows
+            self._rows = {id_: new_row for new_row, (id_, _) in enumerate(live)}
+            self._row_ids = [id_ for id_, _ in live]
+            self._used = len(live)
+            self._alive = np.zeros(capacity, dtype=bool)
+            self._alive[:len(live)] = True
+            self._resize_codes(capacity, self._vectors.shape[1], old_rows)
+        logger.info("Compacted flat vector store: removed %d dead rows", removed)
+
+    def close(self) -> None:
+        """ベクトルファイルを書き出し、データベース接続を閉じる."""
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+            self._conn.close()
+
+    def _reserve(self, n_rows: int, dim: int) -> None:
+        """n_rows 行を追記できるようにベクトルファイルを確保・拡張する."""
+        if self._vectors is not None and self._vectors.shape[1] != dim:
+            raise ValueError(
+                f"Embedding dimension mismatch: expected {self._vectors.shape[1]}, got {dim}"
+            )
+        needed = self._used + n_rows
+        capacity = self._capacity()
+        if needed <= capacity:
+            return
+        capacity = max(capacity, self._initial_capacity)
+        while capacity < needed:
+            capacity *= 2
+        existing = (
+            self._vectors[:self._used]
+            if self._vectors is not None
+            else np.empty((0, dim), dtype=np.float32)
+        )
+        self._swap_file(capacity, existing, self._used)
+        self._commit_swap(self._used)
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._alive)] = self._alive
+        self._alive = alive
+        self._resize_codes(capacity, dim, np.arange(self._used))
+
+    def _resize_codes(
+        self, capacity: int, dim: int, keep_rows: np.ndarray[Any, Any] | None = None
+    ) -> None:
+        """capacity 行分の量子化コードの領域を確保し直し、keep_rows の行を先頭に詰めて移す.
+
+        量子化しない場合は何もしない。
+        """
+        codes: np.ndarray[Any, Any]
+        if self._quantization == "int8":
+            codes = np.zeros((capacity, dim), dtype=np.int8)
+        elif self._quantization == "binary":
+            codes = np.zeros((capacity, (dim + 7) // 8), dtype=np.uint8)
+        else:
+            return
+        scales = np.ones(capacity, dtype=np.float32)
+        if keep_rows is not None and self._codes is not None and self._scales is not None:
+            codes[:len(keep_rows)] = self._codes[keep_rows]
+            scales[:len(keep_rows)] = self._scales[keep_rows]
+        self._codes, self._scales = codes, scales
+
+    def _set_codes(self, start: int, vectors: np.ndarray[Any, Any]) -> None:
+        """正規化済みのベクトルを量子化し、start 行目から書き込む."""
+        if self._codes is None or self._scales is None:
+            return
+        end = start + len(vectors)
+        if self._quantization == "int8":
+            # 行ごとに絶対値の最大値を127に対応させる
+            absmax = np.abs(vectors).max(axis=1)
+            scales = np.where(absmax == 0, 1.0, absmax) / 127
+            self._codes[start:end] = np.round(vectors / scales[:, None]).astype(np.int8)
+            self._scales[start:end] = scales
+        else:
+            self._codes[start:end] = np.packbits(vectors > 0, axis=1)
+
+    def _dequantize(self, start: int, end: int) -> np.ndarray[Any, np.dtype[np.float32]]:
+        """start〜end 行の量子化コードを近似スコア計算用の float32 に戻す."""
+        assert self._codes is not None and self._scales is not None
+        codes = self._codes[start:end]
+        if self._quantization == "int8":
+            return cast(
+                "np.ndarray[Any, np.dtype[np.float32]]",
+                codes.astype(np.float32) * self._scales[start:end, None],
+            )
+        assert self._vectors is not None
+        # 符号ビットを ±1 に戻す（クエリは float32 のまま内積を取る）
+        bits = np.unpackbits(codes, axis=1, count=self._vectors.shape[1])
+        return cast(
+            "np.ndarray[Any, np.dtype[np.float32]]", bits.astype(np.float32) * 2 - 1
+        )
+
+    def _swap_file(self, capacity: int, rows: np.ndarray[Any, Any], used: int) -> None:
+        """rows を先頭に書き込んだ新しい世代のベクトルファイルを作成する（コミット前）."""
+        self._generation += 1
+        name = f"vectors-{self._generation}.npy"
+        vectors = np.lib.format.open_memmap(
+            self._dir / name, mode="w+", dtype=np.float32, shape=(capacity, rows.shape[1])
+        )
+        vectors[:used] = rows
+        vectors.flush()
+        self._pending_file = (name, vectors)
+
+    def _commit_swap(self, used: int) -> None:
+        """新しいベクトルファイルへの切り替えをコミットし、古いファイルを削除する."""
+        name, vectors = self._pending_file
+        self._set_info(
+            vectors_file=name, generation=str(self._generation), used_rows=str(used)
+        )
+        self._conn.commit()
+        old_name, self._file_name = self._file_name, name
+        self._vectors = vectors
+        if old_name is not None:
+            (self._dir / old_name).unlink(missing_ok=True)
+
+    def _set_info(self, **values: str) -> None:
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO info (key, value) VALUES (?, ?)", list(values.items())
+        )
+
+    def _tombstone(self, row: int) -> None:
+        self._alive[row] = False
+        self._row_ids[row] = None
+
+    def _maybe_compact(self) -> None:
+        """削除済みの行が閾値を超えていれば詰め直す."""
+        dead = self.dead_rows
+        if dead >= self._compact_min_rows and dead > self._used * self._compact_ratio:
+            self.compact()
+
+    def _select(
+        self,
+        conditions: list[str],
+        params: list[Any],
+        limit: int | None = None,
+        offset: int | None = None,
+    ) -> list[tuple[str, int, str, str]]:
+        sql = "SELECT id, row, document, metadata FROM docs"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY row"
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params = [*params, -1 if limit is None else limit, offset or 0]
+        return self._conn.execute(sql, params).fetchall()
+
+    def _rows_by_index(self, rows: list[int]) -> list[tuple[str, int, str, str]]:
+        """行番号順ではなく、指定した行の順にチャンクを取得する."""
+        ids = [cast(str, self._row_ids[row]) for row in rows]
+        found: dict[str, tuple[str, int, str, str]] = {}
+        for start in range(0, len(ids), _SQL_BATCH):
+            batch = ids[start:start + _SQL_BATCH]
+            for record in self._select([f"id IN ({_placeholders(len(batch))})"], batch):
+                found[record[0]] = record
+        return [found[id_] for id_ in ids]
+
+    def _result(
+        self, rows: list[tuple[str, int, str, str]], include: list[IncludeEnum]
+    ) -> GetResult:
+        """SQLiteの行を ChromaDB の GetResult 形式に変換する."""
+        embeddings = None
+        if IncludeEnum.embeddings in include and self._vectors is not None:
+            embeddings = [np.array(self._vectors[row]) for _, row, _, _ in rows]
+        return cast(
+            GetResult,
+            {
+                "ids": [id_ for id_, _, _, _ in rows],
+                "embeddings": embeddings,
+                "documents": (
+                    [doc for _, _, doc, _ in rows]
+                    if IncludeEnum.documents in include
+                    else None
+                ),
+                "uris": None,
+                "data": None,
+                "metadatas": (
+                    [json.loads(meta) for _, _, _, meta in rows]
+                    if IncludeEnum.metadatas in include
+                    else None
+                ),
+                "included": include,
+            },
+        )
+
+
+def _normalize(vectors: np.ndarray[Any, Any]) -> np.ndarray[Any, np.dtype[np.float32]]:
+    """各行をL2ノルム1に正規化する（ゼロベクトルはそのまま）."""
+    vectors = np.atleast_2d(vectors).astype(np.float32, copy=False)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return cast(
+        "np.ndarray[Any, np.dtype[np.float32]]",
+        vectors / np.where(norms == 0, 1.0, norms),
+    )
+
+
+def _placeholders(n: int) -> str:
+    return ", ".join("?" * n)
+
+
+def _nested(
+    results: list[GetResult], key: str, include: list[IncludeEnum]
+) -> list[Any] | None:
+    """クエリごとの GetResult から QueryResult 用の二重リストを作る."""
+    if IncludeEnum(key) not in include:
+        return None
+    return [result[key] for result in results]  # type: ignore[literal-required]
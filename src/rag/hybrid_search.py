@@ -5,10 +5,13 @@
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import logging
+import time
+from collections.abc import Awaitable
 from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, TypeVar
 
 if TYPE_CHECKING:
     from src.rag.bm25_index import BM25Index, BM25Result
@@ -16,6 +19,8 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
 
 def _generate_doc_id(source_url: str, chunk_index: int) -> str:
     """ドキュメントIDを生成する.
@@ -41,6 +46,18 @@ class HybridSearchResult:
     rrf_score: float  # RRFで統合されたスコア
 
 
+@dataclass
+class HybridSearchResponse:
+    """ハイブリッド検索の結果と、一方の検索を打ち切ったかどうか.
+
+    degraded は締め切り超過・例外で一方の検索を打ち切り、もう一方の結果のみで
+    ランキングした場合にTrueになる（キャッシュしない判断などに使う）。
+    """
+
+    results: list[HybridSearchResult]
+    degraded: bool = False
+
+
 class HybridSearchEngine:
     """ベクトル検索とBM25を組み合わせたハイブリッド検索.
 
@@ -53,6 +70,7 @@ class HybridSearchEngine:
         bm25_index: BM25Index,
         vector_weight: float = 0.5,
         rrf_k: int = 60,
+        leg_timeout: float = 0.0,
     ) -> None:
         """HybridSearchEngineを初期化する.
 
@@ -61,11 +79,14 @@ class HybridSearchEngine:
             bm25_index: BM25インデックス
             vector_weight: ベクトル検索の重み（0.0〜1.0）
             rrf_k: RRFの定数（デフォルト: 60、論文推奨値）
+            leg_timeout: 各検索（ベクトル / BM25）の締め切り秒数。
+                超過した検索は打ち切り、残りの結果のみでランキングする（0で無制限）
         """
         self._vector_store = vector_store
         self._bm25_index = bm25_index
         self._vector_weight = max(0.0, min(1.0, vector_weight))
         self._rrf_k = rrf_k
+        self._leg_timeout = max(0.0, leg_timeout)
 
     async def search(
         self,
@@ -73,14 +94,11 @@ class HybridSearchEngine:
         n_results: int = 5,
         similarity_threshold: float | None = None,
     ) -> list[HybridSearchResult]:
-        """ハイブリッド検索を実行する.
+        """ハイブリッド検索を実行し、結果のリストを返す.
 
         仕様: docs/specs/f9-rag.md
 
-        1. ベクトル検索で候補を取得
-        2. BM25検索で候補を取得
-        3. RRF（Reciprocal Rank Fusion）でスコアを統合
-        4. 統合スコアでソート
+        一方の検索を打ち切ったかどうかが必要な場合は search_with_status() を使う。
 
         Args:
             query: 検索クエリ
@@ -90,38 +108,138 @@ class HybridSearchEngine:
         Returns:
             HybridSearchResultのリスト（RRFスコア降順）
         """
+        response = await self.search_with_status(query, n_results, similarity_threshold)
+        return response.results
+
+    async def search_with_status(
+        self,
+        query: str,
+        n_results: int = 5,
+        similarity_threshold: float | None = None,
+    ) -> HybridSearchResponse:
+        """ハイブリッド検索を実行する.
+
+        仕様: docs/specs/f9-rag.md
+
+        1. ベクトル検索とBM25検索を並行して実行し、候補を取得
+        2. RRF（Reciprocal Rank Fusion）でスコアを統合
+        3. 統合スコアでソート
+
+        締め切り（leg_timeout）を過ぎた検索と例外で失敗した検索は打ち切り、
+        もう一方の結果のみでランキングする（degraded=True）。
+
+        Args:
+            query: 検索クエリ
+            n_results: 返却する結果の最大数
+            similarity_threshold: ベクトル検索の類似度閾値
+
+        Returns:
+            RRFスコア降順の結果と、一方の検索を打ち切ったかどうか
+        """
         # 多めに取得してからRRFで統合
         fetch_count = max(n_results * 3, 20)
 
-        # ベクトル検索
-        # 閾値フィルタリングは最終段階で行うため、ここでは適用しない
-        vector_results = await self._vector_store.search(
-            query,
-            n_results=fetch_count,
-            similarity_threshold=None,
+        # ベクトル検索とBM25検索は互いに独立しているため並行して実行する
+        # 閾値フィルタリングは最終段階で行うため、ベクトル検索には適用しない
+        # BM25検索はCPUバウンドなのでスレッドで実行し、イベントループを止めない
+        # （インデックスは公開済みの不変な状態を参照するため、書き込みと同時に実行してよい）
+        started = time.perf_counter()
+        vector_task = asyncio.create_task(
+            self._timed(
+                self._vector_store.search(
+                    query,
+                    n_results=fetch_count,
+                    similarity_threshold=None,
+                )
+            )
         )
-
-        # BM25検索
-        bm25_results = self._bm25_index.search(query, n_results=fetch_count)
+        bm25_task = asyncio.create_task(
+            self._timed(
+                asyncio.to_thread(self._bm25_index.search, query, n_results=fetch_count)
+            )
+        )
+        try:
+            await asyncio.wait(
+                (vector_task, bm25_task),
+                timeout=self._leg_timeout or None,
+            )
+            # 両方の検索が失敗した場合のみ呼び出し元に送出する
+            errors = [
+                error
+                for task in (vector_task, bm25_task)
+                if task.done() and (error := task.exception()) is not None
+            ]
+            if len(errors) == 2:
+                raise errors[0]
+            vector_results, vector_ms = self._leg_result("vector", vector_task)
+            bm25_results, bm25_ms = self._leg_result("bm25", bm25_task)
+        finally:
+            # 締め切り超過・例外・呼び出し元のキャンセル時に残った検索を打ち切る
+            for task in (vector_task, bm25_task):
+                task.cancel()
+
+        logger.debug(
+            "Hybrid search legs: vector=%s bm25=%s total=%.1fms",
+            f"{vector_ms:.1f}ms" if vector_ms is not None else "dropped",
+            f"{bm25_ms:.1f}ms" if bm25_ms is not None else "dropped",
+            (time.perf_counter() - started) * 1000,
+        )
+        degraded = vector_ms is None or bm25_ms is None
 
         # 検索結果が両方とも空の場合
         if not vector_results and not bm25_results:
-            return []
+            results: list[HybridSearchResult] = []
 
         # ベクトル検索のみの場合
-        if not bm25_results:
-            return self._convert_vector_only_results(
+        elif not bm25_results:
+            results = self._convert_vector_only_results(
                 vector_results, n_results, similarity_threshold
             )
 
         # BM25のみの場合
-        if not vector_results:
-            return self._convert_bm25_only_results(bm25_results, n_results)
+        elif not vector_results:
+            results = self._convert_bm25_only_results(bm25_results, n_results)
 
         # 両方の結果がある場合はRRFで統合
-        return self._merge_with_rrf(
-            vector_results, bm25_results, n_results, similarity_threshold
-        )
+        else:
+            results = self._merge_with_rrf(
+                vector_results, bm25_results, n_results, similarity_threshold
+            )
+        return HybridSearchResponse(results=results, degraded=degraded)
+
+    @staticmethod
+    async def _timed(leg: Awaitable[_T]) -> tuple[_T, float]:
+        """検索を実行し、結果と所要時間（ミリ秒）を返す."""
+        started = time.perf_counter()
+        result = await leg
+        return result, (time.perf_counter() - started) * 1000
+
+    def _leg_result(
+        self,
+        name: str,
+        task: asyncio.Task[tuple[list[_T], float]],
+    ) -> tuple[list[_T], float | None]:
+        """完了した検索の結果と所要時間を返す.
+
+        締め切りまでに完了しなかった検索と例外で失敗した検索は、空の結果（所要時間None）
+        として扱う（もう一方の検索のみでランキングする）。
+        """
+        if not task.done():
+            logger.warning(
+                "Hybrid search %s leg exceeded %.3fs deadline, falling back to single-leg ranking",
+                name,
+                self._leg_timeout,
+            )
+            return [], None
+        error = task.exception()
+        if error is not None:
+            logger.warning(
+                "Hybrid search %s leg failed, falling back to single-leg ranking",
+                name,
+                exc_info=error,
+            )
+            return [], None
+        return task.result()
 
     def _convert_vector_only_results(
         self,
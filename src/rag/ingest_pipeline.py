@@ -0,0 +1,135 @@
+"""取り込みパイプラインモジュール
+
+クロール → チャンク分割 → Embedding → 保存 のようなステージを、サイズ上限付きの
+asyncio.Queue でつないで並行実行する。
+
+仕様: docs/specs/f9-rag.md
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Iterable, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+# ステージの入力の終わりを表す番兵
+_DONE = object()
+
+
+@dataclass(frozen=True)
+class Stage:
+    """パイプラインの1ステージ.
+
+    Attributes:
+        name: ステージ名（進捗表示用）
+        handler: 1件を処理するコルーチン関数（Noneを返した項目は次のステージに渡さない）
+        concurrency: 同時に処理する件数
+    """
+
+    name: str
+    handler: Callable[[Any], Awaitable[Any]]
+    concurrency: int = 1
+
+
+@dataclass
+class StageStats:
+    """ステージの処理状況.
+
+    Attributes:
+        name: ステージ名
+        processed: 処理を終えた件数
+        busy_sec: ワーカーが処理に費やした時間の合計（秒）
+        started_at: パイプラインの開始時刻（time.monotonic()）
+    """
+
+    name: str
+    processed: int = 0
+    busy_sec: float = 0.0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def throughput(self) -> float:
+        """パイプライン開始からの平均スループット（件/秒）."""
+        elapsed = time.monotonic() - self.started_at
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+
+async def run_pipeline(
+    items: Iterable[Any],
+    stages: Sequence[Stage],
+    queue_size: int = 8,
+    on_processed: Callable[[StageStats, list[StageStats]], Awaitable[None]] | None = None,
+) -> list[StageStats]:
+    """items を先頭のステージから順に流し、全件の処理が終わるまで待つ.
+
+    各ステージは concurrency 個のワーカーで入力キューから項目を取り出して処理し、
+    結果を次のステージのキューに入れる。キューは queue_size 件で満杯になり、
+    後段が詰まると前段のワーカーが待つ（バックプレッシャー）ため、
+    処理途中の項目は全ステージ合わせて概ね (queue_size + concurrency) × ステージ数 件に収まる。
+
+    項目ごとのエラーはハンドラー内で処理すること。ハンドラーが例外を送出した場合は
+    全ステージを中断し、その例外を送出する。
+
+    Args:
+        items: 先頭のステージに渡す項目
+        stages: ステージのリスト（処理順）
+        queue_size: ステージ間のキューの最大件数
+        on_processed: 項目の処理を終えるたびに (そのステージの状況, 全ステージの状況) で
+            呼ばれるコールバック
+
+    Returns:
+        全ステージの処理状況
+    """
+    stats = [StageStats(stage.name) for stage in stages]
+    workers = [max(1, stage.concurrency) for stage in stages]
+    queues: list[asyncio.Queue[Any]] = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+
+    async def feed() -> None:
+        for item in items:
+            await queues[0].put(item)
+        for _ in range(workers[0]):
+            await queues[0].put(_DONE)
+
+    async def work(index: int) -> None:
+        stage, stat = stages[index], stats[index]
+        outbox = queues[index + 1] if index + 1 < len(stages) else None
+        while True:
+            item = await queues[index].get()
+            if item is _DONE:
+                return
+            started = time.monotonic()
+            result = await stage.handler(item)
+            stat.busy_sec += time.monotonic() - started
+            stat.processed += 1
+            if on_processed is not None:
+                await on_processed(stat, stats)
+            if outbox is not None and result is not None:
+                await outbox.put(result)
+
+    async def run_stage(index: int) -> None:
+        async with asyncio.TaskGroup() as group:
+            for _ in range(workers[index]):
+                group.create_task(work(index))
+        # 全ワーカーの終了後に、次のステージのワーカー数だけ番兵を送る
+        if index + 1 < len(stages):
+            for _ in range(workers[index + 1]):
+                await queues[index + 1].put(_DONE)
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            group.create_task(feed())
+            for index in range(len(stages)):
+                group.create_task(run_stage(index))
+    except BaseExceptionGroup as exc_group:
+        raise _first_exception(exc_group) from None
+    return stats
+
+
+def _first_exception(exc_group: BaseExceptionGroup[BaseException]) -> BaseException:
+    """入れ子になった例外グループから最初の例外を取り出す."""
+    exc: BaseException = exc_group
+    while isinstance(exc, BaseExceptionGroup):
+        exc = exc.exceptions[0]
+    return exc
@@ -0,0 +1,70 @@
+"""HTML解析・チャンク分割用のプロセスプール
+
+仕様: docs/specs/f9-rag.md
+
+クロールしたページの本文抽出（BeautifulSoup）とスマートチャンキングはCPU負荷が高く、
+イベントループ上で実行すると大量のクロール中にチャット応答が止まる。
+これらをプロセスプールで実行し、イベントループを空けておく。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from typing import TypeVar
+
+from src.rag.chunker import smart_chunk
+from src.rag.process_pool import LazyProcessPool
+from src.services.web_crawler import HtmlParser, extract_text, resolve_html_parser
+
+_T = TypeVar("_T")
+
+
+class ParsePool:
+    """プロセスプールでHTMLの本文抽出・スマートチャンキングを行う.
+
+    仕様: docs/specs/f9-rag.md
+
+    プロセスは最初の処理依頼で起動する。同時に依頼できる件数を max_pending 件に制限し、
+    超えた依頼は空きが出るまで待つ（ページのHTMLがプールの入力キューに溜まり続けない）。
+    ワーカー数が1の場合やプールが異常終了した場合は、スレッドで処理する。
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 0,
+        max_pending: int = 0,
+        html_parser: HtmlParser = "auto",
+    ) -> None:
+        """ParsePoolを初期化する.
+
+        Args:
+            max_workers: ワーカープロセス数（0でCPUコア数、1でプロセスプールを使わない）
+            max_pending: 同時に依頼できる件数（0でワーカー数の2倍）
+            html_parser: BeautifulSoupのパーサー（auto: lxmlがあればlxml）
+        """
+        self._pool = LazyProcessPool("Parse", max_workers)
+        self._slots = asyncio.Semaphore(max_pending or self._pool.max_workers * 2)
+        self._html_parser = resolve_html_parser(html_parser)
+
+    @property
+    def html_parser(self) -> str:
+        """本文抽出に使うBeautifulSoupのパーサー名を返す."""
+        return self._html_parser
+
+    async def extract_text(self, html: str) -> tuple[str, str]:
+        """HTMLから (title, text) を抽出する（web_crawler.extract_text() 参照）."""
+        return await self._run(extract_text, html, self._html_parser)
+
+    async def smart_chunk(self, text: str, chunk_size: int, chunk_overlap: int) -> list[str]:
+        """テキストをコンテンツタイプに応じてチャンク分割する（chunker.smart_chunk() 参照）."""
+        return await self._run(smart_chunk, text, chunk_size, chunk_overlap)
+
+    async def _run(self, func: Callable[..., _T], *args: object) -> _T:
+        """func をワーカープロセス（使えない場合はスレッド）で実行する."""
+        async with self._slots:
+            return await self._pool.run(func, *args)
+
+    def shutdown(self) -> None:
+        """プロセスプールを停止する."""
+        self._pool.shutdown()
@@ -0,0 +1,106 @@
+"""遅延起動するプロセスプール
+
+仕様: docs/specs/f9-rag.md
+
+TokenizerPool（BM25のトークン化）と ParsePool（本文抽出・チャンク分割）が共通で使う。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TypeVar
+
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+class LazyProcessPool:
+    """最初の処理依頼で起動し、異常終了時はスレッドでの実行に切り替えるプロセスプール.
+
+    仕様: docs/specs/f9-rag.md
+
+    イベントループやスレッドを持つ親プロセスのforkを避けるため、ワーカーはspawnで起動する。
+    ワーカー数が1の場合やプールが異常終了した場合（BrokenProcessPool・起動時のOSError）は、
+    以後の処理をスレッドで行う。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int = 0,
+        initializer: Callable[[], object] | None = None,
+    ) -> None:
+        """LazyProcessPoolを初期化する.
+
+        Args:
+            name: ログに表示するプール名（例: "Tokenizer"）
+            max_workers: ワーカープロセス数（0でCPUコア数、1でプロセスプールを使わない）
+            initializer: 各ワーカープロセスの起動時に呼ぶ関数
+        """
+        self._name = name
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._initializer = initializer
+        self._executor: ProcessPoolExecutor | None = None
+        self._disabled = self._max_workers <= 1
+
+    @property
+    def max_workers(self) -> int:
+        """ワーカープロセス数を返す."""
+        return self._max_workers
+
+    @property
+    def disabled(self) -> bool:
+        """プロセスプールを使わずスレッドで実行する場合にTrueを返す."""
+        return self._disabled
+
+    async def run(self, func: Callable[..., _T], *args: object) -> _T:
+        """func をワーカープロセス（使えない場合はスレッド）で実行する.
+
+        func と引数はワーカーへ送るため、pickle可能なモジュールレベルの関数・値に限る。
+        """
+        if self._disabled:
+            return await asyncio.to_thread(func, *args)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        except (BrokenProcessPool, OSError):
+            if not self._disabled:
+                logger.warning(
+                    "%s process pool failed, falling back to in-thread execution",
+                    self._name,
+                    exc_info=True,
+                )
+                self._disabled = True
+                # 並行する依頼も同じ BrokenProcessPool を受けてスレッドで実行し直すため、
+                # 待機中の処理は取り消さない
+                self._discard_executor(cancel_futures=False)
+            return await asyncio.to_thread(func, *args)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """プロセスプールを返す（初回呼び出し時に起動する）."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self._initializer,
+            )
+            logger.info(
+                "%s process pool started with %d workers", self._name, self._max_workers
+            )
+        return self._executor
+
+    def _discard_executor(self, cancel_futures: bool) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=cancel_futures)
+            self._executor = None
+
+    def shutdown(self) -> None:
+        """プロセスプールを停止する（待機中の処理は取り消す）."""
+        self._discard_executor(cancel_futures=True)
@@ -0,0 +1,101 @@
+"""検索結果キャッシュモジュール
+
+仕様: docs/specs/f9-rag.md
+"""
+
+from __future__ import annotations
+
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Generic, TypeVar
+
+_V = TypeVar("_V")
+
+# (正規化済みクエリ, 返却件数, 検索モード, 世代)
+CacheKey = tuple[str, int, str, int]
+
+
+def normalize_query(query: str) -> str:
+    """キャッシュキー用にクエリを正規化する.
+
+    NFKC正規化（全角英数字・半角カナの統一）、大文字小文字の統一、
+    連続する空白の圧縮を行い、表記揺れだけが異なる質問を同じキーにまとめる。
+    """
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+class RetrievalCache(Generic[_V]):
+    """世代カウンタ付きのLRU+TTL検索結果キャッシュ.
+
+    キーには世代を含める。取り込み・削除のたびに世代を進めることで、
+    それ以前に計算された結果は参照されなくなる（古いエントリは破棄する）。
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_sec: float = 300.0) -> None:
+        """RetrievalCacheを初期化する.
+
+        Args:
+            max_entries: 保持する最大エントリ数（0でキャッシュ無効）
+            ttl_sec: エントリの有効期間（秒）
+        """
+        self._max_entries = max_entries
+        self._ttl_sec = ttl_sec
+        self._entries: OrderedDict[CacheKey, tuple[float, _V]] = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        """キャッシュが有効かどうか."""
+        return self._max_entries > 0
+
+    def key(self, query: str, n_results: int, mode: str, generation: int) -> CacheKey:
+        """キャッシュキーを計算する.
+
+        generation には検索開始前に読み取った世代を渡す。検索中に取り込みが
+        完了した場合、結果は古い世代のキーで保存され、以後参照されない。
+        """
+        return (normalize_query(query), n_results, mode, generation)
+
+    def get(self, key: CacheKey) -> _V | None:
+        """キャッシュ済みの結果を返す（無い・期限切れ・古い世代の場合はNone）."""
+        entry = self._entries.get(key)
+        if entry is None or key[3] != self.generation:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: CacheKey, value: _V) -> None:
+        """結果をキャッシュする（上限を超えた場合は最も古いものから削除）."""
+        if not self.enabled or key[3] != self.generation:
+            return
+        self._entries[key] = (time.monotonic() + self._ttl_sec, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """世代を進め、既存のエントリをすべて無効にする."""
+        self.generation += 1
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """ヒット数・ミス数・エントリ数・世代を返す."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "generation": self.generation,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,160 @@
+"""ソースURL台帳モジュール
+
+仕様: docs/specs/f9-rag.md
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import threading
+from dataclasses import astuple, dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SourceRecord:
+    """取り込み済みのソースURL1件分の情報.
+
+    Attributes:
+        source_url: ソースURL（フラグメント除去済み）
+        chunk_count: 保存されているチャンク数
+        title: ページタイトル
+        crawled_at: 最後に取り込んだ日時（ISO 8601）
+        content_hash: ページ本文のハッシュ（不明な場合は空文字）
+        byte_size: 保存されているチャンク本文の合計バイト数（UTF-8）
+    """
+
+    source_url: str
+    chunk_count: int
+    title: str = ""
+    crawled_at: str = ""
+    content_hash: str = ""
+    byte_size: int = 0
+
+
+class SourceRegistry:
+    """取り込み済みソースURLの台帳（SQLiteに永続化し、メモリ上に全件を保持する）.
+
+    取り込み・削除のたびに更新し、統計（ソース数・チャンク数・データ量）は
+    差分更新した合計値をO(1)で、ソース一覧はO(ソース数)で返す。
+    チャンク全体を走査する必要が無いため、チャンク数が増えても `rag status` は遅くならない。
+
+    仕様: docs/specs/f9-rag.md
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        """SourceRegistryを初期化する.
+
+        Args:
+            path: SQLiteデータベースファイルのパス（":memory:" で永続化しない）
+        """
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # 書き込みはスレッドで行うため、接続はロックで保護して共有する
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sources ("
+                " source_url TEXT PRIMARY KEY,"
+                " chunk_count INTEGER NOT NULL,"
+                " title TEXT NOT NULL,"
+                " crawled_at TEXT NOT NULL,"
+                " content_hash TEXT NOT NULL,"
+                " byte_size INTEGER NOT NULL"
+                ")"
+            )
+            self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT source_url, chunk_count, title, crawled_at, content_hash, byte_size"
+                " FROM sources"
+            ).fetchall()
+        self._records = {row[0]: SourceRecord(*row) for row in rows}
+        self._chunk_count = sum(record.chunk_count for record in self._records.values())
+        self._byte_size = sum(record.byte_size for record in self._records.values())
+
+    def upsert(self, record: SourceRecord) -> None:
+        """ソースURLの情報を追加・更新する（チャンク数0の場合は削除する）."""
+        if record.chunk_count <= 0:
+            self.remove(record.source_url)
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources"
+                " (source_url, chunk_count, title, crawled_at, content_hash, byte_size)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                astuple(record),
+            )
+            self._conn.commit()
+            self._replace(record.source_url, record)
+
+    def remove(self, source_url: str) -> SourceRecord | None:
+        """ソースURLを台帳から削除する.
+
+        Returns:
+            削除した情報（登録されていなかった場合はNone）
+        """
+        with self._lock:
+            if source_url not in self._records:
+                return None
+            self._conn.execute("DELETE FROM sources WHERE source_url = ?", (source_url,))
+            self._conn.commit()
+            return self._replace(source_url, None)
+
+    def replace_all(self, records: list[SourceRecord]) -> None:
+        """台帳の内容をすべて置き換える（既存データからの再構築用）."""
+        with self._lock:
+            self._conn.execute("DELETE FROM sources")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sources"
+                " (source_url, chunk_count, title, crawled_at, content_hash, byte_size)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [astuple(record) for record in records],
+            )
+            self._conn.commit()
+            self._records = {record.source_url: record for record in records}
+            self._chunk_count = sum(record.chunk_count for record in records)
+            self._byte_size = sum(record.byte_size for record in records)
+        logger.info("Rebuilt source registry: %d sources", len(records))
+
+    def _replace(self, source_url: str, record: SourceRecord | None) -> SourceRecord | None:
+        """メモリ上の情報と合計値を差し替える（ロック保持中に呼ぶ）."""
+        old = self._records.pop(source_url, None)
+        if old is not None:
+            self._chunk_count -= old.chunk_count
+            self._byte_size -= old.byte_size
+        if record is not None:
+            self._records[source_url] = record
+            self._chunk_count += record.chunk_count
+            self._byte_size += record.byte_size
+        return old
+
+    def get(self, source_url: str) -> SourceRecord | None:
+        """ソースURLの情報を返す."""
+        return self._records.get(source_url)
+
+    def list_sources(self) -> list[SourceRecord]:
+        """全ソースURLの情報をURL順に返す."""
+        with self._lock:
+            records = list(self._records.values())
+        return sorted(records, key=lambda record: record.source_url)
+
+    def stats(self) -> dict[str, int]:
+        """ソース数・チャンク数・データ量の合計を返す."""
+        with self._lock:
+            return {
+                "source_count": len(self._records),
+                "chunk_count": self._chunk_count,
+                "byte_size": self._byte_size,
+            }
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def close(self) -> None:
+        """データベース接続を閉じる."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,228 @@
+"""BM25インデックス構築用の並列トークナイザ
+
+仕様: docs/specs/f9-rag.md
+
+一括構築（起動時の再構築など）のトークン化をプロセスプールに分散する。
+各ワーカーは起動時に自身のfugashi Taggerを1つ生成し、チャンク単位のバッチを処理する。
+トークン化結果は本文のハッシュをキーにSQLiteへキャッシュし、内容が変わっていないチャンクは
+再起動後の再構築でも形態素解析を行わない。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from src.rag.bm25_index import get_tokenizer_name, tokenize_japanese
+from src.rag.process_pool import LazyProcessPool
+
+# SQLiteのプレースホルダ数の上限（古いバージョンの既定値999）を超えないように分割する
+_LOOKUP_BATCH_SIZE = 500
+
+
+class TokenCache:
+    """トークナイザ名 + sha256(本文) をキーにトークン列をSQLiteへ永続化するキャッシュ.
+
+    プロセスの再起動後も有効なため、スナップショットが使えず再構築する場合でも
+    内容が変わっていないチャンクは形態素解析を行わない。保持件数が上限を超えた場合は
+    最後に使われた日時が古いものから削除する（LRU）。
+    """
+
+    def __init__(
+        self,
+        path: str | Path = ":memory:",
+        max_entries: int = 100000,
+        tokenizer: str | None = None,
+    ) -> None:
+        """TokenCacheを初期化する.
+
+        Args:
+            path: SQLiteデータベースファイルのパス（":memory:" でプロセス内のみ）
+            max_entries: 保持する最大エントリ数（0でキャッシュ無効）
+            tokenizer: キャッシュキーに含めるトークナイザ名（Noneで現在有効なトークナイザ）
+        """
+        self._max_entries = max_entries
+        self._tokenizer = tokenizer or get_tokenizer_name()
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        # 読み書きはスレッドで行うため、接続はロックで保護して共有する
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tokens ("
+                " tokenizer TEXT NOT NULL,"
+                " text_hash BLOB NOT NULL,"
+                " tokens TEXT NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " PRIMARY KEY (tokenizer, text_hash)"
+                ") WITHOUT ROWID"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS tokens_last_used ON tokens (last_used)"
+            )
+            self._conn.commit()
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM tokens").fetchone()
+        self._entries = int(entries)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        """本文からキャッシュキーを計算する."""
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    def get_many(self, keys: list[bytes]) -> dict[bytes, list[str]]:
+        """キャッシュ済みのトークン列を返す（見つかったキーのみ）."""
+        unique = list(dict.fromkeys(keys))
+        found: dict[bytes, list[str]] = {}
+        if self._max_entries > 0:
+            now = time.time()
+            with self._lock:
+                for start in range(0, len(unique), _LOOKUP_BATCH_SIZE):
+                    batch = unique[start:start + _LOOKUP_BATCH_SIZE]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = self._conn.execute(
+                        "SELECT text_hash, tokens FROM tokens"
+                        f" WHERE tokenizer = ? AND text_hash IN ({placeholders})",
+                        [self._tokenizer, *batch],
+                    ).fetchall()
+                    found.update((bytes(key), json.loads(tokens)) for key, tokens in rows)
+                    self._conn.execute(
+                        "UPDATE tokens SET last_used = ?"
+                        f" WHERE tokenizer = ? AND text_hash IN ({placeholders})",
+                        [now, self._tokenizer, *batch],
+                    )
+                self._conn.commit()
+        self.hits += len(found)
+        self.misses += len(unique) - len(found)
+        return found
+
+    def put_many(self, entries: dict[bytes, list[str]]) -> None:
+        """トークン列を保存する（上限を超えた場合は最後に使われた日時が古いものから削除）."""
+        if self._max_entries <= 0 or not entries:
+            return
+        now = time.time()
+        with self._lock:
+            inserted = self._conn.executemany(
+                "INSERT OR IGNORE INTO tokens (tokenizer, text_hash, tokens, last_used)"
+                " VALUES (?, ?, ?, ?)",
+                [
+                    (self._tokenizer, key, json.dumps(tokens, ensure_ascii=False), now)
+                    for key, tokens in entries.items()
+                ],
+            ).rowcount
+            self._entries += max(inserted, 0)
+            if self._entries > self._max_entries:
+                self._conn.execute(
+                    "DELETE FROM tokens WHERE (tokenizer, text_hash) IN ("
+                    " SELECT tokenizer, text_hash FROM tokens ORDER BY last_used LIMIT ?)",
+                    (self._entries - self._max_entries,),
+                )
+                self._entries = self._max_entries
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._entries
+
+    def close(self) -> None:
+        """データベース接続を閉じる."""
+        with self._lock:
+            self._conn.close()
+
+
+def _init_worker() -> None:
+    """ワーカープロセスの初期化（プロセスごとにTaggerを1つ生成する）."""
+    get_tokenizer_name()
+
+
+def _tokenize_chunk(texts: list[str]) -> list[list[str]]:
+    """ワーカープロセスでチャンク内のテキストをトークン化する."""
+    return [tokenize_japanese(text) for text in texts]
+
+
+class TokenizerPool:
+    """プロセスプールでテキストを並列にトークン化する.
+
+    仕様: docs/specs/f9-rag.md
+
+    プロセスは最初の大きなバッチで起動する（スナップショットから復元できた場合は
+    起動しない）。件数が少ない場合やワーカー数が1の場合、プールが異常終了した場合は
+    スレッドで逐次トークン化する。
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 0,
+        chunk_size: int = 200,
+        cache: TokenCache | None = None,
+    ) -> None:
+        """TokenizerPoolを初期化する.
+
+        Args:
+            max_workers: ワーカープロセス数（0でCPUコア数、1でプロセスプールを使わない）
+            chunk_size: 1ワーカーへ一度に渡すテキスト数
+            cache: トークンキャッシュ（Noneの場合はキャッシュしない）
+        """
+        self._pool = LazyProcessPool("Tokenizer", max_workers, initializer=_init_worker)
+        self._chunk_size = max(1, chunk_size)
+        self._cache = cache
+
+    @property
+    def cache(self) -> TokenCache | None:
+        """トークンキャッシュを返す."""
+        return self._cache
+
+    async def tokenize(self, texts: list[str]) -> list[list[str]]:
+        """テキストのリストをトークン化する.
+
+        キャッシュにあるテキストは形態素解析を行わず、残りをチャンクに分けて
+        ワーカーへ分散し、入力と同じ順序で結果をまとめる。
+
+        Args:
+            texts: トークン化するテキストのリスト
+
+        Returns:
+            texts と同順のトークン列のリスト
+        """
+        if self._cache is None:
+            return await self._tokenize_uncached(texts)
+
+        keys = [TokenCache.key(text) for text in texts]
+        cached = await asyncio.to_thread(self._cache.get_many, keys)
+        # 同じ本文は1回だけトークン化する
+        missing: dict[bytes, str] = {}
+        for key, text in zip(keys, texts, strict=True):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            tokenized = await self._tokenize_uncached(list(missing.values()))
+            entries = dict(zip(missing, tokenized, strict=True))
+            await asyncio.to_thread(self._cache.put_many, entries)
+            cached.update(entries)
+
+        return [cached[key] for key in keys]
+
+    async def _tokenize_uncached(self, texts: list[str]) -> list[list[str]]:
+        """キャッシュに無いテキストをトークン化する."""
+        if self._pool.disabled or len(texts) <= self._chunk_size:
+            return await asyncio.to_thread(_tokenize_chunk, texts)
+
+        chunks = [
+            texts[i : i + self._chunk_size] for i in range(0, len(texts), self._chunk_size)
+        ]
+        chunk_results = await asyncio.gather(
+            *(self._pool.run(_tokenize_chunk, chunk) for chunk in chunks)
+        )
+        return [tokens for chunk_tokens in chunk_results for tokens in chunk_tokens]
+
+    def shutdown(self) -> None:
+        """プロセスプールを停止する."""
+        self._pool.shutdown()
@@ -7,14 +7,25 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import shutil
+import threading
+import time
+from collections.abc import AsyncIterator, Callable, Mapping
+from contextlib import aclosing
 from dataclasses import dataclass
-from typing import cast
+from pathlib import Path
+from typing import Any, cast
 
 import chromadb
-from chromadb.api.types import Embeddings, IncludeEnum
+from chromadb.api.models.Collection import Collection
+from chromadb.api.types import Embeddings, GetResult, IncludeEnum, QueryResult
 from chromadb.config import Settings as ChromaSettings
 
 from src.embedding.base import EmbeddingProvider
+from src.embedding.cached_embedding import CachedEmbedding
+from src.rag.embedding_batcher import EmbeddingBatcher
+from src.rag.flat_vector_store import FlatVectorCollection, Quantization
+from src.rag.source_registry import SourceRecord
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +36,73 @@ class DocumentChunk:
 
     id: str  # ユニークID（URLハッシュ + chunk_index）
     text: str  # チャンク本文
-    metadata: dict[str, str | int]  # source_url, title, chunk_index, crawled_at
+    metadata: dict[str, str | int]  # source_url, title, chunk_index, crawled_at, content_hash
+
+
+@dataclass
+class EmbeddedChunks:
+    """Embedding済み・保存前のチャンク（VectorStore.embed_documents() の戻り値）."""
+
+    chunks: list[DocumentChunk]
+    embeddings: list[list[float]]
+    # 再Embedding中の元のモデルのEmbedding（元のコレクションへの書き込み用）
+    previous_embeddings: list[list[float]] | None = None
+
+
+@dataclass(frozen=True)
+class HnswParams:
+    """ChromaDBのHNSWインデックスのパラメータ（コレクション作成時に適用される）.
+
+    デフォルト値はChromaDBのデフォルトと同じ。
+    """
+
+    m: int = 16  # 各ノードのリンク数（大きいほど高精度・高メモリ）
+    construction_ef: int = 100  # 構築時の探索幅
+    search_ef: int = 100  # 検索時の探索幅（大きいほど高精度・低速）
+    batch_size: int = 100  # インデックスへ反映するまでに溜める件数（永続化時のみ）
+    sync_threshold: int = 1000  # ディスクへ書き出すまでに溜める件数（永続化時のみ）
+
+    def to_metadata(self, persistent: bool = True) -> dict[str, str | int]:
+        """コレクション作成時に指定するメタデータに変換する."""
+        metadata: dict[str, str | int] = {
+            "hnsw:space": "cosine",
+            "hnsw:M": self.m,
+            "hnsw:construction_ef": self.construction_ef,
+            "hnsw:search_ef": self.search_ef,
+        }
+        if persistent:
+            metadata["hnsw:batch_size"] = self.batch_size
+            metadata["hnsw:sync_threshold"] = self.sync_threshold
+        return metadata
+
+    @classmethod
+    def from_metadata(cls, metadata: Mapping[str, object] | None) -> HnswParams:
+        """コレクションのメタデータから復元する（未指定の項目はデフォルト値）."""
+        metadata = metadata or {}
+        defaults = cls()
+        return cls(
+            m=int(cast(int, metadata.get("hnsw:M", defaults.m))),
+            construction_ef=int(
+                cast(int, metadata.get("hnsw:construction_ef", defaults.construction_ef))
+            ),
+            search_ef=int(cast(int, metadata.get("hnsw:search_ef", defaults.search_ef))),
+            batch_size=int(cast(int, metadata.get("hnsw:batch_size", defaults.batch_size))),
+            sync_threshold=int(
+                cast(int, metadata.get("hnsw:sync_threshold", defaults.sync_threshold))
+            ),
+        )
+
+
+# インデックス再構築中のコピー先コレクション名の接尾辞
+_REBUILD_SUFFIX = "__rebuild"
+
+# Embeddingモデル変更時の再Embedding先・切り替え時に退避する元のコレクション名の接尾辞
+_REEMBED_SUFFIX = "__reembed"
+_RETIRED_SUFFIX = "__retired"
+
+# コレクションのメタデータに記録するEmbeddingモデルの識別子・次元数のキー
+_MODEL_KEY = "embedding:model"
+_DIMENSION_KEY = "embedding:dimension"
 
 
 @dataclass
@@ -40,6 +117,13 @@ class RetrievalResult:
 class VectorStore:
     """ChromaDBベースのベクトルストア.
 
+    flat_dir を指定した場合は、ChromaDBの代わりに NumPy のフラットなベクトル行列
+    （FlatVectorCollection）をバックエンドとして使う。
+
+    embedding_model を指定した場合は、コレクションのメタデータにEmbeddingモデルと
+    次元数を記録し、起動時にモデルの変更を検知する（embedding_outdated）。
+    begin_reembedding() → reembed() で、検索を止めずに現在のモデルで作り直す。
+
     仕様: docs/specs/f9-rag.md
     """
 
@@ -48,6 +132,15 @@ class VectorStore:
         embedding_provider: EmbeddingProvider,
         persist_directory: str = "./chroma_db",
         collection_name: str = "knowledge",
+        embed_batch_size: int = 64,
+        embed_batch_tokens: int = 8000,
+        embed_concurrency: int = 2,
+        count_refresh_sec: float = 300.0,
+        flat_dir: str | Path | None = None,
+        flat_quantization: Quantization = "none",
+        flat_rerank_factor: int = 8,
+        hnsw: HnswParams | None = None,
+        embedding_model: str = "",
     ) -> None:
         """VectorStoreを初期化する.
 
@@ -55,19 +148,61 @@ class VectorStore:
             embedding_provider: Embedding生成プロバイダー
             persist_directory: ChromaDBの永続化ディレクトリ
             collection_name: コレクション名
+            embed_batch_size: 1回のEmbeddingリクエストの最大チャンク数
+            embed_batch_tokens: 1回のEmbeddingリクエストのおおよその最大トークン数
+            embed_concurrency: 同時に実行するEmbeddingリクエスト数
+            count_refresh_sec: 保持しているチャンク数をChromaDBの件数と照合する間隔（秒）
+            flat_dir: フラットベクトルバックエンドの保存ディレクトリ（Noneの場合はChromaDB）
+            flat_quantization: フラットベクトルバックエンドの候補選択に使う量子化方式
+            flat_rerank_factor: 量子化時に正確に再スコアリングする候補数の倍率
+            hnsw: 新規作成するコレクションのHNSWパラメータ（Noneの場合はデフォルト値）
+            embedding_model: Embeddingモデルの識別子（空文字の場合は記録・変更検知をしない）
         """
-        self._embedding = embedding_provider
+        self._init_count_cache(count_refresh_sec)
+        self._init_embedding_state(embedding_provider, embedding_model)
+        self._batcher = EmbeddingBatcher(
+            embedding_provider,
+            max_items=embed_batch_size,
+            max_tokens=embed_batch_tokens,
+            concurrency=embed_concurrency,
+        )
         self._persist_directory = persist_directory
         self._collection_name = collection_name
+        self._hnsw = hnsw or HnswParams()
+        self.hnsw_outdated = False
+        self._collection: Collection | FlatVectorCollection
+        self._flat_dir = Path(flat_dir) if flat_dir is not None else None
+        self._flat_quantization: Quantization = flat_quantization
+        self._flat_rerank_factor = flat_rerank_factor
+        if self._flat_dir is not None:
+            self._recover_reembed()
+            self._collection = self._open_collection(collection_name)
+            self._check_embedding_model()
+            return
         # テレメトリを無効化
         chroma_settings = ChromaSettings(anonymized_telemetry=False)
         self._client = chromadb.PersistentClient(
             path=persist_directory, settings=chroma_settings
         )
-        self._collection = self._client.get_or_create_collection(
+        self._recover_rebuild()
+        self._recover_reembed()
+        chroma_collection = self._client.get_or_create_collection(
             name=collection_name,
-            metadata={"hnsw:space": "cosine"},
+            metadata={**self._hnsw.to_metadata(), **self._embedding_metadata()},
         )
+        self._collection = chroma_collection
+        # 既存のコレクションには作成時のパラメータが使われ続ける
+        current = HnswParams.from_metadata(chroma_collection.metadata)
+        if current != self._hnsw:
+            self.hnsw_outdated = True
+            logger.warning(
+                "HNSW parameters of collection '%s' differ from settings (%s != %s); "
+                "run 'python -m src.rag.cli rebuild-index' to apply them",
+                collection_name,
+                current,
+                self._hnsw,
+            )
+        self._check_embedding_model()
 
     @classmethod
     def create_ephemeral(
@@ -85,22 +220,533 @@ class VectorStore:
             インメモリのVectorStoreインスタンス
         """
         instance = cls.__new__(cls)
-        instance._embedding = embedding_provider
+        instance._init_count_cache(300.0)
+        instance._init_embedding_state(embedding_provider, "")
+        instance._batcher = EmbeddingBatcher(embedding_provider)
         instance._persist_directory = ""
+        instance._flat_dir = None
         instance._collection_name = collection_name
+        instance._hnsw = HnswParams()
+        instance.hnsw_outdated = False
         # テレメトリを無効化
         chroma_settings = ChromaSettings(anonymized_telemetry=False)
         instance._client = chromadb.EphemeralClient(settings=chroma_settings)
         instance._collection = instance._client.get_or_create_collection(
             name=collection_name,
-            metadata={"hnsw:space": "cosine"},
+            metadata=instance._hnsw.to_metadata(persistent=False),
         )
         return instance
 
+    async def copy_to(self, target: VectorStore, batch_size: int = 1000) -> int:
+        """全チャンクをベクトルごと別のVectorStoreにコピーする（Embeddingは再計算しない）.
+
+        Args:
+            target: コピー先のVectorStore
+            batch_size: 1回にコピーする件数
+
+        Returns:
+            コピーした件数
+        """
+        return await asyncio.to_thread(
+            _copy_records, self._collection, target._upsert, batch_size
+        )
+
+    def _init_count_cache(self, refresh_sec: float) -> None:
+        """チャンク数のキャッシュを初期化する（初回の検索時にChromaDBから取得する）."""
+        self._count_lock = threading.Lock()
+        self._count: int | None = None
+        self._count_synced_at = 0.0
+        self._count_refresh_sec = refresh_sec
+
+    def _init_embedding_state(
+        self, embedding_provider: EmbeddingProvider, embedding_model: str
+    ) -> None:
+        """Embeddingモデルの記録・再Embeddingの状態を初期化する."""
+        self._embedding = embedding_provider
+        self._embedding_model = embedding_model
+        # 検索時のクエリEmbedding（再Embedding中は元のコレクションのモデル）
+        self._query_embedding = embedding_provider
+        self._previous_batcher: EmbeddingBatcher | None = None
+        self._shadow: Collection | FlatVectorCollection | None = None
+        # 書き込みと再Embedding先への反映・切り替えを直列化する
+        self._write_lock = threading.RLock()
+        # 検索対象のコレクションとクエリEmbeddingの組を同時に切り替える
+        self._switch_lock = threading.Lock()
+        self.stored_embedding_model = embedding_model
+        self.embedding_outdated = False
+        self.reembed_progress: tuple[int, int] | None = None
+
+    def _document_count(self) -> int:
+        """保持しているチャンク数を返す（照合間隔を過ぎていればChromaDBの件数と照合する）."""
+        with self._count_lock:
+            now = time.monotonic()
+            if self._count is None or now - self._count_synced_at >= self._count_refresh_sec:
+                count = self._collection.count()
+                if self._count is not None and count != self._count:
+                    logger.debug(
+                        "Reconciled vector store count: %d -> %d", self._count, count
+                    )
+                self._count = count
+                self._count_synced_at = now
+            return self._count
+
+    def _adjust_count(self, delta: int) -> None:
+        """書き込みに合わせてチャンク数を差分更新する.
+
+        書き込みと照合が並行した場合などにずれる可能性があるが、次の照合で補正される。
+        """
+        with self._count_lock:
+            if self._count is not None:
+                self._count = max(0, self._count + delta)
+
+    def _upsert(
+        self,
+        ids: list[str],
+        embeddings: Embeddings,
+        documents: list[str],
+        metadatas: list[dict[str, str | int]],
+    ) -> None:
+        """チャンクをupsertし、新規に追加された件数だけチャンク数を増やす."""
+        with self._write_lock:
+            existing = self._collection.get(ids=ids, include=[])["ids"]
+            _write_records(self._collection, ids, embeddings, documents, metadatas)
+            self._adjust_count(len(set(ids)) - len(existing))
+
+    def _upsert_previous(
+        self,
+        ids: list[str],
+        embeddings: Embeddings,
+        documents: list[str],
+        metadatas: list[dict[str, str | int]],
+    ) -> None:
+        """元のモデルのEmbeddingを元のコレクションに書き込む（切り替え済みの場合は捨てる）."""
+        with self._write_lock:
+            if self._shadow is not None:
+                self._upsert(ids, embeddings, documents, metadatas)
+
+    def _upsert_current(
+        self,
+        ids: list[str],
+        embeddings: Embeddings,
+        documents: list[str],
+        metadatas: list[dict[str, str | int]],
+    ) -> None:
+        """現在のモデルのEmbeddingを書き込む（再Embedding中は再Embedding先のコレクション）."""
+        with self._write_lock:
+            if self._shadow is None:
+                self._upsert(ids, embeddings, documents, metadatas)
+            else:
+                _write_records(self._shadow, ids, embeddings, documents, metadatas)
+
+    def _update_metadata(self, ids: list[str], metadatas: list[dict[str, str | int]]) -> int:
+        """存在するチャンクのメタデータのみ更新する（再Embedding先にコピー済みのものも更新する）."""
+        with self._write_lock:
+            existing = set(self._collection.get(ids=ids, include=[])["ids"])
+            records = [(id_, meta) for id_, meta in zip(ids, metadatas) if id_ in existing]
+            if records:
+                self._collection.update(
+                    ids=[id_ for id_, _ in records], metadatas=[meta for _, meta in records]
+                )
+            if self._shadow is not None:
+                copied = set(self._shadow.get(ids=ids, include=[])["ids"])
+                shadow_records = [(id_, meta) for id_, meta in records if id_ in copied]
+                if shadow_records:
+                    self._shadow.update(
+                        ids=[id_ for id_, _ in shadow_records],
+                        metadatas=[meta for _, meta in shadow_records],
+                    )
+        return len(records)
+
+    def _delete_existing(self, ids: list[str]) -> None:
+        """存在するチャンクを削除し、チャンク数を減らす（再Embedding先からも削除する）."""
+        with self._write_lock:
+            self._collection.delete(ids=ids)
+            if self._shadow is not None:
+                copied = self._shadow.get(ids=ids, include=[])["ids"]
+                if copied:
+                    self._shadow.delete(ids=copied)
+            self._adjust_count(-len(ids))
+
+    def _delete_ids(self, ids: list[str]) -> int:
+        """ID指定でチャンクを削除する（存在しないIDは無視する）."""
+        with self._write_lock:
+            existing = self._collection.get(ids=ids, include=[])["ids"]
+            if existing:
+                self._delete_existing(existing)
+        return len(existing)
+
+    def _recover_rebuild(self) -> None:
+        """中断したインデックス再構築の後始末をする.
+
+        元のコレクションの削除後に中断した場合はコピー先を元の名前に戻し、
+        それ以外（コピー途中）の場合はコピー先を削除する。
+        """
+        names = set(self._client.list_collections())
+        rebuild_name = self._collection_name + _REBUILD_SUFFIX
+        if rebuild_name not in names:
+            return
+        if self._collection_name in names:
+            self._client.delete_collection(rebuild_name)
+            logger.warning("Discarded incomplete HNSW rebuild of '%s'", self._collection_name)
+        else:
+            self._client.get_collection(rebuild_name).modify(name=self._collection_name)
+            logger.warning("Completed interrupted HNSW rebuild of '%s'", self._collection_name)
+
+    async def rebuild_index(self, batch_size: int = 1000) -> int:
+        """現在のHNSWパラメータでコレクションを作り直す（Embeddingは再計算しない）.
+
+        新しいパラメータのコレクションに全チャンクのベクトル・本文・メタデータをコピーし、
+        元のコレクションと置き換える。再構築中の書き込みはコピーされないため、
+        Botを停止した状態で実行すること。
+
+        Args:
+            batch_size: 1回にコピーする件数
+
+        Returns:
+            コピーした件数
+        """
+        if self._flat_dir is not None:
+            raise ValueError("HNSW index rebuild requires the ChromaDB backend")
+        # flat_dir が無い場合、コレクションは常にChromaDBのもの
+        source = cast(Collection, self._collection)
+        count = await asyncio.to_thread(self._rebuild_collection, source, batch_size)
+        logger.info(
+            "Rebuilt HNSW index of '%s' (%d documents, %s)",
+            self._collection_name,
+            count,
+            self._hnsw,
+        )
+        return count
+
+    def _rebuild_collection(self, source: Collection, batch_size: int) -> int:
+        """コピー先のコレクションを作成して全件をコピーし、元のコレクションと置き換える."""
+        rebuild_name = self._collection_name + _REBUILD_SUFFIX
+        if rebuild_name in set(self._client.list_collections()):
+            self._client.delete_collection(rebuild_name)
+        target = self._client.create_collection(
+            name=rebuild_name,
+            metadata={**self._hnsw.to_metadata(), **_embedding_keys(source.metadata)},
+        )
+        copied = _copy_records(
+            source,
+            lambda ids, embeddings, documents, metadatas: target.add(
+                ids=ids,
+                embeddings=embeddings,
+                documents=documents,
+                metadatas=metadatas,  # type: ignore[arg-type]
+            ),
+            batch_size,
+        )
+
+        # 元のコレクションを削除してからコピー先の名前を変える（途中で中断した場合は
+        # 次回の起動時に _recover_rebuild() が完了させる）
+        self._client.delete_collection(self._collection_name)
+        target.modify(name=self._collection_name)
+        self._collection = target
+        self.hnsw_outdated = False
+        with self._count_lock:
+            self._count = copied
+            self._count_synced_at = time.monotonic()
+        return copied
+
+    def _embedding_metadata(self) -> dict[str, str | int]:
+        """新規作成するコレクションに記録するEmbeddingモデルのメタデータ."""
+        return {_MODEL_KEY: self._embedding_model} if self._embedding_model else {}
+
+    def _open_collection(self, name: str) -> Collection | FlatVectorCollection:
+        """コレクションを開く（存在しない場合は作成する）."""
+        if self._flat_dir is not None:
+            return FlatVectorCollection(
+                self._flat_dir / name,
+                quantization=self._flat_quantization,
+                rerank_factor=self._flat_rerank_factor,
+                metadata=self._embedding_metadata(),
+            )
+        return self._client.get_or_create_collection(
+            name=name,
+            metadata={
+                **self._hnsw.to_metadata(persistent=bool(self._persist_directory)),
+                **self._embedding_metadata(),
+            },
+        )
+
+    def _collection_names(self) -> set[str]:
+        """保存されているコレクション名の一覧."""
+        if self._flat_dir is not None:
+            if not self._flat_dir.exists():
+                return set()
+            return {path.name for path in self._flat_dir.iterdir() if path.is_dir()}
+        return set(self._client.list_collections())
+
+    def _rename_stored(self, name: str, new_name: str) -> None:
+        """開いていないコレクションの名前を変える."""
+        if self._flat_dir is not None:
+            (self._flat_dir / name).rename(self._flat_dir / new_name)
+        else:
+            self._client.get_collection(name).modify(name=new_name)
+
+    def _drop_stored(self, name: str) -> None:
+        """開いていないコレクションを削除する."""
+        if self._flat_dir is not None:
+            shutil.rmtree(self._flat_dir / name)
+        else:
+            self._client.delete_collection(name)
+
+    def _check_embedding_model(self) -> None:
+        """コレクションに記録されたEmbeddingモデルと設定のモデルを比較する."""
+        metadata = self._collection.metadata or {}
+        stored = str(metadata.get(_MODEL_KEY, ""))
+        if not self._embedding_model:
+            self.stored_embedding_model = stored
+            return
+        if not stored:
+            # 記録を始める前に作成したコレクションは、現在のモデルで作成したものとみなす
+            recorded = _modifiable_metadata(self._collection)
+            recorded[_MODEL_KEY] = self._embedding_model
+            dimension = _stored_dimension(self._collection)
+            if dimension is not None:
+                recorded[_DIMENSION_KEY] = dimension
+            self._collection.modify(metadata=recorded)
+            stored = self._embedding_model
+        self.stored_embedding_model = stored
+        self.embedding_outdated = stored != self._embedding_model
+        shadow_name = self._collection_name + _REEMBED_SUFFIX
+        if self.embedding_outdated:
+            logger.warning(
+                "Collection '%s' was embedded with '%s' but settings use '%s'; "
+                "re-embedding is required",
+                self._collection_name,
+                stored,
+                self._embedding_model,
+            )
+        elif shadow_name in self._collection_names():
+            # 設定を元のモデルに戻した場合など、不要になった再Embedding先を削除する
+            self._drop_stored(shadow_name)
+            logger.info("Discarded stale re-embedding of '%s'", self._collection_name)
+
+    def _recover_reembed(self) -> None:
+        """再Embedding後の切り替えが中断していた場合に完了させる.
+
+        切り替えは「元のコレクションを退避（__retired）→ 再Embedding先の名前を変更 →
+        退避したコレクションを削除」の順で行うため、元の名前のコレクションが無ければ
+        再Embedding先（無ければ退避したコレクション）を元の名前に戻す。
+        """
+        names = self._collection_names()
+        retired_name = self._collection_name + _RETIRED_SUFFIX
+        if retired_name not in names:
+            return
+        if self._collection_name not in names:
+            shadow_name = self._collection_name + _REEMBED_SUFFIX
+            restored = shadow_name if shadow_name in names else retired_name
+            self._rename_stored(restored, self._collection_name)
+            logger.warning(
+                "Completed interrupted re-embedding switch of '%s'", self._collection_name
+            )
+            if restored == retired_name:
+                return
+        self._drop_stored(retired_name)
+
+    def begin_reembedding(self, previous_embedding: EmbeddingProvider) -> None:
+        """Embeddingモデルの変更に伴う再Embeddingを開始する.
+
+        再Embedding先のコレクション（<名前>__reembed）を開き、切り替えまでの検索は
+        previous_embedding（元のコレクションのモデル）でクエリをEmbeddingして
+        元のコレクションから返す。以降の書き込みは両方のコレクションに反映する。
+        中断した再Embedding先が残っている場合は続きから再開する。
+        書き込みを始める前（起動時）に呼ぶこと。
+
+        Args:
+            previous_embedding: 元のコレクションのEmbeddingモデルのプロバイダー
+
+        Raises:
+            ValueError: コレクションのモデルが設定と同じ場合
+        """
+        if not self.embedding_outdated:
+            raise ValueError("Embedding model of the collection is up to date")
+        shadow_name = self._collection_name + _REEMBED_SUFFIX
+        shadow = self._open_collection(shadow_name)
+        if (shadow.metadata or {}).get(_MODEL_KEY) != self._embedding_model:
+            # 別のモデルへの再Embeddingの途中で残ったコレクションは作り直す
+            if isinstance(shadow, FlatVectorCollection):
+                shadow.close()
+            self._drop_stored(shadow_name)
+            shadow = self._open_collection(shadow_name)
+        with self._write_lock:
+            self._shadow = shadow
+            self._previous_batcher = self._batcher.for_provider(previous_embedding)
+        with self._switch_lock:
+            self._query_embedding = previous_embedding
+        logger.info(
+            "Started re-embedding of '%s' (%s -> %s)",
+            self._collection_name,
+            self.stored_embedding_model,
+            self._embedding_model,
+        )
+
+    async def reembed(
+        self,
+        batch_size: int = 500,
+        progress: Callable[[int, int], None] | None = None,
+        retire_delay_sec: float = 5.0,
+        max_passes: int = 5,
+    ) -> int:
+        """元のコレクションの全チャンクを現在のモデルで再Embeddingし、完了したら切り替える.
+
+        チャンク本文を元のコレクションから読み出し、再Embedding先にまだ無いチャンクだけを
+        Embeddingする（再開時は続きから）。Embeddingは設定の同時実行数までで並行実行する。
+        件数が揃ったら、検索対象のコレクションとクエリのEmbeddingを同時に切り替える。
+        並行した削除で読み出し位置がずれて件数が揃わない場合は、もう一度走査する。
+
+        Args:
+            batch_size: 1回に読み出す件数
+            progress: 進捗（走査済み件数, 全件数）を受け取るコールバック
+            retire_delay_sec: 切り替え後、実行中の検索の完了を待ってから元のコレクションを
+                削除するまでの時間（秒）
+            max_passes: 件数が揃うまで走査する最大回数
+
+        Returns:
+            再Embeddingした件数
+
+        Raises:
+            ValueError: begin_reembedding() を呼んでいない場合
+            RuntimeError: max_passes 回走査しても件数が揃わない場合
+        """
+        if self._shadow is None:
+            raise ValueError("Re-embedding has not been started")
+        embedded = 0
+        for _ in range(max_passes):
+            embedded += await self._reembed_pass(batch_size, progress)
+            retired = await asyncio.to_thread(self._switch_to_shadow)
+            if retired is not None:
+                break
+        else:
+            raise RuntimeError(
+                f"Re-embedding of '{self._collection_name}' did not converge"
+                f" after {max_passes} passes"
+            )
+        logger.info(
+            "Switched '%s' to re-embedded collection (%d documents embedded with '%s')",
+            self._collection_name,
+            embedded,
+            self._embedding_model,
+        )
+        await asyncio.sleep(retire_delay_sec)
+        await asyncio.to_thread(self._drop_retired, retired)
+        return embedded
+
+    async def _reembed_pass(
+        self, batch_size: int, progress: Callable[[int, int], None] | None
+    ) -> int:
+        """元のコレクションを1回走査し、再Embedding先に無いチャンクをEmbeddingする."""
+        total = await asyncio.to_thread(self._collection.count)
+        done = 0
+        embedded = 0
+        while True:
+            results = await asyncio.to_thread(
+                self._collection.get,
+                limit=batch_size,
+                offset=done,
+                include=[IncludeEnum.documents, IncludeEnum.metadatas],
+            )
+            ids = results["ids"]
+            if not ids:
+                break
+            documents = results["documents"] or [""] * len(ids)
+            metadatas = cast(list[dict[str, str | int]], results["metadatas"] or [{}] * len(ids))
+            copied = set(await asyncio.to_thread(self._shadow_ids, ids))
+            pending = [i for i, id_ in enumerate(ids) if id_ not in copied]
+            if pending:
+                chunks = [
+                    DocumentChunk(id=ids[i], text=documents[i] or "", metadata=metadatas[i])
+                    for i in pending
+                ]
+                await self._write_chunks(chunks, self._batcher, self._fill_shadow)
+                embedded += len(pending)
+            done += len(ids)
+            self.reembed_progress = (min(done, total), total)
+            if progress is not None:
+                progress(min(done, total), total)
+            logger.info("Re-embedding progress: %d/%d", min(done, total), total)
+            if len(ids) < batch_size:
+                break
+        return embedded
+
+    def _shadow_ids(self, ids: list[str]) -> list[str]:
+        """再Embedding先に存在するIDを返す."""
+        if self._shadow is None:
+            return ids
+        return self._shadow.get(ids=ids, include=[])["ids"]
+
+    def _fill_shadow(
+        self,
+        ids: list[str],
+        embeddings: Embeddings,
+        documents: list[str],
+        metadatas: list[dict[str, str | int]],
+    ) -> None:
+        """再Embeddingしたチャンクを書き込む.
+
+        読み出した後に削除・更新されたチャンクは書き込まない（並行した書き込みが
+        反映済みのため）。
+        """
+        with self._write_lock:
+            if self._shadow is None:
+                return
+            current = self._collection.get(ids=ids, include=[IncludeEnum.documents])
+            alive = dict(zip(current["ids"], current["documents"] or []))
+            keep = [i for i, id_ in enumerate(ids) if alive.get(id_) == documents[i]]
+            if keep:
+                _write_records(
+                    self._shadow,
+                    [ids[i] for i in keep],
+                    cast(Embeddings, [embeddings[i] for i in keep]),
+                    [documents[i] for i in keep],
+                    [metadatas[i] for i in keep],
+                )
+
+    def _switch_to_shadow(self) -> Collection | FlatVectorCollection | None:
+        """件数が揃っていれば再Embedding先に切り替え、退避した元のコレクションを返す."""
+        with self._write_lock:
+            shadow = self._shadow
+            if shadow is None or shadow.count() != self._collection.count():
+                return None
+            old = self._collection
+            retired_name = self._collection_name + _RETIRED_SUFFIX
+            if self._flat_dir is not None:
+                # 元のコレクションは開いているファイルで切り替えまで検索を続けられる
+                cast(FlatVectorCollection, shadow).close()
+                (self._flat_dir / self._collection_name).rename(self._flat_dir / retired_name)
+                self._rename_stored(self._collection_name + _REEMBED_SUFFIX, self._collection_name)
+                current = self._open_collection(self._collection_name)
+            else:
+                cast(Collection, old).modify(name=retired_name)
+                cast(Collection, shadow).modify(name=self._collection_name)
+                current = shadow
+            with self._switch_lock:
+                self._collection = current
+                self._query_embedding = self._embedding
+            with self._count_lock:
+                self._count = current.count()
+                self._count_synced_at = time.monotonic()
+            self._shadow = None
+            self._previous_batcher = None
+            self.stored_embedding_model = self._embedding_model
+            self.embedding_outdated = False
+            self.reembed_progress = None
+            return old
+
+    def _drop_retired(self, retired: Collection | FlatVectorCollection) -> None:
+        """切り替え前のコレクションを削除する."""
+        if isinstance(retired, FlatVectorCollection):
+            retired.close()
+        self._drop_stored(self._collection_name + _RETIRED_SUFFIX)
+
     async def add_documents(self, chunks: list[DocumentChunk]) -> int:
         """チャンクをEmbedding→ベクトルストアに追加（upsert動作）.
 
         同じIDのドキュメントが既に存在する場合は上書きする。
+        Embeddingは件数・おおよそのトークン数で分割したバッチ単位で生成し、
+        前のバッチのupsert中に次のバッチのEmbeddingを進める。
 
         Args:
             chunks: 追加するチャンクのリスト
@@ -111,23 +757,87 @@ class VectorStore:
         if not chunks:
             return 0
 
-        # テキストをEmbeddingに変換
+        previous_batcher = self._previous_batcher
+        if previous_batcher is None:
+            batches = await self._write_chunks(chunks, self._batcher, self._upsert)
+        else:
+            # 再Embedding中は、切り替えまでの検索用に元のモデルで元のコレクションへ、
+            # 切り替え後の検索用に現在のモデルで再Embedding先へ書き込む
+            batches = await self._write_chunks(chunks, previous_batcher, self._upsert_previous)
+            await self._write_chunks(chunks, self._batcher, self._upsert_current)
+
+        logger.info("Upserted %d documents to vector store (%d batches)", len(chunks), batches)
+        return len(chunks)
+
+    async def _write_chunks(
+        self,
+        chunks: list[DocumentChunk],
+        batcher: EmbeddingBatcher,
+        write: Callable[[list[str], Embeddings, list[str], list[dict[str, str | int]]], None],
+    ) -> int:
+        """チャンクをバッチ単位でEmbeddingして write に渡し、バッチ数を返す."""
         texts = [chunk.text for chunk in chunks]
-        raw_embeddings = await self._embedding.embed(texts)
-        embeddings: Embeddings = cast(Embeddings, raw_embeddings)
+        batches = 0
+        async with aclosing(batcher.iter_embeddings(texts)) as embedded:
+            async for start, raw_embeddings in embedded:
+                batch = chunks[start:start + len(raw_embeddings)]
+                embeddings: Embeddings = cast(Embeddings, raw_embeddings)
+                # ChromaDBにupsert（同期APIなのでto_threadでラップ）
+                await asyncio.to_thread(
+                    write,
+                    [chunk.id for chunk in batch],
+                    embeddings,
+                    [chunk.text for chunk in batch],
+                    [chunk.metadata for chunk in batch],
+                )
+                batches += 1
+        return batches
 
-        # ChromaDBにupsert（同期APIなのでto_threadでラップ）
-        ids = [chunk.id for chunk in chunks]
-        metadatas = [chunk.metadata for chunk in chunks]
+    async def embed_documents(self, chunks: list[DocumentChunk]) -> EmbeddedChunks:
+        """チャンクをEmbeddingする（保存は upsert_embedded() で行う）.
 
-        await asyncio.to_thread(
-            self._collection.upsert,
-            ids=ids,
-            embeddings=embeddings,
-            documents=texts,
-            metadatas=metadatas,  # type: ignore[arg-type]
-        )
+        取り込みパイプラインで、Embeddingと保存を別のステージとして実行するために使う。
+        再Embedding中は元のモデルのEmbeddingも生成する。
+
+        Args:
+            chunks: Embeddingするチャンクのリスト
+
+        Returns:
+            Embedding済みのチャンク
+        """
+        embeddings = await _embed_all(self._batcher, chunks)
+        previous = None
+        if self._previous_batcher is not None:
+            previous = await _embed_all(self._previous_batcher, chunks)
+        return EmbeddedChunks(chunks, embeddings, previous)
+
+    async def upsert_embedded(self, embedded: EmbeddedChunks) -> int:
+        """embed_documents() でEmbeddingしたチャンクを保存する（upsert動作）.
 
+        Args:
+            embedded: Embedding済みのチャンク
+
+        Returns:
+            追加件数
+        """
+        chunks = embedded.chunks
+        if not chunks:
+            return 0
+        ids = [chunk.id for chunk in chunks]
+        documents = [chunk.text for chunk in chunks]
+        metadatas = [chunk.metadata for chunk in chunks]
+        embeddings = cast(Embeddings, embedded.embeddings)
+        if embedded.previous_embeddings is None:
+            await asyncio.to_thread(self._upsert, ids, embeddings, documents, metadatas)
+        else:
+            await asyncio.to_thread(
+                self._upsert_previous,
+                ids,
+                cast(Embeddings, embedded.previous_embeddings),
+                documents,
+                metadatas,
+            )
+            await asyncio.to_thread(self._upsert_current, ids, embeddings, documents, metadatas)
         logger.info("Upserted %d documents to vector store", len(chunks))
         return len(chunks)
 
@@ -147,9 +857,13 @@ class VectorStore:
         Returns:
             検索結果のリスト（類似度の高い順）
         """
+        # 再Embeddingの切り替えと並行しても、クエリEmbeddingと検索対象のモデルを揃える
+        with self._switch_lock:
+            query_embedding, collection = self._query_embedding, self._collection
+
         # クエリをEmbeddingに変換
-        raw_query_embedding = await self._embedding.embed([query])
-        query_embeddings: Embeddings = cast(Embeddings, raw_query_embedding)
+        raw_query_embedding = await query_embedding.embed_query(query)
+        query_embeddings: Embeddings = cast(Embeddings, [raw_query_embedding])
 
         # 閾値フィルタリングを行う場合、多めに取得してからフィルタリング
         fetch_count = n_results
@@ -158,21 +872,13 @@ class VectorStore:
             # 3倍（最低20件）: 閾値で除外される可能性を考慮し余裕を持って取得
             fetch_count = max(n_results * 3, 20)
 
-        # コレクションサイズを超えないように制限（ChromaDBバージョンによる例外を防止）
-        collection_count = await asyncio.to_thread(self._collection.count)
-        if collection_count > 0:
-            fetch_count = min(fetch_count, collection_count)
-        else:
-            # コレクションが空の場合は空リストを返す
-            return []
-
         # ChromaDBで検索（同期APIなのでto_threadでラップ）
         results = await asyncio.to_thread(
-            self._collection.query,
-            query_embeddings=query_embeddings,
-            n_results=fetch_count,
-            include=[IncludeEnum.documents, IncludeEnum.metadatas, IncludeEnum.distances],
+            self._query, collection, query_embeddings, fetch_count
         )
+        if results is None:
+            # コレクションが空の場合は空リストを返す
+            return []
 
         # 結果を変換
         retrieval_results: list[RetrievalResult] = []
@@ -209,6 +915,33 @@ class VectorStore:
 
         return retrieval_results
 
+    def _query(
+        self,
+        collection: Collection | FlatVectorCollection,
+        query_embeddings: Embeddings,
+        fetch_count: int,
+    ) -> QueryResult | None:
+        """ChromaDBで検索する（コレクションが空の場合はNone）.
+
+        取得件数はコレクションサイズを超えないように制限する（ChromaDBバージョンによる
+        例外を防止）。チャンク数は書き込み時に差分更新した値を使い、検索ごとに
+        count() を呼ばない。
+        """
+        collection_count = self._document_count()
+        if collection_count <= 0:
+            return None
+        return collection.query(
+            query_embeddings=query_embeddings,
+            n_results=min(fetch_count, collection_count),
+            include=[IncludeEnum.documents, IncludeEnum.metadatas, IncludeEnum.distances],
+        )
+
+    def _get_by_source(self, source_url: str) -> GetResult:
+        """ソースURL指定でチャンクのIDとメタデータを取得する."""
+        return self._collection.get(
+            where={"source_url": source_url}, include=[IncludeEnum.metadatas]
+        )
+
     async def delete_by_source(self, source_url: str) -> int:
         """ソースURL指定でチャンクを削除.
 
@@ -219,11 +952,7 @@ class VectorStore:
             削除件数
         """
         # まず該当するドキュメントを検索
-        results = await asyncio.to_thread(
-            self._collection.get,
-            where={"source_url": source_url},
-            include=[IncludeEnum.metadatas],
-        )
+        results = await asyncio.to_thread(self._get_by_source, source_url)
 
         if not results["ids"]:
             return 0
@@ -232,74 +961,331 @@ class VectorStore:
         count = len(ids_to_delete)
 
         # 削除実行
-        await asyncio.to_thread(
-            self._collection.delete,
-            ids=ids_to_delete,
-        )
+        await asyncio.to_thread(self._delete_existing, ids_to_delete)
 
         logger.info("Deleted %d documents from vector store (source: %s)", count, source_url)
         return count
 
-    async def delete_stale_chunks(self, source_url: str, valid_ids: set[str]) -> int:
-        """ソースURLのチャンクのうち、valid_idsに含まれないものを削除.
+    async def get_content_hashes(self, source_url: str) -> dict[str, str]:
+        """ソースURLの既存チャンクの content_hash を取得する.
 
-        upsert後に古いチャンクを削除するために使用。
+        再取り込み時に新しいチャンクと比較し、変更の無いチャンクを判定するために使用。
 
         Args:
             source_url: 対象ソースURL
-            valid_ids: 保持するID（これ以外のIDを削除）
 
         Returns:
-            削除件数
+            ID -> content_hash の辞書（content_hash 未記録のチャンクは空文字）
         """
-        # ソースURLの全チャンクを取得
-        results = await asyncio.to_thread(
-            self._collection.get,
-            where={"source_url": source_url},
-            include=[IncludeEnum.metadatas],
-        )
+        results = await asyncio.to_thread(self._get_by_source, source_url)
+        ids = results["ids"]
+        metadatas = results["metadatas"] or [{}] * len(ids)
+        return {
+            id_: str((meta or {}).get("content_hash", ""))
+            for id_, meta in zip(ids, metadatas)
+        }
 
-        if not results["ids"]:
-            return 0
+    async def update_metadata(self, chunks: list[DocumentChunk]) -> int:
+        """Embedding・本文を変えずにチャンクのメタデータのみ更新する.
 
-        # valid_idsに含まれないIDを特定
-        stale_ids = [id_ for id_ in results["ids"] if id_ not in valid_ids]
+        再取り込みで内容が変わっていないチャンクのタイトル・取得日時を更新するために使用。
 
-        if not stale_ids:
+        Args:
+            chunks: 更新するチャンクのリスト（存在しないIDは無視する）
+
+        Returns:
+            更新件数
+        """
+        if not chunks:
             return 0
 
-        # 削除実行
-        await asyncio.to_thread(
-            self._collection.delete,
-            ids=stale_ids,
+        count = await asyncio.to_thread(
+            self._update_metadata,
+            [chunk.id for chunk in chunks],
+            [chunk.metadata for chunk in chunks],
         )
 
-        logger.info(
-            "Deleted %d stale chunks from vector store (source: %s)", len(stale_ids), source_url
-        )
-        return len(stale_ids)
+        logger.debug("Updated metadata of %d documents in vector store", count)
+        return count
+
+    async def delete_documents(self, ids: list[str]) -> int:
+        """ID指定でチャンクを削除.
+
+        Args:
+            ids: 削除するチャンクIDのリスト
+
+        Returns:
+            削除件数
+        """
+        if not ids:
+            return 0
+
+        count = await asyncio.to_thread(self._delete_ids, ids)
+
+        logger.info("Deleted %d documents from vector store", count)
+        return count
+
+    async def iter_documents(
+        self,
+        batch_size: int = 500,
+    ) -> AsyncIterator[list[tuple[str, str, str]]]:
+        """コレクション内の全チャンクをバッチ単位でストリーミング取得する.
+
+        全件を一度にメモリへ載せずにBM25インデックス等を再構築するために使用する。
+
+        Args:
+            batch_size: 1回の取得件数
+
+        Yields:
+            (id, text, source_url) のリスト
+        """
+        offset = 0
+        while True:
+            results = await asyncio.to_thread(
+                self._collection.get,
+                limit=batch_size,
+                offset=offset,
+                include=[IncludeEnum.documents, IncludeEnum.metadatas],
+            )
+            ids = results["ids"]
+            if not ids:
+                return
+
+            documents = results["documents"] or [""] * len(ids)
+            metadatas = results["metadatas"] or [{}] * len(ids)
+            yield [
+                (doc_id, doc or "", str((meta or {}).get("source_url", "")))
+                for doc_id, doc, meta in zip(ids, documents, metadatas)
+            ]
+
+            if len(ids) < batch_size:
+                return
+            offset += len(ids)
+
+    async def get_document_ids(self, batch_size: int = 5000) -> set[str]:
+        """コレクション内の全チャンクIDを取得する（本文・メタデータは読まない）.
+
+        BM25スナップショットがベクトルストアと一致するかの照合に使用する。
+
+        Args:
+            batch_size: 1回の取得件数
+
+        Returns:
+            チャンクIDの集合
+        """
+        doc_ids: set[str] = set()
+        offset = 0
+        while True:
+            results = await asyncio.to_thread(
+                self._collection.get, limit=batch_size, offset=offset, include=[]
+            )
+            ids = results["ids"]
+            doc_ids.update(ids)
+            if len(ids) < batch_size:
+                return doc_ids
+            offset += len(ids)
+
+    async def collect_sources(self, batch_size: int = 1000) -> list[SourceRecord]:
+        """全チャンクを走査し、ソースURLごとのチャンク数・データ量を集計する.
+
+        ソースURL台帳が空の場合（既存データからの移行時）の再構築に使用する。
+        ページ本文のハッシュは記録されていないため空文字になる。
+
+        Args:
+            batch_size: 1回の取得件数
+
+        Returns:
+            ソースURLごとの情報のリスト
+        """
+        chunk_counts: dict[str, int] = {}
+        byte_sizes: dict[str, int] = {}
+        titles: dict[str, str] = {}
+        crawled_ats: dict[str, str] = {}
+        offset = 0
+        while True:
+            results = await asyncio.to_thread(
+                self._collection.get,
+                limit=batch_size,
+                offset=offset,
+                include=[IncludeEnum.documents, IncludeEnum.metadatas],
+            )
+            ids = results["ids"]
+            if not ids:
+                break
+            documents = results["documents"] or [""] * len(ids)
+            metadatas = results["metadatas"] or [{}] * len(ids)
+            for doc, meta in zip(documents, metadatas):
+                meta = meta or {}
+                source_url = str(meta.get("source_url", ""))
+                chunk_counts[source_url] = chunk_counts.get(source_url, 0) + 1
+                byte_sizes[source_url] = byte_sizes.get(source_url, 0) + len(
+                    (doc or "").encode("utf-8")
+                )
+                titles.setdefault(source_url, str(meta.get("title", "")))
+                crawled_at = str(meta.get("crawled_at", ""))
+                # チャンクごとに取り込み日時が異なる場合は最新のものを採用する
+                if crawled_at > crawled_ats.get(source_url, ""):
+                    crawled_ats[source_url] = crawled_at
+            if len(ids) < batch_size:
+                break
+            offset += len(ids)
+
+        return [
+            SourceRecord(
+                source_url=source_url,
+                chunk_count=count,
+                title=titles[source_url],
+                crawled_at=crawled_ats.get(source_url, ""),
+                byte_size=byte_sizes[source_url],
+            )
+            for source_url, count in chunk_counts.items()
+        ]
+
+    def get_texts(self, ids: list[str]) -> dict[str, str]:
+        """ID指定でチャンク本文を取得する.
+
+        BM25インデックスが検索結果の本文を遅延取得するために使用する
+        （検索スレッドから呼ばれるため同期関数）。
+
+        Args:
+            ids: チャンクIDのリスト
+
+        Returns:
+            ID -> 本文 の辞書（存在しないIDは含まない）
+        """
+        if not ids:
+            return {}
+        results = self._collection.get(ids=ids, include=[IncludeEnum.documents])
+        documents = results["documents"] or []
+        return dict(zip(results["ids"], documents))
 
-    def get_stats(self) -> dict[str, int]:
+    def get_stats(self, count_sources: bool = True) -> dict[str, int]:
         """ナレッジベース統計（総チャンク数等）を返す.
 
         Note:
-            この関数は全チャンクのメタデータを走査するため O(N) のコストがかかる。
-            チャンク数が多い場合は頻繁な呼び出しを避けること。
+            count_sources=True の場合、全チャンクのメタデータを走査するため O(N) のコストがかかる。
+            ソースURL台帳がある場合は count_sources=False で呼び、ソース数は台帳から取得すること。
+
+        Args:
+            count_sources: ユニークなソースURL数（source_count）を集計するか
 
         Returns:
             統計情報の辞書
         """
         count = self._collection.count()
+        # 統計取得時もチャンク数を照合する
+        with self._count_lock:
+            self._count = count
+            self._count_synced_at = time.monotonic()
+        stats = {"total_chunks": count}
 
-        # ユニークなソースURL数を取得
-        all_docs = self._collection.get(include=[IncludeEnum.metadatas])
-        source_urls: set[str] = set()
-        if all_docs["metadatas"]:
-            for meta in all_docs["metadatas"]:
-                if meta and "source_url" in meta:
-                    source_urls.add(str(meta["source_url"]))
+        if count_sources:
+            # ユニークなソースURL数を取得
+            all_docs = self._collection.get(include=[IncludeEnum.metadatas])
+            source_urls: set[str] = set()
+            if all_docs["metadatas"]:
+                for meta in all_docs["metadatas"]:
+                    if meta and "source_url" in meta:
+                        source_urls.add(str(meta["source_url"]))
+            stats["source_count"] = len(source_urls)
 
-        return {
-            "total_chunks": count,
-            "source_count": len(source_urls),
-        }
+        progress = self.reembed_progress
+        if progress is not None:
+            stats["reembed_done"], stats["reembed_total"] = progress
+
+        if isinstance(self._embedding, CachedEmbedding):
+            cache_stats = self._embedding.get_stats()
+            stats["embedding_cache_hits"] = cache_stats["hits"]
+            stats["embedding_cache_misses"] = cache_stats["misses"]
+            stats["embedding_cache_entries"] = cache_stats["entries"]
+        return stats
+
+
+def _copy_records(
+    source: Collection | FlatVectorCollection,
+    write: Callable[[list[str], Embeddings, list[str], list[dict[str, str | int]]], None],
+    batch_size: int,
+) -> int:
+    """コレクションの全チャンクをバッチ単位で読み出し、write に渡す."""
+    copied = 0
+    while True:
+        results = source.get(
+            limit=batch_size,
+            offset=copied,
+            include=[IncludeEnum.embeddings, IncludeEnum.documents, IncludeEnum.metadatas],
+        )
+        ids = results["ids"]
+        if not ids:
+            return copied
+        write(
+            ids,
+            cast(Embeddings, results["embeddings"]),
+            results["documents"] or [""] * len(ids),
+            cast(list[dict[str, str | int]], results["metadatas"] or [{}] * len(ids)),
+        )
+        copied += len(ids)
+        if len(ids) < batch_size:
+            return copied
+
+
+async def _embed_all(
+    batcher: EmbeddingBatcher, chunks: list[DocumentChunk]
+) -> list[list[float]]:
+    """チャンクの本文を入力順にEmbeddingする."""
+    embeddings: list[list[float]] = []
+    if not chunks:
+        return embeddings
+    async with aclosing(batcher.iter_embeddings([chunk.text for chunk in chunks])) as embedded:
+        async for _, vectors in embedded:
+            embeddings.extend(vectors)
+    return embeddings
+
+
+def _write_records(
+    collection: Collection | FlatVectorCollection,
+    ids: list[str],
+    embeddings: Embeddings,
+    documents: list[str],
+    metadatas: list[dict[str, str | int]],
+) -> None:
+    """チャンクをupsertし、最初の書き込みでベクトルの次元数をメタデータに記録する."""
+    collection.upsert(
+        ids=ids,
+        embeddings=embeddings,
+        documents=documents,
+        metadatas=metadatas,  # type: ignore[arg-type]
+    )
+    if ids and _DIMENSION_KEY not in (collection.metadata or {}):
+        metadata = _modifiable_metadata(collection)
+        metadata[_DIMENSION_KEY] = len(embeddings[0])
+        collection.modify(metadata=metadata)
+
+
+def _modifiable_metadata(collection: Collection | FlatVectorCollection) -> dict[str, Any]:
+    """コレクションのメタデータを、modify() で置き換えられる形で返す.
+
+    ChromaDBは作成後の hnsw:space の指定を（同じ値でも）受け付けないため除く。
+    距離関数はインデックス側に保存されているため、メタデータから除いても変わらない。
+    """
+    return {
+        key: value
+        for key, value in (collection.metadata or {}).items()
+        if key != "hnsw:space"
+    }
+
+
+def _embedding_keys(metadata: Mapping[str, object] | None) -> dict[str, Any]:
+    """メタデータのうちEmbeddingモデルの記録を返す."""
+    return {
+        key: value
+        for key, value in (metadata or {}).items()
+        if key in (_MODEL_KEY, _DIMENSION_KEY)
+    }
+
+
+def _stored_dimension(collection: Collection | FlatVectorCollection) -> int | None:
+    """保存されているベクトルの次元数を返す（空の場合はNone）."""
+    embeddings = collection.get(limit=1, include=[IncludeEnum.embeddings])["embeddings"]
+    if embeddings is None or len(embeddings) == 0:
+        return None
+    return len(embeddings[0])
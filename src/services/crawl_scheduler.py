@@ -0,0 +1,169 @@
+"""ホストごとのクロール間隔を守るスケジューラー
+
+仕様: docs/specs/f9-rag.md
+
+ホストごとに独立したトークンバケットでリクエストの間隔を空け、全体の同時接続数を
+上限で制限する。あるホストの待機中も、別のホストへのリクエストは並行して進む。
+robots.txt の Crawl-delay / Request-rate が設定より長い場合はそちらに従う。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+logger = logging.getLogger(__name__)
+
+
+def parse_crawl_delay(robots_txt: str, user_agent: str = "*") -> float | None:
+    """robots.txt からリクエスト間隔（秒）を取得する.
+
+    Crawl-delay が無い場合は Request-rate（n/s 秒にn回）から求める。
+
+    Returns:
+        リクエスト間隔（秒）。指定が無い場合は None
+    """
+    parser = RobotFileParser()
+    parser.parse(robots_txt.splitlines())
+    delay = parser.crawl_delay(user_agent)
+    if delay is not None:
+        return float(delay)
+    rate = parser.request_rate(user_agent)
+    if rate is not None and rate.requests > 0:
+        return rate.seconds / rate.requests
+    return None
+
+
+@dataclass
+class _HostState:
+    """ホストごとのトークンバケットと robots.txt のキャッシュ."""
+
+    delay: float
+    tokens: float
+    updated_at: float
+    in_flight: asyncio.Semaphore
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    robots_expires_at: float = 0.0
+
+
+class CrawlScheduler:
+    """ホストごとのトークンバケットと全体の同時接続数の上限で、クロールのリクエストを調整する.
+
+    仕様: docs/specs/f9-rag.md
+
+    - ホストごとに 1/delay 個/秒でトークンが貯まり（最大 burst 個）、1リクエストで1個使う。
+      同じホストへの同時リクエストも burst 件までに制限し、リクエスト中はトークンを貯めない
+      （burst=1 の場合、前のリクエストの完了から delay 秒空ける）
+    - delay は設定値と robots.txt の Crawl-delay の長い方（max_delay で打ち切り）
+    - robots.txt はホストごとに最初のリクエストの前に取得し、robots_ttl 秒キャッシュする
+    - 待機はホストごとのロックの中で行うため、別のホストへのリクエストは待たされない
+    """
+
+    def __init__(
+        self,
+        default_delay: float = 1.0,
+        max_concurrent: int = 5,
+        burst: int = 1,
+        max_delay: float = 30.0,
+        robots_ttl: float = 3600.0,
+        fetch_robots: Callable[[str], Awaitable[str | None]] | None = None,
+    ) -> None:
+        """CrawlSchedulerを初期化する.
+
+        Args:
+            default_delay: 同一ホストへのリクエスト間隔の秒数
+            max_concurrent: 全体の同時リクエスト数の上限
+            burst: 間隔を空けずに送れるリクエスト数（同一ホストへの同時リクエスト数の上限）
+            max_delay: robots.txt で指定されたリクエスト間隔の上限秒数
+            robots_ttl: robots.txt をキャッシュする秒数
+            fetch_robots: robots.txt を取得する関数（引数は "https://example.com" 形式のオリジン、
+                取得できない場合は None を返す）。None の場合は robots.txt を参照しない
+        """
+        self._default_delay = default_delay
+        self._burst = max(1, burst)
+        self._max_delay = max_delay
+        self._robots_ttl = robots_ttl
+        self._fetch_robots = fetch_robots
+        self._global = asyncio.Semaphore(max_concurrent)
+        self._hosts: dict[str, _HostState] = {}
+
+    def host_delay(self, url: str) -> float:
+        """URLのホストに現在適用しているリクエスト間隔（秒）を返す."""
+        state = self._hosts.get(self._origin(url))
+        return state.delay if state is not None else self._default_delay
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """URLへリクエストしてよくなるまで待ち、リクエストの間その枠を確保する.
+
+        Args:
+            url: リクエストするURL
+        """
+        origin = self._origin(url)
+        state = self._hosts.get(origin)
+        if state is None:
+            state = _HostState(
+                delay=self._default_delay,
+                tokens=float(self._burst),
+                updated_at=time.monotonic(),
+                in_flight=asyncio.Semaphore(self._burst),
+            )
+            self._hosts[origin] = state
+
+        async with state.in_flight:
+            async with state.lock:
+                if self._fetch_robots is not None and time.monotonic() >= state.robots_expires_at:
+                    await self._refresh_robots(origin, state)
+                await self._wait_for_token(state)
+                # トークンは全体の枠を確保してから使う（全体の上限で待った分も間隔に含めない）
+                await self._global.acquire()
+                state.tokens -= 1.0
+            try:
+                yield
+            finally:
+                self._global.release()
+                # リクエスト中はトークンを貯めない（間隔はリクエストの完了から数える）
+                state.updated_at = time.monotonic()
+
+    async def _wait_for_token(self, state: _HostState) -> None:
+        """ホストのトークンが1個以上貯まるまで待つ."""
+        if state.delay <= 0:
+            state.tokens = float(self._burst)
+            return
+        while True:
+            now = time.monotonic()
+            state.tokens = min(
+                float(self._burst), state.tokens + (now - state.updated_at) / state.delay
+            )
+            state.updated_at = now
+            if state.tokens >= 1.0:
+                return
+            await asyncio.sleep((1.0 - state.tokens) * state.delay)
+
+    async def _refresh_robots(self, origin: str, state: _HostState) -> None:
+        """robots.txt を取得し、ホストのリクエスト間隔を更新する."""
+        assert self._fetch_robots is not None
+        state.robots_expires_at = time.monotonic() + self._robots_ttl
+        delay = self._default_delay
+        try:
+            async with self._global:
+                robots_txt = await self._fetch_robots(origin)
+            robots_delay = parse_crawl_delay(robots_txt) if robots_txt else None
+        except Exception:
+            logger.debug("Failed to fetch robots.txt: %s", origin, exc_info=True)
+            robots_delay = None
+        if robots_delay is not None and robots_delay > delay:
+            delay = min(robots_delay, self._max_delay)
+            logger.info("Using robots.txt crawl delay for %s: %.1fs", origin, delay)
+        state.delay = delay
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}".lower()
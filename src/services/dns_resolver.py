@@ -0,0 +1,213 @@
+"""SSRF対策付きのDNSリゾルバー
+
+仕様: docs/specs/f9-rag.md
+
+URL検証（SSRF対策）のDNS解決を、イベントループを止めずに行い、結果をTTL付きで
+キャッシュする。同じリゾルバーを共有HTTPクライアントのコネクターにも設定し、
+接続先を検証済みのIPアドレスに固定する。検証から接続までの間にDNSの応答が
+変わっても（DNSリバインディング）、検証していないアドレスには接続しない。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import logging
+import socket
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from aiohttp.abc import AbstractResolver, ResolveResult
+from aiohttp.resolver import DefaultResolver
+
+logger = logging.getLogger(__name__)
+
+_LOCALHOST_NAMES = ("localhost", "localhost.localdomain")
+_LINK_LOCAL_V4 = ipaddress.ip_network("169.254.0.0/16")
+
+
+def check_hostname(hostname: str) -> None:
+    """ホスト名が localhost でないことを検証する.
+
+    Raises:
+        ValueError: localhost が指定された場合
+    """
+    if hostname.lower() in _LOCALHOST_NAMES:
+        raise ValueError("localhost へのアクセスは許可されていません。")
+
+
+def check_public_address(ip_str: str) -> None:
+    """IPアドレスがプライベート/ループバック/リンクローカル/予約済みでないことを検証する.
+
+    SSRF対策として、以下のアドレスへのアクセスをブロック:
+    - 127.0.0.0/8, ::1 (ループバック)
+    - 10.0.0.0/8, 172.16.0.0/12, 192.168.0.0/16, fc00::/7 (プライベート)
+    - 169.254.0.0/16, fe80::/10 (リンクローカル)
+    - 予約済みアドレス
+
+    IPアドレスとして解釈できない文字列は検証しない。
+
+    Raises:
+        ValueError: 許可されていないアドレスの場合
+    """
+    try:
+        ip = ipaddress.ip_address(ip_str)
+    except ValueError:
+        return
+
+    # 注: 順序が重要。is_private は is_loopback/is_link_local を含むため、
+    # より具体的なチェックを先に行う
+    if ip.is_loopback:
+        raise ValueError(f"ループバックアドレス ({ip_str}) へのアクセスは許可されていません。")
+    if ip.is_link_local or (isinstance(ip, ipaddress.IPv4Address) and ip in _LINK_LOCAL_V4):
+        raise ValueError(
+            f"リンクローカルアドレス ({ip_str}) へのアクセスは許可されていません。"
+        )
+    if ip.is_private:
+        raise ValueError(
+            f"プライベートIPアドレス ({ip_str}) へのアクセスは許可されていません。"
+        )
+    if ip.is_reserved:
+        raise ValueError(f"予約済みアドレス ({ip_str}) へのアクセスは許可されていません。")
+
+
+@dataclass
+class _CacheEntry:
+    """ホスト名ごとの解決結果（検証で拒否した場合は error を保持する）."""
+
+    expires_at: float
+    results: list[ResolveResult]
+    error: ValueError | None = None
+
+
+class SafeResolver(AbstractResolver):
+    """SSRF対策の検証済みアドレスのみを返す、TTLキャッシュ付きのaiohttpリゾルバー.
+
+    仕様: docs/specs/f9-rag.md
+
+    DNS解決はaiohttpの非同期リゾルバー（aiodnsがあればAsyncResolver、無ければ
+    スレッドでgetaddrinfoを呼ぶThreadedResolver）で行う。同じホスト名の同時の問い合わせは
+    1回にまとめ、解決結果（拒否した結果を含む）は ttl 秒キャッシュする。
+    DNS解決の失敗はキャッシュしない。
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        max_entries: int = 1024,
+        resolver_factory: Callable[[], AbstractResolver] = DefaultResolver,
+    ) -> None:
+        """SafeResolverを初期化する.
+
+        Args:
+            ttl: 解決結果をキャッシュする秒数（0でキャッシュしない）
+            max_entries: キャッシュするホスト名の最大数
+            resolver_factory: 実際にDNSへ問い合わせるリゾルバーの生成関数
+                （イベントループ上で最初の問い合わせ時に呼ばれる）
+        """
+        self._ttl = ttl
+        self._max_entries = max(1, max_entries)
+        self._resolver_factory = resolver_factory
+        self._resolver: AbstractResolver | None = None
+        self._cache: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._pending: dict[str, asyncio.Task[list[ResolveResult]]] = {}
+        self.lookups = 0  # DNSへ実際に問い合わせた回数
+
+    async def check_host(self, hostname: str) -> None:
+        """ホスト名の全アドレスが接続を許可するアドレスであることを検証する.
+
+        DNS解決に失敗した場合は検証を通す（接続時に同じリゾルバーで解決するため、
+        そこでエラーになる）。
+
+        Raises:
+            ValueError: localhost、または許可されていないアドレスに解決された場合
+        """
+        check_hostname(hostname)
+        try:
+            await self._lookup(hostname)
+        except OSError:
+            logger.debug("DNS resolution failed during validation: %s", hostname, exc_info=True)
+
+    async def resolve(
+        self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET
+    ) -> list[ResolveResult]:
+        """aiohttpのコネクターから呼ばれ、検証済みのアドレスのみを返す."""
+        try:
+            check_hostname(host)
+            results = await self._lookup(host)
+        except ValueError as e:
+            # コネクターはOSErrorを接続エラー（aiohttp.ClientError）として扱う
+            raise OSError(str(e)) from e
+        return [
+            ResolveResult(
+                hostname=result["hostname"],
+                host=result["host"],
+                port=port,
+                family=result["family"],
+                proto=result["proto"],
+                flags=result["flags"],
+            )
+            for result in results
+            if family in (socket.AF_UNSPEC, result["family"])
+        ]
+
+    async def close(self) -> None:
+        """問い合わせ用のリゾルバーを閉じる."""
+        for task in self._pending.values():
+            task.cancel()
+        self._pending.clear()
+        if self._resolver is not None:
+            await self._resolver.close()
+            self._resolver = None
+
+    async def _lookup(self, hostname: str) -> list[ResolveResult]:
+        """キャッシュ（無ければDNS）から検証済みの解決結果を返す."""
+        entry = self._cache.get(hostname)
+        if entry is not None:
+            if entry.expires_at > time.monotonic():
+                self._cache.move_to_end(hostname)
+                if entry.error is not None:
+                    raise ValueError(str(entry.error))
+                return entry.results
+            del self._cache[hostname]
+
+        task = self._pending.get(hostname)
+        if task is None:
+            task = asyncio.create_task(self._query(hostname))
+            self._pending[hostname] = task
+            task.add_done_callback(lambda done: self._finish_query(hostname, done))
+        # 呼び出し元がキャンセルされても、同じホスト名を待つ他の呼び出しのために問い合わせは続ける
+        return await asyncio.shield(task)
+
+    async def _query(self, hostname: str) -> list[ResolveResult]:
+        """DNSへ問い合わせ、全アドレスを検証してキャッシュする."""
+        if self._resolver is None:
+            self._resolver = self._resolver_factory()
+        self.lookups += 1
+        results = await self._resolver.resolve(hostname, 0, socket.AF_UNSPEC)
+        try:
+            for result in results:
+                check_public_address(result["host"])
+        except ValueError as e:
+            self._store(hostname, _CacheEntry(time.monotonic() + self._ttl, [], e))
+            raise
+        self._store(hostname, _CacheEntry(time.monotonic() + self._ttl, results))
+        return results
+
+    def _store(self, hostname: str, entry: _CacheEntry) -> None:
+        """解決結果をキャッシュする（上限を超えた場合は最も古いものから削除）."""
+        if self._ttl <= 0:
+            return
+        self._cache[hostname] = entry
+        self._cache.move_to_end(hostname)
+        while len(self._cache) > self._max_entries:
+            self._cache.popitem(last=False)
+
+    def _finish_query(self, hostname: str, task: asyncio.Task[list[ResolveResult]]) -> None:
+        """問い合わせの完了時に待ち合わせから外す（待つ呼び出しが無い場合の例外も回収する）."""
+        if self._pending.get(hostname) is task:
+            del self._pending[hostname]
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,107 @@
+"""共有HTTPクライアント
+
+仕様: docs/specs/f9-rag.md
+
+クローラー・OGP画像取得・Safe Browsing API呼び出しの外部HTTPアクセスで、
+1つの aiohttp.ClientSession（コネクションプール）を共有する。呼び出しごとに
+セッションを作ると、TCP/TLS接続とコネクターのDNSキャッシュが毎回捨てられ、
+同じホストの50ページをクロールすると50回TLSハンドシェイクが発生する。
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+
+import aiohttp
+
+if TYPE_CHECKING:
+    from aiohttp.abc import AbstractResolver
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    """プロセス全体で共有するHTTPクライアント.
+
+    仕様: docs/specs/f9-rag.md
+
+    セッションは最初の利用時に（実行中のイベントループ上で）作成し、close() で閉じる。
+    接続はホストごとの上限付きでプールし、keep-alive で再利用する。
+    タイムアウトはリクエストごとに指定する。
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 8,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: int = 300,
+        resolver: AbstractResolver | None = None,
+    ) -> None:
+        """HttpClientを初期化する.
+
+        Args:
+            limit: 全体の同時接続数の上限
+            limit_per_host: ホストごとの同時接続数の上限
+            keepalive_timeout: 使い終わった接続をプールに保持する秒数
+            dns_cache_ttl: コネクターのDNSキャッシュの有効期間（秒）
+            resolver: コネクターが使うリゾルバー（SafeResolverを渡すと、接続先を
+                SSRF対策で検証済みのアドレスに限定する。閉じるのは呼び出し側の責任）
+        """
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._dns_cache_ttl = dns_cache_ttl
+        self._resolver = resolver
+        self._session: aiohttp.ClientSession | None = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """共有セッションを返す（初回呼び出し時に作成する）."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self._limit,
+                limit_per_host=self._limit_per_host,
+                keepalive_timeout=self._keepalive_timeout,
+                ttl_dns_cache=self._dns_cache_ttl,
+                resolver=self._resolver,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            logger.info(
+                "Shared HTTP session created (limit=%d, per host=%d)",
+                self._limit,
+                self._limit_per_host,
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """共有セッションを閉じ、プール中の接続を切断する."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+@asynccontextmanager
+async def client_session(
+    http_client: HttpClient | None, timeout: aiohttp.ClientTimeout
+) -> AsyncIterator[aiohttp.ClientSession]:
+    """リクエストに使うセッションを返す.
+
+    共有HTTPクライアントがあればその共有セッションを返し（終了時に閉じない）、
+    無ければこの呼び出しのためだけのセッションを作成して終了時に閉じる。
+
+    Args:
+        http_client: 共有HTTPクライアント（Noneの場合は呼び出しごとのセッション）
+        timeout: 呼び出しごとのセッションのタイムアウト
+
+    Yields:
+        aiohttp.ClientSession
+    """
+    if http_client is not None:
+        yield http_client.session
+        return
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        yield session
@@ -8,10 +8,15 @@ from __future__ import annotations
 import logging
 import re
 from html import unescape
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import aiohttp
 
+from src.services.http_client import client_session
+
+if TYPE_CHECKING:
+    from src.services.http_client import HttpClient
+
 logger = logging.getLogger(__name__)
 
 IMG_SRC_PATTERN = re.compile(
@@ -35,8 +40,9 @@ class OgpExtractor:
     仕様: docs/specs/f2-feed-collection.md (AC10)
     """
 
-    def __init__(self, timeout: float = 5.0) -> None:
+    def __init__(self, timeout: float = 5.0, http_client: HttpClient | None = None) -> None:
         self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._http_client = http_client
 
     async def extract_image_url(
         self, url: str, entry: dict[str, Any] | None = None
@@ -101,8 +107,8 @@ class OgpExtractor:
 
     async def _fetch_og_image(self, url: str) -> str | None:
         """記事URLにアクセスしてog:imageメタタグを抽出する."""
-        async with aiohttp.ClientSession(timeout=self._timeout) as session:
-            async with session.get(url) as resp:
+        async with client_session(self._http_client, self._timeout) as session:
+            async with session.get(url, timeout=self._timeout) as resp:
                 if resp.status != 200:
                     return None
                 html = await resp.text(errors="replace")
@@ -6,23 +6,29 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import hashlib
 import logging
+import time
+from collections import deque
 from collections.abc import Awaitable, Callable
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import TYPE_CHECKING
 from urllib.parse import urldefrag
 
-from src.rag.chunker import chunk_text
-from src.rag.content_detector import ContentType, detect_content_type
-from src.rag.heading_chunker import chunk_by_headings
-from src.rag.table_chunker import chunk_table_data
-from src.rag.vector_store import DocumentChunk, VectorStore
+from src.rag.chunker import smart_chunk
+from src.rag.ingest_pipeline import Stage, StageStats, run_pipeline
+from src.rag.source_registry import SourceRecord
+from src.rag.vector_store import DocumentChunk, EmbeddedChunks, VectorStore
 
 if TYPE_CHECKING:
     from src.config.settings import Settings
     from src.rag.bm25_index import BM25Index
     from src.rag.hybrid_search import HybridSearchEngine
+    from src.rag.parse_pool import ParsePool
+    from src.rag.retrieval_cache import RetrievalCache
+    from src.rag.source_registry import SourceRegistry
+    from src.rag.tokenizer_pool import TokenizerPool
     from src.services.safe_browsing import SafeBrowsingClient
     from src.services.web_crawler import CrawledPage, WebCrawler
 
@@ -38,10 +44,70 @@ class RAGRetrievalResult:
     Attributes:
         context: フォーマット済みテキスト（システムプロンプト注入用）
         sources: ユニークなソースURLリスト（表示用）
+        degraded: ハイブリッド検索の一方の検索を打ち切り、もう一方の結果のみを返した場合True
+            （検索結果キャッシュに保存しない）
     """
 
     context: str
     sources: list[str]
+    degraded: bool = False
+
+
+@dataclass
+class PageIngestResult:
+    """1ページの取り込み結果.
+
+    仕様: docs/specs/f9-rag.md
+
+    Attributes:
+        added: 新規に追加したチャンク数
+        updated: 内容が変わり、Embeddingし直したチャンク数
+        kept: 内容が変わらず、そのまま残したチャンク数
+        removed: ページから無くなり、削除したチャンク数
+    """
+
+    added: int = 0
+    updated: int = 0
+    kept: int = 0
+    removed: int = 0
+
+    @property
+    def chunks(self) -> int:
+        """取り込み後のページのチャンク数."""
+        return self.added + self.updated + self.kept
+
+
+@dataclass(frozen=True)
+class IngestPipelineConfig:
+    """一括取り込み（ingest_from_index）のパイプラインの設定.
+
+    Attributes:
+        crawl_concurrency: 同時にクロールするページ数
+        chunk_concurrency: 同時にチャンク分割・差分判定するページ数
+        embed_concurrency: 同時にEmbeddingするページ数
+        store_concurrency: 同時に保存するページ数
+        queue_size: ステージ間で待機できるページ数（超えると前のステージが待つ）
+    """
+
+    crawl_concurrency: int = 5
+    chunk_concurrency: int = 2
+    embed_concurrency: int = 2
+    store_concurrency: int = 1
+    queue_size: int = 8
+
+
+@dataclass
+class _PreparedPage:
+    """チャンク分割・差分判定済みで、保存待ちのページ."""
+
+    page: CrawledPage
+    source_url: str
+    document_chunks: list[DocumentChunk]
+    changed_chunks: list[DocumentChunk]
+    kept_chunks: list[DocumentChunk]
+    removed_ids: list[str]
+    result: PageIngestResult
+    embedded: EmbeddedChunks | None = None
 
 
 class RAGKnowledgeService:
@@ -59,6 +125,14 @@ class RAGKnowledgeService:
         safe_browsing_client: SafeBrowsingClient | None = None,
         bm25_index: BM25Index | None = None,
         hybrid_search_enabled: bool = False,
+        bm25_snapshot_path: str | None = None,
+        bm25_snapshot_interval: float = 30.0,
+        bm25_snapshot_max_pending: int = 50,
+        tokenizer_pool: TokenizerPool | None = None,
+        retrieval_cache: RetrievalCache[RAGRetrievalResult] | None = None,
+        source_registry: SourceRegistry | None = None,
+        ingest_pipeline: IngestPipelineConfig | None = None,
+        parse_pool: ParsePool | None = None,
     ) -> None:
         """RAGKnowledgeServiceを初期化する.
 
@@ -70,6 +144,14 @@ class RAGKnowledgeService:
             safe_browsing_client: Safe Browsing クライアント（オプション）
             bm25_index: BM25インデックス（オプション、ハイブリッド検索用）
             hybrid_search_enabled: ハイブリッド検索の有効/無効
+            bm25_snapshot_path: BM25スナップショットの保存先（Noneの場合は永続化しない）
+            bm25_snapshot_interval: BM25の変更からスナップショットを保存するまでの最大秒数
+            bm25_snapshot_max_pending: この件数の変更が溜まったら待たずに保存する
+            tokenizer_pool: BM25用の並列トークナイザ（Noneの場合はスレッドで逐次処理）
+            retrieval_cache: 検索結果キャッシュ（Noneの場合はキャッシュしない）
+            source_registry: ソースURL台帳（Noneの場合は統計のたびに全チャンクを走査する）
+            ingest_pipeline: 一括取り込みのパイプラインの設定（Noneの場合はデフォルト値）
+            parse_pool: チャンク分割を行うプロセスプール（Noneの場合はスレッドで分割する）
         """
         self._vector_store = vector_store
         self._web_crawler = web_crawler
@@ -79,6 +161,24 @@ class RAGKnowledgeService:
         self._bm25_index = bm25_index
         self._hybrid_search_enabled = hybrid_search_enabled
         self._hybrid_search_engine: HybridSearchEngine | None = None
+        self._bm25_snapshot_path = bm25_snapshot_path
+        self._bm25_snapshot_lock = asyncio.Lock()
+        self._bm25_snapshot_interval = bm25_snapshot_interval
+        self._bm25_snapshot_max_pending = max(1, bm25_snapshot_max_pending)
+        # スナップショットに未反映の変更（ページ・削除の単位）の数
+        self._bm25_unsaved_changes = 0
+        self._bm25_flush_requested = asyncio.Event()
+        self._bm25_flush_task: asyncio.Task[None] | None = None
+        self._closing = False
+        # 起動時の復元中に行った書き込み（復元後に再適用する。復元中以外は None）
+        self._bm25_replay: list[tuple[str, tuple[object, ...]]] | None = None
+        self._tokenizer_pool = tokenizer_pool
+        self._retrieval_cache = retrieval_cache
+        self._source_registry = source_registry
+        self._ingest_pipeline = ingest_pipeline or IngestPipelineConfig()
+        self._parse_pool = parse_pool
+        # 台帳とベクトルストアの整合性を確認するまでは、統計に台帳を使わない
+        self._source_registry_ready = False
 
         # ハイブリッド検索エンジンの初期化
         if hybrid_search_enabled and bm25_index is not None:
@@ -91,6 +191,7 @@ class RAGKnowledgeService:
                 bm25_index=bm25_index,
                 vector_weight=settings.rag_vector_weight,
                 rrf_k=settings.rag_rrf_k,
+                leg_timeout=settings.rag_hybrid_leg_timeout_sec,
             )
             logger.info("Hybrid search engine initialized")
 
@@ -98,20 +199,28 @@ class RAGKnowledgeService:
         self,
         index_url: str,
         url_pattern: str = "",
-        progress_callback: Callable[[int, int], Awaitable[None]] | None = None,
+        progress_callback: Callable[[int, int, list[StageStats]], Awaitable[None]]
+        | None = None,
     ) -> dict[str, int]:
         """リンク集ページから一括取り込み.
 
+        各ページはクロールが終わり次第、チャンク分割 → Embedding → 保存 のステージへ
+        順に流す（全ページのクロール完了を待たず、処理途中のページ数はキューの上限で抑える）。
+        各ステージの同時実行数は IngestPipelineConfig で指定する。
+
         Args:
             index_url: リンク集ページのURL
             url_pattern: 正規表現パターンでリンクをフィルタリング（任意）
             progress_callback: 進捗コールバック関数（オプション）
-                引数: (crawled: int, total: int)
+                引数: (crawled: int, total: int, stages: list[StageStats])
                 crawled: クロール完了ページ数
                 total: 総ページ数
+                stages: 各ステージの処理件数・スループット
 
         Returns:
-            {"pages_crawled": N, "chunks_stored": M, "errors": E, "unsafe_urls": U}
+            {"pages_crawled": N, "chunks_stored": M, "chunks_added": A,
+             "chunks_updated": C, "chunks_kept": K, "chunks_removed": R,
+             "errors": E, "unsafe_urls": U}
 
         Raises:
             SafetyCheckError: Safe Browsing APIでfail_open=False設定時、
@@ -121,7 +230,7 @@ class RAGKnowledgeService:
         urls = await self._web_crawler.crawl_index_page(index_url, url_pattern)
         if not urls:
             logger.warning("No URLs found in index page: %s", index_url)
-            return {"pages_crawled": 0, "chunks_stored": 0, "errors": 0, "unsafe_urls": 0}
+            return self._crawl_summary(0, PageIngestResult(), errors=0, unsafe_urls=0)
 
         # Safe Browsing チェック（有効な場合のみ）
         safe_urls = urls
@@ -148,77 +257,141 @@ class RAGKnowledgeService:
 
         if not safe_urls:
             logger.warning("No safe URLs to crawl after Safe Browsing check")
-            return {"pages_crawled": 0, "chunks_stored": 0, "errors": 0, "unsafe_urls": unsafe_count}
+            return self._crawl_summary(
+                0, PageIngestResult(), errors=0, unsafe_urls=unsafe_count
+            )
 
-        # 複数ページを並行クロール（進捗報告付き）
-        # WebCrawler.crawl_page() は内部でセマフォ制御と遅延を行う
+        # クロール → チャンク分割 → Embedding → 保存 をページ単位で流す
+        # （WebCrawler.crawl_page() は内部でもセマフォ制御と遅延を行う）
         total_urls = len(safe_urls)
-        tasks = [
-            asyncio.create_task(self._web_crawler.crawl_page(url))
-            for url in safe_urls
-        ]
-
-        pages: list[CrawledPage] = []
-        completed_count = 0
-        for coro in asyncio.as_completed(tasks):
-            page = await coro
-            completed_count += 1
-            if page is not None:
-                pages.append(page)
+        total = PageIngestResult()
+        pages_crawled = 0
+        errors = 0
+
+        async def crawl(url: str) -> CrawledPage | None:
+            nonlocal pages_crawled, errors
+            page = await self._web_crawler.crawl_page(url)
+            if page is None:
+                errors += 1
+            else:
+                pages_crawled += 1
+            return page
 
-            # 進捗コールバック呼び出し（エラーを隔離）
-            if progress_callback:
-                try:
-                    await progress_callback(completed_count, total_urls)
-                except Exception:
-                    logger.debug("Progress callback failed", exc_info=True)
+        async def chunk(page: CrawledPage) -> _PreparedPage | None:
+            nonlocal errors
+            try:
+                return await self._prepare_page(page)
+            except Exception:
+                logger.exception("Failed to chunk page: %s", page.url)
+                errors += 1
+                return None
 
-        # 各ページをチャンキングして保存
-        total_chunks = 0
-        # errorsはクロール失敗数（safe_urlsの数からpagesの数を引く）
-        errors = len(safe_urls) - len(pages)
+        async def embed(prepared: _PreparedPage) -> _PreparedPage | None:
+            nonlocal errors
+            try:
+                prepared.embedded = await self._vector_store.embed_documents(
+                    prepared.changed_chunks
+                )
+            except Exception:
+                logger.exception("Failed to embed page: %s", prepared.source_url)
+                errors += 1
+                return None
+            return prepared
 
-        for page in pages:
+        async def store(prepared: _PreparedPage) -> None:
+            nonlocal errors
             try:
-                chunks_stored = await self._ingest_crawled_page(page)
-                total_chunks += chunks_stored
+                page_result = await self._store_page(prepared)
             except Exception:
-                logger.exception("Failed to ingest page: %s", page.url)
+                logger.exception("Failed to ingest page: %s", prepared.source_url)
                 errors += 1
+                return
+            total.added += page_result.added
+            total.updated += page_result.updated
+            total.kept += page_result.kept
+            total.removed += page_result.removed
+
+        async def on_processed(stage: StageStats, stages: list[StageStats]) -> None:
+            # 進捗コールバック呼び出し（クロール完了ごと、エラーを隔離）
+            if progress_callback is None or stage.name != "crawl":
+                return
+            try:
+                await progress_callback(stage.processed, total_urls, stages)
+            except Exception:
+                logger.debug("Progress callback failed", exc_info=True)
+
+        config = self._ingest_pipeline
+        stage_stats = await run_pipeline(
+            safe_urls,
+            [
+                Stage("crawl", crawl, config.crawl_concurrency),
+                Stage("chunk", chunk, config.chunk_concurrency),
+                Stage("embed", embed, config.embed_concurrency),
+                Stage("store", store, config.store_concurrency),
+            ],
+            queue_size=config.queue_size,
+            on_processed=on_processed,
+        )
 
         logger.info(
-            "Ingested from index: pages=%d, chunks=%d, errors=%d, unsafe=%d",
-            len(pages),
-            total_chunks,
+            "Ingested from index: pages=%d, chunks=%d"
+            " (added=%d, updated=%d, kept=%d, removed=%d), errors=%d, unsafe=%d",
+            pages_crawled,
+            total.chunks,
+            total.added,
+            total.updated,
+            total.kept,
+            total.removed,
             errors,
             unsafe_count,
         )
+        logger.info(
+            "Ingest pipeline throughput: %s",
+            ", ".join(
+                f"{stat.name}={stat.processed} ({stat.throughput:.2f}/s, busy {stat.busy_sec:.1f}s)"
+                for stat in stage_stats
+            ),
+        )
+
+        return self._crawl_summary(
+            pages_crawled, total, errors=errors, unsafe_urls=unsafe_count
+        )
 
+    @staticmethod
+    def _crawl_summary(
+        pages_crawled: int, total: PageIngestResult, errors: int, unsafe_urls: int
+    ) -> dict[str, int]:
+        """ingest_from_index() の結果の辞書を組み立てる."""
         return {
-            "pages_crawled": len(pages),
-            "chunks_stored": total_chunks,
+            "pages_crawled": pages_crawled,
+            "chunks_stored": total.chunks,
+            "chunks_added": total.added,
+            "chunks_updated": total.updated,
+            "chunks_kept": total.kept,
+            "chunks_removed": total.removed,
             "errors": errors,
-            "unsafe_urls": unsafe_count,
+            "unsafe_urls": unsafe_urls,
         }
 
-    async def ingest_page(self, url: str) -> int:
+    async def ingest_page(self, url: str) -> PageIngestResult:
         """単一ページ取り込み.
 
-        同一URLの再取り込み時は、まず add_documents() による upsert を行い、
-        その後 delete_stale_chunks() で不要になったチャンクを削除する。
+        同一URLの再取り込み時は、追加・変更されたチャンクのみ add_documents() で
+        upsert し、その後 delete_documents() で無くなったチャンクを削除する。
 
         Args:
             url: 取り込むページのURL
 
         Returns:
-            チャンク数
+            PageIngestResult: 追加・更新・変更なし・削除のチャンク数
+                （クロール失敗時はすべて0）
 
         Raises:
             ValueError: URL検証に失敗した場合、またはURLが危険と判定された場合
         """
         # URL検証を先に行い、失敗時は例外を投げる（ユーザーにエラー理由を伝えるため）
         # 戻り値（正規化済みURL）を以降の処理で使用
-        validated_url = self._web_crawler.validate_url(url)
+        validated_url = await self._web_crawler.validate_url_async(url)
 
         # Safe Browsing チェック（有効な場合のみ）
         if self._safe_browsing_client:
@@ -236,7 +409,7 @@ class RAGKnowledgeService:
         page = await self._web_crawler.crawl_page(validated_url)
         if page is None:
             logger.warning("Failed to crawl page: %s", validated_url)
-            return 0
+            return PageIngestResult()
 
         return await self._ingest_crawled_page(page)
 
@@ -245,64 +418,53 @@ class RAGKnowledgeService:
 
         仕様: docs/specs/f9-rag.md
 
-        - TABLE: テーブルデータとして行単位でチャンキング
-        - HEADING/MIXED: 見出し単位でチャンキング
-        - PROSE: 従来の段落ベースチャンキング
-
         Args:
             text: チャンキング対象のテキスト
 
         Returns:
             チャンクのリスト
         """
-        if not text or not text.strip():
-            return []
-
-        content_type = detect_content_type(text)
-        logger.debug("Detected content type: %s", content_type.value)
-
-        if content_type == ContentType.TABLE:
-            # テーブルデータ: 行単位でチャンキング
-            table_chunks = chunk_table_data(text)
-            if table_chunks:
-                return [chunk.formatted_text for chunk in table_chunks]
-            # テーブルチャンキングに失敗した場合はフォールバック
-            logger.debug("Table chunking returned no results, falling back to prose")
-
-        if content_type in (ContentType.HEADING, ContentType.MIXED):
-            # 見出しあり: 見出し単位でチャンキング
-            heading_chunks = chunk_by_headings(
-                text,
-                max_chunk_size=self._chunk_size,
-            )
-            if heading_chunks:
-                return [chunk.formatted_text for chunk in heading_chunks]
-            # 見出しチャンキングに失敗した場合はフォールバック
-            logger.debug("Heading chunking returned no results, falling back to prose")
-
-        # 通常テキスト: 従来のチャンキング
-        return chunk_text(
-            text,
-            chunk_size=self._chunk_size,
-            chunk_overlap=self._chunk_overlap,
-        )
+        return smart_chunk(text, chunk_size=self._chunk_size, chunk_overlap=self._chunk_overlap)
 
-    async def _ingest_crawled_page(self, page: CrawledPage) -> int:
+    async def _ingest_crawled_page(self, page: CrawledPage) -> PageIngestResult:
         """クロール済みページをチャンキングして保存する.
 
+        各チャンクのメタデータに本文のハッシュ（content_hash）を記録し、再取り込み時は
+        保存済みのハッシュと比較して、追加・変更されたチャンクのみEmbedding→upsertし、
+        無くなったチャンクのみ削除する。変更の無いチャンクはメタデータ（タイトル・取得日時）
+        のみ更新する。
+
         Args:
             page: クロール済みページ
 
         Returns:
-            保存されたチャンク数
+            PageIngestResult: 追加・更新・変更なし・削除のチャンク数
+        """
+        prepared = await self._prepare_page(page)
+        if prepared is None:
+            return PageIngestResult()
+        return await self._store_page(prepared)
+
+    async def _prepare_page(self, page: CrawledPage) -> _PreparedPage | None:
+        """ページをチャンク分割し、保存済みのチャンクとの差分を求める.
+
+        Returns:
+            保存待ちのページ（チャンクが生成されなかった場合はNone）
         """
         # テキストをスマートチャンキング（コンテンツタイプに応じた手法を選択）
-        chunks = self._smart_chunk(page.text)
+        # 純粋なCPU処理のため、並行するクロール・Embedding・チャット応答を止めないよう
+        # プロセスプール（未設定の場合はスレッド）で行う
+        if self._parse_pool is not None:
+            chunks = await self._parse_pool.smart_chunk(
+                page.text, self._chunk_size, self._chunk_overlap
+            )
+        else:
+            chunks = await asyncio.to_thread(self._smart_chunk, page.text)
 
         if not chunks:
             # チャンク生成失敗時は既存ナレッジを削除しない（データ喪失防止）
             logger.info("No chunks generated for page: %s", page.url)
-            return 0
+            return None
 
         # URLからフラグメントを除去して正規化（上流で除去済みだが防御的に再適用）
         normalized_url, _ = urldefrag(page.url)
@@ -319,36 +481,141 @@ class RAGKnowledgeService:
                     "title": page.title,
                     "chunk_index": i,
                     "crawled_at": page.crawled_at,
+                    "content_hash": hashlib.sha256(chunk.encode()).hexdigest()[:16],
                 },
             )
             for i, chunk in enumerate(chunks)
         ]
         new_ids = {chunk.id for chunk in document_chunks}
 
-        # ベクトルストアにupsert（失敗時もデータロスを防ぐため、先に追加）
-        count = await self._vector_store.add_documents(document_chunks)
-
-        # upsert成功後、古いチャンクを削除（チャンク数が減った場合）
-        await self._vector_store.delete_stale_chunks(normalized_url, new_ids)
+        # 保存済みのチャンクと比較し、追加・変更されたチャンクと無くなったチャンクを求める
+        # （content_hash 未記録の旧形式のチャンクは変更ありとして扱う）
+        stored_hashes = await self._vector_store.get_content_hashes(normalized_url)
+        changed_chunks: list[DocumentChunk] = []
+        kept_chunks: list[DocumentChunk] = []
+        for chunk in document_chunks:
+            if stored_hashes.get(chunk.id) == chunk.metadata["content_hash"]:
+                kept_chunks.append(chunk)
+            else:
+                changed_chunks.append(chunk)
+        removed_ids = [doc_id for doc_id in stored_hashes if doc_id not in new_ids]
+        added = sum(1 for chunk in changed_chunks if chunk.id not in stored_hashes)
+        return _PreparedPage(
+            page=page,
+            source_url=normalized_url,
+            document_chunks=document_chunks,
+            changed_chunks=changed_chunks,
+            kept_chunks=kept_chunks,
+            removed_ids=removed_ids,
+            result=PageIngestResult(
+                added=added,
+                updated=len(changed_chunks) - added,
+                kept=len(kept_chunks),
+                removed=len(removed_ids),
+            ),
+        )
 
-        # BM25インデックスにも追加（ハイブリッド検索用）
-        # 注: BM25は補助的機能のため、失敗してもVectorStoreの結果は維持する
-        if self._bm25_index is not None:
-            bm25_docs = [
-                (chunk.id, chunk.text, normalized_url)
-                for chunk in document_chunks
-            ]
-            try:
-                self._bm25_index.add_documents(bm25_docs)
-                logger.debug("Added %d documents to BM25 index", len(bm25_docs))
-            except Exception:
-                logger.warning(
-                    "Failed to add documents to BM25 index for %s", normalized_url,
-                    exc_info=True,
+    async def _store_page(self, prepared: _PreparedPage) -> PageIngestResult:
+        """差分判定済みのページを保存する（Embedding済みでなければここでEmbeddingする）."""
+        page = prepared.page
+        normalized_url = prepared.source_url
+        document_chunks = prepared.document_chunks
+        changed_chunks = prepared.changed_chunks
+        removed_ids = prepared.removed_ids
+        result = prepared.result
+
+        try:
+            # ベクトルストアにupsert（失敗時もデータロスを防ぐため、先に追加）
+            if prepared.embedded is None:
+                await self._vector_store.add_documents(changed_chunks)
+            else:
+                await self._vector_store.upsert_embedded(prepared.embedded)
+
+            # 変更の無いチャンクはEmbeddingし直さず、タイトル・取得日時のみ更新する
+            await self._vector_store.update_metadata(prepared.kept_chunks)
+
+            # upsert成功後、無くなったチャンクを削除（チャンク数が減った場合）
+            await self._vector_store.delete_documents(removed_ids)
+
+            # BM25インデックスにも反映（ハイブリッド検索用）
+            # 注: BM25は補助的機能のため、失敗してもVectorStoreの結果は維持する
+            if self._bm25_index is not None:
+                await self._update_bm25_for_page(
+                    normalized_url, document_chunks, changed_chunks, removed_ids
                 )
+        finally:
+            if changed_chunks or removed_ids:
+                # 取り込み後（失敗時も部分的に書き込まれている可能性がある）は
+                # 検索結果キャッシュを無効化
+                self._invalidate_retrieval_cache()
+
+        if self._source_registry is not None:
+            await asyncio.to_thread(
+                self._source_registry.upsert,
+                SourceRecord(
+                    source_url=normalized_url,
+                    chunk_count=len(document_chunks),
+                    title=page.title,
+                    crawled_at=page.crawled_at,
+                    content_hash=hashlib.sha256(page.text.encode()).hexdigest()[:16],
+                    byte_size=sum(len(chunk.text.encode()) for chunk in document_chunks),
+                ),
+            )
 
-        logger.info("Ingested page %s: %d chunks", normalized_url, count)
-        return count
+        logger.info(
+            "Ingested page %s: %d chunks (added=%d, updated=%d, kept=%d, removed=%d)",
+            normalized_url,
+            result.chunks,
+            result.added,
+            result.updated,
+            result.kept,
+            result.removed,
+        )
+        return result
+
+    async def _update_bm25_for_page(
+        self,
+        source_url: str,
+        document_chunks: list[DocumentChunk],
+        changed_chunks: list[DocumentChunk],
+        removed_ids: list[str],
+    ) -> None:
+        """ページの追加・変更・削除されたチャンクをBM25インデックスに反映する."""
+        assert self._bm25_index is not None
+        bm25_index = self._bm25_index
+        changed_ids = {chunk.id for chunk in changed_chunks}
+        # 変更の無いチャンクも、過去にBM25への追加が失敗していた場合は追加し直す
+        bm25_docs = [
+            (chunk.id, chunk.text, source_url)
+            for chunk in document_chunks
+            if chunk.id in changed_ids or bm25_index.get_source_url(chunk.id) is None
+        ]
+        if not bm25_docs and not removed_ids:
+            return
+        try:
+            tokenized = None
+            if self._tokenizer_pool is not None and bm25_docs:
+                tokenized = await self._tokenizer_pool.tokenize(
+                    [text for _, text, _ in bm25_docs]
+                )
+            # 新しい状態の構築はスレッドで行い、公開はアトミックな差し替えで行う
+            if bm25_docs:
+                await self._write_bm25("add_documents", bm25_docs, tokenized)
+            if removed_ids:
+                await self._write_bm25("delete_documents", removed_ids)
+            logger.debug(
+                "Updated BM25 index: %d added, %d removed", len(bm25_docs), len(removed_ids)
+            )
+        except Exception:
+            logger.warning(
+                "Failed to update BM25 index for %s", source_url,
+                exc_info=True,
+            )
+        else:
+            if removed_ids:
+                await self._save_bm25_snapshot_now()
+            else:
+                self._schedule_bm25_snapshot()
 
     async def retrieve(self, query: str, n_results: int = 5) -> RAGRetrievalResult:
         """関連知識を検索し、結果を返す.
@@ -367,13 +634,32 @@ class RAGKnowledgeService:
         from src.config.settings import get_settings
 
         settings = get_settings()
+        hybrid = self._hybrid_search_enabled and self._hybrid_search_engine is not None
+
+        # 同じ（正規化後の）質問は、取り込み・削除が行われるまでキャッシュから返す
+        cache = self._retrieval_cache
+        cache_key = None
+        if cache is not None and cache.enabled:
+            cache_key = cache.key(
+                query, n_results, "hybrid" if hybrid else "vector", cache.generation
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                if settings.rag_debug_log_enabled:
+                    logger.info("RAG retrieve (cache hit): query=%r", query)
+                return replace(cached, sources=list(cached.sources))
+
+        if hybrid:
+            # ハイブリッド検索が有効な場合
+            result = await self._retrieve_hybrid(query, n_results, settings)
+        else:
+            # 従来のベクトル検索のみ
+            result = await self._retrieve_vector_only(query, n_results, settings)
 
-        # ハイブリッド検索が有効な場合
-        if self._hybrid_search_enabled and self._hybrid_search_engine is not None:
-            return await self._retrieve_hybrid(query, n_results, settings)
-
-        # 従来のベクトル検索のみ
-        return await self._retrieve_vector_only(query, n_results, settings)
+        # 一方の検索を打ち切った結果はキャッシュしない（次回は両方の検索で結果を作り直す）
+        if cache is not None and cache_key is not None and not result.degraded:
+            cache.put(cache_key, replace(result, sources=list(result.sources)))
+        return result
 
     async def _retrieve_vector_only(
         self,
@@ -453,14 +739,15 @@ class RAGKnowledgeService:
         """
         assert self._hybrid_search_engine is not None
 
-        results = await self._hybrid_search_engine.search(
+        response = await self._hybrid_search_engine.search_with_status(
             query,
             n_results=n_results,
             similarity_threshold=settings.rag_similarity_threshold,
         )
+        results = response.results
 
         if not results:
-            return RAGRetrievalResult(context="", sources=[])
+            return RAGRetrievalResult(context="", sources=[], degraded=response.degraded)
 
         # デバッグログ出力
         if settings.rag_debug_log_enabled:
@@ -495,6 +782,7 @@ class RAGKnowledgeService:
         return RAGRetrievalResult(
             context="\n\n".join(formatted_parts),
             sources=sources,
+            degraded=response.degraded,
         )
 
     async def delete_source(self, source_url: str) -> int:
@@ -509,44 +797,370 @@ class RAGKnowledgeService:
         # フラグメントを除去して正規化
         normalized_url, fragment = urldefrag(source_url)
 
-        # 正規化後のURLに紐づくチャンクを削除（ベクトルストア）
-        total_deleted = await self._vector_store.delete_by_source(normalized_url)
+        try:
+            # 正規化後のURLに紐づくチャンクを削除（ベクトルストア）
+            total_deleted = await self._vector_store.delete_by_source(normalized_url)
+
+            # 後方互換: 以前はフラグメント付きURLで保存していた可能性があるため、
+            # 元のURL（フラグメント付き）でも削除を試みる
+            if fragment:
+                legacy_deleted = await self._vector_store.delete_by_source(source_url)
+                total_deleted += legacy_deleted
+                logger.info(
+                    "Deleted %d chunks from sources: %s (normalized), %s (with fragment)",
+                    total_deleted,
+                    normalized_url,
+                    source_url,
+                )
+            else:
+                logger.info("Deleted %d chunks from source: %s", total_deleted, normalized_url)
+
+            if self._source_registry is not None:
+                await asyncio.to_thread(self._source_registry.remove, normalized_url)
+                if fragment:
+                    await asyncio.to_thread(self._source_registry.remove, source_url)
+
+            # BM25インデックスからも削除（ハイブリッド検索用）
+            # 注: BM25は補助的機能のため、失敗してもVectorStoreの結果は維持する
+            if self._bm25_index is not None:
+                try:
+                    bm25_deleted = await self._write_bm25("delete_by_source", normalized_url)
+                    if fragment:
+                        bm25_deleted += await self._write_bm25("delete_by_source", source_url)
+                    logger.debug("Deleted %d documents from BM25 index", bm25_deleted)
+                except Exception:
+                    logger.warning(
+                        "Failed to delete from BM25 index for %s", normalized_url,
+                        exc_info=True,
+                    )
+                else:
+                    if bm25_deleted:
+                        await self._save_bm25_snapshot_now()
+        finally:
+            self._invalidate_retrieval_cache()
+
+        return total_deleted
+
+    async def warm_start_bm25_index(
+        self, batch_size: int = 500, max_in_flight: int = 4
+    ) -> int:
+        """起動時にBM25インデックスを復元する.
+
+        仕様: docs/specs/f9-rag.md
+
+        スナップショットがあればそれを読み込み、無い（互換性がない、またはチャンクIDが
+        ベクトルストアと一致しない）場合はベクトルストアから全チャンクをストリーミングして
+        一括再構築する。
+        再構築時のトークン化は並列トークナイザ（設定時）に分散し、次のバッチの取得と
+        並行して進める。再構築した場合はスナップショットを書き出し、次回以降の起動を
+        高速化する。
+
+        復元はバックグラウンドで行い、その間も取り込み・削除を受け付ける。復元中の
+        BM25への書き込みは記録しておき、復元した状態を公開した後に同じ順序で
+        再適用する（復元した状態で上書きされて失われたり、削除したチャンクが
+        復活したりしない）。
+
+        Args:
+            batch_size: ベクトルストアから一度に取得するチャンク数
+            max_in_flight: 同時にトークン化するバッチ数の上限
+
+        Returns:
+            インデックス内のドキュメント数
+        """
+        if self._bm25_index is None:
+            return 0
+
+        self._bm25_replay = []
+        try:
+            rebuilt = await self._restore_bm25_index(batch_size, max_in_flight)
+            replayed = await self._replay_bm25_writes()
+        finally:
+            self._bm25_replay = None
+
+        count = self._bm25_index.get_document_count()
+        if rebuilt and count > 0:
+            await self._persist_bm25_snapshot()
+        elif replayed:
+            self._schedule_bm25_snapshot()
+        return count
+
+    async def _restore_bm25_index(self, batch_size: int, max_in_flight: int) -> bool:
+        """スナップショットまたはベクトルストアからBM25インデックスを復元する.
 
-        # 後方互換: 以前はフラグメント付きURLで保存していた可能性があるため、
-        # 元のURL（フラグメント付き）でも削除を試みる
-        if fragment:
-            legacy_deleted = await self._vector_store.delete_by_source(source_url)
-            total_deleted += legacy_deleted
+        Returns:
+            ベクトルストアから再構築した場合は True（スナップショットの保存が必要）
+        """
+        assert self._bm25_index is not None
+        started = time.monotonic()
+
+        if self._bm25_index.is_persistent:
+            # セグメント型のインデックスは開いた時点で復元済み（空の場合のみ再構築する）
+            count = self._bm25_index.get_document_count()
+            if count > 0:
+                logger.info(
+                    "BM25 index opened from segments: %d documents in %.2fs",
+                    count,
+                    time.monotonic() - started,
+                )
+                return False
+
+        restored: BM25Index | None = None
+        vector_ids: set[str] = set()
+        if self._bm25_snapshot_path:
+            # 照合用のチャンクIDはスナップショットより先に取得する
+            # （以降の書き込みは復元後に再適用される）
+            vector_ids = await self._vector_store.get_document_ids()
+            # 読み込み・索引構築はスレッドで行い、完成した状態をアトミックに差し替える
+            restored = await asyncio.to_thread(
+                self._bm25_index.read_snapshot, self._bm25_snapshot_path
+            )
+        # 保存前に終了した変更（削除したチャンク等）を復活させないよう、
+        # チャンクIDがベクトルストアと一致しない場合は使わずに再構築する
+        if restored is not None and restored.get_document_ids() != vector_ids:
             logger.info(
-                "Deleted %d chunks from sources: %s (normalized), %s (with fragment)",
-                total_deleted,
-                normalized_url,
-                source_url,
+                "BM25 snapshot out of sync (%d documents, vector store %d), rebuilding",
+                restored.get_document_count(),
+                len(vector_ids),
             )
-        else:
-            logger.info("Deleted %d chunks from source: %s", total_deleted, normalized_url)
+            restored = None
+        if restored is not None:
+            self._bm25_index.adopt(restored)
+            # 復元前（BM25が空の間）にキャッシュした結果を使わない
+            self._invalidate_retrieval_cache()
+            count = self._bm25_index.get_document_count()
+            logger.info(
+                "BM25 index restored from snapshot: %d documents in %.2fs",
+                count,
+                time.monotonic() - started,
+            )
+            return False
+
+        # スナップショットが無い場合はChromaDBから一括再構築
+        # トークン化はプロセスプール（またはスレッド）で次バッチの取得と並行して進め、
+        # 全件そろってからスレッドで一度だけ反映する（構築途中のコーパスを公開しない）
+        documents: list[tuple[str, str, str]] = []
+        tokenized: list[list[str]] = []
+        in_flight: deque[
+            tuple[list[tuple[str, str, str]], asyncio.Task[list[list[str]]]]
+        ] = deque()
+        try:
+            async for batch in self._vector_store.iter_documents(batch_size=batch_size):
+                texts = [text for _, text, _ in batch]
+                in_flight.append((batch, asyncio.create_task(self._tokenize_for_bm25(texts))))
+                if len(in_flight) >= max_in_flight:
+                    done_batch, task = in_flight.popleft()
+                    documents.extend(done_batch)
+                    tokenized.extend(await task)
+            while in_flight:
+                done_batch, task = in_flight.popleft()
+                documents.extend(done_batch)
+                tokenized.extend(await task)
+        finally:
+            for _, task in in_flight:
+                task.cancel()
+        await asyncio.to_thread(self._bm25_index.add_documents, documents, tokenized)
+        self._invalidate_retrieval_cache()
+
+        count = self._bm25_index.get_document_count()
+        logger.info(
+            "BM25 index rebuilt from vector store: %d documents in %.2fs",
+            count,
+            time.monotonic() - started,
+        )
+        cache = self._tokenizer_pool.cache if self._tokenizer_pool is not None else None
+        if cache is not None:
+            logger.info("BM25 token cache: %d hits, %d misses", cache.hits, cache.misses)
+        return True
+
+    async def _replay_bm25_writes(self) -> bool:
+        """復元中に行ったBM25への書き込みを、復元した状態に再適用する.
+
+        再適用中の書き込みも記録されるため、記録が空になるまで繰り返す
+        （追加は同じIDの置き換え、削除は冪等なので、重複して適用しても結果は変わらない）。
 
-        # BM25インデックスからも削除（ハイブリッド検索用）
-        # 注: BM25は補助的機能のため、失敗してもVectorStoreの結果は維持する
-        if self._bm25_index is not None:
+        Returns:
+            再適用した書き込みがあった場合は True
+        """
+        assert self._bm25_index is not None
+        replayed = 0
+        while self._bm25_replay:
+            writes, self._bm25_replay = self._bm25_replay, []
+            for method, args in writes:
+                try:
+                    await asyncio.to_thread(getattr(self._bm25_index, method), *args)
+                except Exception:
+                    logger.warning("Failed to replay BM25 write: %s", method, exc_info=True)
+            replayed += len(writes)
+        if replayed:
+            logger.info("Replayed %d BM25 writes made during warm start", replayed)
+            self._invalidate_retrieval_cache()
+        return replayed > 0
+
+    async def _write_bm25(self, method: str, *args: object) -> int:
+        """BM25インデックスへ書き込む（起動時の復元中は再適用のために記録する）."""
+        assert self._bm25_index is not None
+        if self._bm25_replay is not None:
+            self._bm25_replay.append((method, args))
+        result: int = await asyncio.to_thread(getattr(self._bm25_index, method), *args)
+        return result
+
+    def _invalidate_retrieval_cache(self) -> None:
+        """ナレッジの変更後に検索結果キャッシュの世代を進める."""
+        if self._retrieval_cache is not None:
+            self._retrieval_cache.invalidate()
+
+    async def _tokenize_for_bm25(self, texts: list[str]) -> list[list[str]]:
+        """BM25インデックス用にテキストをトークン化する."""
+        if self._tokenizer_pool is not None:
+            return await self._tokenizer_pool.tokenize(texts)
+
+        from src.rag.bm25_index import tokenize_japanese
+
+        return await asyncio.to_thread(lambda: [tokenize_japanese(text) for text in texts])
+
+    def _schedule_bm25_snapshot(self) -> None:
+        """BM25インデックスの変更を記録し、スナップショットの保存を予約する.
+
+        変更のたびにコーパス全体を書き直すと、N ページのクロールで O(N²) の書き込みになる。
+        保存は bm25_snapshot_interval 秒に1回（bm25_snapshot_max_pending 件の変更が
+        溜まった場合はすぐに）バックグラウンドでまとめて行い、終了時の close() でも行う。
+        """
+        if self._bm25_index is None or not self._bm25_snapshot_path:
+            return
+        if self._bm25_index.is_persistent:
+            return
+        self._bm25_unsaved_changes += 1
+        if self._bm25_unsaved_changes >= self._bm25_snapshot_max_pending:
+            self._bm25_flush_requested.set()
+        if self._bm25_flush_task is None or self._bm25_flush_task.done():
+            self._bm25_flush_task = asyncio.create_task(self._flush_bm25_snapshot_later())
+
+    async def _save_bm25_snapshot_now(self) -> None:
+        """BM25インデックスからの削除を、間隔を待たずにスナップショットへ保存する.
+
+        削除したチャンク（機密情報の場合もある）が、次回の保存前に異常終了した際に
+        古いスナップショットから復活しないようにする。起動時の復元中は、復元後の
+        保存に任せる（復元途中の状態を書き出さない）。
+        """
+        self._schedule_bm25_snapshot()
+        if self._bm25_replay is None:
+            await self.flush_bm25_snapshot()
+
+    async def _flush_bm25_snapshot_later(self) -> None:
+        """未保存の変更が無くなるまで、一定間隔でスナップショットを保存する."""
+        while self._bm25_unsaved_changes:
+            if not self._closing:
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(
+                        self._bm25_flush_requested.wait(), timeout=self._bm25_snapshot_interval
+                    )
+            await self.flush_bm25_snapshot()
+
+    async def flush_bm25_snapshot(self) -> None:
+        """未保存の変更があればBM25インデックスのスナップショットを保存する."""
+        if not self._bm25_unsaved_changes:
+            return
+        # 保存中の変更は次回の保存に含める
+        self._bm25_unsaved_changes = 0
+        self._bm25_flush_requested.clear()
+        await self._persist_bm25_snapshot()
+
+    async def close(self) -> None:
+        """終了時に未保存のBM25スナップショットを保存する."""
+        self._closing = True
+        self._bm25_flush_requested.set()
+        if self._bm25_flush_task is not None and not self._bm25_flush_task.done():
+            await self._bm25_flush_task
+        await self.flush_bm25_snapshot()
+
+    async def _persist_bm25_snapshot(self) -> None:
+        """BM25インデックスのスナップショットを保存する.
+
+        注: BM25は補助的機能のため、保存に失敗しても例外は送出しない。
+        """
+        if self._bm25_index is None or not self._bm25_snapshot_path:
+            return
+        if self._bm25_index.is_persistent:
+            return
+
+        from src.rag.bm25_index import write_snapshot_file
+
+        # ロック内でスナップショットを取得し、書き込み順序を変更順と一致させる
+        # （公開済みの不変な状態から作成するため、作成もスレッドで行える）
+        index = self._bm25_index
+        path = self._bm25_snapshot_path
+        async with self._bm25_snapshot_lock:
             try:
-                bm25_deleted = self._bm25_index.delete_by_source(normalized_url)
-                if fragment:
-                    bm25_deleted += self._bm25_index.delete_by_source(source_url)
-                logger.debug("Deleted %d documents from BM25 index", bm25_deleted)
+                await asyncio.to_thread(
+                    lambda: write_snapshot_file(path, index.to_snapshot())
+                )
             except Exception:
                 logger.warning(
-                    "Failed to delete from BM25 index for %s", normalized_url,
+                    "Failed to write BM25 snapshot: %s", self._bm25_snapshot_path,
                     exc_info=True,
                 )
 
-        return total_deleted
+    async def sync_source_registry(self) -> int:
+        """ソースURL台帳とベクトルストアの整合性を確認し、必要なら再構築する.
+
+        仕様: docs/specs/f9-rag.md
+
+        台帳の合計チャンク数がベクトルストアの件数と一致しない場合（台帳導入前の
+        データ、台帳ファイルの削除、台帳を経由しない書き込み等）は、全チャンクを
+        1回だけ走査して台帳を作り直す。
+
+        Returns:
+            台帳に登録されているソースURL数
+        """
+        if self._source_registry is None:
+            return 0
+        registry = self._source_registry
+        vector_stats = await asyncio.to_thread(
+            self._vector_store.get_stats, count_sources=False
+        )
+        if registry.stats()["chunk_count"] != vector_stats["total_chunks"]:
+            logger.info(
+                "Source registry out of sync (%d chunks, vector store %d), rebuilding",
+                registry.stats()["chunk_count"],
+                vector_stats["total_chunks"],
+            )
+            records = await self._vector_store.collect_sources()
+            await asyncio.to_thread(registry.replace_all, records)
+        self._source_registry_ready = True
+        return len(registry)
+
+    async def list_sources(self) -> list[SourceRecord]:
+        """取り込み済みソースURLの一覧（URL順）.
+
+        台帳が利用可能な場合は O(ソース数) で返し、それ以外は全チャンクを走査する。
+        """
+        if self._source_registry is not None and self._source_registry_ready:
+            return self._source_registry.list_sources()
+        records = await self._vector_store.collect_sources()
+        return sorted(records, key=lambda record: record.source_url)
 
     async def get_stats(self) -> dict[str, int]:
         """ナレッジベース統計.
 
+        ソースURL台帳が利用可能な場合、ソース数とデータ量は台帳の合計値から返す
+        （全チャンクのメタデータを走査しない）。
+
         Returns:
             統計情報の辞書
         """
-        # VectorStore.get_stats()は同期APIを呼ぶため、to_threadでラップ
-        return await asyncio.to_thread(self._vector_store.get_stats)
+        if self._source_registry is not None and self._source_registry_ready:
+            # VectorStore.get_stats()は同期APIを呼ぶため、to_threadでラップ
+            stats = await asyncio.to_thread(
+                self._vector_store.get_stats, count_sources=False
+            )
+            registry_stats = self._source_registry.stats()
+            stats["source_count"] = registry_stats["source_count"]
+            stats["total_bytes"] = registry_stats["byte_size"]
+        else:
+            stats = await asyncio.to_thread(self._vector_store.get_stats)
+        if self._retrieval_cache is not None and self._retrieval_cache.enabled:
+            cache_stats = self._retrieval_cache.stats()
+            stats["retrieval_cache_hits"] = cache_stats["hits"]
+            stats["retrieval_cache_misses"] = cache_stats["misses"]
+            stats["retrieval_cache_entries"] = cache_stats["entries"]
+        return stats
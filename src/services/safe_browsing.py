@@ -16,8 +16,11 @@ from typing import TYPE_CHECKING, Any
 
 import aiohttp
 
+from src.services.http_client import client_session
+
 if TYPE_CHECKING:
     from src.config.settings import Settings
+    from src.services.http_client import HttpClient
 
 logger = logging.getLogger(__name__)
 
@@ -117,6 +120,7 @@ class SafeBrowsingClient:
         client_id: str = "ai-assistant",
         client_version: str = "1.0.0",
         max_cache_size: int | None = None,
+        http_client: HttpClient | None = None,
     ) -> None:
         """SafeBrowsingClient を初期化する.
 
@@ -128,6 +132,7 @@ class SafeBrowsingClient:
             client_id: クライアント識別子
             client_version: クライアントバージョン
             max_cache_size: キャッシュの最大エントリ数（None の場合はデフォルト値を使用）
+            http_client: 共有HTTPクライアント（None の場合はリクエストごとにセッションを作成）
         """
         self._api_key = api_key
         self._timeout = aiohttp.ClientTimeout(total=timeout)
@@ -138,6 +143,7 @@ class SafeBrowsingClient:
         self._max_cache_size = max_cache_size if max_cache_size is not None else self.MAX_CACHE_SIZE
         self._cache: dict[str, CacheEntry] = {}
         self._cache_lock = asyncio.Lock()
+        self._http_client = http_client
 
     def _get_cache_key(self, url: str) -> str:
         """URLからキャッシュキーを生成する."""
@@ -310,16 +316,21 @@ class SafeBrowsingClient:
         """Safe Browsing API を呼び出す."""
         request_body = self._build_request_body(urls)
 
-        async with aiohttp.ClientSession(timeout=self._timeout) as session:
-            async with session.post(
-                self.API_URL, params={"key": self._api_key}, json=request_body
-            ) as resp:
-                if resp.status != 200:
-                    error_text = await resp.text()
-                    raise RuntimeError(
-                        f"Safe Browsing API error: {resp.status} - {error_text}"
-                    )
-                response_data = await resp.json()
+        async with (
+            client_session(self._http_client, self._timeout) as session,
+            session.post(
+                self.API_URL,
+                params={"key": self._api_key},
+                json=request_body,
+                timeout=self._timeout,
+            ) as resp,
+        ):
+            if resp.status != 200:
+                error_text = await resp.text()
+                raise RuntimeError(
+                    f"Safe Browsing API error: {resp.status} - {error_text}"
+                )
+            response_data = await resp.json()
 
         return self._parse_response(response_data, urls)
 
@@ -364,11 +375,14 @@ class SafeBrowsingClient:
         return len(expired_keys)
 
 
-def create_safe_browsing_client(settings: Settings) -> SafeBrowsingClient | None:
+def create_safe_browsing_client(
+    settings: Settings, http_client: HttpClient | None = None
+) -> SafeBrowsingClient | None:
     """設定に基づいてSafeBrowsingClientを生成する.
 
     Args:
         settings: アプリケーション設定
+        http_client: 共有HTTPクライアント（None の場合はリクエストごとにセッションを作成）
 
     Returns:
         SafeBrowsingClient または None（無効時）
@@ -393,4 +407,5 @@ def create_safe_browsing_client(settings: Settings) -> SafeBrowsingClient | None
         timeout=settings.rag_url_safety_timeout,
         cache_ttl=cache_ttl,
         fail_open=settings.rag_url_safety_fail_open,
+        http_client=http_client,
     )
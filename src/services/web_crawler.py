@@ -6,20 +6,32 @@
 from __future__ import annotations
 
 import asyncio
-import ipaddress
+import importlib.util
 import logging
 import re
 import socket
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Literal
 from urllib.parse import urldefrag, urljoin, urlparse
 
 import aiohttp
 from bs4 import BeautifulSoup
 from charset_normalizer import from_bytes
 
+from src.services.crawl_scheduler import CrawlScheduler
+from src.services.dns_resolver import check_hostname, check_public_address
+from src.services.http_client import client_session
+
+if TYPE_CHECKING:
+    from src.rag.parse_pool import ParsePool
+    from src.services.dns_resolver import SafeResolver
+    from src.services.http_client import HttpClient
+
 logger = logging.getLogger(__name__)
 
+HtmlParser = Literal["auto", "html.parser", "lxml"]
+
 
 @dataclass
 class CrawledPage:
@@ -31,6 +43,70 @@ class CrawledPage:
     crawled_at: str  # ISO 8601 タイムスタンプ
 
 
+def resolve_html_parser(parser: HtmlParser) -> str:
+    """BeautifulSoupに渡すパーサー名を決める.
+
+    auto の場合は lxml がインストールされていれば lxml、無ければ html.parser を使う。
+    lxml を指定してインストールされていない場合は、警告を出して html.parser を使う。
+    """
+    if parser == "html.parser":
+        return parser
+    if importlib.util.find_spec("lxml") is not None:
+        return "lxml"
+    if parser == "lxml":
+        logger.warning("lxml is not installed, falling back to html.parser")
+    return "html.parser"
+
+
+def extract_text(html: str, parser: str = "html.parser") -> tuple[str, str]:
+    """HTMLから本文テキストを抽出する.
+
+    抽出ロジック:
+    1. <script>, <style>, <nav>, <header>, <footer> タグを除去
+    2. <article> → <main> → <body> の優先順で本文領域を特定
+    3. テキストを抽出してクリーンアップ
+
+    プロセスプールのワーカーからも呼ばれるため、モジュールレベルの関数とする。
+
+    Args:
+        html: HTML文字列
+        parser: BeautifulSoupのパーサー名
+
+    Returns:
+        (title, text) のタプル
+    """
+    soup = BeautifulSoup(html, parser)
+
+    # タイトル抽出
+    title = ""
+    title_tag = soup.find("title")
+    if title_tag and title_tag.string:
+        title = title_tag.string.strip()
+
+    # 不要なタグを除去
+    for tag_name in ("script", "style", "nav", "header", "footer", "aside", "noscript"):
+        for tag in soup.find_all(tag_name):
+            tag.decompose()
+
+    # 本文領域を特定（優先順: article → main → body）
+    content_element = soup.find("article")
+    if content_element is None:
+        content_element = soup.find("main")
+    if content_element is None:
+        content_element = soup.find("body")
+    if content_element is None:
+        content_element = soup
+
+    # テキスト抽出とクリーンアップ
+    text = content_element.get_text(separator="\n", strip=True)
+    # 連続する空白行を1つにまとめる
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    # 連続するスペースを1つにまとめる
+    text = re.sub(r"[ \t]+", " ", text)
+
+    return title, text.strip()
+
+
 class WebCrawler:
     """Webページクローラー.
 
@@ -43,19 +119,39 @@ class WebCrawler:
         max_pages: int = 50,
         crawl_delay: float = 1.0,
         max_concurrent: int = 5,
+        parse_pool: ParsePool | None = None,
+        http_client: HttpClient | None = None,
+        resolver: SafeResolver | None = None,
+        respect_robots_txt: bool = False,
+        max_crawl_delay: float = 30.0,
     ) -> None:
         """WebCrawlerを初期化する.
 
         Args:
             timeout: HTTPリクエストのタイムアウト秒数
             max_pages: 1回のクロールで取得する最大ページ数
-            crawl_delay: 同一ドメインへの連続リクエスト間の待機秒数
-            max_concurrent: 同時接続数の上限
+            crawl_delay: 同一ホストへの連続リクエスト間の待機秒数
+            max_concurrent: 全ホスト合計の同時接続数の上限
+            parse_pool: 本文抽出を行うプロセスプール（Noneの場合はイベントループ上で抽出する）
+            http_client: 共有HTTPクライアント（Noneの場合はリクエストごとにセッションを作成する）
+            resolver: SSRF対策のDNS解決に使うキャッシュ付きリゾルバー
+                （Noneの場合は検証ごとにスレッドで getaddrinfo を呼ぶ）
+            respect_robots_txt: robots.txt の Crawl-delay が crawl_delay より長い場合はそれに従う
+            max_crawl_delay: robots.txt で指定された待機秒数の上限
         """
         self._timeout = aiohttp.ClientTimeout(total=timeout)
         self._max_pages = max_pages
         self._crawl_delay = crawl_delay
-        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._scheduler = CrawlScheduler(
+            default_delay=crawl_delay,
+            max_concurrent=max_concurrent,
+            max_delay=max_crawl_delay,
+            fetch_robots=self._fetch_robots_txt if respect_robots_txt else None,
+        )
+        self._parse_pool = parse_pool
+        self._http_client = http_client
+        self._resolver = resolver
+        self._html_parser = parse_pool.html_parser if parse_pool is not None else "html.parser"
 
     def validate_url(self, url: str) -> str:
         """URL検証・正規化. 問題なければ正規化済みURLを返す.
@@ -75,6 +171,40 @@ class WebCrawler:
         Raises:
             ValueError: URL検証に失敗した場合
         """
+        defragmented_url, hostname = self._parse_url(url)
+
+        # SSRF対策: プライベートIP/localhost/リンクローカルをブロック
+        self._validate_hostname_not_private(hostname)
+
+        return defragmented_url
+
+    async def validate_url_async(self, url: str) -> str:
+        """validate_url() の非同期版. DNS解決でイベントループを止めない.
+
+        リゾルバーがあれば検証済みの解決結果をキャッシュから返し（同じホスト名はTTLの間
+        1回だけ問い合わせる）、無ければスレッドで validate_url() と同じ検証を行う。
+
+        Raises:
+            ValueError: URL検証に失敗した場合
+        """
+        defragmented_url, hostname = self._parse_url(url)
+
+        if self._resolver is not None:
+            await self._resolver.check_host(hostname)
+        else:
+            await asyncio.to_thread(self._validate_hostname_not_private, hostname)
+
+        return defragmented_url
+
+    def _parse_url(self, url: str) -> tuple[str, str]:
+        """フラグメントを除去し、スキームとホスト名を検証する.
+
+        Returns:
+            (正規化済みURL, ホスト名) のタプル
+
+        Raises:
+            ValueError: スキームまたはホスト名が不正な場合
+        """
         # フラグメント除去（#以降を除去して正規化）
         defragmented_url, _ = urldefrag(url)
         parsed = urlparse(defragmented_url)
@@ -90,10 +220,7 @@ class WebCrawler:
         if not hostname:
             raise ValueError("URLにホスト名が含まれていません。")
 
-        # SSRF対策: プライベートIP/localhost/リンクローカルをブロック
-        self._validate_hostname_not_private(hostname)
-
-        return defragmented_url
+        return defragmented_url, hostname
 
     async def _decode_response(self, resp: aiohttp.ClientResponse) -> str:
         """レスポンスボディをエンコーディング自動検出でデコードする.
@@ -124,6 +251,9 @@ class WebCrawler:
         - fc00::/7 (IPv6 ユニークローカル)
         - fe80::/10 (IPv6 リンクローカル)
 
+        getaddrinfo はブロッキング呼び出しのため、イベントループ上からは
+        validate_url_async() を使う。
+
         Args:
             hostname: 検証するホスト名
 
@@ -131,8 +261,7 @@ class WebCrawler:
             ValueError: プライベートアドレスへのアクセスが検出された場合
         """
         # localhost の文字列チェック
-        if hostname.lower() in ("localhost", "localhost.localdomain"):
-            raise ValueError("localhost へのアクセスは許可されていません。")
+        check_hostname(hostname)
 
         # DNS解決してIPアドレスを取得
         try:
@@ -144,45 +273,10 @@ class WebCrawler:
 
         # 全ての解決済みIPアドレスをチェック
         for addr_info in addr_infos:
-            ip_str = addr_info[4][0]
-            try:
-                ip = ipaddress.ip_address(ip_str)
-            except ValueError:
-                continue
-
-            # プライベート/予約済みIPをブロック
-            # 注: 順序が重要。is_private は is_loopback/is_link_local を含むため、
-            # より具体的なチェックを先に行う
-            if ip.is_loopback:
-                raise ValueError(
-                    f"ループバックアドレス ({ip_str}) へのアクセスは許可されていません。"
-                )
-            if ip.is_link_local:
-                raise ValueError(
-                    f"リンクローカルアドレス ({ip_str}) へのアクセスは許可されていません。"
-                )
-            # IPv4の場合、169.254.0.0/16 (リンクローカル) も追加チェック
-            if isinstance(ip, ipaddress.IPv4Address):
-                if ip in ipaddress.ip_network("169.254.0.0/16"):
-                    raise ValueError(
-                        f"リンクローカルアドレス ({ip_str}) へのアクセスは許可されていません。"
-                    )
-            if ip.is_private:
-                raise ValueError(
-                    f"プライベートIPアドレス ({ip_str}) へのアクセスは許可されていません。"
-                )
-            if ip.is_reserved:
-                raise ValueError(
-                    f"予約済みアドレス ({ip_str}) へのアクセスは許可されていません。"
-                )
+            check_public_address(str(addr_info[4][0]))
 
     def _extract_text(self, html: str) -> tuple[str, str]:
-        """HTMLから本文テキストを抽出する.
-
-        抽出ロジック:
-        1. <script>, <style>, <nav>, <header>, <footer> タグを除去
-        2. <article> → <main> → <body> の優先順で本文領域を特定
-        3. テキストを抽出してクリーンアップ
+        """HTMLから本文テキストを抽出する（extract_text() 参照）.
 
         Args:
             html: HTML文字列
@@ -190,36 +284,7 @@ class WebCrawler:
         Returns:
             (title, text) のタプル
         """
-        soup = BeautifulSoup(html, "html.parser")
-
-        # タイトル抽出
-        title = ""
-        title_tag = soup.find("title")
-        if title_tag and title_tag.string:
-            title = title_tag.string.strip()
-
-        # 不要なタグを除去
-        for tag_name in ("script", "style", "nav", "header", "footer", "aside", "noscript"):
-            for tag in soup.find_all(tag_name):
-                tag.decompose()
-
-        # 本文領域を特定（優先順: article → main → body）
-        content_element = soup.find("article")
-        if content_element is None:
-            content_element = soup.find("main")
-        if content_element is None:
-            content_element = soup.find("body")
-        if content_element is None:
-            content_element = soup
-
-        # テキスト抽出とクリーンアップ
-        text = content_element.get_text(separator="\n", strip=True)
-        # 連続する空白行を1つにまとめる
-        text = re.sub(r"\n{3,}", "\n\n", text)
-        # 連続するスペースを1つにまとめる
-        text = re.sub(r"[ \t]+", " ", text)
-
-        return title, text.strip()
+        return extract_text(html, self._html_parser)
 
     async def crawl_index_page(
         self,
@@ -242,31 +307,34 @@ class WebCrawler:
             ValueError: URL検証に失敗した場合
         """
         # インデックスページのURL検証
-        validated_url = self.validate_url(index_url)
+        validated_url = await self.validate_url_async(index_url)
 
         # パターンのコンパイル
         pattern = re.compile(url_pattern) if url_pattern else None
 
         # ページ取得（SSRF対策: リダイレクト追従を無効化）
-        async with aiohttp.ClientSession(
-            timeout=self._timeout,
-        ) as session:
-            async with session.get(validated_url, allow_redirects=False) as resp:
-                # リダイレクト応答の場合はログを出して空リストを返す
-                if resp.status in (301, 302, 303, 307, 308):
-                    logger.warning(
-                        "Redirect detected (SSRF protection): %s -> %s",
-                        index_url,
-                        resp.headers.get("Location", "unknown"),
-                    )
-                    return []
-                if resp.status != 200:
-                    logger.warning("Failed to fetch index page: %s (status=%d)", index_url, resp.status)
-                    return []
-                html = await self._decode_response(resp)
+        async with (
+            self._scheduler.slot(validated_url),
+            client_session(self._http_client, self._timeout) as session,
+            session.get(validated_url, allow_redirects=False, timeout=self._timeout) as resp,
+        ):
+            # リダイレクト応答の場合はログを出して空リストを返す
+            if resp.status in (301, 302, 303, 307, 308):
+                logger.warning(
+                    "Redirect detected (SSRF protection): %s -> %s",
+                    index_url,
+                    resp.headers.get("Location", "unknown"),
+                )
+                return []
+            if resp.status != 200:
+                logger.warning(
+                    "Failed to fetch index page: %s (status=%d)", index_url, resp.status
+                )
+                return []
+            html = await self._decode_response(resp)
 
         # リンク抽出
-        soup = BeautifulSoup(html, "html.parser")
+        soup = BeautifulSoup(html, self._html_parser)
         urls: list[str] = []
         seen: set[str] = set()
 
@@ -304,7 +372,7 @@ class WebCrawler:
             # スキーム検証・SSRF対策（DNS解決を含むので最後に実行）
             # 重複・パターンで弾かれたURLには問い合わせしない
             try:
-                self.validate_url(normalized_url)
+                await self.validate_url_async(normalized_url)
             except ValueError:
                 continue
 
@@ -329,32 +397,36 @@ class WebCrawler:
             CrawledPage オブジェクト、または失敗時は None
         """
         try:
-            validated_url = self.validate_url(url)
+            validated_url = await self.validate_url_async(url)
         except ValueError as e:
             logger.warning("URL validation failed: %s - %s", url, e)
             return None
 
         try:
-            async with self._semaphore:
-                async with aiohttp.ClientSession(
-                    timeout=self._timeout,
-                ) as session:
-                    # SSRF対策: リダイレクト追従を無効化
-                    async with session.get(validated_url, allow_redirects=False) as resp:
-                        # リダイレクト応答の場合はログを出して None を返す
-                        if resp.status in (301, 302, 303, 307, 308):
-                            logger.warning(
-                                "Redirect detected (SSRF protection): %s -> %s",
-                                url,
-                                resp.headers.get("Location", "unknown"),
-                            )
-                            return None
-                        if resp.status != 200:
-                            logger.warning("Failed to fetch page: %s (status=%d)", url, resp.status)
-                            return None
-                        html = await self._decode_response(resp)
-
-            title, text = self._extract_text(html)
+            # ホストごとの間隔と全体の同時接続数の上限を守る（SSRF対策: リダイレクト追従は無効化）
+            async with (
+                self._scheduler.slot(validated_url),
+                client_session(self._http_client, self._timeout) as session,
+                session.get(validated_url, allow_redirects=False, timeout=self._timeout) as resp,
+            ):
+                # リダイレクト応答の場合はログを出して None を返す
+                if resp.status in (301, 302, 303, 307, 308):
+                    logger.warning(
+                        "Redirect detected (SSRF protection): %s -> %s",
+                        url,
+                        resp.headers.get("Location", "unknown"),
+                    )
+                    return None
+                if resp.status != 200:
+                    logger.warning("Failed to fetch page: %s (status=%d)", url, resp.status)
+                    return None
+                html = await self._decode_response(resp)
+
+            if self._parse_pool is not None:
+                # CPU負荷の高い解析はプロセスプールで行い、イベントループを止めない
+                title, text = await self._parse_pool.extract_text(html)
+            else:
+                title, text = self._extract_text(html)
             crawled_at = datetime.now(tz=timezone.utc).isoformat()
 
             return CrawledPage(
@@ -376,8 +448,8 @@ class WebCrawler:
     async def crawl_pages(self, urls: list[str]) -> list[CrawledPage]:
         """複数ページを並行クロールする.
 
-        - Semaphore により同時接続数を max_concurrent に制限
-        - 同一ドメインへの連続リクエスト間に crawl_delay 秒の待機を挿入（負荷軽減）
+        - ホストごとのリクエスト間隔と全体の同時接続数は crawl_page() 内のスケジューラーで守る
+          （あるホストの待機中も、別のホストのページは並行して取得する）
         - ページ単位でエラーを隔離し、他のページの処理は継続
 
         Args:
@@ -389,37 +461,9 @@ class WebCrawler:
         if not urls:
             return []
 
-        # ホストごとの最終リクエスト時刻を管理するロック付き辞書
-        last_request_time: dict[str, float] = {}
-        time_lock = asyncio.Lock()
-
-        async def crawl_with_delay(url: str) -> CrawledPage | None:
-            """同一ドメインへの遅延を挿入してクロールする."""
-            hostname = urlparse(url).hostname
-
-            if hostname and self._crawl_delay > 0:
-                async with time_lock:
-                    previous = last_request_time.get(hostname)
-                    if previous is not None:
-                        now = asyncio.get_event_loop().time()
-                        elapsed = now - previous
-                        if elapsed < self._crawl_delay:
-                            await asyncio.sleep(self._crawl_delay - elapsed)
-                    # リクエスト前に時刻を更新（他のタスクが同じホストに同時アクセスしないようにする）
-                    last_request_time[hostname] = asyncio.get_event_loop().time()
-
-            page = await self.crawl_page(url)
-
-            # リクエスト後に実際の完了時刻を更新
-            if hostname:
-                async with time_lock:
-                    last_request_time[hostname] = asyncio.get_event_loop().time()
-
-            return page
-
-        # 並行実行（Semaphore は crawl_page 内で適用される）
-        tasks = [crawl_with_delay(url) for url in urls]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = await asyncio.gather(
+            *(self.crawl_page(url) for url in urls), return_exceptions=True
+        )
 
         # 成功したページのみを収集（例外はログ済みなのでスキップ）
         pages: list[CrawledPage] = []
@@ -428,3 +472,22 @@ class WebCrawler:
                 pages.append(result)
 
         return pages
+
+    async def _fetch_robots_txt(self, origin: str) -> str | None:
+        """robots.txt を取得する. 存在しない・取得できない場合は None.
+
+        Args:
+            origin: "https://example.com" 形式のオリジン
+        """
+        try:
+            validated_url = await self.validate_url_async(f"{origin}/robots.txt")
+            async with (
+                client_session(self._http_client, self._timeout) as session,
+                session.get(validated_url, allow_redirects=False, timeout=self._timeout) as resp,
+            ):
+                if resp.status != 200:
+                    return None
+                return await self._decode_response(resp)
+        except (ValueError, aiohttp.ClientError, TimeoutError) as e:
+            logger.debug("Failed to fetch robots.txt: %s - %s", origin, e)
+            return None
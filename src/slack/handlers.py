@@ -25,6 +25,7 @@ from src.services.user_profiler import UserProfiler
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+    from src.rag.ingest_pipeline import StageStats
     from src.services.feed_collector import FeedCollector
     from src.services.rag_knowledge import RAGKnowledgeService
 
@@ -37,6 +38,9 @@ _FEED_KEYWORDS = ("feed",)
 _RAG_KEYWORDS = ("rag",)
 _STATUS_KEYWORDS = ("status", "info")
 
+# rag list で表示するソースの最大件数
+_RAG_LIST_LIMIT = 50
+
 # 起動時刻（main.py から設定される）
 BOT_START_TIME: datetime | None = None
 
@@ -491,11 +495,16 @@ async def _handle_rag_crawl(
             logger.debug("Failed to post start message", exc_info=True)
 
     # 2. 進捗コールバックを定義
-    async def progress_callback(crawled: int, total: int) -> None:
+    async def progress_callback(
+        crawled: int, total: int, stages: list[StageStats] | None = None
+    ) -> None:
         if say and crawled % progress_interval == 0:
+            text = f"└─ {crawled}ページ取得中..."
+            if stages:
+                text += f" ({_format_stage_throughput(stages)})"
             try:
                 await say(  # type: ignore[operator]
-                    text=f"└─ {crawled}ページ取得中...",
+                    text=text,
                     thread_ts=thread_ts,
                 )
             except Exception:
@@ -510,7 +519,7 @@ async def _handle_rag_crawl(
         # 4. 完了メッセージを投稿
         completion_message = (
             f"└─ 完了: {result['pages_crawled']}ページ / "
-            f"{result['chunks_stored']}チャンク / "
+            f"{result['chunks_stored']}チャンク ({_format_chunk_changes(result)}) / "
             f"エラー: {result['errors']}件"
         )
         if say:
@@ -528,7 +537,8 @@ async def _handle_rag_crawl(
         return (
             f"クロール完了しました。\n"
             f"取り込みページ数: {result['pages_crawled']}\n"
-            f"チャンク数: {result['chunks_stored']}\n"
+            f"チャンク数: {result['chunks_stored']}"
+            f" ({_format_chunk_changes(result)})\n"
             f"エラー: {result['errors']}件"
         )
     except ValueError as e:
@@ -540,6 +550,26 @@ async def _handle_rag_crawl(
         return "エラー: クロール中にエラーが発生しました。"
 
 
+def _format_chunk_changes(result: dict[str, int]) -> str:
+    """取り込み時のチャンクの増減を表示用の文字列にする."""
+    return (
+        f"追加 {result['chunks_added']} / 更新 {result['chunks_updated']} / "
+        f"変更なし {result['chunks_kept']} / 削除 {result['chunks_removed']}"
+    )
+
+
+# 進捗メッセージに表示する取り込みステージの名前
+_STAGE_LABELS = {"crawl": "取得", "chunk": "分割", "embed": "Embedding", "store": "保存"}
+
+
+def _format_stage_throughput(stages: list[StageStats]) -> str:
+    """取り込みパイプラインの各ステージのスループットを表示用の文字列にする."""
+    return " / ".join(
+        f"{_STAGE_LABELS.get(stat.name, stat.name)} {stat.throughput:.1f}件/秒"
+        for stat in stages
+    )
+
+
 async def _handle_rag_add(
     rag_service: RAGKnowledgeService,
     url: str,
@@ -552,9 +582,15 @@ async def _handle_rag_add(
         return "エラー: URLを指定してください。\n例: `@bot rag add https://example.com/page`"
 
     try:
-        chunks = await rag_service.ingest_page(url)
-        if chunks > 0:
-            return f"ページを取り込みました: {url} ({chunks}チャンク)"
+        result = await rag_service.ingest_page(url)
+        if result.chunks > 0:
+            changes = _format_chunk_changes({
+                "chunks_added": result.added,
+                "chunks_updated": result.updated,
+                "chunks_kept": result.kept,
+                "chunks_removed": result.removed,
+            })
+            return f"ページを取り込みました: {url} ({result.chunks}チャンク / {changes})"
         else:
             return f"エラー: ページの取り込みに失敗しました: {url}"
     except ValueError as e:
@@ -570,16 +606,60 @@ async def _handle_rag_status(
     """RAGステータス表示処理."""
     try:
         stats = await rag_service.get_stats()
-        return (
+        message = (
             "ナレッジベース統計:\n"
             f"総チャンク数: {stats['total_chunks']}\n"
             f"ソースURL数: {stats['source_count']}"
         )
+        if "total_bytes" in stats:
+            message += f"\n本文データ量: {stats['total_bytes'] / 1024:.1f}KB"
+        if "reembed_total" in stats:
+            done, total = stats["reembed_done"], stats["reembed_total"]
+            percent = done / total * 100 if total else 0.0
+            message += f"\nEmbeddingモデル変更の再Embedding中: {done} / {total} ({percent:.1f}%)"
+        for prefix, label in (
+            ("retrieval_cache", "検索キャッシュ"),
+            ("embedding_cache", "Embeddingキャッシュ"),
+        ):
+            if f"{prefix}_hits" not in stats:
+                continue
+            hits = stats[f"{prefix}_hits"]
+            lookups = hits + stats[f"{prefix}_misses"]
+            hit_rate = hits / lookups * 100 if lookups else 0.0
+            message += (
+                f"\n{label}: ヒット {hits} / 参照 {lookups} ({hit_rate:.1f}%)"
+                f", 保持 {stats[f'{prefix}_entries']}件"
+            )
+        return message
     except Exception:
         logger.exception("Failed to get RAG stats")
         return "エラー: 統計情報の取得中にエラーが発生しました。"
 
 
+async def _handle_rag_list(
+    rag_service: RAGKnowledgeService,
+    limit: int = _RAG_LIST_LIMIT,
+) -> str:
+    """RAGソース一覧表示処理."""
+    try:
+        sources = await rag_service.list_sources()
+    except Exception:
+        logger.exception("Failed to list RAG sources")
+        return "エラー: ソース一覧の取得中にエラーが発生しました。"
+
+    if not sources:
+        return "取り込み済みのソースはありません。"
+    lines = [f"取り込み済みソース ({len(sources)}件):"]
+    for record in sources[:limit]:
+        crawled_date = record.crawled_at[:10] or "不明"
+        lines.append(
+            f"• {record.source_url} ({record.chunk_count}チャンク, 取り込み: {crawled_date})"
+        )
+    if len(sources) > limit:
+        lines.append(f"…他 {len(sources) - limit}件")
+    return "\n".join(lines)
+
+
 async def _handle_rag_delete(
     rag_service: RAGKnowledgeService,
     url: str,
@@ -852,6 +932,8 @@ def register_handlers(
                 response_text = await _handle_rag_add(rag_service, url, raw_url_token)
             elif subcommand == "status":
                 response_text = await _handle_rag_status(rag_service)
+            elif subcommand == "list":
+                response_text = await _handle_rag_list(rag_service)
             elif subcommand == "delete":
                 response_text = await _handle_rag_delete(rag_service, url, raw_url_token)
             else:
@@ -860,6 +942,7 @@ def register_handlers(
                     "• `@bot rag crawl <URL> [パターン]` — リンク集ページからクロール＆取り込み\n"
                     "• `@bot rag add <URL>` — 単一ページ取り込み\n"
                     "• `@bot rag status` — ナレッジベース統計表示\n"
+                    "• `@bot rag list` — 取り込み済みソース一覧表示\n"
                     "• `@bot rag delete <URL>` — ソースURL指定で削除"
                 )
 
@@ -3,7 +3,23 @@
 仕様: docs/specs/f9-rag.md
 """
 
-from src.rag.bm25_index import BM25Index, tokenize_japanese
+import json
+import math
+import random
+import threading
+from collections import Counter
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.rag.bm25_index import (
+    SNAPSHOT_VERSION,
+    BM25Index,
+    BM25ScoringMode,
+    tokenize_japanese,
+    write_snapshot_file,
+)
 
 
 class TestTokenizeJapanese:
@@ -79,6 +95,23 @@ class TestBM25Index:
         # 残りは1件
         assert index.get_document_count() == 1
 
+    def test_delete_documents_by_id(self) -> None:
+        """ID指定でドキュメントを削除でき、存在しないIDは無視される."""
+        index = BM25Index()
+        index.add_documents([
+            ("doc1", "ドラゴン テスト", "source1"),
+            ("doc2", "ドラゴン 検索", "source1"),
+            ("doc3", "ゼルダ", "source2"),
+            ("doc4", "ポケモン", "source2"),
+        ])
+
+        assert index.delete_documents(["doc2", "doc2", "missing"]) == 1
+
+        assert index.get_document_count() == 3
+        assert index.get_source_url("doc2") is None
+        assert [r.doc_id for r in index.search("ドラゴン")] == ["doc1"]
+        assert index.delete_documents([]) == 0
+
     def test_ac6_search_empty_index_returns_empty_list(self) -> None:
         """AC6: 空のインデックスへの検索は空リストを返す."""
         index = BM25Index()
@@ -133,3 +166,479 @@ class TestBM25Index:
         # パラメータが設定されている
         assert index._k1 == 2.0
         assert index._b == 0.5
+
+
+class TestBM25CompactStorage:
+    """ソースURLの逆引きと本文の遅延取得のテスト."""
+
+    def test_delete_by_source_uses_reverse_index(self) -> None:
+        """ソースURLごとのドキュメントIDを逆引きで管理し、削除時に更新する."""
+        index = BM25Index()
+        index.add_documents([
+            ("a1", "dragon quest", "sourceA"),
+            ("a2", "dragon slayer", "sourceA"),
+            ("b1", "pokemon monster", "sourceB"),
+        ])
+
+        assert index._state.source_docs == {"sourceA": {"a1", "a2"}, "sourceB": {"b1"}}
+
+        assert index.delete_by_source("sourceA") == 2
+
+        assert index.get_document_count() == 1
+        assert "sourceA" not in index._state.source_docs
+        assert index._state.source_docs["sourceB"] == {"b1"}
+        assert index.delete_by_source("sourceA") == 0
+
+    def test_update_moves_document_between_sources(self) -> None:
+        """ソースURLが変わった更新は逆引きも移動する."""
+        index = BM25Index()
+        index.add_documents([("doc1", "dragon quest", "sourceA")])
+        published = index._state
+
+        index.add_documents([("doc1", "dragon quest", "sourceB")])
+
+        assert index._state.source_docs == {"sourceB": {"doc1"}}
+        # 公開済みの状態の逆引きは変更しない
+        assert published.source_docs == {"sourceA": {"doc1"}}
+        assert index.delete_by_source("sourceA") == 0
+        assert index.delete_by_source("sourceB") == 1
+
+    def test_documents_store_term_ids(self) -> None:
+        """ドキュメントは共有語彙の用語ID配列で保持する."""
+        index = BM25Index()
+        index.add_documents([
+            ("doc1", "dragon quest dragon", "source1"),
+            ("doc2", "quest log", "source1"),
+        ])
+
+        state = index._state
+        assert state.terms == ["dragon", "quest", "log"]
+        assert list(state.documents["doc1"].term_ids) == [0, 1, 0]
+        assert index._document_tokens("doc2") == ["quest", "log"]
+
+    def test_text_loader_fetches_only_top_k(self) -> None:
+        """text_loader 指定時は本文を保持せず、返却する上位k件の本文だけを取得する."""
+        texts = {f"doc{i}": f"dragon text {i}" for i in range(20)}
+        loader = MagicMock(side_effect=lambda ids: {doc_id: texts[doc_id] for doc_id in ids})
+        index = BM25Index(text_loader=loader)
+        index.add_documents([(doc_id, text, "source1") for doc_id, text in texts.items()])
+        index.add_documents([("other", "unrelated words here", "source2")])
+
+        assert all(document.text is None for document in index._state.documents.values())
+
+        results = index.search("dragon", n_results=3)
+
+        assert len(results) == 3
+        loader.assert_called_once_with([r.doc_id for r in results])
+        assert all(r.text == texts[r.doc_id] for r in results)
+
+    def test_text_loader_failure_returns_results_without_text(self) -> None:
+        """本文の取得に失敗してもスコアと順位は返す."""
+        loader = MagicMock(side_effect=RuntimeError("store unavailable"))
+        index = BM25Index(text_loader=loader)
+        index.add_documents([
+            ("doc1", "dragon quest", "source1"),
+            ("doc2", "pokemon monster", "source2"),
+            ("doc3", "zelda sword", "source3"),
+        ])
+
+        results = index.search("dragon")
+
+        assert [(r.doc_id, r.text) for r in results] == [("doc1", "")]
+        assert results[0].score > 0
+
+
+def _make_corpus(n_docs: int, seed: int = 0) -> list[tuple[str, str, str]]:
+    """パリティ検証用の合成コーパスを生成する（簡易トークナイザでも分割される空白区切り）."""
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(40)]
+    docs = []
+    for i in range(n_docs):
+        length = rng.randint(3, 15)
+        # 一部の用語を偏らせて負のIDF（半数以上の文書に出現）も発生させる
+        words = [rng.choice(vocab[:5] if rng.random() < 0.4 else vocab) for _ in range(length)]
+        docs.append((f"doc{i}", " ".join(words), f"source{i % 7}"))
+    return docs
+
+
+class TestBM25Parity:
+    """rank_bm25.BM25Okapi との結果一致テスト."""
+
+    @staticmethod
+    def _rank_bm25_top(
+        docs: list[tuple[str, str, str]], query: str, n_results: int
+    ) -> list[tuple[str, float]]:
+        rank_bm25 = pytest.importorskip("rank_bm25")
+        corpus = [tokenize_japanese(text) for _, text, _ in docs]
+        bm25 = rank_bm25.BM25Okapi(corpus, k1=1.5, b=0.75)
+        scores = bm25.get_scores(tokenize_japanese(query))
+        scored = [(docs[i][0], float(s)) for i, s in enumerate(scores) if s > 0]
+        scored.sort(key=lambda x: x[1], reverse=True)
+        return scored[:n_results]
+
+    @pytest.mark.parametrize("scoring", ["postings", "sparse", "maxscore"])
+    @pytest.mark.parametrize("query", ["term1 term7", "term0", "term3 term3 term22", "term39"])
+    def test_scores_match_rank_bm25(self, query: str, scoring: BM25ScoringMode) -> None:
+        """同じコーパス・クエリでrank_bm25と同じ順位・スコアになる."""
+        docs = _make_corpus(60)
+        index = BM25Index(k1=1.5, b=0.75, scoring=scoring)
+        index.add_documents(docs)
+
+        expected = self._rank_bm25_top(docs, query, 10)
+        actual = [(r.doc_id, r.score) for r in index.search(query, n_results=10)]
+
+        assert [doc_id for doc_id, _ in actual] == [doc_id for doc_id, _ in expected]
+        assert [score for _, score in actual] == pytest.approx(
+            [score for _, score in expected]
+        )
+
+    @pytest.mark.parametrize("scoring", ["postings", "sparse", "maxscore"])
+    def test_incremental_updates_match_fresh_build(self, scoring: BM25ScoringMode) -> None:
+        """追加・更新・削除を差分で反映した結果が、最終状態から新規構築した結果と一致する."""
+        docs = _make_corpus(50, seed=1)
+        incremental = BM25Index(scoring=scoring)
+        incremental.add_documents(docs[:30])
+        incremental.delete_by_source("source3")
+        incremental.add_documents(docs[30:])
+        # 既存ドキュメントを別の内容で置き換える
+        replaced = [("doc2", "term9 term9 term11", "source2")]
+        incremental.add_documents(replaced)
+
+        final_docs = {doc_id: (text, src) for doc_id, text, src in docs[:30]}
+        final_docs = {k: v for k, v in final_docs.items() if v[1] != "source3"}
+        final_docs.update({doc_id: (text, src) for doc_id, text, src in docs[30:]})
+        final_docs["doc2"] = ("term9 term9 term11", "source2")
+        fresh = BM25Index(scoring=scoring)
+        fresh.add_documents([(k, text, src) for k, (text, src) in final_docs.items()])
+
+        for query in ["term9", "term1 term2", "term11 term0"]:
+            expected = {r.doc_id: r.score for r in fresh.search(query, n_results=100)}
+            actual = {r.doc_id: r.score for r in incremental.search(query, n_results=100)}
+            assert actual.keys() == expected.keys()
+            for doc_id, score in expected.items():
+                assert actual[doc_id] == pytest.approx(score)
+
+    @pytest.mark.parametrize("n_results", [1, 3, 10, 500])
+    def test_sparse_top_k_matches_postings(self, n_results: int) -> None:
+        """疎行列方式の上位k件選択が、ポスティング走査方式と同じ結果（同点の順序含む）になる."""
+        docs = _make_corpus(300, seed=2)
+        sparse = BM25Index(scoring="sparse")
+        postings = BM25Index(scoring="postings")
+        sparse.add_documents(docs)
+        postings.add_documents(docs)
+
+        for query in ["term0", "term4 term12", "term1 term1 term30"]:
+            expected = postings.search(query, n_results=n_results)
+            actual = sparse.search(query, n_results=n_results)
+            assert [r.doc_id for r in actual] == [r.doc_id for r in expected]
+            assert [r.score for r in actual] == pytest.approx([r.score for r in expected])
+
+    def test_sparse_falls_back_to_postings_without_numpy(self) -> None:
+        """numpyが無い環境ではpostings方式にフォールバックする."""
+        with patch("src.rag.bm25_index._numpy_available", return_value=False):
+            index = BM25Index(scoring="sparse")
+
+        index.add_documents(_make_corpus(10))
+        assert index._scoring == "postings"
+        assert len(index.search("term1")) > 0
+
+
+class _CountingDict(dict[int, int]):
+    """要素の参照回数を数える辞書（評価したドキュメント数の計測用）."""
+
+    reads = 0
+
+    def __getitem__(self, key: int) -> int:
+        self.reads += 1
+        return super().__getitem__(key)
+
+
+class TestBM25MaxScore:
+    """MaxScore（動的枝刈り）による上位k件選択のテスト."""
+
+    @pytest.mark.parametrize("n_results", [1, 5, 20, 1000])
+    @pytest.mark.parametrize("seed", [3, 4, 5])
+    def test_maxscore_matches_exhaustive_scoring(self, n_results: int, seed: int) -> None:
+        """枝刈りの結果が全件スコアリング（postings）と順位・スコア・同点の順序まで一致する."""
+        rng = random.Random(seed)
+        vocab = [f"w{i}" for i in range(300)]
+
+        def zipf_word() -> str:
+            # Zipf風の偏りで頻出語と希少語を混在させる
+            return vocab[min(int(300 ** rng.random()), 299)]
+
+        docs = [
+            (f"doc{i}", " ".join(zipf_word() for _ in range(rng.randint(2, 30))), f"source{i % 11}")
+            for i in range(400)
+        ]
+        maxscore = BM25Index(scoring="maxscore")
+        exhaustive = BM25Index(scoring="postings")
+        for index in (maxscore, exhaustive):
+            index.add_documents(docs[:300])
+            index.delete_by_source("source4")
+            index.add_documents(docs[300:])
+            index.add_documents([("doc7", "w1 w250 w250", "source7")])
+
+        queries = [" ".join(zipf_word() for _ in range(rng.randint(1, 6))) for _ in range(30)]
+        for query in queries + ["w1 w1 w250", "w299", "w0 w0"]:
+            expected = exhaustive.search(query, n_results=n_results)
+            actual = maxscore.search(query, n_results=n_results)
+            assert [(r.doc_id, r.score) for r in actual] == [
+                (r.doc_id, r.score) for r in expected
+            ]
+
+    def test_incremental_bound_frontier_matches_fresh_build(self) -> None:
+        """追加・更新・削除を差分で反映した上限スコアの統計が、新規構築したものと一致する."""
+        docs = _make_corpus(80, seed=6)
+        incremental = BM25Index(scoring="maxscore")
+        incremental.add_documents(docs[:50])
+        incremental.delete_by_source("source2")
+        incremental.add_documents(docs[50:])
+        incremental.add_documents([
+            ("doc0", "term3", "source0"),
+            ("doc9", "term0 term0", "source2"),
+        ])
+        incremental.delete_by_source("source5")
+
+        fresh = BM25Index(scoring="maxscore")
+        for doc_id in incremental._state.documents:
+            document = incremental._state.documents[doc_id]
+            fresh.add_documents([(doc_id, document.text, document.source_url)])
+
+        assert incremental._state.term_bounds == fresh._state.term_bounds
+
+    def test_maxscore_skips_documents_outside_top_k(self) -> None:
+        """上位k件に入り得ない（頻出語だけを含む）ドキュメントは評価しない."""
+        docs = [(f"common{i}", "common filler", "s") for i in range(500)]
+        docs += [(f"rare{i}", "rare common", "s") for i in range(3)]
+        docs += [(f"other{i}", "other", "s") for i in range(600)]
+        index = BM25Index(scoring="maxscore")
+        index.add_documents(docs)
+        # 上限スコアのキャッシュを作ってから、評価時の文書長の参照回数を数える
+        index.search("rare common", n_results=3)
+        counting = _CountingDict(index._state.doc_lengths)
+        index._state.doc_lengths = counting
+
+        results = index.search("rare common", n_results=3)
+
+        assert [r.doc_id for r in results] == ["rare0", "rare1", "rare2"]
+        assert counting.reads == 3
+
+    def test_maxscore_falls_back_when_idf_is_not_positive(self) -> None:
+        """非正のIDF（平均IDFが負の場合の補正値）を含むクエリは全件評価にフォールバックする."""
+        docs = [
+            ("doc1", "alpha beta", "s"),
+            ("doc2", "alpha beta", "s"),
+            ("doc3", "alpha gamma", "s"),
+        ]
+        maxscore = BM25Index(scoring="maxscore")
+        exhaustive = BM25Index(scoring="postings")
+        maxscore.add_documents(docs)
+        exhaustive.add_documents(docs)
+
+        for query in ["alpha", "alpha gamma", "beta"]:
+            expected = exhaustive.search(query, n_results=3)
+            actual = maxscore.search(query, n_results=3)
+            assert [(r.doc_id, r.score) for r in actual] == [
+                (r.doc_id, r.score) for r in expected
+            ]
+
+
+class TestBM25Concurrency:
+    """公開済み状態の差し替えによる読み書きの分離のテスト."""
+
+    def test_published_state_is_not_modified_by_writes(self) -> None:
+        """検索が保持している状態は、その後の追加・削除で変更されない."""
+        index = BM25Index(scoring="postings")
+        index.add_documents(_make_corpus(20))
+        state = index._state
+        postings_before = {term: dict(p) for term, p in state.postings.items()}
+
+        index.add_documents([("new", "term1 term2 term3", "source-new")])
+        index.add_documents([("doc3", "term9 term9", "source3")])
+        index.delete_by_source("source1")
+
+        assert index._state is not state
+        assert len(state.documents) == 20
+        assert "new" not in state.documents
+        assert {term: dict(p) for term, p in state.postings.items()} == postings_before
+
+    @pytest.mark.parametrize("scoring", ["postings", "sparse", "maxscore"])
+    def test_concurrent_search_sees_consistent_states(self, scoring: BM25ScoringMode) -> None:
+        """書き込み中の検索は、常にいずれかの公開済み状態と同じ結果を返す."""
+        # 各ソースは全文書に共通の用語と、ソース固有の用語を持つ
+        batches = [
+            [(f"s{s}_{i}", f"common unique{s} filler{i}", f"source{s}") for i in range(20)]
+            for s in range(30)
+        ]
+        index = BM25Index(scoring=scoring)
+        index.add_documents(batches[0])
+        errors: list[str] = []
+        stop = threading.Event()
+
+        def reader() -> None:
+            while not stop.is_set():
+                results = index.search("common", n_results=1000)
+                sources = {r.doc_id.split("_")[0] for r in results}
+                # 構築途中の状態が見えると、ソース内の文書数が揃わない
+                for source in sources:
+                    count = sum(1 for r in results if r.doc_id.startswith(f"{source}_"))
+                    if count != 20:
+                        errors.append(f"{source}: {count}")
+                # 同じ状態の全文書は同じ長さ・同じ出現回数なので同点になる
+                if len({r.score for r in results}) > 1:
+                    errors.append("inconsistent scores")
+
+        readers = [threading.Thread(target=reader) for _ in range(3)]
+        for thread in readers:
+            thread.start()
+        try:
+            for s, batch in enumerate(batches[1:], start=1):
+                index.add_documents(batch)
+                if s % 3 == 0:
+                    index.delete_by_source(f"source{s - 1}")
+        finally:
+            stop.set()
+            for thread in readers:
+                thread.join()
+
+        assert errors == []
+
+    def test_write_copies_only_touched_shards(self) -> None:
+        """書き込みは変更したシャードだけを複製し、残りは公開済みの状態と共有する."""
+        index = BM25Index(scoring="postings")
+        index.add_documents(
+            [(f"doc{i}", f"common word{i}", f"source{i % 50}") for i in range(5000)]
+        )
+        published = index._state
+
+        index.add_documents([("doc1", "common word1 extra", "source1")])
+
+        state = index._state
+        for name in ("documents", "doc_lengths", "postings", "source_docs"):
+            before = getattr(published, name).shards
+            after = getattr(state, name).shards
+            copied = sum(1 for old, new in zip(before, after, strict=True) if old is not new)
+            # 変更したキーは多くても4件（用語は common, word, 1, extra）
+            assert 0 < copied <= 4, name
+
+    @pytest.mark.parametrize("scoring", ["postings", "sparse", "maxscore"])
+    def test_incremental_idf_floor_matches_full_computation(
+        self, scoring: BM25ScoringMode
+    ) -> None:
+        """差分で更新したIDF補正値が、全用語から計算した値と一致する."""
+        index = BM25Index(scoring=scoring)
+        docs = _make_corpus(120, seed=8)
+        index.add_documents(docs[:80])
+        index.delete_by_source("source3")
+        index.add_documents(docs[80:])
+        index.add_documents([("doc5", "term1 term39 term39", "source5")])
+        index.delete_documents(["doc7", "doc11"])
+
+        state = index._state
+        doc_freqs = Counter(
+            state.terms[term_id]
+            for document in state.documents.values()
+            for term_id in set(document.term_ids)
+        )
+        n = len(state.documents)
+        idfs = [math.log(n - df + 0.5) - math.log(df + 0.5) for df in doc_freqs.values()]
+
+        assert state.df_counts == Counter(doc_freqs.values())
+        assert state.idf_floor == pytest.approx(0.25 * sum(idfs) / len(idfs))
+
+
+class TestBM25Snapshot:
+    """BM25インデックスのスナップショット永続化テスト."""
+
+    def test_snapshot_roundtrip_restores_search(self, tmp_path: Path) -> None:
+        """スナップショットから復元したインデックスで同じ検索結果が得られる."""
+        index = BM25Index()
+        index.add_documents([
+            ("doc1", "dragon quest adventure game", "source1"),
+            ("doc2", "pokemon battle monster", "source2"),
+            ("doc3", "zelda sword shield", "source3"),
+        ])
+        path = tmp_path / "bm25.json"
+        write_snapshot_file(path, index.to_snapshot())
+
+        restored = BM25Index()
+        assert restored.load_snapshot(path) is True
+
+        assert restored.get_document_count() == 3
+        assert restored.get_source_url("doc2") == "source2"
+        expected = [(r.doc_id, r.score) for r in index.search("pokemon monster")]
+        actual = [(r.doc_id, r.score) for r in restored.search("pokemon monster")]
+        assert actual == expected
+
+    def test_snapshot_contains_tokens_and_stats(self) -> None:
+        """スナップショットにトークン化済みコーパスと統計が含まれる."""
+        index = BM25Index()
+        index.add_documents([("doc1", "dragon quest", "source1")])
+
+        snapshot = index.to_snapshot()
+
+        assert snapshot["version"] == SNAPSHOT_VERSION
+        assert snapshot["stats"]["document_count"] == 1
+        doc_id, source_url, text, term_ids = snapshot["documents"][0]
+        assert (doc_id, source_url, text) == ("doc1", "source1", "dragon quest")
+        # トークン列は語彙の用語IDで保存される
+        tokens = [snapshot["vocabulary"][term_id] for term_id in term_ids]
+        assert tokens == tokenize_japanese("dragon quest")
+        assert snapshot["stats"]["total_length"] == len(tokens)
+
+    def test_snapshot_roundtrip_without_texts(self, tmp_path: Path) -> None:
+        """本文を保持しないインデックスのスナップショットも復元できる."""
+        loader = MagicMock(side_effect=lambda ids: {doc_id: f"text of {doc_id}" for doc_id in ids})
+        index = BM25Index(text_loader=loader)
+        index.add_documents([
+            ("doc1", "pokemon monster", "source1"),
+            ("doc2", "dragon quest", "source2"),
+            ("doc3", "zelda sword", "source3"),
+        ])
+        path = tmp_path / "bm25.json"
+        snapshot = index.to_snapshot()
+        assert [entry[2] for entry in snapshot["documents"]] == [None, None, None]
+        write_snapshot_file(path, snapshot)
+
+        restored = BM25Index(text_loader=loader)
+        assert restored.load_snapshot(path) is True
+
+        results = restored.search("pokemon")
+        assert [(r.doc_id, r.text) for r in results] == [("doc1", "text of doc1")]
+
+    def test_load_missing_snapshot_returns_false(self, tmp_path: Path) -> None:
+        """スナップショットが存在しない場合はFalseを返す."""
+        index = BM25Index()
+        assert index.load_snapshot(tmp_path / "missing.json") is False
+        assert index.get_document_count() == 0
+
+    def test_load_incompatible_version_is_ignored(self, tmp_path: Path) -> None:
+        """バージョン不一致のスナップショットは読み込まない."""
+        path = tmp_path / "bm25.json"
+        path.write_text(
+            json.dumps({"version": SNAPSHOT_VERSION + 1, "documents": []}),
+            encoding="utf-8",
+        )
+
+        index = BM25Index()
+        index.add_documents([("doc1", "dragon quest", "source1")])
+
+        assert index.load_snapshot(path) is False
+        # 既存の内容は維持される
+        assert index.get_document_count() == 1
+
+    def test_load_corrupted_snapshot_is_ignored(self, tmp_path: Path) -> None:
+        """壊れたスナップショットは読み込まない."""
+        path = tmp_path / "bm25.json"
+        path.write_text("{not json", encoding="utf-8")
+
+        assert BM25Index().load_snapshot(path) is False
+
+    def test_write_snapshot_file_leaves_no_temp_files(self, tmp_path: Path) -> None:
+        """書き込み後に一時ファイルが残らない."""
+        path = tmp_path / "nested" / "bm25.json"
+        write_snapshot_file(path, BM25Index().to_snapshot())
+
+        assert path.exists()
+        assert [p.name for p in path.parent.iterdir()] == ["bm25.json"]
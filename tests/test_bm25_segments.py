@@ -0,0 +1,235 @@
+"""BM25セグメント型ストレージのテスト
+
+仕様: docs/specs/f9-rag.md
+"""
+
+import json
+import random
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.rag.bm25_index import BM25Index, get_tokenizer_name, tokenize_japanese
+from src.rag.bm25_segments import BM25SegmentStore
+
+
+def _make_corpus(n_docs: int, seed: int = 0) -> list[tuple[str, str, str]]:
+    """合成コーパスを生成する（簡易トークナイザでも分割される空白区切り）."""
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(40)]
+    docs = []
+    for i in range(n_docs):
+        length = rng.randint(3, 15)
+        # 一部の用語を偏らせて負のIDF（半数以上の文書に出現）も発生させる
+        words = [rng.choice(vocab[:5] if rng.random() < 0.4 else vocab) for _ in range(length)]
+        docs.append((f"doc{i}", " ".join(words), f"source{i % 7}"))
+    return docs
+
+
+def _make_store(path: Path, **kwargs: object) -> BM25SegmentStore:
+    """小さいバッファ・同期マージのストアを作成する."""
+    options: dict[str, object] = {
+        "tokenizer": get_tokenizer_name(),
+        "buffer_size": 8,
+        "max_segments": 3,
+        "merge_factor": 2,
+        "background_merge": False,
+    }
+    options.update(kwargs)
+    return BM25SegmentStore(path, **options)  # type: ignore[arg-type]
+
+
+def _add(store: BM25SegmentStore, docs: list[tuple[str, str, str]]) -> int:
+    return store.add_documents(docs, [tokenize_japanese(text) for _, text, _ in docs])
+
+
+def _top(store: BM25SegmentStore, query: str) -> list[tuple[str, float]]:
+    return [
+        (doc_id, pytest.approx(score))
+        for doc_id, score in store.top_k(tokenize_japanese(query), 10)
+    ]
+
+
+def _expected(index: BM25Index, query: str) -> list[tuple[str, float]]:
+    return [(r.doc_id, r.score) for r in index.search(query, n_results=10)]
+
+
+QUERIES = ["term1 term7", "term3", "term0 term2 term30", "term12 term0 term0"]
+
+
+class TestBM25SegmentStore:
+    """セグメント・書き込みバッファ・墓標・マージのテスト."""
+
+    def test_matches_in_memory_index_across_flushes_and_merges(self, tmp_path: Path) -> None:
+        """追加・置き換え・削除・書き出し・マージを経ても、メモリ上のインデックスと一致する."""
+        rng = random.Random(3)
+        corpus = _make_corpus(120, seed=1)
+        reference = BM25Index(scoring="sparse")
+        store = _make_store(tmp_path)
+
+        for step in range(40):
+            if rng.random() < 0.75:
+                batch = rng.sample(corpus, rng.randint(1, 10))
+                # 同じIDの内容を変えた置き換えも混ぜる
+                batch = [
+                    (doc_id, text if rng.random() < 0.7 else f"{text} term39", source)
+                    for doc_id, text, source in batch
+                ]
+                reference.add_documents(batch)
+                _add(store, batch)
+            else:
+                source_url = f"source{rng.randint(0, 6)}"
+                assert store.delete_by_source(source_url) == reference.delete_by_source(
+                    source_url
+                )
+
+            assert store.get_document_count() == reference.get_document_count()
+            for query in QUERIES:
+                assert _top(store, query) == _expected(reference, query), (step, query)
+
+        assert store.get_segment_count() < 3
+
+    def test_reopen_restores_segments_and_write_buffer(self, tmp_path: Path) -> None:
+        """閉じずに停止しても、マニフェストとWALから同じ内容に復元される."""
+        corpus = _make_corpus(30)
+        reference = BM25Index()
+        reference.add_documents(corpus)
+        reference.delete_by_source("source2")
+
+        store = _make_store(tmp_path, max_segments=100)
+        _add(store, corpus)
+        store.delete_by_source("source2")
+        # 30件 / バッファ8件: 3セグメント + バッファ6件（WALのみに記録）
+        assert store.get_segment_count() == 3
+
+        reopened = _make_store(tmp_path, max_segments=100)
+
+        assert reopened.get_document_count() == reference.get_document_count()
+        assert reopened.get_source_url("doc29") == "source1"
+        assert reopened.get_source_url("doc2") is None
+        for query in QUERIES:
+            assert _top(reopened, query) == _expected(reference, query)
+
+    def test_delete_by_source_tombstones_segment_documents(self, tmp_path: Path) -> None:
+        """セグメント内のドキュメントは墓標で削除され、全件削除されたセグメントは取り除かれる."""
+        store = _make_store(tmp_path, buffer_size=2, max_segments=100)
+        _add(store, [
+            ("a1", "dragon quest", "sourceA"),
+            ("a2", "dragon slayer", "sourceA"),
+            ("b1", "pokemon dragon", "sourceB"),
+            ("c1", "zelda sword", "sourceC"),
+        ])
+        assert store.get_segment_count() == 2
+
+        assert store.delete_by_source("sourceB") == 1
+        assert [doc_id for doc_id, _ in store.top_k(["dragon"], 10)] == ["a1", "a2"]
+        assert store.get_document_count() == 3
+
+        assert store.delete_by_source("sourceA") == 2
+        assert store.get_segment_count() == 1
+        assert store.delete_by_source("sourceA") == 0
+
+    def test_delete_documents_by_id_survives_reopen(self, tmp_path: Path) -> None:
+        """ID指定の削除はバッファ・セグメントの両方に効き、WALから再現される."""
+        corpus = _make_corpus(30)
+        reference = BM25Index()
+        reference.add_documents(corpus)
+        removed = ["doc3", "doc17", "doc29", "missing"]
+        assert reference.delete_documents(removed) == 3
+
+        store = _make_store(tmp_path, max_segments=100)
+        _add(store, corpus)
+        # doc3, doc17 はセグメント内、doc29 は書き込みバッファ内
+        assert store.delete_documents(removed) == 3
+        assert store.delete_documents(removed) == 0
+
+        reopened = _make_store(tmp_path, max_segments=100)
+
+        for current in (store, reopened):
+            assert current.get_document_count() == reference.get_document_count()
+            assert current.get_source_url("doc17") is None
+            for query in QUERIES:
+                assert _top(current, query) == _expected(reference, query)
+
+    def test_background_merge_keeps_results(self, tmp_path: Path) -> None:
+        """バックグラウンドのマージ完了後もセグメント数が減り、結果は変わらない."""
+        corpus = _make_corpus(60, seed=5)
+        reference = BM25Index()
+        reference.add_documents(corpus)
+
+        store = _make_store(tmp_path, background_merge=True)
+        for start in range(0, 60, 8):
+            _add(store, corpus[start:start + 8])
+        store.wait_for_merges()
+
+        assert store.get_segment_count() < 3
+        for query in QUERIES:
+            assert _top(store, query) == _expected(reference, query)
+        store.close()
+
+    def test_incompatible_tokenizer_discards_segments(self, tmp_path: Path) -> None:
+        """トークナイザが一致しないセグメントは破棄して空で開く."""
+        store = _make_store(tmp_path)
+        _add(store, _make_corpus(20))
+        store.close()
+
+        manifest_path = tmp_path / "manifest.json"
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        manifest["tokenizer"] = "other"
+        manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+
+        reopened = _make_store(tmp_path)
+
+        assert reopened.get_document_count() == 0
+        assert reopened.get_segment_count() == 0
+
+    def test_texts_are_stored_in_segments(self, tmp_path: Path) -> None:
+        """本文はセグメントとバッファから取得できる."""
+        store = _make_store(tmp_path, buffer_size=2)
+        _add(store, [
+            ("doc1", "dragon quest", "source1"),
+            ("doc2", "日本語の本文", "source1"),
+            ("doc3", "zelda sword", "source2"),
+        ])
+
+        assert store.get_texts(["doc2", "doc3", "missing"]) == {
+            "doc2": "日本語の本文",
+            "doc3": "zelda sword",
+        }
+
+
+class TestBM25IndexSegmentBackend:
+    """BM25Index のセグメントバックエンドのテスト."""
+
+    def test_index_uses_segments(self, tmp_path: Path) -> None:
+        """segment_dir を指定したインデックスはセグメントに保持し、再度開いても同じ結果を返す."""
+        corpus = _make_corpus(40)
+        index = BM25Index(segment_dir=tmp_path, segment_buffer_size=16)
+        index.add_documents(corpus)
+        expected = [(r.doc_id, r.score, r.text) for r in index.search("term1 term7")]
+        assert index.is_persistent is True
+        index.close()
+
+        reopened = BM25Index(segment_dir=tmp_path, segment_buffer_size=16)
+
+        assert reopened.get_document_count() == 40
+        actual = [(r.doc_id, r.score, r.text) for r in reopened.search("term1 term7")]
+        assert actual == expected
+        assert actual[0][2] == {d: t for d, t, _ in corpus}[actual[0][0]]
+
+    def test_text_loader_skips_text_storage(self, tmp_path: Path) -> None:
+        """text_loader 指定時は本文をセグメントに書き出さず、上位k件のみ取得する."""
+        loader = MagicMock(side_effect=lambda ids: {doc_id: f"text of {doc_id}" for doc_id in ids})
+        index = BM25Index(segment_dir=tmp_path, segment_buffer_size=2, text_loader=loader)
+        index.add_documents([
+            ("doc1", "pokemon monster", "source1"),
+            ("doc2", "dragon quest", "source2"),
+            ("doc3", "zelda sword", "source3"),
+        ])
+
+        results = index.search("pokemon", n_results=1)
+
+        assert [(r.doc_id, r.text) for r in results] == [("doc1", "text of doc1")]
+        loader.assert_called_once_with(["doc1"])
+        assert not list(tmp_path.glob("seg-*/texts.npy"))
@@ -0,0 +1,152 @@
+"""クロールスケジューラーのテスト
+
+仕様: docs/specs/f9-rag.md
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import AsyncExitStack
+from unittest.mock import MagicMock
+
+import pytest
+from aiohttp import web
+
+from src.services.crawl_scheduler import CrawlScheduler, parse_crawl_delay
+from src.services.web_crawler import WebCrawler
+
+_PAGE = "<html><head><title>ページ</title></head><body><article><p>本文</p></article></body></html>"
+
+StartServers = Callable[..., Awaitable[list[tuple[str, list[float]]]]]
+
+
+@pytest.fixture
+async def stub_servers() -> AsyncIterator[StartServers]:
+    """ローカルHTTPサーバーを起動する関数（各サーバーはページへのリクエスト時刻を記録する）."""
+    async with AsyncExitStack() as stack:
+
+        async def start(count: int, robots_txt: str = "") -> list[tuple[str, list[float]]]:
+            servers = []
+            for _ in range(count):
+                requested_at: list[float] = []
+
+                async def page(
+                    request: web.Request, log: list[float] = requested_at
+                ) -> web.Response:
+                    log.append(time.monotonic())
+                    return web.Response(text=_PAGE, content_type="text/html")
+
+                async def robots(request: web.Request) -> web.Response:
+                    if not robots_txt:
+                        return web.Response(status=404)
+                    return web.Response(text=robots_txt, content_type="text/plain")
+
+                app = web.Application()
+                app.router.add_get("/robots.txt", robots)
+                app.router.add_get("/{name}", page)
+                runner = web.AppRunner(app)
+                await runner.setup()
+                stack.push_async_callback(runner.cleanup)
+                site = web.TCPSite(runner, "127.0.0.1", 0)
+                await site.start()
+                servers.append((f"http://127.0.0.1:{runner.addresses[0][1]}", requested_at))
+            return servers
+
+        yield start
+
+
+def _local_crawler(**kwargs: object) -> WebCrawler:
+    crawler = WebCrawler(**kwargs)  # type: ignore[arg-type]
+    # ローカルサーバーへのアクセスのためSSRF対策の検証を省略する
+    crawler._validate_hostname_not_private = MagicMock()  # type: ignore[method-assign]
+    return crawler
+
+
+def _min_gap(times: list[float]) -> float:
+    ordered = sorted(times)
+    return min(b - a for a, b in itertools.pairwise(ordered))
+
+
+class TestCrawlScheduler:
+    """CrawlScheduler のテスト."""
+
+    @pytest.mark.asyncio
+    async def test_hosts_are_crawled_in_parallel_while_each_is_throttled(
+        self, stub_servers: StartServers
+    ) -> None:
+        """複数ホストのクロールは並行して進み、各ホストへのリクエストは間隔を空ける."""
+        delay = 0.2
+        pages_per_host = 4
+        servers = await stub_servers(3)
+        crawler = _local_crawler(crawl_delay=delay, max_concurrent=5)
+        urls = [f"{base}/page{i}" for i in range(pages_per_host) for base, _ in servers]
+
+        started = time.monotonic()
+        pages = await crawler.crawl_pages(urls)
+        elapsed = time.monotonic() - started
+
+        assert len(pages) == len(urls)
+        for _, requested_at in servers:
+            assert len(requested_at) == pages_per_host
+            assert _min_gap(requested_at) >= delay * 0.9
+        # 全ホストを1本の待機で直列化すると (全ページ数 - 1) × delay かかる
+        serialized = (len(urls) - 1) * delay
+        assert elapsed < serialized / 2
+
+    @pytest.mark.asyncio
+    async def test_robots_crawl_delay_is_honored(self, stub_servers: StartServers) -> None:
+        """robots.txt の Crawl-delay が設定より長い場合はそれに従う."""
+        servers = await stub_servers(1, "User-agent: *\nCrawl-delay: 1\n")
+        base, requested_at = servers[0]
+        crawler = _local_crawler(crawl_delay=0.05, respect_robots_txt=True)
+
+        await crawler.crawl_pages([f"{base}/a", f"{base}/b"])
+
+        assert len(requested_at) == 2
+        assert _min_gap(requested_at) >= 0.9
+        assert crawler._scheduler.host_delay(base) == 1.0
+
+    @pytest.mark.asyncio
+    async def test_global_concurrency_is_capped(self) -> None:
+        """全ホスト合計の同時リクエスト数は max_concurrent までに制限される."""
+        scheduler = CrawlScheduler(default_delay=0, max_concurrent=2)
+        running = 0
+        peak = 0
+
+        async def request(url: str) -> None:
+            nonlocal running, peak
+            async with scheduler.slot(url):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.02)
+                running -= 1
+
+        await asyncio.gather(*(request(f"https://host{i}.example/") for i in range(8)))
+
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_robots_delay_is_capped_and_cached(self) -> None:
+        """robots.txt の間隔は max_delay で打ち切り、ホストごとに1回だけ取得する."""
+        fetch_robots = MagicMock()
+
+        async def fetch(origin: str) -> str:
+            fetch_robots(origin)
+            return "User-agent: *\nCrawl-delay: 120\n"
+
+        scheduler = CrawlScheduler(default_delay=0, max_delay=0.05, fetch_robots=fetch)
+        for _ in range(3):
+            async with scheduler.slot("https://example.com/page"):
+                pass
+
+        fetch_robots.assert_called_once_with("https://example.com")
+        assert scheduler.host_delay("https://example.com/other") == 0.05
+
+    def test_parse_crawl_delay(self) -> None:
+        """Crawl-delay が無い場合は Request-rate から間隔を求める."""
+        assert parse_crawl_delay("User-agent: *\nCrawl-delay: 3\n") == 3.0
+        assert parse_crawl_delay("User-agent: *\nRequest-rate: 1/5\n") == 5.0
+        assert parse_crawl_delay("User-agent: *\nDisallow: /private\n") is None
@@ -0,0 +1,193 @@
+"""SSRF対策付きDNSリゾルバーのテスト
+
+仕様: docs/specs/f9-rag.md
+"""
+
+from __future__ import annotations
+
+import asyncio
+import socket
+from unittest.mock import MagicMock, patch
+
+import pytest
+from aiohttp.abc import AbstractResolver, ResolveResult
+
+from src.services.dns_resolver import SafeResolver
+from src.services.web_crawler import WebCrawler
+
+
+class FakeResolver(AbstractResolver):
+    """ホスト名ごとに決まったアドレスを返し、問い合わせ回数を記録するリゾルバー."""
+
+    def __init__(self, addresses: dict[str, list[str]], delay: float = 0.0) -> None:
+        self.addresses = addresses
+        self.delay = delay
+        self.calls: list[str] = []
+
+    async def resolve(
+        self, host: str, port: int = 0, family: socket.AddressFamily = socket.AF_INET
+    ) -> list[ResolveResult]:
+        self.calls.append(host)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if host not in self.addresses:
+            raise OSError(f"unknown host: {host}")
+        return [
+            ResolveResult(
+                hostname=host,
+                host=address,
+                port=port,
+                family=socket.AF_INET6 if ":" in address else socket.AF_INET,
+                proto=0,
+                flags=0,
+            )
+            for address in self.addresses[host]
+        ]
+
+    async def close(self) -> None:
+        pass
+
+
+def _make_resolver(
+    addresses: dict[str, list[str]], ttl: float = 300.0, delay: float = 0.0
+) -> tuple[SafeResolver, FakeResolver]:
+    fake = FakeResolver(addresses, delay)
+    return SafeResolver(ttl=ttl, resolver_factory=lambda: fake), fake
+
+
+class TestSafeResolver:
+    """SafeResolver のテスト."""
+
+    @pytest.mark.asyncio
+    async def test_host_is_resolved_once_within_ttl(self) -> None:
+        """TTLの間は同じホスト名を再度問い合わせない."""
+        resolver, fake = _make_resolver({"example.com": ["93.184.216.34"]})
+
+        for _ in range(5):
+            await resolver.check_host("example.com")
+        results = await resolver.resolve("example.com", 443)
+
+        assert fake.calls == ["example.com"]
+        assert [(r["host"], r["port"]) for r in results] == [("93.184.216.34", 443)]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_lookups_are_coalesced(self) -> None:
+        """同じホスト名の同時の問い合わせは1回にまとめる."""
+        resolver, fake = _make_resolver({"example.com": ["93.184.216.34"]}, delay=0.05)
+
+        await asyncio.gather(*(resolver.check_host("example.com") for _ in range(10)))
+
+        assert fake.calls == ["example.com"]
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_is_resolved_again(self) -> None:
+        """TTLを過ぎた解決結果は問い合わせ直す."""
+        resolver, fake = _make_resolver({"example.com": ["93.184.216.34"]}, ttl=10.0)
+
+        with patch("src.services.dns_resolver.time.monotonic", return_value=1000.0):
+            await resolver.check_host("example.com")
+        with patch("src.services.dns_resolver.time.monotonic", return_value=1011.0):
+            await resolver.check_host("example.com")
+
+        assert fake.calls == ["example.com", "example.com"]
+
+    @pytest.mark.asyncio
+    async def test_private_addresses_are_rejected(self) -> None:
+        """プライベート/ループバック/リンクローカルに解決されるホスト名は拒否する."""
+        resolver, fake = _make_resolver({
+            "internal.example": ["93.184.216.34", "10.0.0.5"],
+            "loop.example": ["127.0.0.1"],
+            "metadata.example": ["169.254.169.254"],
+            "v6.example": ["fd00::1"],
+        })
+
+        with pytest.raises(ValueError, match="プライベートIPアドレス"):
+            await resolver.check_host("internal.example")
+        with pytest.raises(ValueError, match="ループバックアドレス"):
+            await resolver.check_host("loop.example")
+        with pytest.raises(ValueError, match="リンクローカルアドレス"):
+            await resolver.check_host("metadata.example")
+        with pytest.raises(ValueError, match="プライベートIPアドレス"):
+            await resolver.check_host("v6.example")
+        with pytest.raises(ValueError, match="localhost"):
+            await resolver.check_host("localhost")
+        # 拒否した結果もキャッシュする
+        with pytest.raises(ValueError):
+            await resolver.check_host("internal.example")
+        assert fake.calls.count("internal.example") == 1
+
+    @pytest.mark.asyncio
+    async def test_dns_failure_passes_validation_and_is_not_cached(self) -> None:
+        """DNS解決の失敗は検証を通し、キャッシュしない."""
+        resolver, fake = _make_resolver({})
+
+        await resolver.check_host("unknown.example")
+        await resolver.check_host("unknown.example")
+
+        assert fake.calls == ["unknown.example", "unknown.example"]
+
+    @pytest.mark.asyncio
+    async def test_connection_is_pinned_to_validated_addresses(self) -> None:
+        """検証後にDNSの応答が変わっても、接続には検証済みのアドレスを返す."""
+        resolver, fake = _make_resolver({"example.com": ["93.184.216.34"]})
+        await resolver.check_host("example.com")
+
+        # DNSリバインディング: 検証後にプライベートアドレスを返すようになる
+        fake.addresses["example.com"] = ["10.0.0.5"]
+        results = await resolver.resolve("example.com", 80, socket.AF_UNSPEC)
+
+        assert [r["host"] for r in results] == ["93.184.216.34"]
+
+    @pytest.mark.asyncio
+    async def test_resolve_for_private_host_raises_os_error(self) -> None:
+        """コネクターからの解決でプライベートアドレスの場合は接続エラー（OSError）にする."""
+        resolver, _ = _make_resolver({"internal.example": ["192.168.1.10"]})
+
+        with pytest.raises(OSError, match="プライベートIPアドレス"):
+            await resolver.resolve("internal.example", 80)
+
+    @pytest.mark.asyncio
+    async def test_resolve_filters_by_family(self) -> None:
+        """要求されたアドレスファミリーの結果のみ返す."""
+        resolver, _ = _make_resolver({"example.com": ["93.184.216.34", "2606:2800:220:1::1"]})
+
+        v4 = await resolver.resolve("example.com", 443, socket.AF_INET)
+        both = await resolver.resolve("example.com", 443, socket.AF_UNSPEC)
+
+        assert [r["host"] for r in v4] == ["93.184.216.34"]
+        assert len(both) == 2
+
+
+class TestWebCrawlerWithResolver:
+    """WebCrawler がリゾルバーでURLを検証するテスト."""
+
+    @pytest.mark.asyncio
+    async def test_link_validation_resolves_host_once(self) -> None:
+        """リンク集ページの全リンクの検証で、ホスト名の問い合わせは1回になる."""
+        resolver, fake = _make_resolver({"example.com": ["93.184.216.34"]})
+        crawler = WebCrawler(resolver=resolver)
+        html = "".join(f'<a href="/page{i}">p{i}</a>' for i in range(20))
+
+        with patch.object(crawler, "_decode_response", return_value=html), patch(
+            "src.services.web_crawler.aiohttp.ClientSession"
+        ) as session_cls, patch(
+            "src.services.web_crawler.socket.getaddrinfo"
+        ) as getaddrinfo:
+            session = session_cls.return_value.__aenter__.return_value
+            session.get = MagicMock()
+            session.get.return_value.__aenter__.return_value.status = 200
+            urls = await crawler.crawl_index_page("https://example.com/index")
+
+        assert len(urls) == 20
+        assert fake.calls == ["example.com"]
+        getaddrinfo.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_private_host_is_not_fetched(self) -> None:
+        """プライベートアドレスに解決されるURLは取得しない."""
+        resolver, _ = _make_resolver({"internal.example": ["10.1.2.3"]})
+        crawler = WebCrawler(resolver=resolver)
+
+        page = await crawler.crawl_page("http://internal.example/secret")
+
+        assert page is None
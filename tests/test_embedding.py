@@ -5,14 +5,23 @@
 
 from __future__ import annotations
 
-from unittest.mock import AsyncMock, MagicMock
+import asyncio
+import sqlite3
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from src.config.settings import Settings
 from src.embedding.base import EmbeddingProvider
-from src.embedding.factory import get_embedding_provider
+from src.embedding.cached_embedding import CachedEmbedding
+from src.embedding.factory import (
+    embedding_model_id,
+    get_embedding_provider,
+    get_embedding_provider_by_id,
+)
 from src.embedding.lmstudio_embedding import LMStudioEmbedding
+from src.embedding.micro_batching import MicroBatchingEmbedding
 from src.embedding.openai_embedding import OpenAIEmbedding
 
 
@@ -151,6 +160,24 @@ def test_ac4_factory_uses_settings_model_online(
     assert provider._model == "text-embedding-3-large"
 
 
+def test_factory_round_trips_embedding_model_id(monkeypatch: pytest.MonkeyPatch) -> None:
+    """モデルの識別子から同じモデルのプロバイダーを作り直せること."""
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    settings = Settings(_env_file=None)  # type: ignore[call-arg]
+
+    model_id = embedding_model_id(settings, "online")
+    provider = get_embedding_provider_by_id(settings, model_id)
+
+    assert model_id == f"online:{settings.embedding_model_online}"
+    assert isinstance(provider, OpenAIEmbedding)
+    assert provider._model == settings.embedding_model_online
+    local = get_embedding_provider_by_id(settings, "local:old-model")
+    assert isinstance(local, LMStudioEmbedding)
+    assert local._model == "old-model"
+    with pytest.raises(ValueError, match="Invalid"):
+        get_embedding_provider_by_id(settings, "old-model")
+
+
 def test_ac4_embedding_settings_defaults(monkeypatch: pytest.MonkeyPatch) -> None:
     """AC4: Embedding関連設定のデフォルト値が正しいこと."""
     monkeypatch.delenv("EMBEDDING_PROVIDER", raising=False)
@@ -188,3 +215,184 @@ def test_lmstudio_embedding_custom_params() -> None:
     )
     assert provider._client.base_url.host == "192.168.1.100"
     assert provider._model == "custom-embed"
+
+
+def _mock_backend() -> MagicMock:
+    """テキスト長からベクトルを作るモックプロバイダー."""
+    backend = MagicMock(spec=EmbeddingProvider)
+    backend.embed = AsyncMock(
+        side_effect=lambda texts: [[float(len(text)), 0.5, -1.25] for text in texts]
+    )
+    return backend
+
+
+@pytest.mark.asyncio
+async def test_cached_embedding_sends_only_misses(tmp_path: Path) -> None:
+    """キャッシュ済みのテキストはプロバイダーに送らず、順序どおりに結合して返す."""
+    backend = _mock_backend()
+    provider = CachedEmbedding(backend, model="local:nomic", path=tmp_path / "cache.db")
+
+    first = await provider.embed(["a", "bb"])
+    second = await provider.embed(["ccc", "a", "ccc", "bb"])
+
+    assert first == [[1.0, 0.5, -1.25], [2.0, 0.5, -1.25]]
+    assert second == [[3.0, 0.5, -1.25], first[0], [3.0, 0.5, -1.25], first[1]]
+    # 2回目はキャッシュミスの1件（重複は1回）のみ送られる
+    assert backend.embed.await_args_list[1].args == (["ccc"],)
+    assert provider.get_stats() == {"hits": 3, "misses": 3, "entries": 3}
+    provider.close()
+
+
+@pytest.mark.asyncio
+async def test_cached_embedding_persists_across_instances(tmp_path: Path) -> None:
+    """再起動後もディスク上のキャッシュから返し、モデルが異なれば別のキーになる."""
+    path = tmp_path / "cache.db"
+    provider = CachedEmbedding(_mock_backend(), model="local:nomic", path=path)
+    expected = await provider.embed(["りゅうおう"])
+    provider.close()
+
+    backend = _mock_backend()
+    reopened = CachedEmbedding(backend, model="local:nomic", path=path)
+    assert await reopened.embed(["りゅうおう"]) == expected
+    backend.embed.assert_not_awaited()
+    reopened.close()
+
+    other_model = CachedEmbedding(backend, model="online:text-embedding-3-small", path=path)
+    await other_model.embed(["りゅうおう"])
+    backend.embed.assert_awaited_once()
+    other_model.close()
+
+
+@pytest.mark.asyncio
+async def test_cached_embedding_rejects_mismatched_backend_result(tmp_path: Path) -> None:
+    """プロバイダーの返却件数が一致しない場合は保存せずにエラーにする."""
+    backend = MagicMock(spec=EmbeddingProvider)
+    backend.embed = AsyncMock(return_value=[[0.1, 0.2]])
+    provider = CachedEmbedding(backend, model="local:nomic", path=tmp_path / "cache.db")
+
+    with pytest.raises(ValueError, match="1 vectors for 2 texts"):
+        await provider.embed(["a", "b"])
+
+    assert provider.get_stats()["entries"] == 0
+    provider.close()
+
+
+@pytest.mark.asyncio
+async def test_cached_embedding_evicts_least_recently_used(tmp_path: Path) -> None:
+    """上限を超えると最も長く使われていないベクトルから削除される."""
+    backend = _mock_backend()
+    provider = CachedEmbedding(
+        backend, model="local:nomic", path=tmp_path / "cache.db", max_entries=2
+    )
+    with patch(
+        "src.embedding.cached_embedding.time.time",
+        side_effect=[1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0],
+    ):
+        await provider.embed(["a"])
+        await provider.embed(["bb"])
+        await provider.embed(["a"])
+        await provider.embed(["ccc"])
+
+    assert provider.get_stats()["entries"] == 2
+    backend.embed.reset_mock()
+    await provider.embed(["a", "ccc"])
+    backend.embed.assert_not_awaited()
+    await provider.embed(["bb"])
+    backend.embed.assert_awaited_once_with(["bb"])
+    provider.close()
+
+
+@pytest.mark.asyncio
+async def test_cached_embedding_does_not_store_queries(tmp_path: Path) -> None:
+    """検索クエリはキャッシュを参照・保存せず、内側のプロバイダーで生成する."""
+    backend = _mock_backend()
+    backend.embed_query = AsyncMock(return_value=[0.1, 0.2])
+    provider = CachedEmbedding(backend, model="local:nomic", path=tmp_path / "cache.db")
+
+    vector = await provider.embed_query("ユーザーの質問")
+
+    assert vector == [pytest.approx(0.1), pytest.approx(0.2)]
+    backend.embed_query.assert_awaited_once_with("ユーザーの質問")
+    assert provider.get_stats() == {"hits": 0, "misses": 0, "entries": 0}
+    provider.close()
+
+
+@pytest.mark.asyncio
+async def test_cached_embedding_migrates_cache_without_last_used(tmp_path: Path) -> None:
+    """最終利用日時の列が無い旧形式のキャッシュも開いて使い続けられる."""
+    path = tmp_path / "cache.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE embeddings (model TEXT NOT NULL, text_hash BLOB NOT NULL,"
+        " vector BLOB NOT NULL, PRIMARY KEY (model, text_hash)) WITHOUT ROWID"
+    )
+    conn.commit()
+    conn.close()
+
+    provider = CachedEmbedding(_mock_backend(), model="local:nomic", path=path)
+    first = await provider.embed(["a"])
+    assert await provider.embed(["a"]) == first
+    assert provider.get_stats() == {"hits": 1, "misses": 1, "entries": 1}
+    provider.close()
+
+
+@pytest.mark.asyncio
+async def test_embed_query_defaults_to_embed() -> None:
+    """embed_query は既定で embed() に1件のリストを渡す."""
+    backend = _mock_backend()
+    assert await EmbeddingProvider.embed_query(backend, "ab") == [2.0, 0.5, -1.25]
+    backend.embed.assert_awaited_once_with(["ab"])
+
+
+@pytest.mark.asyncio
+async def test_micro_batching_merges_concurrent_calls() -> None:
+    """並行する呼び出しは1回のリクエストにまとめられ、呼び出し元ごとに結果が返る."""
+    backend = _mock_backend()
+    provider = MicroBatchingEmbedding(backend, max_wait_sec=0.01, max_batch_size=32)
+
+    results = await asyncio.gather(
+        provider.embed(["a"]), provider.embed(["bb", "ccc"]), provider.embed(["dddd"])
+    )
+
+    assert results == [
+        [[1.0, 0.5, -1.25]],
+        [[2.0, 0.5, -1.25], [3.0, 0.5, -1.25]],
+        [[4.0, 0.5, -1.25]],
+    ]
+    backend.embed.assert_awaited_once_with(["a", "bb", "ccc", "dddd"])
+    assert (provider.calls, provider.requests) == (3, 1)
+
+
+@pytest.mark.asyncio
+async def test_micro_batching_flushes_at_max_batch_size() -> None:
+    """最大件数に達したら待ち時間を待たずに送信し、大きな呼び出しはそのまま送る."""
+    backend = _mock_backend()
+    # 待ち時間が経過するとテストがタイムアウトするほど長くする
+    provider = MicroBatchingEmbedding(backend, max_wait_sec=60.0, max_batch_size=2)
+
+    first, second = await asyncio.wait_for(
+        asyncio.gather(provider.embed(["a"]), provider.embed(["bb"])), timeout=5
+    )
+    large = await asyncio.wait_for(provider.embed(["x", "yy", "zzz"]), timeout=5)
+
+    assert (first, second) == ([[1.0, 0.5, -1.25]], [[2.0, 0.5, -1.25]])
+    assert len(large) == 3
+    assert [call.args for call in backend.embed.await_args_list] == [
+        (["a", "bb"],),
+        (["x", "yy", "zzz"],),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_micro_batching_propagates_errors_to_all_callers() -> None:
+    """まとめたリクエストが失敗した場合、すべての呼び出し元に同じエラーを返す."""
+    backend = MagicMock(spec=EmbeddingProvider)
+    backend.embed = AsyncMock(side_effect=ConnectionError("unavailable"))
+    provider = MicroBatchingEmbedding(backend, max_wait_sec=0.01)
+
+    results = await asyncio.gather(
+        provider.embed(["a"]), provider.embed(["b"]), return_exceptions=True
+    )
+
+    assert all(isinstance(result, ConnectionError) for result in results)
+    backend.embed.assert_awaited_once()
@@ -0,0 +1,166 @@
+"""Embeddingバッチ分割・パイプライン実行のテスト
+
+仕様: docs/specs/f9-rag.md
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from src.embedding.base import EmbeddingProvider
+from src.rag.embedding_batcher import EmbeddingBatcher, estimate_tokens, is_input_limit_error
+from src.rag.vector_store import DocumentChunk, VectorStore
+
+
+class _PayloadTooLarge(Exception):
+    """413を返すプロバイダーのエラー."""
+
+    status_code = 413
+
+
+class RecordingEmbedding(EmbeddingProvider):
+    """呼び出しを記録し、max_items を超えるバッチを413で拒否するプロバイダー."""
+
+    def __init__(self, max_items: int | None = None, delay: float = 0.0) -> None:
+        self.calls: list[list[str]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._max_items = max_items
+        self._delay = delay
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(texts)
+        if self._max_items is not None and len(texts) > self._max_items:
+            raise _PayloadTooLarge("Request entity too large")
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self._delay)
+        finally:
+            self.in_flight -= 1
+        return [[float(len(text)), 1.0, 0.0] for text in texts]
+
+    async def is_available(self) -> bool:
+        return True
+
+
+async def _collect(batcher: EmbeddingBatcher, texts: list[str]) -> list[tuple[int, int]]:
+    return [(start, len(vectors)) async for start, vectors in batcher.iter_embeddings(texts)]
+
+
+class TestEmbeddingBatcher:
+    """EmbeddingBatcher のテスト."""
+
+    def test_estimate_tokens(self) -> None:
+        """UTF-8バイト数 / 3（切り上げ）で見積もる."""
+        assert estimate_tokens("") == 1
+        assert estimate_tokens("abcd") == 2
+        assert estimate_tokens("日本語") == 3
+
+    def test_is_input_limit_error(self) -> None:
+        """413とトークン数超過のメッセージを入力上限超過として判定する."""
+        assert is_input_limit_error(_PayloadTooLarge("x"))
+        assert is_input_limit_error(ValueError("This model's maximum context length is 8192"))
+        assert not is_input_limit_error(ConnectionError("connection reset"))
+
+    @pytest.mark.asyncio
+    async def test_splits_by_item_count_and_token_budget(self) -> None:
+        """件数上限・トークン上限で分割し、入力順に開始位置を返す."""
+        provider = RecordingEmbedding()
+        batcher = EmbeddingBatcher(provider, max_items=3, max_tokens=10)
+        # 6文字=2トークン、30文字=10トークン、60文字=20トークン（単独で上限超過）
+        texts = ["a" * 6] * 4 + ["b" * 30] + ["c" * 60] + ["d" * 6]
+
+        batches = await _collect(batcher, texts)
+
+        assert batches == [(0, 3), (3, 1), (4, 1), (5, 1), (6, 1)]
+        assert [len(call) for call in provider.calls] == [3, 1, 1, 1, 1]
+
+    @pytest.mark.asyncio
+    async def test_halves_batch_on_limit_error(self) -> None:
+        """413を受けたバッチは半分に分割して再試行し、以降のバッチも縮める."""
+        provider = RecordingEmbedding(max_items=2)
+        batcher = EmbeddingBatcher(provider, max_items=8, concurrency=1)
+
+        batches = await _collect(batcher, [f"text{i}" for i in range(10)])
+
+        assert sum(size for _, size in batches) == 10
+        assert batcher.max_items == 2
+        # 8件（失敗）→ 4件（失敗）×2 → 2件×4、以降の2件は縮めた上限で1回
+        assert [len(call) for call in provider.calls] == [8, 4, 2, 2, 4, 2, 2, 2]
+
+    @pytest.mark.asyncio
+    async def test_limits_grow_back_after_successes(self) -> None:
+        """一時的な413で縮めた上限は、成功が続くと設定値まで戻る."""
+
+        class TransientLimitEmbedding(RecordingEmbedding):
+            async def embed(self, texts: list[str]) -> list[list[float]]:
+                if not self.calls:
+                    self.calls.append(texts)
+                    raise _PayloadTooLarge("Request entity too large")
+                return await super().embed(texts)
+
+        provider = TransientLimitEmbedding()
+        batcher = EmbeddingBatcher(provider, max_items=8, max_tokens=8000, concurrency=1)
+
+        batches = await _collect(batcher, [f"text{i}" for i in range(40)])
+
+        assert sum(size for _, size in batches) == 40
+        # 8件（失敗）→ 4件×2、さらに4件×2の成功で上限が8件に戻る
+        assert [len(call) for call in provider.calls] == [8, 4, 4, 4, 4, 8, 8, 8]
+        assert batcher.max_items == 8
+        # トークン上限も失敗したバッチの半分（8トークン）から倍に戻る
+        assert batcher.max_tokens == 16
+
+    @pytest.mark.asyncio
+    async def test_other_errors_are_not_retried(self) -> None:
+        """入力上限超過以外のエラーはそのまま送出する."""
+
+        class FailingEmbedding(RecordingEmbedding):
+            async def embed(self, texts: list[str]) -> list[list[float]]:
+                self.calls.append(texts)
+                raise ConnectionError("connection reset")
+
+        provider = FailingEmbedding()
+        batcher = EmbeddingBatcher(provider, max_items=4)
+
+        with pytest.raises(ConnectionError):
+            await _collect(batcher, ["a", "b", "c"])
+        assert len(provider.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_next_batches_run_while_caller_stores(self) -> None:
+        """呼び出し側の保存中も、最大 concurrency 件のEmbeddingを先行して実行する."""
+        provider = RecordingEmbedding(delay=0.01)
+        batcher = EmbeddingBatcher(provider, max_items=1, concurrency=3)
+        started_before_store: list[int] = []
+
+        async for _, _ in batcher.iter_embeddings([f"t{i}" for i in range(6)]):
+            await asyncio.sleep(0.02)  # 保存処理の代わり
+            started_before_store.append(len(provider.calls))
+
+        assert provider.max_in_flight == 3
+        # 1バッチ目の保存中に後続のバッチのEmbeddingが開始されている
+        assert started_before_store[0] == 4
+
+
+class TestVectorStoreBatching:
+    """VectorStore.add_documents のバッチ処理のテスト."""
+
+    @pytest.mark.asyncio
+    async def test_add_documents_upserts_all_batches(self) -> None:
+        """複数のバッチに分割しても全チャンクが保存される."""
+        provider = RecordingEmbedding(max_items=3)
+        store = VectorStore.create_ephemeral(provider, collection_name="batching")
+        store._batcher = EmbeddingBatcher(provider, max_items=4, concurrency=2)
+        chunks = [
+            DocumentChunk(id=f"doc_{i}", text=f"テキスト{i}", metadata={"source_url": "s"})
+            for i in range(10)
+        ]
+
+        assert await store.add_documents(chunks) == 10
+
+        assert store.get_stats()["total_chunks"] == 10
+        assert store.get_texts(["doc_0", "doc_9"]) == {"doc_0": "テキスト0", "doc_9": "テキスト9"}
@@ -0,0 +1,261 @@
+"""NumPyフラットベクトルストアのテスト
+
+仕様: docs/specs/f9-rag.md
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, cast
+
+import numpy as np
+import pytest
+from chromadb.api.types import Embeddings, IncludeEnum
+
+from src.embedding.base import EmbeddingProvider
+from src.rag.flat_vector_store import FlatVectorCollection, Quantization, bytes_per_vector
+from src.rag.vector_store import DocumentChunk, VectorStore
+
+_INCLUDE = [IncludeEnum.documents, IncludeEnum.metadatas, IncludeEnum.distances]
+
+
+def _vectors(rows: list[list[float]]) -> Embeddings:
+    return cast(Embeddings, rows)
+
+
+def _upsert(collection: FlatVectorCollection, vectors: dict[str, list[float]]) -> None:
+    ids = list(vectors)
+    collection.upsert(
+        ids=ids,
+        embeddings=_vectors(list(vectors.values())),
+        documents=[f"本文 {id_}" for id_ in ids],
+        metadatas=[
+            {"source_url": f"https://example.com/{id_[0]}", "n": i} for i, id_ in enumerate(ids)
+        ],
+    )
+
+
+class TestFlatVectorCollection:
+    """FlatVectorCollection のテスト."""
+
+    def test_query_matches_exact_cosine_distance(self, tmp_path: Path) -> None:
+        """総当たりのcosine距離の近い順に、ChromaDBと同じ形式で返す."""
+        rng = np.random.default_rng(0)
+        matrix = rng.normal(size=(50, 8))
+        collection = FlatVectorCollection(tmp_path)
+        _upsert(collection, {f"d{i}": row.tolist() for i, row in enumerate(matrix)})
+        query = rng.normal(size=8)
+
+        result = collection.query(_vectors([query.tolist()]), n_results=5, include=_INCLUDE)
+
+        cosine = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query))
+        expected = np.argsort(-cosine)[:5]
+        assert result["ids"] == [[f"d{i}" for i in expected]]
+        assert result["distances"] is not None
+        assert result["distances"][0] == pytest.approx(1.0 - cosine[expected], abs=1e-5)
+        assert result["documents"] == [[f"本文 d{i}" for i in expected]]
+        assert result["metadatas"] is not None
+        assert result["metadatas"][0][0]["source_url"] == "https://example.com/d"
+
+    def test_upsert_overwrites_and_tombstones_old_row(self, tmp_path: Path) -> None:
+        """同じIDのupsertは新しい行に追記し、古い行は検索対象から外れる."""
+        collection = FlatVectorCollection(tmp_path)
+        _upsert(collection, {"a1": [1.0, 0.0], "b1": [0.0, 1.0]})
+        _upsert(collection, {"a1": [0.6, 0.8]})
+
+        result = collection.query(_vectors([[1.0, 0.0]]), n_results=5, include=_INCLUDE)
+
+        assert collection.count() == 2
+        assert collection.dead_rows == 1
+        assert result["ids"] == [["a1", "b1"]]
+        assert result["distances"] is not None
+        assert result["distances"][0] == pytest.approx([0.4, 1.0])
+
+    def test_delete_and_get(self, tmp_path: Path) -> None:
+        """削除したIDは取得・検索の対象外になり、ソースURL・ページングで取得できる."""
+        collection = FlatVectorCollection(tmp_path)
+        _upsert(collection, {"a1": [1.0, 0.0], "a2": [1.0, 1.0], "b1": [0.0, 1.0]})
+        collection.delete(["a1", "missing"])
+
+        assert collection.count() == 2
+        assert collection.get(ids=["a1", "a2"], include=[])["ids"] == ["a2"]
+        by_source = collection.get(where={"source_url": "https://example.com/a"})
+        assert by_source["ids"] == ["a2"]
+        assert by_source["documents"] == ["本文 a2"]
+        assert collection.get(limit=1, offset=1)["ids"] == ["b1"]
+        result = collection.query(_vectors([[1.0, 0.0]]), n_results=5, include=_INCLUDE)
+        assert result["ids"] == [["a2", "b1"]]
+
+    def test_update_replaces_metadata_only(self, tmp_path: Path) -> None:
+        """update はベクトル・本文を変えずにメタデータを置き換え、存在しないIDは無視する."""
+        collection = FlatVectorCollection(tmp_path)
+        _upsert(collection, {"a0": [1.0, 0.0]})
+
+        collection.update(
+            ids=["a0", "z0"],
+            metadatas=[
+                {"source_url": "https://example.com/a", "title": "新タイトル"},
+                {"source_url": "https://example.com/z"},
+            ],
+        )
+
+        got = collection.get(include=[*_INCLUDE[:2], IncludeEnum.embeddings])
+        assert got["ids"] == ["a0"]
+        assert got["documents"] == ["本文 a0"]
+        assert got["metadatas"] == [{"source_url": "https://example.com/a", "title": "新タイトル"}]
+        assert got["embeddings"] is not None
+        np.testing.assert_allclose(got["embeddings"][0], [1.0, 0.0])
+        assert collection.count() == 1
+
+    def test_compaction_keeps_live_rows(self, tmp_path: Path) -> None:
+        """削除済みの行が閾値を超えると詰め直し、検索結果は変わらない."""
+        collection = FlatVectorCollection(tmp_path, compact_min_rows=2, initial_capacity=4)
+        _upsert(collection, {f"d{i}": [float(i), 1.0] for i in range(10)})
+        before = collection.query(_vectors([[1.0, 0.5]]), n_results=3, include=_INCLUDE)
+
+        assert before["ids"] == [["d2", "d3", "d4"]]
+
+        collection.delete(["d0", "d1", "d5", "d6", "d7", "d8"])
+
+        assert collection.dead_rows == 0
+        assert collection.count() == 4
+        # 拡張（4行 → 16行）で1世代、詰め直しで1世代進み、古いファイルは削除される
+        assert list(tmp_path.glob("vectors-*.npy")) == [tmp_path / "vectors-2.npy"]
+        after = collection.query(_vectors([[1.0, 0.5]]), n_results=3, include=_INCLUDE)
+        assert after["ids"] == before["ids"]
+
+    def test_reopen_restores_vectors_and_metadata(self, tmp_path: Path) -> None:
+        """再度開いても保存済みのチャンクを検索でき、コミットされていないファイルは削除する."""
+        collection = FlatVectorCollection(tmp_path)
+        _upsert(collection, {"a1": [1.0, 0.0], "b1": [0.0, 1.0]})
+        collection.delete(["b1"])
+        collection.close()
+        (tmp_path / "vectors-99.npy").write_bytes(b"")
+
+        reopened = FlatVectorCollection(tmp_path)
+
+        assert reopened.count() == 1
+        assert reopened.dead_rows == 1
+        assert reopened.dimension == 2
+        assert not (tmp_path / "vectors-99.npy").exists()
+        result = reopened.query(_vectors([[0.0, 1.0]]), n_results=5, include=_INCLUDE)
+        assert result["ids"] == [["a1"]]
+
+    def test_dimension_mismatch_raises(self, tmp_path: Path) -> None:
+        """次元数の異なるベクトルは保存しない."""
+        collection = FlatVectorCollection(tmp_path)
+        _upsert(collection, {"a1": [1.0, 0.0]})
+
+        with pytest.raises(ValueError, match="dimension"):
+            _upsert(collection, {"b1": [1.0, 0.0, 0.0]})
+        assert collection.count() == 1
+
+
+class TestQuantization:
+    """量子化した候補選択 + 正確な再スコアリングのテスト."""
+
+    def test_bytes_per_vector(self) -> None:
+        """int8は約1/4、binaryは1/32のデータ量になる."""
+        assert bytes_per_vector(384, "none") == 1536
+        assert bytes_per_vector(384, "int8") == 388
+        assert bytes_per_vector(384, "binary") == 48
+
+    @pytest.mark.parametrize(
+        ("quantization", "rerank_factor", "min_recall"),
+        [("int8", 4, 1.0), ("binary", 20, 0.8)],
+    )
+    def test_reranked_results_are_exact(
+        self, tmp_path: Path, quantization: Quantization, rerank_factor: int, min_recall: float
+    ) -> None:
+        """候補を正確に再スコアリングし、量子化なしの結果をほぼ再現する."""
+        rng = np.random.default_rng(1)
+        # クラスタ構造を持つデータ（実際のEmbeddingに近い分布）
+        centers = rng.normal(size=(20, 256))
+        matrix = centers[rng.integers(0, 20, size=2000)] + rng.normal(scale=0.3, size=(2000, 256))
+        vectors = {f"d{i}": row.tolist() for i, row in enumerate(matrix)}
+        exact = FlatVectorCollection(tmp_path / "exact")
+        quantized = FlatVectorCollection(
+            tmp_path / "quantized", quantization=quantization, rerank_factor=rerank_factor
+        )
+        _upsert(exact, vectors)
+        _upsert(quantized, vectors)
+        queries = _vectors((centers[:10] + rng.normal(scale=0.3, size=(10, 256))).tolist())
+
+        expected = exact.query(queries, n_results=5, include=_INCLUDE)
+        result = quantized.query(queries, n_results=5, include=_INCLUDE)
+
+        hits = sum(
+            len(set(ids) & set(expected_ids))
+            for ids, expected_ids in zip(result["ids"], expected["ids"])
+        )
+        assert hits / 50 >= min_recall
+        # 返す距離は量子化コードではなく float32 のベクトルから計算した値
+        assert result["distances"] is not None
+        query_matrix = np.asarray(queries)
+        for query, ids, distances in zip(query_matrix, result["ids"], result["distances"]):
+            rows = matrix[[int(id_[1:]) for id_ in ids]]
+            cosine = rows @ query / (np.linalg.norm(rows, axis=1) * np.linalg.norm(query))
+            assert distances == pytest.approx((1.0 - cosine).tolist(), abs=1e-5)
+
+    def test_codes_follow_upsert_compaction_and_reopen(self, tmp_path: Path) -> None:
+        """上書き・詰め直し・再オープン後も量子化コードが行と対応している."""
+        collection = FlatVectorCollection(
+            tmp_path, quantization="int8", compact_min_rows=2, initial_capacity=2
+        )
+        _upsert(collection, {f"d{i}": [float(i), 1.0, -1.0] for i in range(6)})
+        _upsert(collection, {"d5": [-1.0, 0.0, 0.0]})
+        collection.delete(["d0", "d1", "d2"])
+        assert collection.dead_rows == 0
+
+        query = _vectors([[-1.0, 0.1, 0.0]])
+        before = collection.query(query, n_results=1, include=_INCLUDE)
+        collection.close()
+        reopened = FlatVectorCollection(tmp_path, quantization="int8")
+
+        assert before["ids"] == [["d5"]]
+        assert reopened.query(query, n_results=1, include=_INCLUDE)["ids"] == [["d5"]]
+
+    def test_unsupported_quantization_raises(self, tmp_path: Path) -> None:
+        """未対応の量子化方式は指定できない."""
+        with pytest.raises(ValueError, match="quantization"):
+            FlatVectorCollection(tmp_path, quantization="pq")  # type: ignore[arg-type]
+
+
+class KeywordEmbedding(EmbeddingProvider):
+    """キーワードの出現で決まるベクトルを返すプロバイダー."""
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        return [
+            [float("Python" in text), float("Rust" in text), 0.1]
+            for text in texts
+        ]
+
+    async def is_available(self) -> bool:
+        return True
+
+
+class TestVectorStoreFlatBackend:
+    """flat_dir を指定した VectorStore のテスト."""
+
+    @pytest.mark.asyncio
+    async def test_vector_store_operations(self, tmp_path: Path) -> None:
+        """追加・検索・削除・統計がChromaDBバックエンドと同じように動作する."""
+        store = VectorStore(KeywordEmbedding(), flat_dir=tmp_path)
+        metadata: dict[str, Any] = {"source_url": "https://example.com/py"}
+        await store.add_documents([
+            DocumentChunk(id="py0", text="Python入門", metadata=metadata),
+            DocumentChunk(id="py1", text="Pythonの型ヒント", metadata=metadata),
+            DocumentChunk(
+                id="rs0", text="Rust入門", metadata={"source_url": "https://example.com/rs"}
+            ),
+        ])
+
+        results = await store.search("Pythonについて", n_results=2)
+
+        assert [r.text for r in results] == ["Python入門", "Pythonの型ヒント"]
+        assert results[0].metadata["source_url"] == "https://example.com/py"
+        assert (tmp_path / "knowledge" / "meta.db").exists()
+        assert await store.get_content_hashes("https://example.com/py") == {"py0": "", "py1": ""}
+        assert await store.delete_by_source("https://example.com/py") == 2
+        assert store.get_stats() == {"total_chunks": 1, "source_count": 1}
+        assert store.get_texts(["rs0", "py0"]) == {"rs0": "Rust入門"}
@@ -0,0 +1,123 @@
+"""共有HTTPクライアントのテスト
+
+仕様: docs/specs/f9-rag.md
+"""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from unittest.mock import MagicMock
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from src.services.http_client import HttpClient, client_session
+from src.services.ogp_extractor import OgpExtractor
+from src.services.web_crawler import WebCrawler
+
+_PAGE = """<html><head><title>ページ</title>
+<meta property="og:image" content="https://example.com/image.png"></head>
+<body><article><p>本文です。</p></article></body></html>"""
+
+
+@pytest.fixture
+async def server() -> AsyncIterator[tuple[str, set[int]]]:
+    """HTMLを返すローカルHTTPサーバー（受け付けた接続のクライアント側ポートを記録する）."""
+    client_ports: set[int] = set()
+
+    async def handle(request: web.Request) -> web.Response:
+        peer = request.transport.get_extra_info("peername") if request.transport else None
+        if peer is not None:
+            client_ports.add(peer[1])
+        return web.Response(text=_PAGE, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/{name}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        yield f"http://127.0.0.1:{port}", client_ports
+    finally:
+        await runner.cleanup()
+
+
+class TestHttpClient:
+    """HttpClient のテスト."""
+
+    @pytest.mark.asyncio
+    async def test_connections_are_reused(self, server: tuple[str, set[int]]) -> None:
+        """同じホストへの連続したリクエストはkeep-aliveで1つの接続を再利用する."""
+        base_url, client_ports = server
+        http_client = HttpClient(limit_per_host=2)
+        timeout = aiohttp.ClientTimeout(total=5)
+
+        try:
+            for i in range(5):
+                async with (
+                    client_session(http_client, timeout) as session,
+                    session.get(f"{base_url}/page{i}") as resp,
+                ):
+                    assert resp.status == 200
+                    await resp.read()
+            session = http_client.session
+        finally:
+            await http_client.close()
+
+        assert len(client_ports) == 1
+        assert session.closed
+
+    @pytest.mark.asyncio
+    async def test_without_shared_client_each_call_uses_own_session(
+        self, server: tuple[str, set[int]]
+    ) -> None:
+        """共有クライアントが無い場合は呼び出しごとにセッションを作成して閉じる."""
+        base_url, client_ports = server
+        timeout = aiohttp.ClientTimeout(total=5)
+        sessions = []
+
+        for i in range(2):
+            async with client_session(None, timeout) as session:
+                sessions.append(session)
+                async with session.get(f"{base_url}/page{i}") as resp:
+                    await resp.read()
+
+        assert len(client_ports) == 2
+        assert all(session.closed for session in sessions)
+
+    @pytest.mark.asyncio
+    async def test_session_is_recreated_after_close(self) -> None:
+        """閉じた後に使うと新しいセッションを作成する."""
+        http_client = HttpClient()
+        first = http_client.session
+        await http_client.close()
+
+        second = http_client.session
+        await http_client.close()
+
+        assert first is not second
+        assert first.closed and second.closed
+
+    @pytest.mark.asyncio
+    async def test_services_share_the_session(self, server: tuple[str, set[int]]) -> None:
+        """クローラーとOGP画像取得が1つのコネクションプールを共有する."""
+        base_url, client_ports = server
+        http_client = HttpClient()
+        crawler = WebCrawler(http_client=http_client)
+        # ローカルサーバーへのアクセスのためSSRF対策の検証を省略する
+        crawler._validate_hostname_not_private = MagicMock()  # type: ignore[method-assign]
+        extractor = OgpExtractor(http_client=http_client)
+
+        try:
+            page = await crawler.crawl_page(f"{base_url}/article")
+            image_url = await extractor.extract_image_url(f"{base_url}/article")
+        finally:
+            await http_client.close()
+
+        assert page is not None
+        assert page.title == "ページ"
+        assert image_url == "https://example.com/image.png"
+        assert len(client_ports) == 1
@@ -3,6 +3,9 @@
 仕様: docs/specs/f9-rag.md
 """
 
+import asyncio
+import logging
+import threading
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
@@ -286,3 +289,195 @@ class TestHybridSearchEngine:
         results = await engine.search("テスト", n_results=3)
 
         assert len(results) == 3
+
+    @pytest.mark.asyncio
+    async def test_bm25_search_runs_off_event_loop(
+        self, engine: HybridSearchEngine, mock_vector_store: MagicMock, mock_bm25_index: MagicMock
+    ) -> None:
+        """BM25検索はイベントループのスレッドをブロックせず、別スレッドで実行される."""
+        loop_thread = threading.current_thread()
+        search_threads: list[threading.Thread] = []
+
+        def search(query: str, n_results: int = 10) -> list[BM25Result]:
+            search_threads.append(threading.current_thread())
+            return []
+
+        mock_vector_store.search.return_value = []
+        mock_bm25_index.search.side_effect = search
+
+        await engine.search("テスト", n_results=3)
+
+        assert search_threads
+        assert search_threads[0] is not loop_thread
+
+    @pytest.mark.asyncio
+    async def test_vector_and_bm25_legs_run_concurrently(
+        self, engine: HybridSearchEngine, mock_vector_store: MagicMock, mock_bm25_index: MagicMock
+    ) -> None:
+        """ベクトル検索の完了を待たずにBM25検索が開始される."""
+        bm25_started = threading.Event()
+
+        async def vector_search(*args: object, **kwargs: object) -> list[RetrievalResult]:
+            # BM25検索が並行して開始されていなければ待ち時間切れになる
+            assert await asyncio.to_thread(bm25_started.wait, 5.0)
+            return []
+
+        def bm25_search(query: str, n_results: int = 10) -> list[BM25Result]:
+            bm25_started.set()
+            return [BM25Result(doc_id="bm25_doc_1", score=1.0, text="BM25")]
+
+        mock_vector_store.search.side_effect = vector_search
+        mock_bm25_index.search.side_effect = bm25_search
+
+        results = await engine.search("テスト", n_results=3)
+
+        assert [r.doc_id for r in results] == ["bm25_doc_1"]
+
+    @pytest.mark.asyncio
+    async def test_slow_vector_leg_is_dropped_after_deadline(
+        self,
+        mock_vector_store: MagicMock,
+        mock_bm25_index: MagicMock,
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        """締め切りを過ぎたベクトル検索は打ち切られ、BM25のみでランキングされる."""
+        cancelled = asyncio.Event()
+
+        async def vector_search(*args: object, **kwargs: object) -> list[RetrievalResult]:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return []
+
+        mock_vector_store.search.side_effect = vector_search
+        mock_bm25_index.search.return_value = [
+            BM25Result(doc_id="bm25_doc_1", score=8.5, text="BM25でのみヒット"),
+        ]
+        engine = HybridSearchEngine(
+            vector_store=mock_vector_store,
+            bm25_index=mock_bm25_index,
+            leg_timeout=0.05,
+        )
+
+        with caplog.at_level(logging.WARNING, logger="src.rag.hybrid_search"):
+            results = await engine.search("キーワードクエリ", n_results=5)
+
+        assert [(r.doc_id, r.vector_distance) for r in results] == [("bm25_doc_1", None)]
+        assert results[0].rrf_score == pytest.approx(0.5 / 61)
+        assert "vector leg exceeded" in caplog.text
+        await asyncio.wait_for(cancelled.wait(), timeout=1.0)
+
+    @pytest.mark.asyncio
+    async def test_slow_bm25_leg_is_dropped_after_deadline(
+        self, mock_vector_store: MagicMock, mock_bm25_index: MagicMock
+    ) -> None:
+        """締め切りを過ぎたBM25検索は打ち切られ、ベクトル検索のみでランキングされる."""
+        release = threading.Event()
+
+        def bm25_search(query: str, n_results: int = 10) -> list[BM25Result]:
+            release.wait(5.0)
+            return [BM25Result(doc_id="bm25_doc_1", score=8.5, text="BM25")]
+
+        mock_vector_store.search.return_value = [
+            RetrievalResult(
+                text="ベクトル検索でヒット",
+                metadata={"source_url": "http://example.com/vec", "chunk_index": 0},
+                distance=0.25,
+            ),
+        ]
+        mock_bm25_index.search.side_effect = bm25_search
+        engine = HybridSearchEngine(
+            vector_store=mock_vector_store,
+            bm25_index=mock_bm25_index,
+            leg_timeout=0.05,
+        )
+
+        try:
+            results = await engine.search("テスト", n_results=5)
+        finally:
+            release.set()
+
+        assert len(results) == 1
+        assert results[0].vector_distance == 0.25
+        assert results[0].bm25_score is None
+
+    @pytest.mark.asyncio
+    async def test_leg_timings_are_logged(
+        self,
+        engine: HybridSearchEngine,
+        mock_vector_store: MagicMock,
+        mock_bm25_index: MagicMock,
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        """各検索の所要時間がデバッグログに出力される."""
+        mock_vector_store.search.return_value = []
+        mock_bm25_index.search.return_value = []
+
+        with caplog.at_level(logging.DEBUG, logger="src.rag.hybrid_search"):
+            await engine.search("テスト", n_results=3)
+
+        assert "Hybrid search legs: vector=" in caplog.text
+        assert "timeout" not in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_failed_leg_falls_back_to_other_leg(
+        self,
+        engine: HybridSearchEngine,
+        mock_vector_store: MagicMock,
+        mock_bm25_index: MagicMock,
+        caplog: pytest.LogCaptureFixture,
+    ) -> None:
+        """一方の検索の例外は締め切り超過と同じく、もう一方の検索のみでランキングする."""
+        mock_vector_store.search.side_effect = RuntimeError("embedding failed")
+        mock_bm25_index.search.return_value = [
+            BM25Result(doc_id="bm25_doc_1", score=8.5, text="BM25でのみヒット"),
+        ]
+
+        with caplog.at_level(logging.WARNING, logger="src.rag.hybrid_search"):
+            results = await engine.search("テスト", n_results=3)
+
+        assert [(r.doc_id, r.vector_distance) for r in results] == [("bm25_doc_1", None)]
+        assert "vector leg failed" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_search_with_status_reports_degraded(
+        self, mock_vector_store: MagicMock, mock_bm25_index: MagicMock
+    ) -> None:
+        """一方の検索を打ち切った場合のみ degraded=True を返す."""
+        release = threading.Event()
+
+        def bm25_search(query: str, n_results: int = 10) -> list[BM25Result]:
+            release.wait(5.0)
+            return []
+
+        mock_vector_store.search.return_value = []
+        mock_bm25_index.search.return_value = []
+        engine = HybridSearchEngine(
+            vector_store=mock_vector_store,
+            bm25_index=mock_bm25_index,
+            leg_timeout=0.05,
+        )
+
+        assert (await engine.search_with_status("テスト")).degraded is False
+
+        mock_bm25_index.search.side_effect = bm25_search
+        try:
+            response = await engine.search_with_status("テスト")
+        finally:
+            release.set()
+
+        assert response.degraded is True
+        assert response.results == []
+
+    @pytest.mark.asyncio
+    async def test_error_is_propagated_when_both_legs_fail(
+        self, engine: HybridSearchEngine, mock_vector_store: MagicMock, mock_bm25_index: MagicMock
+    ) -> None:
+        """両方の検索が失敗した場合は例外を呼び出し元に送出する."""
+        mock_vector_store.search.side_effect = RuntimeError("embedding failed")
+        mock_bm25_index.search.side_effect = RuntimeError("index broken")
+
+        with pytest.raises(RuntimeError, match="embedding failed"):
+            await engine.search("テスト", n_results=3)
@@ -0,0 +1,139 @@
+"""取り込みパイプラインのテスト
+
+仕様: docs/specs/f9-rag.md
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from src.rag.ingest_pipeline import Stage, StageStats, run_pipeline
+
+
+class TestRunPipeline:
+    """run_pipeline() のテスト."""
+
+    @pytest.mark.asyncio
+    async def test_items_flow_through_all_stages(self) -> None:
+        """全項目が各ステージを順に通り、Noneを返した項目は後のステージに渡らない."""
+        stored: list[int] = []
+
+        async def double(item: int) -> int:
+            return item * 2
+
+        async def drop_multiples_of_three(item: int) -> int | None:
+            return None if item % 3 == 0 else item
+
+        async def store(item: int) -> None:
+            stored.append(item)
+
+        stats = await run_pipeline(
+            range(1, 11),
+            [
+                Stage("double", double, concurrency=3),
+                Stage("filter", drop_multiples_of_three, concurrency=2),
+                Stage("store", store),
+            ],
+            queue_size=2,
+        )
+
+        assert sorted(stored) == [2, 4, 8, 10, 14, 16, 20]
+        assert [(stat.name, stat.processed) for stat in stats] == [
+            ("double", 10),
+            ("filter", 10),
+            ("store", 7),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_later_stage_starts_before_first_stage_finishes(self) -> None:
+        """先に終わった項目は、前のステージの残りを待たずに次のステージで処理される."""
+        release = asyncio.Event()
+        stored: list[str] = []
+
+        async def fetch(item: str) -> str:
+            if item == "slow":
+                await release.wait()
+            return item
+
+        async def store(item: str) -> None:
+            stored.append(item)
+            release.set()
+
+        await asyncio.wait_for(
+            run_pipeline(["slow", "fast"], [Stage("fetch", fetch, 2), Stage("store", store)]),
+            timeout=5,
+        )
+
+        assert stored == ["fast", "slow"]
+
+    @pytest.mark.asyncio
+    async def test_backpressure_bounds_items_in_flight(self) -> None:
+        """後のステージが詰まると、前のステージは queue_size を超えて先に進まない."""
+        started = 0
+        release = asyncio.Event()
+
+        async def fetch(item: int) -> int:
+            nonlocal started
+            started += 1
+            return item
+
+        async def store(item: int) -> None:
+            await release.wait()
+
+        task = asyncio.create_task(
+            run_pipeline(
+                range(100),
+                [Stage("fetch", fetch), Stage("store", store)],
+                queue_size=2,
+            )
+        )
+        for _ in range(20):
+            await asyncio.sleep(0)
+
+        # 保存中の1件 + キューの2件 + キューに入れようとして待っている1件
+        assert started == 4
+        release.set()
+        stats = await asyncio.wait_for(task, timeout=5)
+        assert stats[1].processed == 100
+
+    @pytest.mark.asyncio
+    async def test_handler_exception_cancels_pipeline(self) -> None:
+        """ハンドラーの例外で全ステージを中断し、その例外を送出する."""
+
+        async def fetch(item: int) -> int:
+            if item == 3:
+                raise RuntimeError("boom")
+            return item
+
+        async def store(item: int) -> None:
+            await asyncio.sleep(0)
+
+        with pytest.raises(RuntimeError, match="boom"):
+            await asyncio.wait_for(
+                run_pipeline(range(10), [Stage("fetch", fetch), Stage("store", store)]),
+                timeout=5,
+            )
+
+    @pytest.mark.asyncio
+    async def test_on_processed_reports_stage_stats(self) -> None:
+        """項目を処理するたびに、そのステージと全ステージの状況が通知される."""
+        calls: list[tuple[str, int, int]] = []
+
+        async def passthrough(item: int) -> int:
+            return item
+
+        async def on_processed(stat: StageStats, stats: list[StageStats]) -> None:
+            calls.append((stat.name, stat.processed, len(stats)))
+
+        stats = await run_pipeline(
+            range(3),
+            [Stage("a", passthrough), Stage("b", passthrough)],
+            on_processed=on_processed,
+        )
+
+        assert [call for call in calls if call[0] == "a"] == [("a", 1, 2), ("a", 2, 2), ("a", 3, 2)]
+        assert len(calls) == 6
+        assert all(stat.throughput > 0 for stat in stats)
+        assert all(stat.busy_sec >= 0 for stat in stats)
@@ -0,0 +1,86 @@
+"""HTML解析・チャンク分割用プロセスプールのテスト
+
+仕様: docs/specs/f9-rag.md
+"""
+
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock, patch
+
+from src.rag.chunker import smart_chunk
+from src.rag.parse_pool import ParsePool
+from src.services.web_crawler import extract_text, resolve_html_parser
+
+_HTML = """
+<html><head><title>テストページ</title></head>
+<body>
+<nav>ナビゲーション</nav>
+<article>
+<h2>はじめに</h2>
+<p>RAGはベクトル検索でナレッジを取り込む仕組みです。</p>
+<h2>使い方</h2>
+<p>rag crawl コマンドでリンク集ページから一括で取り込みます。</p>
+</article>
+</body></html>
+"""
+
+
+class TestParsePool:
+    """ParsePoolのテスト."""
+
+    async def test_process_pool_matches_in_process_results(self) -> None:
+        """プロセスプールでの本文抽出・チャンク分割がプロセス内の実行と同じ結果になる."""
+        pool = ParsePool(max_workers=2, html_parser="html.parser")
+        try:
+            title, text = await pool.extract_text(_HTML)
+            chunks = await pool.smart_chunk(text, 100, 10)
+        finally:
+            pool.shutdown()
+
+        assert (title, text) == extract_text(_HTML, "html.parser")
+        assert title == "テストページ"
+        assert "ナビゲーション" not in text
+        assert chunks == smart_chunk(text, 100, 10)
+
+    async def test_pending_requests_are_bounded(self) -> None:
+        """同時に依頼できる件数を超えた依頼は、空きが出るまで待つ."""
+        pool = ParsePool(max_workers=1, max_pending=2)
+        running = 0
+        peak = 0
+
+        def parse(html: str, parser: str) -> tuple[str, str]:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            try:
+                return extract_text(html, parser)
+            finally:
+                running -= 1
+
+        with patch("src.rag.parse_pool.extract_text", side_effect=parse):
+            results = await asyncio.gather(*(pool.extract_text(_HTML) for _ in range(8)))
+
+        assert len(results) == 8
+        assert peak <= 2
+
+    async def test_broken_pool_falls_back_to_thread(self) -> None:
+        """プロセスプールが異常終了した場合はスレッドで処理する."""
+        pool = ParsePool(max_workers=2, html_parser="html.parser")
+        broken = MagicMock()
+        broken.submit.side_effect = BrokenProcessPool("worker died")
+
+        with patch.object(pool._pool, "_get_executor", return_value=broken):
+            result = await pool.extract_text(_HTML)
+
+        assert result == extract_text(_HTML, "html.parser")
+        # 以後はプロセスプールを使わない
+        assert pool._pool.disabled
+
+    def test_lxml_falls_back_when_not_installed(self) -> None:
+        """lxmlがインストールされていない場合は html.parser を使う."""
+        with patch("src.services.web_crawler.importlib.util.find_spec", return_value=None):
+            assert resolve_html_parser("lxml") == "html.parser"
+            assert resolve_html_parser("auto") == "html.parser"
+        with patch("src.services.web_crawler.importlib.util.find_spec", return_value=object()):
+            assert resolve_html_parser("auto") == "lxml"
+        assert resolve_html_parser("html.parser") == "html.parser"
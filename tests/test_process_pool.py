@@ -0,0 +1,55 @@
+"""遅延起動するプロセスプールのテスト
+
+仕様: docs/specs/f9-rag.md
+"""
+
+import asyncio
+import operator
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock
+
+from src.rag.process_pool import LazyProcessPool
+
+
+class TestLazyProcessPool:
+    """LazyProcessPoolのテスト."""
+
+    async def test_executor_starts_on_first_run(self) -> None:
+        """プロセスは最初の依頼で起動し、結果を返す."""
+        pool = LazyProcessPool("Test", max_workers=2)
+        assert pool._executor is None
+        try:
+            assert await pool.run(operator.add, 2, 3) == 5
+            assert pool._executor is not None
+        finally:
+            pool.shutdown()
+        assert pool._executor is None
+
+    async def test_single_worker_runs_in_thread(self) -> None:
+        """ワーカー数が1の場合はプロセスを起動せずスレッドで実行する."""
+        pool = LazyProcessPool("Test", max_workers=1)
+
+        assert pool.disabled
+        assert await pool.run(operator.mul, 4, 5) == 20
+        assert pool._executor is None
+
+    async def test_concurrent_runs_fall_back_when_pool_breaks(self) -> None:
+        """プールが異常終了した場合、並行する依頼もすべてスレッドで実行し直す."""
+        pool = LazyProcessPool("Test", max_workers=2)
+        broken = MagicMock()
+
+        def submit(*_: object) -> Future[int]:
+            future: Future[int] = Future()
+            future.set_exception(BrokenProcessPool("worker died"))
+            return future
+
+        broken.submit.side_effect = submit
+
+        pool._executor = broken
+        results = await asyncio.gather(*(pool.run(operator.neg, i) for i in range(4)))
+
+        assert results == [0, -1, -2, -3]
+        assert pool.disabled
+        # 停止は1回だけ行い、待機中の依頼は取り消さない
+        broken.shutdown.assert_called_once_with(wait=False, cancel_futures=False)
@@ -11,14 +11,25 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from src.embedding.base import EmbeddingProvider
 from src.rag.cli import (
     RegressionInfo,
     detect_regression,
     load_baseline,
+    sweep_hnsw_params,
+    write_hnsw_sweep_json_report,
+    write_hnsw_sweep_markdown_report,
     write_json_report,
     write_markdown_report,
+    write_quantization_json_report,
+    write_quantization_markdown_report,
 )
-from src.rag.evaluation import EvaluationReport, QueryEvaluationResult
+from src.rag.evaluation import (
+    EvaluationReport,
+    QuantizationFidelityResult,
+    QueryEvaluationResult,
+)
+from src.rag.vector_store import DocumentChunk, HnswParams, VectorStore
 
 
 class TestDetectRegression:
@@ -178,6 +189,81 @@ class TestWriteMarkdownReport:
         assert "平均F1 | 0.850" in content
 
 
+class TestWriteQuantizationReport:
+    """量子化の精度レポート出力テスト."""
+
+    def test_quantization_reports(self, tmp_path: Path) -> None:
+        """方式ごとのデータ量・Recallの差・一致率がJSON/Markdownに出力されること."""
+        report = EvaluationReport(
+            queries_evaluated=1,
+            average_precision=0.5,
+            average_recall=1.0,
+            average_f1=0.667,
+            negative_source_violations=[],
+        )
+        results = [
+            QuantizationFidelityResult("none", 1536, 1.0, report, 0.0, 1.0),
+            QuantizationFidelityResult("binary", 48, 32.0, report, -0.1, 0.9),
+        ]
+
+        write_quantization_json_report(results, tmp_path / "report.json", "dataset.json")
+        write_quantization_markdown_report(results, tmp_path / "report.md", "dataset.json")
+
+        data = json.loads((tmp_path / "report.json").read_text(encoding="utf-8"))
+        assert [r["quantization"] for r in data["results"]] == ["none", "binary"]
+        assert data["results"][1]["memory_ratio"] == 32.0
+        assert data["results"][1]["recall_delta"] == -0.1
+        content = (tmp_path / "report.md").read_text(encoding="utf-8")
+        assert "# ベクトル量子化の精度レポート" in content
+        assert "| binary | 48 | 32.0x | 0.500 | 1.000 | -0.100 | 0.900 |" in content
+
+
+class _IndexEmbedding(EmbeddingProvider):
+    """テキスト末尾の番号から決まるベクトルを返すプロバイダー."""
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        return [[1.0, float(text.split()[-1]) / 10, 0.5] for text in texts]
+
+    async def is_available(self) -> bool:
+        return True
+
+
+class TestHnswSweep:
+    """HNSWパラメータのスイープのテスト."""
+
+    @pytest.mark.asyncio
+    async def test_sweep_reports_latency_and_recall(self, tmp_path: Path) -> None:
+        """パラメータの組ごとにレイテンシとrecall@kを計測し、JSON・Markdownに出力できること."""
+        source = VectorStore(_IndexEmbedding(), persist_directory=str(tmp_path / "source"))
+        await source.add_documents([
+            DocumentChunk(id=f"doc_{i}", text=f"チャンク {i}", metadata={"source_url": f"u{i}"})
+            for i in range(30)
+        ])
+        queries = dict(zip(["質問 3", "質問 17"], await _IndexEmbedding().embed(["3", "17"])))
+        grid = [HnswParams(m=8, search_ef=10), HnswParams(m=16, search_ef=100)]
+
+        results = await sweep_hnsw_params(
+            source, queries, grid, tmp_path / "work", k=3, repeat=2
+        )
+
+        assert [(r.m, r.search_ef) for r in results] == [(8, 10), (16, 100)]
+        # 小さなコレクションではHNSWも総当たりと同じ結果になる
+        assert all(r.recall_at_k == 1.0 for r in results)
+        assert all(0 < r.p50_ms <= r.p95_ms for r in results)
+
+        output_path = tmp_path / "report.md"
+        write_hnsw_sweep_markdown_report(results, output_path, "dataset.json", k=3)
+        content = output_path.read_text(encoding="utf-8")
+        assert "| M | construction_ef | search_ef |" in content
+        assert "| 16 | 100 | 100 |" in content
+
+        json_path = tmp_path / "report.json"
+        write_hnsw_sweep_json_report(results, json_path, "dataset.json", k=3)
+        data = json.loads(json_path.read_text(encoding="utf-8"))
+        assert data["k"] == 3
+        assert [r["search_ef"] for r in data["results"]] == [10, 100]
+
+
 class TestRegressionInfo:
     """リグレッション情報付きレポートのテスト."""
 
@@ -629,6 +715,7 @@ class TestCLIInitTestDb:
         args = Namespace(
             persist_dir=str(persist_dir),
             fixture=str(fixture_path),
+            backend="chroma",
         )
 
         with patch("src.config.settings.get_settings") as mock_settings:
@@ -18,6 +18,7 @@ from src.rag.evaluation import (
     QueryEvaluationResult,
     calculate_precision_recall,
     check_negative_sources,
+    evaluate_quantization_fidelity,
     evaluate_retrieval,
     load_evaluation_dataset,
 )
@@ -456,6 +457,59 @@ class TestEvaluateRetrieval:
         mock_rag_service.retrieve.assert_not_called()
 
 
+class TestEvaluateQuantizationFidelity:
+    """evaluate_quantization_fidelity() のテスト."""
+
+    @staticmethod
+    def _service(sources_per_query: list[list[str]]) -> MagicMock:
+        mock = MagicMock()
+        mock.retrieve = AsyncMock(
+            side_effect=[
+                RAGRetrievalResult(context="参考情報", sources=sources)
+                for sources in sources_per_query
+            ]
+        )
+        return mock
+
+    async def test_compares_with_unquantized_results(self, tmp_path: Path) -> None:
+        """方式ごとのRecallの差・量子化なしとの一致率・データ量の削減倍率を返す."""
+        dataset = {
+            "queries": [
+                {"id": "q1", "query": "質問1", "expected_sources": ["https://a.com"]},
+                {"id": "q2", "query": "質問2", "expected_sources": ["https://b.com"]},
+            ]
+        }
+        dataset_path = tmp_path / "dataset.json"
+        dataset_path.write_text(json.dumps(dataset, ensure_ascii=False), encoding="utf-8")
+        services = {
+            "none": self._service([["https://a.com", "https://x.com"], ["https://b.com"]]),
+            "int8": self._service([["https://a.com", "https://x.com"], ["https://b.com"]]),
+            "binary": self._service([["https://a.com", "https://y.com"], ["https://c.com"]]),
+        }
+
+        results = await evaluate_quantization_fidelity(
+            services, str(dataset_path), dimension=384  # type: ignore[arg-type]
+        )
+
+        by_mode = {result.quantization: result for result in results}
+        assert [result.quantization for result in results] == ["none", "int8", "binary"]
+        assert by_mode["none"].memory_ratio == 1.0
+        assert by_mode["int8"].memory_ratio == pytest.approx(1536 / 388)
+        assert by_mode["binary"].memory_ratio == 32.0
+        assert by_mode["int8"].recall_delta == 0.0
+        assert by_mode["int8"].source_agreement == 1.0
+        assert by_mode["binary"].recall_delta == pytest.approx(-0.5)
+        # q1: 2件中1件一致、q2: 一致なし
+        assert by_mode["binary"].source_agreement == pytest.approx(0.25)
+
+    async def test_missing_baseline_raises(self, tmp_path: Path) -> None:
+        """基準の方式が評価対象に含まれない場合はエラー."""
+        with pytest.raises(ValueError, match="Baseline"):
+            await evaluate_quantization_fidelity(
+                {"int8": MagicMock()}, str(tmp_path / "dataset.json"), dimension=384
+            )
+
+
 class TestEvaluationReportDataclass:
     """EvaluationReport データクラスのテスト."""
 
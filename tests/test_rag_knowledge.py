@@ -5,13 +5,21 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
-from src.rag.vector_store import RetrievalResult, VectorStore
-from src.services.rag_knowledge import RAGKnowledgeService, RAGRetrievalResult
+from src.rag.parse_pool import ParsePool
+from src.rag.retrieval_cache import RetrievalCache
+from src.rag.source_registry import SourceRecord, SourceRegistry
+from src.rag.vector_store import EmbeddedChunks, RetrievalResult, VectorStore
+from src.services.rag_knowledge import (
+    PageIngestResult,
+    RAGKnowledgeService,
+    RAGRetrievalResult,
+)
 from src.services.web_crawler import CrawledPage, WebCrawler
 
 
@@ -28,9 +36,14 @@ def mock_vector_store(mock_embedding_provider: MagicMock) -> MagicMock:
     """モックVectorStoreを作成する."""
     mock = MagicMock(spec=VectorStore)
     mock.add_documents = AsyncMock(return_value=3)
+    mock.embed_documents = AsyncMock(
+        side_effect=lambda chunks: EmbeddedChunks(chunks, [[0.1, 0.2, 0.3]] * len(chunks))
+    )
+    mock.upsert_embedded = AsyncMock(side_effect=lambda embedded: len(embedded.chunks))
     mock.search = AsyncMock(return_value=[])
     mock.delete_by_source = AsyncMock(return_value=0)
-    mock.delete_stale_chunks = AsyncMock(return_value=0)
+    mock.get_content_hashes = AsyncMock(return_value={})
+    mock.delete_documents = AsyncMock(return_value=0)
     mock.get_stats = MagicMock(return_value={"total_chunks": 10, "source_count": 2})
     return mock
 
@@ -42,8 +55,9 @@ def mock_web_crawler() -> MagicMock:
     mock.crawl_index_page = AsyncMock(return_value=[])
     mock.crawl_page = AsyncMock(return_value=None)
     mock.crawl_pages = AsyncMock(return_value=[])
-    # validate_url は入力URLをそのまま返す（検証OK）
+    # validate_url / validate_url_async は入力URLをそのまま返す（検証OK）
     mock.validate_url = MagicMock(side_effect=lambda url: url)
+    mock.validate_url_async = AsyncMock(side_effect=lambda url: url)
     # クロール間隔（進捗フィードバック機能で使用）
     mock._crawl_delay = 0.0  # テスト時は遅延なし
     return mock
@@ -159,6 +173,84 @@ class TestIngestFromIndex:
         assert result["chunks_stored"] == 0
         assert result["errors"] == 0
 
+    async def test_pages_are_stored_while_crawling_continues(
+        self,
+        rag_service: RAGKnowledgeService,
+        mock_vector_store: MagicMock,
+        mock_web_crawler: MagicMock,
+    ) -> None:
+        """クロールが終わったページから、残りのクロール完了を待たずに保存されること."""
+        urls = [f"https://example.com/page{i}" for i in range(3)]
+        mock_web_crawler.crawl_index_page.return_value = urls
+        slow_page_release = asyncio.Event()
+
+        async def crawl_page(url: str) -> CrawledPage:
+            if url.endswith("page2"):
+                # 他のページの保存が終わるまでクロールが終わらないページ
+                await slow_page_release.wait()
+            return CrawledPage(
+                url=url, title=url, text=f"{url} の本文", crawled_at="2024-01-01T00:00:00+00:00"
+            )
+
+        async def upsert_embedded(embedded: EmbeddedChunks) -> int:
+            stored.extend(str(chunk.metadata["source_url"]) for chunk in embedded.chunks)
+            if len(stored) == 2:
+                slow_page_release.set()
+            return len(embedded.chunks)
+
+        stored: list[str] = []
+        mock_web_crawler.crawl_page.side_effect = crawl_page
+        mock_vector_store.upsert_embedded.side_effect = upsert_embedded
+        progress = AsyncMock()
+
+        result = await asyncio.wait_for(
+            rag_service.ingest_from_index("https://example.com/index", progress_callback=progress),
+            timeout=5,
+        )
+
+        assert sorted(stored[:2]) == urls[:2]
+        assert stored[2] == urls[2]
+        assert result["pages_crawled"] == 3
+        assert result["chunks_added"] == 3
+        assert result["errors"] == 0
+        # 一括取り込みではEmbedding済みのチャンクを保存する
+        mock_vector_store.add_documents.assert_not_called()
+        assert progress.await_count == 3
+        crawled, total, stages = progress.await_args_list[-1].args
+        assert (crawled, total) == (3, 3)
+        assert [stage.name for stage in stages] == ["crawl", "chunk", "embed", "store"]
+
+    async def test_embedding_failure_counts_as_error(
+        self,
+        rag_service: RAGKnowledgeService,
+        mock_vector_store: MagicMock,
+        mock_web_crawler: MagicMock,
+    ) -> None:
+        """Embeddingに失敗したページはエラーとしてカウントし、他のページは保存されること."""
+        mock_web_crawler.crawl_index_page.return_value = [
+            "https://example.com/page1",
+            "https://example.com/page2",
+        ]
+        mock_web_crawler.crawl_page.side_effect = [
+            CrawledPage(
+                url=f"https://example.com/page{i}",
+                title=f"Page {i}",
+                text=f"Content {i}",
+                crawled_at="2024-01-01T00:00:00+00:00",
+            )
+            for i in (1, 2)
+        ]
+        mock_vector_store.embed_documents.side_effect = [
+            RuntimeError("embedding failed"),
+            EmbeddedChunks([], []),
+        ]
+
+        result = await rag_service.ingest_from_index("https://example.com/index")
+
+        assert result["pages_crawled"] == 2
+        assert result["errors"] == 1
+        mock_vector_store.upsert_embedded.assert_awaited_once()
+
 
 class TestIngestPage:
     """ingest_page() のテスト (AC17)."""
@@ -183,19 +275,19 @@ class TestIngestPage:
         result = await rag_service.ingest_page("https://example.com/page1")
 
         # Assert
-        assert result == 1
-        mock_web_crawler.validate_url.assert_called_once_with("https://example.com/page1")
+        assert result == PageIngestResult(added=1)
+        mock_web_crawler.validate_url_async.assert_awaited_once_with("https://example.com/page1")
         mock_web_crawler.crawl_page.assert_called_once_with("https://example.com/page1")
+        mock_vector_store.get_content_hashes.assert_called_once_with("https://example.com/page1")
         mock_vector_store.add_documents.assert_called_once()
-        # upsert後に古いチャンクを削除
-        mock_vector_store.delete_stale_chunks.assert_called_once()
+        mock_vector_store.delete_documents.assert_called_once_with([])
 
     async def test_ingest_page_crawl_failed(
         self,
         rag_service: RAGKnowledgeService,
         mock_web_crawler: MagicMock,
     ) -> None:
-        """クロール失敗時は0を返すこと."""
+        """クロール失敗時はチャンク数0を返すこと."""
         # Arrange
         mock_web_crawler.crawl_page.return_value = None
 
@@ -203,7 +295,7 @@ class TestIngestPage:
         result = await rag_service.ingest_page("https://example.com/fail")
 
         # Assert
-        assert result == 0
+        assert result.chunks == 0
 
     async def test_ingest_page_upsert(
         self,
@@ -211,22 +303,106 @@ class TestIngestPage:
         mock_vector_store: MagicMock,
         mock_web_crawler: MagicMock,
     ) -> None:
-        """同一URLの再取り込み時はupsert後に古いチャンクを削除すること."""
-        # Arrange
-        mock_web_crawler.crawl_page.return_value = CrawledPage(
+        """同一URLの再取り込み時は変更されたチャンクのみupsertし、無くなったチャンクを削除すること."""
+        # Arrange: 1回目の取り込みで保存されたチャンクのハッシュを控える
+        page = CrawledPage(
             url="https://example.com/page1",
-            title="Updated Page",
-            text="Updated content.",
-            crawled_at="2024-01-02T00:00:00+00:00",
+            title="Test Page",
+            text="First paragraph.\n\nSecond paragraph.",
+            crawled_at="2024-01-01T00:00:00+00:00",
+        )
+        rag_service._smart_chunk = MagicMock(  # type: ignore[method-assign]
+            return_value=["First paragraph.", "Second paragraph.", "Third paragraph."]
         )
-        mock_vector_store.delete_stale_chunks.return_value = 2  # 古い2件削除
+        await rag_service._ingest_crawled_page(page)
+        first_chunks = mock_vector_store.add_documents.call_args[0][0]
+        stored = {chunk.id: str(chunk.metadata["content_hash"]) for chunk in first_chunks}
+        url_hash = first_chunks[0].id.rsplit("_", 1)[0]
+        # 旧形式（content_hash 未記録）のチャンクと、ページから無くなるチャンク
+        stored[f"{url_hash}_2"] = ""
+        stored[f"{url_hash}_3"] = "0123456789abcdef"
+        mock_vector_store.get_content_hashes.return_value = stored
+        mock_vector_store.add_documents.reset_mock()
+
+        # Act: 2番目のチャンクを変更、4番目を追加し、末尾の旧チャンクを削除
+        rag_service._smart_chunk.return_value = [  # type: ignore[attr-defined]
+            "First paragraph.",
+            "Second paragraph, edited.",
+            "Third paragraph.",
+        ]
+        result = await rag_service._ingest_crawled_page(page)
 
-        # Act
-        await rag_service.ingest_page("https://example.com/page1")
+        # Assert
+        assert result == PageIngestResult(added=0, updated=2, kept=1, removed=1)
+        upserted = mock_vector_store.add_documents.call_args[0][0]
+        assert [chunk.id for chunk in upserted] == [f"{url_hash}_1", f"{url_hash}_2"]
+        mock_vector_store.delete_documents.assert_called_with([f"{url_hash}_3"])
+        # 変更の無いチャンクはEmbeddingせず、メタデータのみ更新する
+        kept = mock_vector_store.update_metadata.call_args[0][0]
+        assert [chunk.id for chunk in kept] == [f"{url_hash}_0"]
+
+    async def test_unchanged_page_is_not_reembedded(
+        self,
+        rag_service: RAGKnowledgeService,
+        mock_vector_store: MagicMock,
+    ) -> None:
+        """内容が変わっていないページの再取り込みではEmbedding・削除を行わないこと."""
+        page = CrawledPage(
+            url="https://example.com/page1",
+            title="Test Page",
+            text="Unchanged content.",
+            crawled_at="2024-01-01T00:00:00+00:00",
+        )
+        await rag_service._ingest_crawled_page(page)
+        first_chunks = mock_vector_store.add_documents.call_args[0][0]
+        mock_vector_store.get_content_hashes.return_value = {
+            chunk.id: chunk.metadata["content_hash"] for chunk in first_chunks
+        }
 
-        # Assert: upsert後に古いチャンクを削除
-        mock_vector_store.add_documents.assert_called_once()
-        mock_vector_store.delete_stale_chunks.assert_called_once()
+        # タイトル・取得日時だけが変わった再クロール
+        recrawled = CrawledPage(
+            url=page.url,
+            title="Renamed Page",
+            text=page.text,
+            crawled_at="2024-02-01T00:00:00+00:00",
+        )
+        result = await rag_service._ingest_crawled_page(recrawled)
+
+        assert result == PageIngestResult(kept=len(first_chunks))
+        assert mock_vector_store.add_documents.call_args[0][0] == []
+        mock_vector_store.delete_documents.assert_called_with([])
+        # 変更の無いチャンクのタイトル・取得日時はEmbeddingし直さずに更新する
+        kept = mock_vector_store.update_metadata.call_args[0][0]
+        assert [chunk.id for chunk in kept] == [chunk.id for chunk in first_chunks]
+        assert {chunk.metadata["title"] for chunk in kept} == {"Renamed Page"}
+        assert {chunk.metadata["crawled_at"] for chunk in kept} == {"2024-02-01T00:00:00+00:00"}
+
+    async def test_chunking_is_delegated_to_parse_pool(
+        self,
+        mock_vector_store: MagicMock,
+        mock_web_crawler: MagicMock,
+    ) -> None:
+        """ParsePool指定時はチャンク分割をプロセスプールに依頼すること."""
+        parse_pool = MagicMock(spec=ParsePool)
+        parse_pool.smart_chunk = AsyncMock(return_value=["chunk 1", "chunk 2"])
+        service = RAGKnowledgeService(
+            mock_vector_store,
+            mock_web_crawler,
+            chunk_size=300,
+            chunk_overlap=30,
+            parse_pool=parse_pool,
+        )
+        page = CrawledPage(
+            url="https://example.com/page1",
+            title="Test Page",
+            text="Some content.",
+            crawled_at="2024-01-01T00:00:00+00:00",
+        )
+
+        result = await service._ingest_crawled_page(page)
+
+        parse_pool.smart_chunk.assert_awaited_once_with("Some content.", 300, 30)
+        assert result == PageIngestResult(added=2)
 
 
 class TestRetrieve:
@@ -1032,6 +1208,274 @@ class TestRAGShowSources:
         assert "参照元:" not in response
 
 
+class TestRetrievalCache:
+    """検索結果キャッシュのテスト."""
+
+    @pytest.fixture
+    def cache(self) -> RetrievalCache[RAGRetrievalResult]:
+        """検索結果キャッシュ."""
+        return RetrievalCache(max_entries=16)
+
+    @pytest.fixture
+    def cached_service(
+        self,
+        mock_vector_store: MagicMock,
+        mock_web_crawler: MagicMock,
+        cache: RetrievalCache[RAGRetrievalResult],
+    ) -> RAGKnowledgeService:
+        """検索結果キャッシュ付きのRAGKnowledgeService."""
+        mock_vector_store.search.return_value = [
+            RetrievalResult(
+                text="りゅうおうは竜王の城にいる",
+                metadata={"source_url": "https://example.com/page1"},
+                distance=0.1,
+            ),
+        ]
+        return RAGKnowledgeService(
+            vector_store=mock_vector_store,
+            web_crawler=mock_web_crawler,
+            retrieval_cache=cache,
+        )
+
+    async def test_repeated_query_is_served_from_cache(
+        self, cached_service: RAGKnowledgeService, mock_vector_store: MagicMock
+    ) -> None:
+        """同じ（正規化後の）質問は検索せずにキャッシュから返す."""
+        first = await cached_service.retrieve("りゅうおう どこ", n_results=5)
+        second = await cached_service.retrieve(" りゅうおう　どこ ", n_results=5)
+
+        assert second == first
+        assert second is not first
+        mock_vector_store.search.assert_called_once()
+
+        # 返却件数が異なる場合は別のキーになる
+        await cached_service.retrieve("りゅうおう どこ", n_results=3)
+        assert mock_vector_store.search.call_count == 2
+
+    async def test_degraded_hybrid_result_is_not_cached(
+        self,
+        mock_vector_store: MagicMock,
+        mock_web_crawler: MagicMock,
+        cache: RetrievalCache[RAGRetrievalResult],
+    ) -> None:
+        """一方の検索を打ち切った（degraded）ハイブリッド検索の結果はキャッシュしない."""
+        mock_vector_store.search.return_value = [
+            RetrievalResult(
+                text="りゅうおうは竜王の城にいる",
+                metadata={"source_url": "https://example.com/page1"},
+                distance=0.1,
+            ),
+        ]
+        bm25_index = MagicMock()
+        bm25_index.search.side_effect = RuntimeError("index broken")
+        service = RAGKnowledgeService(
+            vector_store=mock_vector_store,
+            web_crawler=mock_web_crawler,
+            bm25_index=bm25_index,
+            hybrid_search_enabled=True,
+            retrieval_cache=cache,
+        )
+
+        degraded = await service.retrieve("りゅうおう")
+
+        assert degraded.degraded
+        assert "竜王の城" in degraded.context
+        assert len(cache) == 0
+
+        # BM25が復旧すれば検索し直し、両方の検索で得た結果はキャッシュする
+        bm25_index.search.side_effect = None
+        bm25_index.search.return_value = []
+        recovered = await service.retrieve("りゅうおう")
+        await service.retrieve("りゅうおう")
+
+        assert not recovered.degraded
+        assert len(cache) == 1
+        assert mock_vector_store.search.call_count == 2
+
+    async def test_ingest_invalidates_cache(
+        self,
+        cached_service: RAGKnowledgeService,
+        mock_vector_store: MagicMock,
+        cache: RetrievalCache[RAGRetrievalResult],
+    ) -> None:
+        """ページ取り込み後は新しい内容で検索し直す."""
+        await cached_service.retrieve("りゅうおう")
+
+        await cached_service._ingest_crawled_page(
+            CrawledPage(
+                url="https://example.com/page2",
+                title="Page 2",
+                text="りゅうおうの新しい情報",
+                crawled_at="2024-01-01T00:00:00+00:00",
+            )
+        )
+        await cached_service.retrieve("りゅうおう")
+
+        assert cache.generation == 1
+        assert mock_vector_store.search.call_count == 2
+
+    async def test_failed_ingest_still_invalidates_cache(
+        self,
+        cached_service: RAGKnowledgeService,
+        mock_vector_store: MagicMock,
+        cache: RetrievalCache[RAGRetrievalResult],
+    ) -> None:
+        """取り込みが途中で失敗しても（部分的に書き込まれている可能性があるため）無効化する."""
+        mock_vector_store.delete_documents.side_effect = RuntimeError("db error")
+
+        with pytest.raises(RuntimeError):
+            await cached_service._ingest_crawled_page(
+                CrawledPage(
+                    url="https://example.com/page2",
+                    title="Page 2",
+                    text="りゅうおうの新しい情報",
+                    crawled_at="2024-01-01T00:00:00+00:00",
+                )
+            )
+
+        assert cache.generation == 1
+
+    async def test_delete_source_invalidates_cache(
+        self,
+        cached_service: RAGKnowledgeService,
+        mock_vector_store: MagicMock,
+        cache: RetrievalCache[RAGRetrievalResult],
+    ) -> None:
+        """ソース削除後は削除済みの内容を返さない."""
+        await cached_service.retrieve("りゅうおう")
+
+        await cached_service.delete_source("https://example.com/page1")
+        mock_vector_store.search.return_value = []
+        result = await cached_service.retrieve("りゅうおう")
+
+        assert result.context == ""
+        assert cache.generation == 1
+
+    async def test_get_stats_includes_cache_stats(
+        self, cached_service: RAGKnowledgeService
+    ) -> None:
+        """統計情報に検索キャッシュのヒット・ミス数が含まれる."""
+        await cached_service.retrieve("りゅうおう")
+        await cached_service.retrieve("りゅうおう")
+
+        stats = await cached_service.get_stats()
+
+        assert stats["retrieval_cache_hits"] == 1
+        assert stats["retrieval_cache_misses"] == 1
+        assert stats["retrieval_cache_entries"] == 1
+
+    async def test_get_stats_without_cache(self, rag_service: RAGKnowledgeService) -> None:
+        """キャッシュ無しの場合はキャッシュの統計を含めない."""
+        stats = await rag_service.get_stats()
+
+        assert "retrieval_cache_hits" not in stats
+
+
+class TestSourceRegistry:
+    """ソースURL台帳のテスト."""
+
+    @pytest.fixture
+    def registry(self) -> SourceRegistry:
+        """インメモリのソースURL台帳."""
+        return SourceRegistry(":memory:")
+
+    @pytest.fixture
+    def registry_service(
+        self,
+        mock_vector_store: MagicMock,
+        mock_web_crawler: MagicMock,
+        registry: SourceRegistry,
+    ) -> RAGKnowledgeService:
+        """ソースURL台帳付きのRAGKnowledgeService."""
+        return RAGKnowledgeService(
+            vector_store=mock_vector_store,
+            web_crawler=mock_web_crawler,
+            source_registry=registry,
+        )
+
+    async def test_ingest_and_delete_update_registry(
+        self,
+        registry_service: RAGKnowledgeService,
+        registry: SourceRegistry,
+        mock_web_crawler: MagicMock,
+    ) -> None:
+        """取り込みでソースの情報が記録され、削除で台帳から除かれる."""
+        mock_web_crawler.crawl_page.return_value = CrawledPage(
+            url="https://example.com/page",
+            title="Test Page",
+            text="りゅうおうは竜王の城にいる。",
+            crawled_at="2026-10-18T00:00:00+00:00",
+        )
+
+        result = await registry_service.ingest_page("https://example.com/page#top")
+
+        record = registry.get("https://example.com/page")
+        assert record is not None
+        assert record.chunk_count == result.chunks
+        assert record.title == "Test Page"
+        assert record.crawled_at == "2026-10-18T00:00:00+00:00"
+        assert record.byte_size == len("りゅうおうは竜王の城にいる。".encode())
+        assert len(record.content_hash) == 16
+
+        await registry_service.delete_source("https://example.com/page")
+
+        assert len(registry) == 0
+
+    async def test_get_stats_uses_registry_without_scanning(
+        self,
+        registry_service: RAGKnowledgeService,
+        registry: SourceRegistry,
+        mock_vector_store: MagicMock,
+    ) -> None:
+        """同期後の統計は台帳から返し、ベクトルストアのメタデータを走査しない."""
+        registry.upsert(SourceRecord("https://example.com/a", chunk_count=6, byte_size=2048))
+        registry.upsert(SourceRecord("https://example.com/b", chunk_count=4, byte_size=1024))
+        mock_vector_store.get_stats.return_value = {"total_chunks": 10}
+
+        assert await registry_service.sync_source_registry() == 2
+        stats = await registry_service.get_stats()
+
+        assert stats["total_chunks"] == 10
+        assert stats["source_count"] == 2
+        assert stats["total_bytes"] == 3072
+        for call in mock_vector_store.get_stats.call_args_list:
+            assert call.kwargs == {"count_sources": False}
+        mock_vector_store.collect_sources.assert_not_called()
+
+    async def test_sync_rebuilds_out_of_date_registry(
+        self,
+        registry_service: RAGKnowledgeService,
+        registry: SourceRegistry,
+        mock_vector_store: MagicMock,
+    ) -> None:
+        """台帳のチャンク数がベクトルストアと一致しない場合は全チャンクから作り直す."""
+        registry.upsert(SourceRecord("https://example.com/deleted", chunk_count=1))
+        mock_vector_store.get_stats.return_value = {"total_chunks": 5}
+        mock_vector_store.collect_sources = AsyncMock(return_value=[
+            SourceRecord("https://example.com/b", chunk_count=3),
+            SourceRecord("https://example.com/a", chunk_count=2),
+        ])
+
+        assert await registry_service.sync_source_registry() == 2
+
+        assert [r.source_url for r in await registry_service.list_sources()] == [
+            "https://example.com/a",
+            "https://example.com/b",
+        ]
+        mock_vector_store.collect_sources.assert_awaited_once()
+
+    async def test_stats_scan_until_registry_is_synced(
+        self,
+        registry_service: RAGKnowledgeService,
+        mock_vector_store: MagicMock,
+    ) -> None:
+        """同期前は従来どおりベクトルストアの集計を返す."""
+        stats = await registry_service.get_stats()
+
+        assert stats == {"total_chunks": 10, "source_count": 2}
+        mock_vector_store.get_stats.assert_called_once_with()
+
+
 class TestFragmentNormalization:
     """URL フラグメント正規化のテスト (AC36, AC37)."""
 
@@ -1045,8 +1489,8 @@ class TestFragmentNormalization:
         # Arrange
         # fixtureデフォルトの side_effect（入力をそのまま返す）をリセットし、
         # フラグメント除去後の正規化済みURLを返すようにする
-        mock_web_crawler.validate_url.side_effect = None
-        mock_web_crawler.validate_url.return_value = "https://example.com/page"
+        mock_web_crawler.validate_url_async.side_effect = None
+        mock_web_crawler.validate_url_async.return_value = "https://example.com/page"
         mock_web_crawler.crawl_page.return_value = CrawledPage(
             url="https://example.com/page",
             title="Test Page",
@@ -1059,9 +1503,11 @@ class TestFragmentNormalization:
         result = await rag_service.ingest_page("https://example.com/page#section")
 
         # Assert
-        assert result == 1
-        # validate_url にフラグメント付きURLが渡される
-        mock_web_crawler.validate_url.assert_called_once_with("https://example.com/page#section")
+        assert result.chunks == 1
+        # validate_url_async にフラグメント付きURLが渡される
+        mock_web_crawler.validate_url_async.assert_awaited_once_with(
+            "https://example.com/page#section"
+        )
         # crawl_page にはフラグメント除去済みURLが渡される
         mock_web_crawler.crawl_page.assert_called_once_with("https://example.com/page")
 
@@ -1095,10 +1541,8 @@ class TestFragmentNormalization:
         # メタデータもフラグメント除去済みURL
         assert chunk.metadata["source_url"] == "https://example.com/page"
 
-        # delete_stale_chunks もフラグメント除去済みURLで呼ばれる
-        mock_vector_store.delete_stale_chunks.assert_called_once()
-        stale_call_args = mock_vector_store.delete_stale_chunks.call_args[0]
-        assert stale_call_args[0] == "https://example.com/page"
+        # 保存済みチャンクの取得もフラグメント除去済みURLで行われる
+        mock_vector_store.get_content_hashes.assert_called_once_with("https://example.com/page")
 
     async def test_ac37_delete_source_normalizes_fragment_url(
         self,
@@ -1254,7 +1698,7 @@ class TestSafeBrowsingIntegration:
         # Assert
         mock_safe_browsing_client.check_url.assert_called_once_with("https://safe.com")
         mock_web_crawler.crawl_page.assert_called_once()
-        assert result == 1
+        assert result.chunks == 1
 
     async def test_ac9_ingest_page_unsafe_url_rejected(
         self,
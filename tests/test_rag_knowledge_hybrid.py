@@ -5,16 +5,33 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import threading
+from collections.abc import AsyncIterator
+from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
-from src.rag.bm25_index import BM25Index, BM25Result
+from src.embedding.base import EmbeddingProvider
+from src.rag.bm25_index import BM25Index, BM25Result, write_snapshot_file
+from src.rag.tokenizer_pool import TokenizerPool
 from src.rag.vector_store import RetrievalResult, VectorStore
 from src.services.rag_knowledge import RAGKnowledgeService, RAGRetrievalResult
 from src.services.web_crawler import CrawledPage, WebCrawler
 
 
+class _ConstantEmbedding(EmbeddingProvider):
+    """すべてのテキストを同じベクトルに変換するEmbeddingプロバイダー."""
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        return [[1.0, 0.0, 0.0] for _ in texts]
+
+    async def is_available(self) -> bool:
+        return True
+
+
 @pytest.fixture
 def mock_embedding_provider() -> MagicMock:
     """モックEmbeddingプロバイダーを作成する."""
@@ -30,7 +47,8 @@ def mock_vector_store(mock_embedding_provider: MagicMock) -> MagicMock:
     mock.add_documents = AsyncMock(return_value=3)
     mock.search = AsyncMock(return_value=[])
     mock.delete_by_source = AsyncMock(return_value=0)
-    mock.delete_stale_chunks = AsyncMock(return_value=0)
+    mock.get_content_hashes = AsyncMock(return_value={})
+    mock.delete_documents = AsyncMock(return_value=0)
     mock.get_stats = MagicMock(return_value={"total_chunks": 10, "source_count": 2})
     return mock
 
@@ -43,6 +61,7 @@ def mock_web_crawler() -> MagicMock:
     mock.crawl_page = AsyncMock(return_value=None)
     mock.crawl_pages = AsyncMock(return_value=[])
     mock.validate_url = MagicMock(side_effect=lambda url: url)
+    mock.validate_url_async = AsyncMock(side_effect=lambda url: url)
     return mock
 
 
@@ -83,6 +102,7 @@ def rag_service_hybrid(
     mock_settings = MagicMock()
     mock_settings.rag_vector_weight = 0.5
     mock_settings.rag_rrf_k = 60
+    mock_settings.rag_hybrid_leg_timeout_sec = 0.0
     mock_settings.rag_similarity_threshold = None
     mock_settings.rag_debug_log_enabled = False
 
@@ -221,7 +241,7 @@ class TestBM25IndexIntegration:
         result = await rag_service_hybrid.ingest_page("https://example.com/page1")
 
         # Assert
-        assert result >= 1
+        assert result.chunks >= 1
         mock_bm25_index.add_documents.assert_called()
 
     async def test_ac6_delete_source_removes_from_bm25(
@@ -245,6 +265,373 @@ class TestBM25IndexIntegration:
         )
 
 
+class TestBM25WarmStart:
+    """BM25インデックスのスナップショット永続化と起動時復元のテスト."""
+
+    @staticmethod
+    def _make_service(
+        vector_store: MagicMock,
+        web_crawler: MagicMock,
+        bm25_index: BM25Index,
+        snapshot_path: Path,
+        snapshot_interval: float = 30.0,
+        snapshot_max_pending: int = 50,
+    ) -> RAGKnowledgeService:
+        mock_settings = MagicMock()
+        mock_settings.rag_vector_weight = 0.5
+        mock_settings.rag_rrf_k = 60
+        mock_settings.rag_hybrid_leg_timeout_sec = 0.0
+        with patch("src.config.settings.get_settings", return_value=mock_settings):
+            return RAGKnowledgeService(
+                vector_store=vector_store,
+                web_crawler=web_crawler,
+                bm25_index=bm25_index,
+                hybrid_search_enabled=True,
+                bm25_snapshot_path=str(snapshot_path),
+                bm25_snapshot_interval=snapshot_interval,
+                bm25_snapshot_max_pending=snapshot_max_pending,
+            )
+
+    @staticmethod
+    def _page(url: str, text: str) -> CrawledPage:
+        return CrawledPage(
+            url=url, title="Test Page", text=text, crawled_at="2024-01-01T00:00:00+00:00"
+        )
+
+    async def test_warm_start_rebuilds_from_vector_store_without_snapshot(
+        self,
+        mock_vector_store: MagicMock,
+        mock_web_crawler: MagicMock,
+        tmp_path: Path,
+    ) -> None:
+        """スナップショットが無い場合、ベクトルストアから一括再構築して保存する."""
+        batches = [
+            [("a_0", "dragon quest", "https://example.com/a")],
+            [("b_0", "pokemon battle", "https://example.com/b")],
+        ]
+
+        async def iter_documents(batch_size: int = 500) -> AsyncIterator[
+            list[tuple[str, str, str]]
+        ]:
+            for batch in batches:
+                yield batch
+
+        mock_vector_store.iter_documents = iter_documents
+        snapshot_path = tmp_path / "bm25.json"
+        index = BM25Index()
+        service = self._make_service(
+            mock_vector_store, mock_web_crawler, index, snapshot_path
+        )
+
+        count = await service.warm_start_bm25_index()
+
+        assert count == 2
+        assert index.get_source_url("b_0") == "https://example.com/b"
+        assert snapshot_path.exists()
+
+    async def test_warm_start_uses_tokenizer_pool_in_order(
+        self,
+        mock_vector_store: MagicMock,
+        mock_web_crawler: MagicMock,
+        tmp_path: Path,
+    ) -> None:
+        """並列トークナイザ設定時はそのトークン化結果を取得順にインデックスへ反映する."""
+        batches = [
+            [(f"doc{b}_{i}", f"term{b} text{i}", f"https://example.com/{b}") for i in range(2)]
+            for b in range(5)
+        ]
+
+        async def iter_documents(batch_size: int = 500) -> AsyncIterator[
+            list[tuple[str, str, str]]
+        ]:
+            for batch in batches:
+                yield batch
+
+        mock_vector_store.iter_documents = iter_documents
+        pool = MagicMock(spec=TokenizerPool)
+        pool.tokenize = AsyncMock(side_effect=lambda texts: [text.split() for text in texts])
+        pool.cache = None
+        index = BM25Index()
+        service = self._make_service(
+            mock_vector_store, mock_web_crawler, index, tmp_path / "bm25.json"
+        )
+        service._tokenizer_pool = pool
+
+        count = await service.warm_start_bm25_index(max_in_flight=2)
+
+        assert count == 10
+        assert pool.tokenize.await_count == 5
+        # 取得順に反映され、各ドキュメントにそのトークン化結果が対応する
+        documents = index._state.documents
+        assert list(documents) == [doc_id for batch in batches for doc_id, _, _ in batch]
+        assert index._document_tokens("doc3_1") == ["term3", "text1"]
+
+    async def test_warm_start_prefers_snapshot(
+        self,
+        mock_vector_store: MagicMock,
+        mock_web_crawler: MagicMock,
+        tmp_path: Path,
+    ) -> None:
+        """スナップショットがある場合はベクトルストアを走査しない."""
+        snapshot_path = tmp_path / "bm25.json"
+        source = BM25Index()
+        source.add_documents([("a_0", "dragon quest", "https://example.com/a")])
+        write_snapshot_file(snapshot_path, source.to_snapshot())
+        mock_vector_store.get_document_ids = AsyncMock(return_value={"a_0"})
+        mock_vector_store.iter_documents = MagicMock()
+
+        index = BM25Index()
+        service = self._make_service(
+            mock_vector_store, mock_web_crawler, index, snapshot_path
+        )
+
+        count = await service.warm_start_bm25_index()
+
+        assert count == 1
+        mock_vector_store.iter_documents.assert_not_called()
+
+    async def test_snapshot_out_of_sync_with_vector_store_is_rebuilt(
+        self,
+        mock_vector_store: MagicMock,
+        mock_web_crawler: MagicMock,
+        tmp_path: Path,
+    ) -> None:
+        """スナップショットのチャンクIDがベクトルストアと一致しない場合は再構築する."""
+        snapshot_path = tmp_path / "bm25.json"
+        source = BM25Index()
+        source.add_documents([
+            ("a_0", "dragon quest", "https://example.com/a"),
+            ("b_0", "secret password", "https://example.com/b"),
+        ])
+        write_snapshot_file(snapshot_path, source.to_snapshot())
+
+        async def iter_documents(batch_size: int = 500) -> AsyncIterator[
+            list[tuple[str, str, str]]
+        ]:
+            yield [("a_0", "dragon quest", "https://example.com/a")]
+
+        mock_vector_store.get_document_ids = AsyncMock(return_value={"a_0"})
+        mock_vector_store.iter_documents = iter_documents
+        index = BM25Index()
+        service = self._make_service(
+            mock_vector_store, mock_web_crawler, index, snapshot_path
+        )
+
+        count = await service.warm_start_bm25_index()
+
+        assert count == 1
+        assert index.get_source_url("b_0") is None
+        # 再構築した内容でスナップショットを書き直す
+        restored = BM25Index()
+        assert restored.load_snapshot(snapshot_path)
+        assert restored.get_document_ids() == {"a_0"}
+
+    async def test_source_deleted_after_last_flush_is_not_resurrected(
+        self,
+        mock_web_crawler: MagicMock,
+        tmp_path: Path,
+    ) -> None:
+        """最後の保存後に削除したソースは、再起動後の検索で返さない."""
+        vector_store = VectorStore.create_ephemeral(
+            _ConstantEmbedding(), collection_name=f"test_{tmp_path.name}"
+        )
+        snapshot_path = tmp_path / "bm25.json"
+        service = self._make_service(
+            vector_store, mock_web_crawler, BM25Index(), snapshot_path
+        )
+        texts = [
+            "社内ポータルの利用方法について説明します。",
+            "機密情報のパスワードはhunter2です。",
+            "会議室の予約は前日までに行ってください。",
+            "経費精算の締め日は毎月末です。",
+        ]
+        for i, text in enumerate(texts, start=1):
+            mock_web_crawler.crawl_page.return_value = self._page(f"https://e.com/{i}", text)
+            await service.ingest_page(f"https://e.com/{i}")
+        await service.flush_bm25_snapshot()
+
+        await service.delete_source("https://e.com/2")
+        # 保存間隔の経過前に異常終了した想定で、close() を呼ばずに再起動する
+        restarted = self._make_service(
+            vector_store, mock_web_crawler, BM25Index(), snapshot_path
+        )
+        count = await restarted.warm_start_bm25_index()
+
+        assert count == vector_store.get_stats(count_sources=False)["total_chunks"] == 3
+        settings = MagicMock()
+        settings.rag_similarity_threshold = None
+        settings.rag_debug_log_enabled = False
+        with patch("src.config.settings.get_settings", return_value=settings):
+            result = await restarted.retrieve("パスワード")
+        assert "hunter2" not in result.context
+        assert "https://e.com/2" not in result.sources
+
+    async def test_warm_start_opens_segmented_index_without_rebuild(
+        self,
+        mock_vector_store: MagicMock,
+        mock_web_crawler: MagicMock,
+        tmp_path: Path,
+    ) -> None:
+        """セグメント型のインデックスに内容があれば再構築もスナップショット保存もしない."""
+        segment_dir = tmp_path / "segments"
+        source = BM25Index(segment_dir=segment_dir)
+        source.add_documents([("a_0", "dragon quest", "https://example.com/a")])
+        source.close()
+        mock_vector_store.iter_documents = MagicMock()
+        snapshot_path = tmp_path / "bm25.json"
+
+        index = BM25Index(segment_dir=segment_dir)
+        service = self._make_service(
+            mock_vector_store, mock_web_crawler, index, snapshot_path
+        )
+
+        count = await service.warm_start_bm25_index()
+
+        assert count == 1
+        mock_vector_store.iter_documents.assert_not_called()
+        assert not snapshot_path.exists()
+
+    async def test_ingest_and_delete_write_snapshot_on_flush(
+        self,
+        mock_vector_store: MagicMock,
+        mock_web_crawler: MagicMock,
+        tmp_path: Path,
+    ) -> None:
+        """取り込みの変更は保存間隔を待ってまとめて保存し、削除はすぐに保存する."""
+        snapshot_path = tmp_path / "bm25.json"
+        index = BM25Index()
+        service = self._make_service(
+            mock_vector_store, mock_web_crawler, index, snapshot_path
+        )
+        mock_web_crawler.crawl_page.return_value = self._page(
+            "https://example.com/page1",
+            "これはテストコンテンツです。十分な長さのテキストが必要です。",
+        )
+
+        await service.ingest_page("https://example.com/page1")
+
+        # 保存間隔（30秒）が経過するまでは書き込まない
+        assert not snapshot_path.exists()
+        await service.flush_bm25_snapshot()
+        restored = BM25Index()
+        assert restored.load_snapshot(snapshot_path)
+        assert restored.get_document_count() == index.get_document_count() > 0
+
+        # 削除は保存間隔を待たずにすぐ保存する
+        await service.delete_source("https://example.com/page1")
+        restored = BM25Index()
+        assert restored.load_snapshot(snapshot_path)
+        assert restored.get_document_count() == 0
+        await service.close()
+
+    async def test_snapshot_writes_are_batched(
+        self,
+        mock_vector_store: MagicMock,
+        mock_web_crawler: MagicMock,
+        tmp_path: Path,
+    ) -> None:
+        """複数ページの取り込みでも、スナップショットは件数の上限ごとに1回だけ書き込む."""
+        snapshot_path = tmp_path / "bm25.json"
+        index = BM25Index()
+        service = self._make_service(
+            mock_vector_store,
+            mock_web_crawler,
+            index,
+            snapshot_path,
+            snapshot_max_pending=5,
+        )
+
+        with patch(
+            "src.rag.bm25_index.write_snapshot_file", wraps=write_snapshot_file
+        ) as write:
+            for i in range(10):
+                mock_web_crawler.crawl_page.return_value = self._page(
+                    f"https://example.com/page{i}", f"ページ{i}のテストコンテンツです。"
+                )
+                await service.ingest_page(f"https://example.com/page{i}")
+                await asyncio.sleep(0)
+            await service.close()
+
+        assert write.call_count == 2
+        restored = BM25Index()
+        assert restored.load_snapshot(snapshot_path)
+        assert restored.get_document_count() == index.get_document_count() == 10
+
+    async def test_ingest_during_snapshot_restore_is_kept(
+        self,
+        mock_vector_store: MagicMock,
+        mock_web_crawler: MagicMock,
+        tmp_path: Path,
+    ) -> None:
+        """スナップショットからの復元中に取り込み・削除したページは、復元後も反映されている."""
+        snapshot_path = tmp_path / "bm25.json"
+        source = BM25Index()
+        source.add_documents([("old_0", "dragon quest", "https://example.com/old")])
+        write_snapshot_file(snapshot_path, source.to_snapshot())
+
+        mock_vector_store.get_document_ids = AsyncMock(return_value={"old_0"})
+        index = BM25Index()
+        service = self._make_service(
+            mock_vector_store, mock_web_crawler, index, snapshot_path
+        )
+        reading = threading.Event()
+        release = threading.Event()
+        read_snapshot = index.read_snapshot
+
+        def slow_read_snapshot(path: str) -> BM25Index | None:
+            reading.set()
+            release.wait(timeout=5)
+            return read_snapshot(path)
+
+        with patch.object(index, "read_snapshot", side_effect=slow_read_snapshot):
+            warm_start = asyncio.create_task(service.warm_start_bm25_index())
+            await asyncio.to_thread(reading.wait, 5)
+
+            mock_web_crawler.crawl_page.return_value = self._page(
+                "https://example.com/new", "pokemon battle"
+            )
+            await service.ingest_page("https://example.com/new")
+            await service.delete_source("https://example.com/old")
+            release.set()
+            count = await warm_start
+
+        assert count == 1
+        assert index.get_source_url("old_0") is None
+        url_hash = hashlib.sha256(b"https://example.com/new").hexdigest()[:16]
+        assert index.get_source_url(f"{url_hash}_0") == "https://example.com/new"
+
+    async def test_delete_during_rebuild_is_not_resurrected(
+        self,
+        mock_vector_store: MagicMock,
+        mock_web_crawler: MagicMock,
+        tmp_path: Path,
+    ) -> None:
+        """ベクトルストアからの再構築中に削除したページは、再構築後に復活しない."""
+        deleted = asyncio.Event()
+
+        async def iter_documents(batch_size: int = 500) -> AsyncIterator[
+            list[tuple[str, str, str]]
+        ]:
+            yield [("old_0", "dragon quest", "https://example.com/old")]
+            # 取得済みのチャンクが削除されるまで再構築を止める
+            await deleted.wait()
+
+        mock_vector_store.iter_documents = iter_documents
+        index = BM25Index()
+        service = self._make_service(
+            mock_vector_store, mock_web_crawler, index, tmp_path / "bm25.json"
+        )
+
+        warm_start = asyncio.create_task(service.warm_start_bm25_index())
+        await asyncio.sleep(0.05)
+        await service.delete_source("https://example.com/old")
+        deleted.set()
+        count = await warm_start
+
+        assert count == 0
+        assert index.get_source_url("old_0") is None
+
+
 class TestTableDataSearch:
     """AC12: テーブル内データ検索テスト."""
 
@@ -408,6 +795,7 @@ class TestHybridSearchEngineInitialization:
         mock_settings = MagicMock()
         mock_settings.rag_vector_weight = 0.5
         mock_settings.rag_rrf_k = 60
+        mock_settings.rag_hybrid_leg_timeout_sec = 0.0
 
         with patch("src.config.settings.get_settings", return_value=mock_settings):
             service = RAGKnowledgeService(
@@ -0,0 +1,79 @@
+"""検索結果キャッシュのテスト
+
+仕様: docs/specs/f9-rag.md
+"""
+
+from unittest.mock import patch
+
+from src.rag.retrieval_cache import RetrievalCache, normalize_query
+
+
+class TestNormalizeQuery:
+    """normalize_query関数のテスト."""
+
+    def test_width_case_and_whitespace_are_normalized(self) -> None:
+        """全角・半角、大文字・小文字、空白の違いは同じクエリとして扱う."""
+        assert normalize_query("  ＤＱ３の　りゅうおう\n ") == normalize_query("dq3の りゅうおう")
+
+
+class TestRetrievalCache:
+    """RetrievalCacheのテスト."""
+
+    def test_hit_and_miss_are_counted(self) -> None:
+        """キャッシュのヒット・ミスが記録され、正規化後のクエリで一致する."""
+        cache: RetrievalCache[str] = RetrievalCache()
+
+        assert cache.get(cache.key("りゅうおう", 5, "hybrid", cache.generation)) is None
+        cache.put(cache.key("りゅうおう", 5, "hybrid", cache.generation), "result")
+
+        assert cache.get(cache.key(" りゅうおう ", 5, "hybrid", cache.generation)) == "result"
+        assert cache.get(cache.key("りゅうおう", 3, "hybrid", cache.generation)) is None
+        assert cache.get(cache.key("りゅうおう", 5, "vector", cache.generation)) is None
+        assert cache.stats() == {"hits": 1, "misses": 3, "entries": 1, "generation": 0}
+
+    def test_least_recently_used_entry_is_evicted(self) -> None:
+        """上限を超えると最も長く使われていないエントリから削除される."""
+        cache: RetrievalCache[str] = RetrievalCache(max_entries=2)
+        first, second, third = (cache.key(q, 5, "vector", 0) for q in ("a", "b", "c"))
+        cache.put(first, "a")
+        cache.put(second, "b")
+        cache.get(first)
+        cache.put(third, "c")
+
+        assert len(cache) == 2
+        assert cache.get(second) is None
+        assert cache.get(first) == "a"
+
+    def test_expired_entry_is_a_miss(self) -> None:
+        """有効期間を過ぎたエントリは返さない."""
+        cache: RetrievalCache[str] = RetrievalCache(ttl_sec=10.0)
+        key = cache.key("a", 5, "vector", 0)
+        with patch("src.rag.retrieval_cache.time.monotonic", return_value=100.0):
+            cache.put(key, "a")
+        with patch("src.rag.retrieval_cache.time.monotonic", return_value=109.0):
+            assert cache.get(key) == "a"
+        with patch("src.rag.retrieval_cache.time.monotonic", return_value=110.0):
+            assert cache.get(key) is None
+        assert len(cache) == 0
+
+    def test_invalidate_advances_generation(self) -> None:
+        """世代を進めると既存のエントリは参照されず、古い世代で計算した結果も保存されない."""
+        cache: RetrievalCache[str] = RetrievalCache()
+        started_generation = cache.generation
+        cache.put(cache.key("a", 5, "vector", started_generation), "a")
+
+        cache.invalidate()
+        # 検索中に取り込みが完了したケース: 開始時の世代で保存しようとしても無視される
+        cache.put(cache.key("b", 5, "vector", started_generation), "b")
+
+        assert cache.generation == started_generation + 1
+        assert len(cache) == 0
+        assert cache.get(cache.key("a", 5, "vector", cache.generation)) is None
+
+    def test_zero_size_disables_cache(self) -> None:
+        """上限0の場合はキャッシュしない."""
+        cache: RetrievalCache[str] = RetrievalCache(max_entries=0)
+        cache.put(cache.key("a", 5, "vector", 0), "a")
+
+        assert cache.enabled is False
+        assert len(cache) == 0
@@ -6,15 +6,32 @@ from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
+from src.rag.ingest_pipeline import StageStats
+from src.rag.source_registry import SourceRecord
+from src.services.rag_knowledge import PageIngestResult
 from src.slack.handlers import (
     _handle_rag_add,
     _handle_rag_crawl,
     _handle_rag_delete,
+    _handle_rag_list,
     _handle_rag_status,
     _parse_rag_command,
 )
 
 
+def _crawl_result(pages: int, chunks: int, errors: int) -> dict[str, int]:
+    """ingest_from_index の戻り値（全チャンクを新規追加した場合）を作成する."""
+    return {
+        "pages_crawled": pages,
+        "chunks_stored": chunks,
+        "chunks_added": chunks,
+        "chunks_updated": 0,
+        "chunks_kept": 0,
+        "chunks_removed": 0,
+        "errors": errors,
+    }
+
+
 class TestParseRagCommand:
     """_parse_rag_command関数のテスト."""
 
@@ -134,7 +151,7 @@ class TestHandleRagCrawl:
         """クロール成功時のレスポンス（say関数なし、従来の動作）."""
         mock_rag = MagicMock()
         mock_rag.ingest_from_index = AsyncMock(
-            return_value={"pages_crawled": 5, "chunks_stored": 20, "errors": 0}
+            return_value=_crawl_result(5, 20, 0)
         )
 
         result = await _handle_rag_crawl(
@@ -195,7 +212,7 @@ class TestHandleRagCrawlProgressFeedback:
         """AC42: rag crawl実行時、即座に開始メッセージがスレッド内に投稿されること."""
         mock_rag = MagicMock()
         mock_rag.ingest_from_index = AsyncMock(
-            return_value={"pages_crawled": 5, "chunks_stored": 20, "errors": 0}
+            return_value=_crawl_result(5, 20, 0)
         )
         mock_say = AsyncMock()
 
@@ -226,7 +243,7 @@ class TestHandleRagCrawlProgressFeedback:
                 # 10ページ分の進捗を報告（interval=5なので5, 10で2回投稿される）
                 for i in range(1, 11):
                     await progress_callback(i, 10)  # type: ignore[misc]
-            return {"pages_crawled": 10, "chunks_stored": 50, "errors": 0}
+            return _crawl_result(10, 50, 0)
 
         mock_rag.ingest_from_index = mock_ingest
         mock_say = AsyncMock()
@@ -254,12 +271,46 @@ class TestHandleRagCrawlProgressFeedback:
         for call in progress_calls:
             assert call.kwargs.get("thread_ts") == "1234567890.123456"
 
+    @pytest.mark.asyncio
+    async def test_progress_message_shows_stage_throughput(self) -> None:
+        """進捗メッセージに取り込みパイプラインの各ステージのスループットが表示されること."""
+        mock_rag = MagicMock()
+        stages = [
+            StageStats("crawl", processed=5, started_at=0.0),
+            StageStats("chunk", processed=4, started_at=0.0),
+            StageStats("embed", processed=3, started_at=0.0),
+            StageStats("store", processed=2, started_at=0.0),
+        ]
+
+        async def mock_ingest(url: str, pattern: str, progress_callback: object = None) -> dict[str, int]:
+            if progress_callback:
+                await progress_callback(5, 10, stages)  # type: ignore[operator]
+            return _crawl_result(10, 50, 0)
+
+        mock_rag.ingest_from_index = mock_ingest
+        mock_say = AsyncMock()
+
+        await _handle_rag_crawl(
+            mock_rag,
+            "https://example.com/docs",
+            "",
+            say=mock_say,
+            thread_ts="1234567890.123456",
+            progress_interval=5,
+        )
+
+        progress_text = mock_say.call_args_list[1].kwargs["text"]
+        assert progress_text.startswith("└─ 5ページ取得中... (取得 ")
+        for label in ("取得", "分割", "Embedding", "保存"):
+            assert f"{label} " in progress_text
+        assert "件/秒" in progress_text
+
     @pytest.mark.asyncio
     async def test_ac44_rag_crawl_posts_completion_summary(self) -> None:
         """AC44: クロール完了時、結果サマリーがスレッド内に投稿されること."""
         mock_rag = MagicMock()
         mock_rag.ingest_from_index = AsyncMock(
-            return_value={"pages_crawled": 15, "chunks_stored": 128, "errors": 2}
+            return_value=_crawl_result(15, 128, 2)
         )
         mock_say = AsyncMock()
 
@@ -281,6 +332,7 @@ class TestHandleRagCrawlProgressFeedback:
         assert "15ページ" in completion_text
         assert "128チャンク" in completion_text
         assert "エラー: 2件" in completion_text
+        assert "追加 128 / 更新 0 / 変更なし 0 / 削除 0" in completion_text
 
     @pytest.mark.asyncio
     async def test_ac45_progress_messages_in_thread_only(self) -> None:
@@ -290,7 +342,7 @@ class TestHandleRagCrawlProgressFeedback:
         async def mock_ingest(url: str, pattern: str, progress_callback: object = None) -> dict[str, int]:
             if progress_callback:
                 await progress_callback(5, 10)  # type: ignore[misc]
-            return {"pages_crawled": 10, "chunks_stored": 50, "errors": 0}
+            return _crawl_result(10, 50, 0)
 
         mock_rag.ingest_from_index = mock_ingest
         mock_say = AsyncMock()
@@ -324,19 +376,22 @@ class TestHandleRagAdd:
     async def test_success(self) -> None:
         """ページ追加成功時のレスポンス."""
         mock_rag = MagicMock()
-        mock_rag.ingest_page = AsyncMock(return_value=5)
+        mock_rag.ingest_page = AsyncMock(
+            return_value=PageIngestResult(added=1, updated=1, kept=3, removed=2)
+        )
 
         result = await _handle_rag_add(mock_rag, "https://example.com/page")
 
         assert "取り込みました" in result
         assert "5チャンク" in result
+        assert "追加 1 / 更新 1 / 変更なし 3 / 削除 2" in result
         mock_rag.ingest_page.assert_called_once_with("https://example.com/page")
 
     @pytest.mark.asyncio
     async def test_no_chunks(self) -> None:
         """チャンク0の場合のエラーメッセージ."""
         mock_rag = MagicMock()
-        mock_rag.ingest_page = AsyncMock(return_value=0)
+        mock_rag.ingest_page = AsyncMock(return_value=PageIngestResult())
 
         result = await _handle_rag_add(mock_rag, "https://example.com/page")
 
@@ -393,6 +448,58 @@ class TestHandleRagStatus:
         assert "統計" in result
         assert "100" in result
         assert "10" in result
+        assert "検索キャッシュ" not in result
+
+    @pytest.mark.asyncio
+    async def test_shows_total_bytes_from_registry(self) -> None:
+        """ソースURL台帳が有効な場合は本文データ量を表示する."""
+        mock_rag = MagicMock()
+        mock_rag.get_stats = AsyncMock(
+            return_value={"total_chunks": 100, "source_count": 10, "total_bytes": 2560}
+        )
+
+        result = await _handle_rag_status(mock_rag)
+
+        assert "本文データ量: 2.5KB" in result
+
+    @pytest.mark.asyncio
+    async def test_shows_reembedding_progress(self) -> None:
+        """Embeddingモデル変更の再Embedding中は進捗を表示する."""
+        mock_rag = MagicMock()
+        mock_rag.get_stats = AsyncMock(
+            return_value={
+                "total_chunks": 100,
+                "source_count": 10,
+                "reembed_done": 25,
+                "reembed_total": 100,
+            }
+        )
+
+        result = await _handle_rag_status(mock_rag)
+
+        assert "再Embedding中: 25 / 100 (25.0%)" in result
+
+    @pytest.mark.asyncio
+    async def test_shows_retrieval_cache_stats(self) -> None:
+        """検索キャッシュ・Embeddingキャッシュ有効時はヒット率を表示する."""
+        mock_rag = MagicMock()
+        mock_rag.get_stats = AsyncMock(
+            return_value={
+                "total_chunks": 100,
+                "source_count": 10,
+                "retrieval_cache_hits": 3,
+                "retrieval_cache_misses": 1,
+                "retrieval_cache_entries": 2,
+                "embedding_cache_hits": 0,
+                "embedding_cache_misses": 0,
+                "embedding_cache_entries": 0,
+            }
+        )
+
+        result = await _handle_rag_status(mock_rag)
+
+        assert "検索キャッシュ: ヒット 3 / 参照 4 (75.0%), 保持 2件" in result
+        assert "Embeddingキャッシュ: ヒット 0 / 参照 0 (0.0%), 保持 0件" in result
 
     @pytest.mark.asyncio
     async def test_exception(self) -> None:
@@ -449,3 +556,38 @@ class TestHandleRagDelete:
 
         assert "エラー" in result
         assert "無効なURLスキーム" in result
+
+
+class TestHandleRagList:
+    """_handle_rag_list関数のテスト."""
+
+    @pytest.mark.asyncio
+    async def test_lists_sources(self) -> None:
+        """ソースURLごとのチャンク数と取り込み日を表示し、上限を超えた分は件数のみ表示する."""
+        mock_rag = MagicMock()
+        mock_rag.list_sources = AsyncMock(return_value=[
+            SourceRecord(
+                "https://example.com/a", chunk_count=8, crawled_at="2026-10-18T09:00:00+00:00"
+            ),
+            SourceRecord("https://example.com/b", chunk_count=2),
+            SourceRecord("https://example.com/c", chunk_count=1),
+        ])
+
+        result = await _handle_rag_list(mock_rag, limit=2)
+
+        assert result.splitlines() == [
+            "取り込み済みソース (3件):",
+            "• https://example.com/a (8チャンク, 取り込み: 2026-10-18)",
+            "• https://example.com/b (2チャンク, 取り込み: 不明)",
+            "…他 1件",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_no_sources(self) -> None:
+        """ソースが無い場合のメッセージ."""
+        mock_rag = MagicMock()
+        mock_rag.list_sources = AsyncMock(return_value=[])
+
+        result = await _handle_rag_list(mock_rag)
+
+        assert "ありません" in result
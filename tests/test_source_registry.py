@@ -0,0 +1,70 @@
+"""ソースURL台帳のテスト
+
+仕様: docs/specs/f9-rag.md
+"""
+
+from pathlib import Path
+
+from src.rag.source_registry import SourceRecord, SourceRegistry
+
+
+def _record(url: str, chunks: int, size: int = 100) -> SourceRecord:
+    return SourceRecord(
+        source_url=url,
+        chunk_count=chunks,
+        title=f"title of {url}",
+        crawled_at="2026-10-18T00:00:00+00:00",
+        content_hash="abcd",
+        byte_size=size,
+    )
+
+
+class TestSourceRegistry:
+    """SourceRegistryのテスト."""
+
+    def test_totals_follow_upsert_and_remove(self) -> None:
+        """追加・更新・削除に合わせて合計値が差分更新される."""
+        registry = SourceRegistry(":memory:")
+
+        registry.upsert(_record("https://example.com/a", 3, 300))
+        registry.upsert(_record("https://example.com/b", 2, 50))
+        registry.upsert(_record("https://example.com/a", 5, 500))
+
+        assert registry.stats() == {"source_count": 2, "chunk_count": 7, "byte_size": 550}
+        assert registry.get("https://example.com/a") == _record("https://example.com/a", 5, 500)
+
+        assert registry.remove("https://example.com/a") == _record(
+            "https://example.com/a", 5, 500
+        )
+        assert registry.remove("https://example.com/a") is None
+        assert registry.stats() == {"source_count": 1, "chunk_count": 2, "byte_size": 50}
+
+    def test_zero_chunks_removes_source(self) -> None:
+        """チャンク数0で更新したソースは台帳から削除される."""
+        registry = SourceRegistry(":memory:")
+        registry.upsert(_record("https://example.com/a", 3))
+
+        registry.upsert(_record("https://example.com/a", 0))
+
+        assert len(registry) == 0
+
+    def test_reopen_restores_records(self, tmp_path: Path) -> None:
+        """台帳はSQLiteに永続化され、開き直しても同じ内容・合計値になる."""
+        path = tmp_path / "sources.db"
+        registry = SourceRegistry(path)
+        registry.replace_all([
+            _record("https://example.com/b", 2, 20),
+            _record("https://example.com/a", 1, 10),
+        ])
+        registry.upsert(_record("https://example.com/c", 4, 40))
+        registry.close()
+
+        reopened = SourceRegistry(path)
+
+        assert [r.source_url for r in reopened.list_sources()] == [
+            "https://example.com/a",
+            "https://example.com/b",
+            "https://example.com/c",
+        ]
+        assert reopened.stats() == {"source_count": 3, "chunk_count": 7, "byte_size": 70}
+        reopened.close()
@@ -0,0 +1,113 @@
+"""BM25用並列トークナイザのテスト
+
+仕様: docs/specs/f9-rag.md
+"""
+
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from src.rag.bm25_index import tokenize_japanese
+from src.rag.tokenizer_pool import TokenCache, TokenizerPool
+
+_TEXTS = [
+    "りゅうおうはドラゴンクエストのボスです",
+    "スライムは最弱のモンスターです",
+    "ゾーマは強力な魔王です",
+    "勇者は伝説の剣を手に入れた",
+    "dragon quest adventure game",
+]
+
+
+class TestTokenCache:
+    """TokenCacheのテスト."""
+
+    def test_hit_and_miss_are_counted(self) -> None:
+        """キャッシュのヒット・ミスが記録される."""
+        cache = TokenCache()
+        key = TokenCache.key("テキスト")
+
+        assert cache.get_many([key]) == {}
+        cache.put_many({key: ["テキスト"]})
+        assert cache.get_many([key]) == {key: ["テキスト"]}
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_entries_survive_reopen(self, tmp_path: Path) -> None:
+        """保存したトークン列は開き直した後も取得できる（トークナイザ名が違えば別のキー）."""
+        path = tmp_path / "tokens.db"
+        key = TokenCache.key("テキスト")
+        cache = TokenCache(path, tokenizer="fugashi")
+        cache.put_many({key: ["テキ", "スト"]})
+        cache.close()
+
+        reopened = TokenCache(path, tokenizer="fugashi")
+        assert len(reopened) == 1
+        assert reopened.get_many([key]) == {key: ["テキ", "スト"]}
+        reopened.close()
+
+        other = TokenCache(path, tokenizer="simple")
+        assert other.get_many([key]) == {}
+        other.close()
+
+    def test_least_recently_used_entry_is_evicted(self) -> None:
+        """上限を超えると最も長く使われていないエントリから削除される."""
+        cache = TokenCache(max_entries=2)
+        first, second, third = (TokenCache.key(t) for t in ("a", "b", "c"))
+        with patch("src.rag.tokenizer_pool.time.time", side_effect=[1.0, 2.0, 3.0, 4.0]):
+            cache.put_many({first: ["a"]})
+            cache.put_many({second: ["b"]})
+            cache.get_many([first])
+            cache.put_many({third: ["c"]})
+
+        assert len(cache) == 2
+        assert cache.get_many([first, second, third]) == {first: ["a"], third: ["c"]}
+
+    def test_zero_size_disables_cache(self) -> None:
+        """上限0の場合はキャッシュしない."""
+        cache = TokenCache(max_entries=0)
+        cache.put_many({TokenCache.key("a"): ["a"]})
+        assert len(cache) == 0
+
+
+class TestTokenizerPool:
+    """TokenizerPoolのテスト."""
+
+    async def test_process_pool_matches_serial_tokenization(self) -> None:
+        """プロセスプールでの結果が逐次トークン化と同じ順序・内容になる."""
+        pool = TokenizerPool(max_workers=2, chunk_size=2)
+        try:
+            result = await pool.tokenize(_TEXTS)
+        finally:
+            pool.shutdown()
+
+        assert result == [tokenize_japanese(text) for text in _TEXTS]
+
+    async def test_cached_texts_skip_tokenization(self) -> None:
+        """キャッシュ済みのテキストはトークン化しない."""
+        pool = TokenizerPool(max_workers=1, cache=TokenCache())
+        await pool.tokenize(_TEXTS[:3])
+
+        with patch(
+            "src.rag.tokenizer_pool._tokenize_chunk", wraps=lambda texts: [["new"]] * len(texts)
+        ) as tokenize_chunk:
+            result = await pool.tokenize(_TEXTS)
+
+        # 未キャッシュの2件のみがトークン化される
+        tokenize_chunk.assert_called_once_with(_TEXTS[3:])
+        assert result[:3] == [tokenize_japanese(text) for text in _TEXTS[:3]]
+        assert result[3:] == [["new"], ["new"]]
+        assert pool.cache is not None
+        assert pool.cache.hits == 3
+
+    async def test_broken_pool_falls_back_to_in_process(self) -> None:
+        """プロセスプールが異常終了した場合はプロセス内でトークン化する."""
+        pool = TokenizerPool(max_workers=2, chunk_size=1)
+        broken = MagicMock()
+        broken.submit.side_effect = BrokenProcessPool("worker died")
+
+        with patch.object(pool._pool, "_get_executor", return_value=broken):
+            result = await pool.tokenize(_TEXTS)
+
+        assert result == [tokenize_japanese(text) for text in _TEXTS]
+        # 以後はプロセスプールを使わない
+        assert pool._pool.disabled
@@ -6,11 +6,14 @@
 from __future__ import annotations
 
 import uuid
+from pathlib import Path
+from unittest.mock import MagicMock
 
 import pytest
 
 from src.embedding.base import EmbeddingProvider
-from src.rag.vector_store import DocumentChunk, RetrievalResult, VectorStore
+from src.embedding.cached_embedding import CachedEmbedding
+from src.rag.vector_store import DocumentChunk, HnswParams, RetrievalResult, VectorStore
 
 
 class MockEmbeddingProvider(EmbeddingProvider):
@@ -96,6 +99,32 @@ class TestAC8AddDocuments:
         await ephemeral_store.add_documents([chunk])
         assert mock_embedding._call_count == 1
 
+    @pytest.mark.asyncio
+    async def test_embed_then_upsert_embedded(
+        self,
+        mock_embedding: MockEmbeddingProvider,
+        ephemeral_store: VectorStore,
+    ) -> None:
+        """Embeddingと保存を分けて実行でき、add_documents() と同じ内容が保存される."""
+        chunks = [
+            DocumentChunk(
+                id=f"doc_{i}",
+                text=f"テキスト{i}",
+                metadata={"source_url": "https://example.com", "chunk_index": i},
+            )
+            for i in range(3)
+        ]
+
+        embedded = await ephemeral_store.embed_documents(chunks)
+
+        assert embedded.embeddings == await mock_embedding.embed([c.text for c in chunks])
+        assert embedded.previous_embeddings is None
+        assert ephemeral_store.get_stats(count_sources=False)["total_chunks"] == 0
+        assert await ephemeral_store.upsert_embedded(embedded) == 3
+        assert ephemeral_store.get_stats(count_sources=False)["total_chunks"] == 3
+        results = await ephemeral_store.search("テキスト", n_results=5)
+        assert sorted(r.text for r in results) == ["テキスト0", "テキスト1", "テキスト2"]
+
 
 class TestAC9SearchSimilarChunks:
     """AC9: VectorStore.search() でクエリに類似するチャンクを検索できること."""
@@ -222,6 +251,153 @@ class TestAC10DeleteBySource:
         assert deleted_count == 0
 
 
+class TestContentHashes:
+    """差分取り込み用の content_hash 取得・ID指定削除のテスト."""
+
+    @pytest.mark.asyncio
+    async def test_get_content_hashes_and_delete_documents(
+        self, ephemeral_store: VectorStore
+    ) -> None:
+        """ソースURLのチャンクのハッシュを取得し、ID指定で削除できる."""
+        chunks = [
+            DocumentChunk(
+                id="doc1_0",
+                text="テキスト1",
+                metadata={"source_url": "https://example.com/page1", "content_hash": "aaaa"},
+            ),
+            DocumentChunk(
+                id="doc1_1",
+                text="テキスト2",
+                metadata={"source_url": "https://example.com/page1"},
+            ),
+            DocumentChunk(
+                id="doc2_0",
+                text="テキスト3",
+                metadata={"source_url": "https://example.com/page2", "content_hash": "bbbb"},
+            ),
+        ]
+        await ephemeral_store.add_documents(chunks)
+
+        hashes = await ephemeral_store.get_content_hashes("https://example.com/page1")
+        # content_hash 未記録のチャンクは空文字
+        assert hashes == {"doc1_0": "aaaa", "doc1_1": ""}
+
+        assert await ephemeral_store.delete_documents(["doc1_1"]) == 1
+        assert await ephemeral_store.delete_documents([]) == 0
+        assert await ephemeral_store.get_content_hashes("https://example.com/page1") == {
+            "doc1_0": "aaaa"
+        }
+        assert ephemeral_store.get_stats()["total_chunks"] == 2
+
+    @pytest.mark.asyncio
+    async def test_update_metadata_keeps_embedding(
+        self, ephemeral_store: VectorStore, mock_embedding: MockEmbeddingProvider
+    ) -> None:
+        """メタデータのみ更新し、Embeddingの再生成・存在しないIDの追加は行わない."""
+        metadata: dict[str, str | int] = {
+            "source_url": "https://example.com/page1",
+            "title": "旧タイトル",
+            "content_hash": "aaaa",
+        }
+        await ephemeral_store.add_documents(
+            [DocumentChunk(id="doc1_0", text="テキスト1", metadata=metadata)]
+        )
+        embed_calls = mock_embedding._call_count
+
+        updated = await ephemeral_store.update_metadata([
+            DocumentChunk(
+                id="doc1_0", text="テキスト1", metadata={**metadata, "title": "新タイトル"}
+            ),
+            DocumentChunk(id="missing_0", text="テキスト2", metadata=metadata),
+        ])
+
+        assert updated == 1
+        assert mock_embedding._call_count == embed_calls
+        results = await ephemeral_store.search("テキスト1", n_results=5)
+        assert [r.metadata["title"] for r in results] == ["新タイトル"]
+        assert ephemeral_store.get_stats()["total_chunks"] == 1
+
+
+class TestCollectSources:
+    """ソースURL台帳の再構築用の集計のテスト."""
+
+    @pytest.mark.asyncio
+    async def test_collect_sources_groups_chunks(self, ephemeral_store: VectorStore) -> None:
+        """ソースURLごとにチャンク数・本文のバイト数・最新の取り込み日時を集計する."""
+        chunks = [
+            DocumentChunk(
+                id=f"a_{i}",
+                text="あいう",
+                metadata={
+                    "source_url": "https://example.com/a",
+                    "title": "A",
+                    "crawled_at": f"2026-10-1{i}T00:00:00+00:00",
+                },
+            )
+            for i in range(3)
+        ] + [
+            DocumentChunk(
+                id="b_0",
+                text="abc",
+                metadata={"source_url": "https://example.com/b", "title": "B"},
+            )
+        ]
+        await ephemeral_store.add_documents(chunks)
+
+        records = await ephemeral_store.collect_sources(batch_size=2)
+
+        by_url = {record.source_url: record for record in records}
+        assert by_url["https://example.com/a"].chunk_count == 3
+        assert by_url["https://example.com/a"].byte_size == 27
+        assert by_url["https://example.com/a"].crawled_at == "2026-10-12T00:00:00+00:00"
+        assert by_url["https://example.com/b"].chunk_count == 1
+        assert by_url["https://example.com/b"].title == "B"
+        assert ephemeral_store.get_stats(count_sources=False) == {"total_chunks": 4}
+
+
+class TestDocumentCountCache:
+    """検索時のチャンク数キャッシュのテスト."""
+
+    @pytest.mark.asyncio
+    async def test_search_does_not_count_per_query(self, ephemeral_store: VectorStore) -> None:
+        """チャンク数は書き込みで差分更新され、検索ごとに count() を呼ばない."""
+        await ephemeral_store.add_documents([
+            DocumentChunk(id="doc_0", text="テキスト0", metadata={"source_url": "s"}),
+            DocumentChunk(id="doc_1", text="テキスト1", metadata={"source_url": "s"}),
+        ])
+        await ephemeral_store.search("テキスト")  # 初回の検索で件数を取得する
+        collection = ephemeral_store._collection
+        ephemeral_store._collection = MagicMock(wraps=collection)
+
+        # 既存IDの上書きは件数を増やさず、新規IDと削除は差分で反映される
+        await ephemeral_store.add_documents([
+            DocumentChunk(id="doc_1", text="テキスト1改", metadata={"source_url": "s"}),
+            DocumentChunk(id="doc_2", text="テキスト2", metadata={"source_url": "t"}),
+        ])
+        assert await ephemeral_store.delete_documents(["doc_0", "missing"]) == 1
+        results = [await ephemeral_store.search("テキスト", n_results=5) for _ in range(3)]
+
+        assert [len(r) for r in results] == [2, 2, 2]
+        ephemeral_store._collection.count.assert_not_called()
+        assert ephemeral_store._collection.query.call_count == 3
+        assert ephemeral_store._document_count() == collection.count() == 2
+
+    @pytest.mark.asyncio
+    async def test_count_is_reconciled_periodically(
+        self, mock_embedding: MockEmbeddingProvider
+    ) -> None:
+        """照合間隔を過ぎると、ずれた件数がChromaDBの件数で補正される."""
+        store = VectorStore.create_ephemeral(mock_embedding, collection_name="reconcile")
+        store._init_count_cache(0.0)
+        await store.add_documents([
+            DocumentChunk(id="doc_0", text="テキスト0", metadata={"source_url": "s"}),
+        ])
+        store._count = 10  # 並行書き込み等でずれた状態
+
+        assert len(await store.search("テキスト", n_results=5)) == 1
+        assert store._count == 1
+
+
 class TestAC11GetStats:
     """AC11: VectorStore.get_stats() でナレッジベースの統計情報を取得できること."""
 
@@ -256,6 +432,31 @@ class TestAC11GetStats:
         stats = ephemeral_store.get_stats()
         assert stats["total_chunks"] == 3
         assert stats["source_count"] == 2
+        assert "embedding_cache_hits" not in stats
+
+    @pytest.mark.asyncio
+    async def test_get_stats_includes_embedding_cache(
+        self, mock_embedding: MockEmbeddingProvider, tmp_path: Path
+    ) -> None:
+        """Embeddingキャッシュ使用時はヒット・ミス数を含め、再追加時は再生成しない."""
+        cached = CachedEmbedding(mock_embedding, model="mock", path=tmp_path / "cache.db")
+        store = VectorStore.create_ephemeral(
+            cached, collection_name=f"test_collection_{uuid.uuid4().hex[:8]}"
+        )
+        chunk = DocumentChunk(
+            id="doc1_0",
+            text="テキスト1",
+            metadata={"source_url": "https://example.com/page1", "chunk_index": 0},
+        )
+        await store.add_documents([chunk])
+        await store.add_documents([chunk])
+
+        stats = store.get_stats()
+        assert mock_embedding._call_count == 1
+        assert stats["embedding_cache_hits"] == 1
+        assert stats["embedding_cache_misses"] == 1
+        assert stats["embedding_cache_entries"] == 1
+        cached.close()
 
 
 class TestVectorStoreDataClasses:
@@ -284,6 +485,196 @@ class TestVectorStoreDataClasses:
         assert result.distance == 0.5
 
 
+class TestHnswParams:
+    """HNSWパラメータの適用・再構築のテスト."""
+
+    def test_metadata_round_trip(self) -> None:
+        """メタデータに変換して復元でき、未指定の項目はChromaDBのデフォルト値になる."""
+        params = HnswParams(m=32, construction_ef=200, search_ef=50)
+
+        assert HnswParams.from_metadata(params.to_metadata()) == params
+        assert HnswParams.from_metadata({"hnsw:space": "cosine"}) == HnswParams()
+        assert "hnsw:batch_size" not in params.to_metadata(persistent=False)
+
+    @pytest.mark.asyncio
+    async def test_rebuild_applies_new_params(
+        self, tmp_path: Path, mock_embedding: MockEmbeddingProvider
+    ) -> None:
+        """既存のコレクションはパラメータ変更を検知し、再構築で全チャンクを引き継ぐ."""
+        store = VectorStore(mock_embedding, persist_directory=str(tmp_path))
+        await store.add_documents([
+            DocumentChunk(id=f"doc_{i}", text=f"テキスト{i}", metadata={"source_url": "s"})
+            for i in range(5)
+        ])
+        assert not store.hnsw_outdated
+
+        params = HnswParams(m=8, search_ef=20)
+        reopened = VectorStore(mock_embedding, persist_directory=str(tmp_path), hnsw=params)
+        assert reopened.hnsw_outdated
+
+        assert await reopened.rebuild_index(batch_size=2) == 5
+
+        assert not reopened.hnsw_outdated
+        assert reopened.get_texts(["doc_4"]) == {"doc_4": "テキスト4"}
+        assert len(await reopened.search("テキスト", n_results=10)) == 5
+        after = VectorStore(mock_embedding, persist_directory=str(tmp_path), hnsw=params)
+        assert not after.hnsw_outdated
+        assert after.get_stats(count_sources=False)["total_chunks"] == 5
+
+    @pytest.mark.asyncio
+    async def test_interrupted_rebuild_is_recovered(
+        self, tmp_path: Path, mock_embedding: MockEmbeddingProvider
+    ) -> None:
+        """元のコレクション削除後に中断した再構築は、次回の起動時にコピー先を引き継ぐ."""
+        store = VectorStore(mock_embedding, persist_directory=str(tmp_path))
+        await store.add_documents([
+            DocumentChunk(id="doc_0", text="テキスト0", metadata={"source_url": "s"}),
+        ])
+        copy = VectorStore(
+            mock_embedding, persist_directory=str(tmp_path), collection_name="knowledge__rebuild"
+        )
+        await store.copy_to(copy)
+        store._client.delete_collection("knowledge")
+
+        recovered = VectorStore(mock_embedding, persist_directory=str(tmp_path))
+
+        assert recovered.get_texts(["doc_0"]) == {"doc_0": "テキスト0"}
+        assert "knowledge__rebuild" not in recovered._client.list_collections()
+
+    @pytest.mark.asyncio
+    async def test_rebuild_requires_chroma_backend(
+        self, tmp_path: Path, mock_embedding: MockEmbeddingProvider
+    ) -> None:
+        """フラットベクトルバックエンドでは再構築できない."""
+        store = VectorStore(mock_embedding, flat_dir=tmp_path)
+
+        with pytest.raises(ValueError, match="ChromaDB"):
+            await store.rebuild_index()
+
+
+def _open_store(
+    tmp_path: Path, provider: EmbeddingProvider, model: str, flat: bool = False
+) -> VectorStore:
+    return VectorStore(
+        provider,
+        persist_directory=str(tmp_path),
+        flat_dir=tmp_path / "flat" if flat else None,
+        embedding_model=model,
+    )
+
+
+def _chunks(*indexes: int) -> list[DocumentChunk]:
+    return [
+        DocumentChunk(id=f"doc_{i}", text=f"テキスト{i}", metadata={"source_url": "s"})
+        for i in indexes
+    ]
+
+
+class TestReembedding:
+    """Embeddingモデル変更時の再Embeddingのテスト."""
+
+    @pytest.mark.asyncio
+    async def test_legacy_collection_adopts_current_model(self, tmp_path: Path) -> None:
+        """記録の無いコレクションは現在のモデルを記録し、cosine距離のまま検索できる."""
+        store = VectorStore(MockEmbeddingProvider(), persist_directory=str(tmp_path))
+        await store.add_documents(_chunks(0))
+
+        reopened = _open_store(tmp_path, MockEmbeddingProvider(), "local:a")
+
+        assert not reopened.embedding_outdated
+        assert reopened._collection.metadata is not None
+        assert reopened._collection.metadata["embedding:model"] == "local:a"
+        assert reopened._collection.metadata["embedding:dimension"] == 3
+        results = await reopened.search("テキスト10")
+        assert results[0].distance < 0.01
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("flat", [False, True])
+    async def test_reembed_switches_after_completion(self, tmp_path: Path, flat: bool) -> None:
+        """切り替えまでは元のモデルで検索し、並行した書き込みも反映して切り替える."""
+        old, new = MockEmbeddingProvider(dimension=3), MockEmbeddingProvider(dimension=4)
+        store = _open_store(tmp_path, old, "local:old", flat)
+        await store.add_documents(_chunks(0, 1, 2, 3, 4))
+
+        reopened = _open_store(tmp_path, new, "local:new", flat)
+        assert reopened.embedding_outdated
+        assert reopened.stored_embedding_model == "local:old"
+        reopened.begin_reembedding(old)
+
+        # 元のコレクション（3次元）を元のモデルで検索する
+        assert len(await reopened.search("テキスト", n_results=10)) == 5
+        await reopened.add_documents(_chunks(5))
+        await reopened.delete_documents(["doc_0"])
+        progress: list[tuple[int, int]] = []
+        embedded = await reopened.reembed(
+            batch_size=2,
+            progress=lambda done, total: progress.append((done, total)),
+            retire_delay_sec=0,
+        )
+
+        assert embedded == 4  # doc_5 は書き込み時に再Embedding先へ反映済み
+        assert progress[-1] == (5, 5)
+        assert not reopened.embedding_outdated
+        assert len(await reopened.search("テキスト", n_results=10)) == 5
+        assert reopened.get_texts(["doc_0", "doc_5"]) == {"doc_5": "テキスト5"}
+        after = _open_store(tmp_path, new, "local:new", flat)
+        assert not after.embedding_outdated
+        assert after._collection.metadata is not None
+        assert after._collection.metadata["embedding:dimension"] == 4
+        assert after._collection_names() == {"knowledge"}
+        assert after.get_stats(count_sources=False)["total_chunks"] == 5
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("flat", [False, True])
+    async def test_interrupted_switch_is_recovered(self, tmp_path: Path, flat: bool) -> None:
+        """元のコレクションを退避した後に中断した切り替えは、次回の起動時に完了させる."""
+        old, new = MockEmbeddingProvider(dimension=3), MockEmbeddingProvider(dimension=4)
+        store = _open_store(tmp_path, old, "local:old", flat)
+        await store.add_documents(_chunks(0, 1))
+        reopened = _open_store(tmp_path, new, "local:new", flat)
+        reopened.begin_reembedding(old)
+        await reopened._reembed_pass(batch_size=10, progress=None)
+        reopened._rename_stored("knowledge", "knowledge__retired")
+
+        recovered = _open_store(tmp_path, new, "local:new", flat)
+
+        assert not recovered.embedding_outdated
+        assert recovered._collection_names() == {"knowledge"}
+        assert recovered.get_texts(["doc_0", "doc_1"]) == {
+            "doc_0": "テキスト0",
+            "doc_1": "テキスト1",
+        }
+
+    @pytest.mark.asyncio
+    async def test_upsert_embedded_writes_both_collections(self, tmp_path: Path) -> None:
+        """再Embedding中にEmbeddingしたチャンクは、元のコレクションと再Embedding先の両方に保存する."""
+        old, new = MockEmbeddingProvider(dimension=3), MockEmbeddingProvider(dimension=4)
+        store = _open_store(tmp_path, old, "local:old")
+        await store.add_documents(_chunks(0))
+        reopened = _open_store(tmp_path, new, "local:new")
+        reopened.begin_reembedding(old)
+
+        embedded = await reopened.embed_documents(_chunks(1))
+        await reopened.upsert_embedded(embedded)
+
+        assert embedded.previous_embeddings is not None
+        assert len(embedded.previous_embeddings[0]) == 3
+        assert len(embedded.embeddings[0]) == 4
+        assert len(await reopened.search("テキスト", n_results=10)) == 2
+        assert await reopened.reembed(retire_delay_sec=0) == 1
+        assert len(await reopened.search("テキスト", n_results=10)) == 2
+
+    @pytest.mark.asyncio
+    async def test_reembedding_requires_model_change(self, tmp_path: Path) -> None:
+        """モデルが変わっていない場合・開始前は再Embeddingできない."""
+        store = _open_store(tmp_path, MockEmbeddingProvider(), "local:a")
+
+        with pytest.raises(ValueError, match="up to date"):
+            store.begin_reembedding(MockEmbeddingProvider())
+        with pytest.raises(ValueError, match="not been started"):
+            await store.reembed()
+
+
 class TestVectorStoreFactory:
     """VectorStoreのファクトリメソッドのテスト."""
 
@@ -438,3 +829,84 @@ class TestAC38SimilarityThreshold:
             if "Similarity threshold filtering" in r.message
         ]
         assert len(threshold_logs) > 0, "閾値フィルタリングのログが出力されていない"
+
+
+class TestIterDocuments:
+    """iter_documents() によるストリーミング取得のテスト."""
+
+    @pytest.mark.asyncio
+    async def test_iter_documents_yields_all_chunks_in_batches(
+        self,
+        ephemeral_store: VectorStore,
+    ) -> None:
+        """全チャンクがバッチ単位で (id, text, source_url) として取得される."""
+        chunks = [
+            DocumentChunk(
+                id=f"doc_{i}",
+                text=f"テキスト{i}",
+                metadata={"source_url": f"https://example.com/{i % 2}", "chunk_index": i},
+            )
+            for i in range(5)
+        ]
+        await ephemeral_store.add_documents(chunks)
+
+        batches = [batch async for batch in ephemeral_store.iter_documents(batch_size=2)]
+
+        assert [len(batch) for batch in batches] == [2, 2, 1]
+        collected = {doc_id: (text, url) for batch in batches for doc_id, text, url in batch}
+        assert collected["doc_3"] == ("テキスト3", "https://example.com/1")
+        assert len(collected) == 5
+
+    @pytest.mark.asyncio
+    async def test_iter_documents_empty_collection(
+        self,
+        ephemeral_store: VectorStore,
+    ) -> None:
+        """空のコレクションでは何も返さない."""
+        batches = [batch async for batch in ephemeral_store.iter_documents()]
+        assert batches == []
+
+    @pytest.mark.asyncio
+    async def test_get_document_ids_reads_all_batches(
+        self,
+        ephemeral_store: VectorStore,
+    ) -> None:
+        """全チャンクのIDをバッチ単位で取得する."""
+        chunks = [
+            DocumentChunk(
+                id=f"doc_{i}",
+                text=f"テキスト{i}",
+                metadata={"source_url": "https://example.com/", "chunk_index": i},
+            )
+            for i in range(5)
+        ]
+        await ephemeral_store.add_documents(chunks)
+
+        doc_ids = await ephemeral_store.get_document_ids(batch_size=2)
+
+        assert doc_ids == {f"doc_{i}" for i in range(5)}
+
+
+class TestGetTexts:
+    """get_texts() によるID指定の本文取得のテスト."""
+
+    @pytest.mark.asyncio
+    async def test_get_texts_returns_requested_chunks(
+        self,
+        ephemeral_store: VectorStore,
+    ) -> None:
+        """指定したIDの本文のみを返し、存在しないIDは含まない."""
+        chunks = [
+            DocumentChunk(
+                id=f"doc_{i}",
+                text=f"テキスト{i}",
+                metadata={"source_url": "https://example.com/", "chunk_index": i},
+            )
+            for i in range(3)
+        ]
+        await ephemeral_store.add_documents(chunks)
+
+        texts = ephemeral_store.get_texts(["doc_2", "doc_0", "missing"])
+
+        assert texts == {"doc_2": "テキスト2", "doc_0": "テキスト0"}
+        assert ephemeral_store.get_texts([]) == {}
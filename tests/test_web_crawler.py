@@ -10,6 +10,7 @@ from unittest.mock import AsyncMock, patch
 
 import pytest
 
+from src.rag.parse_pool import ParsePool
 from src.services.web_crawler import CrawledPage, WebCrawler
 
 
@@ -433,6 +434,25 @@ class TestWebCrawlerCrawlPage:
         assert "これは記事の本文です" in page.text
         assert page.crawled_at  # ISO 8601 形式のタイムスタンプ
 
+    @pytest.mark.asyncio
+    async def test_crawl_page_extracts_text_in_parse_pool(self) -> None:
+        """ParsePool指定時は本文抽出をプロセスプールに依頼すること."""
+        parse_pool = ParsePool(max_workers=2, html_parser="html.parser")
+        crawler = WebCrawler(parse_pool=parse_pool)
+
+        try:
+            with patch(
+                "src.services.web_crawler.aiohttp.ClientSession",
+                return_value=MockClientSession(200, SAMPLE_HTML_WITH_ARTICLE),
+            ):
+                page = await crawler.crawl_page("https://example.com/article/1")
+        finally:
+            parse_pool.shutdown()
+
+        assert page is not None
+        assert (page.title, page.text) == crawler._extract_text(SAMPLE_HTML_WITH_ARTICLE)
+        assert "これは記事の本文です" in page.text
+
     @pytest.mark.asyncio
     async def test_crawl_page_returns_none_on_http_error(self) -> None:
         """HTTPエラー時に None を返すこと."""
@@ -562,10 +582,11 @@ class TestWebCrawlerCrawlPages:
         """AC35: 同一ドメインへの連続リクエスト間に crawl_delay の待機が挿入されること."""
         crawler = WebCrawler(crawl_delay=0.1)
 
+        # DNS解決の所要時間で待機が不要になることがないよう、SSRF検証のDNS解決を省略する
         with patch(
             "src.services.web_crawler.aiohttp.ClientSession",
             return_value=MockClientSession(200, SAMPLE_HTML_WITH_ARTICLE),
-        ):
+        ), patch.object(crawler, "_validate_hostname_not_private"):
             with patch(
                 "src.services.web_crawler.asyncio.sleep", new_callable=AsyncMock
             ) as mock_sleep: